@@ -8,19 +8,69 @@ import numpy as np
 from math import radians, cos, sin, sqrt
 from enum import Enum
 from core.ecs import Entity
+from util.geometry import extract_frustum_planes
 from util.quaternion import Quaternion
 
 
+# 渲染所有层的剔除掩码 (GameObject.layer取值0~31)
+ALL_LAYERS = 0xFFFFFFFF
+
+
+def layer_mask(*layers):
+    """由层编号生成剔除掩码，如 layer_mask(0, 5)"""
+    mask = 0
+    for layer in layers:
+        mask |= 1 << layer
+    return mask
+
+
 class ProjectionType(Enum):
     PERSPECTIVE = 0
     ORTHOGRAPHIC = 1
 
 
+def _camera_property(name, view=False, projection=False, orientation=False):
+    """
+    生成相机输入属性: 值真正改变时才标记对应矩阵为脏并递增版本号
+    Args:
+        view: 影响视图矩阵
+        projection: 影响投影矩阵
+        orientation: 需要由pitch/yaw重新推导方向向量
+    """
+    attr = '_' + name
+
+    def getter(self):
+        return getattr(self, attr)
+
+    def setter(self, value):
+        if hasattr(self, attr) and getattr(self, attr) == value:
+            return
+        setattr(self, attr, value)
+        if orientation:
+            self._orientation_dirty = True
+        if view:
+            self._mark_view_dirty()
+        if projection:
+            self._mark_projection_dirty()
+
+    return property(getter, setter)
+
+
 class Camera(Entity):
     """
     Camera实体 - 自包含相机功能
     参考Unity Camera的设计，直接在Entity中实现相机逻辑
+    视图和投影矩阵分别维护版本号 (view_version / projection_version)，
+    输入属性改变时递增，矩阵及其派生数据在下次访问时才重新计算
     """
+
+    fov = _camera_property('fov', projection=True)
+    aspect_ratio = _camera_property('aspect_ratio', projection=True)
+    near_clip = _camera_property('near_clip', projection=True)
+    far_clip = _camera_property('far_clip', projection=True)
+    projection_type = _camera_property('projection_type', projection=True)
+    pitch = _camera_property('pitch', view=True, orientation=True)  # 俯仰角
+    yaw = _camera_property('yaw', view=True, orientation=True)  # 偏航角
     
     def __init__(self, entity_id=None, 
                  position=np.array([0.0, 0.0, 3.0]),
@@ -29,8 +79,27 @@ class Camera(Entity):
                  aspect_ratio=800/600,
                  near_clip=0.1,
                  far_clip=100.0,
-                 projection_type=ProjectionType.PERSPECTIVE):
+                 projection_type=ProjectionType.PERSPECTIVE,
+                 viewport_rect=(0.0, 0.0, 1.0, 1.0),
+                 priority=0,
+                 culling_mask=ALL_LAYERS,
+                 render_target=None):
         super().__init__(entity_id)
+
+        # 版本号与脏标记
+        self.view_version = 0
+        self.projection_version = 0
+        self._view_dirty = True
+        self._projection_dirty = True
+        self._orientation_dirty = True
+        self._view_matrix = None
+        self._projection_matrix = None
+
+        # 由视图投影矩阵派生的缓存，按 (view_version, projection_version) 失效
+        self._derived_versions = None
+        self._view_projection_matrix = None
+        self._inverse_view_projection_matrix = None
+        self._frustum_planes = None
         
         # 相机基本属性
         self.position = position
@@ -39,6 +108,15 @@ class Camera(Entity):
         self.near_clip = near_clip
         self.far_clip = far_clip
         self.projection_type = projection_type
+
+        # 多相机渲染 (参考Unity Camera.rect / depth / cullingMask / targetTexture)
+        self.enabled = True
+        self.viewport_rect = tuple(viewport_rect)  # 归一化视口 (x, y, width, height)，原点在左下角
+        self.priority = priority  # 渲染顺序，小的先渲染
+        self.culling_mask = culling_mask  # 只渲染 (1 << layer) & culling_mask 不为0的物体
+        self.render_target = render_target  # 渲染目标纹理，为None时渲染到窗口
+        self.clear_color = (0.0, 0.0, 0.0, 1.0)  # 为None时只清除深度 (叠加在先渲染的相机之上)
+        self.use_occlusion_culling = True
         
         # 相机旋转
         self.pitch = 0.0  # 俯仰角
@@ -46,33 +124,69 @@ class Camera(Entity):
         
         # 四元数旋转
         if rotation is None:
-            self.rotation = Quaternion.from_euler_angles(self.pitch, self.yaw, 0.0)
+            self._rotation = Quaternion.from_euler_angles(self.pitch, self.yaw, 0.0)
         else:
-            self.rotation = rotation.normalized()
+            self._rotation = rotation.normalized()
         
         # 方向向量
         self.front = np.array([0.0, 0.0, -1.0])
         self.right = np.array([1.0, 0.0, 0.0])
         self.up = np.array([0.0, 1.0, 0.0])
         
-        # 矩阵
-        self.view_matrix = None
-        self.projection_matrix = None
-        
-        # 脏标记
-        self.is_dirty = True
-        
         # 初始化
         self.update_direction_vectors()
         self.calculate_projection_matrix()
         self.calculate_view_matrix()
-    
-    def __setattr__(self, key, value):
-        """当相机属性变化时标记为脏"""
-        if hasattr(self, 'is_dirty') and key in ['position', 'rotation', 'fov', 'aspect_ratio', 
-                                                 'near_clip', 'far_clip', 'projection_type', 'pitch', 'yaw']:
-            self.is_dirty = True
-        super(Camera, self).__setattr__(key, value)
+
+    # ============ 输入属性与脏标记 ============
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        # camera.position += offset 会先原地修改数组再赋值回来，此时无法比较新旧值
+        if hasattr(self, '_position') and value is not self._position \
+                and np.array_equal(self._position, value):
+            return
+        # 复制一份，避免与调用方共享数组
+        self._position = np.array(value, dtype=np.float64)
+        self._mark_view_dirty()
+
+    @property
+    def rotation(self):
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        self._rotation = value
+        self._orientation_dirty = True
+        self._mark_view_dirty()
+
+    @property
+    def is_dirty(self):
+        """视图或投影矩阵是否等待重新计算"""
+        return self._view_dirty or self._projection_dirty
+
+    @is_dirty.setter
+    def is_dirty(self, value):
+        # 兼容旧接口: 原地修改position等数组后可以手动置为True强制更新
+        if value:
+            self.mark_dirty()
+
+    def mark_dirty(self):
+        """强制在下次访问时重新计算视图和投影矩阵"""
+        self._mark_view_dirty()
+        self._mark_projection_dirty()
+
+    def _mark_view_dirty(self):
+        self._view_dirty = True
+        self.view_version += 1
+
+    def _mark_projection_dirty(self):
+        self._projection_dirty = True
+        self.projection_version += 1
     
     # ============ 方向向量更新 ============
     
@@ -92,14 +206,29 @@ class Camera(Entity):
         # 计算上向量
         self.up = self.normalize(np.cross(self.right, self.front))
         
-        # 同步更新旋转四元数
-        self.rotation = Quaternion.from_euler_angles(self.pitch, self.yaw, 0.0)
+        # 同步更新旋转四元数 (内部同步，不产生新的版本)
+        self._rotation = Quaternion.from_euler_angles(self.pitch, self.yaw, 0.0)
+        self._orientation_dirty = False
     
     # ============ 矩阵计算 ============
+
+    @property
+    def view_matrix(self):
+        """视图矩阵 (OpenGL列主序)，输入改变后首次访问时重新计算"""
+        if self._view_dirty:
+            self.calculate_view_matrix()
+        return self._view_matrix
+
+    @property
+    def projection_matrix(self):
+        """投影矩阵 (OpenGL列主序)，输入改变后首次访问时重新计算"""
+        if self._projection_dirty:
+            self.calculate_projection_matrix()
+        return self._projection_matrix
     
     def calculate_view_matrix(self):
         """计算视图矩阵"""
-        if self.is_dirty:
+        if self._orientation_dirty:
             self.update_direction_vectors()
         
         # 使用 LookAt 矩阵的计算方式
@@ -108,21 +237,21 @@ class Camera(Entity):
         x_axis = self.normalize(np.cross(self.up, z_axis))  # right
         y_axis = np.cross(z_axis, x_axis)  # up
         
-        self.view_matrix = np.array([
+        self._view_matrix = np.array([
             [x_axis[0], y_axis[0], z_axis[0], 0],
             [x_axis[1], y_axis[1], z_axis[1], 0],
             [x_axis[2], y_axis[2], z_axis[2], 0],
             [-np.dot(x_axis, self.position), -np.dot(y_axis, self.position), -np.dot(z_axis, self.position), 1]
         ])
         
-        self.is_dirty = False
+        self._view_dirty = False
     
     def calculate_projection_matrix(self):
         """计算投影矩阵"""
         tan_half_fov = np.tan(np.radians(self.fov) / 2)
         
         if self.projection_type == ProjectionType.PERSPECTIVE:
-            self.projection_matrix = np.array([
+            self._projection_matrix = np.array([
                 [1 / (tan_half_fov * self.aspect_ratio), 0, 0, 0],
                 [0, 1 / tan_half_fov, 0, 0],
                 [0, 0, -(self.far_clip + self.near_clip) / (self.far_clip - self.near_clip), -1],
@@ -133,14 +262,17 @@ class Camera(Entity):
             left, right = -10.0, 10.0
             bottom, top = -10.0, 10.0
             near, far = self.near_clip, self.far_clip
-            self.projection_matrix = np.array([
+            # 与透视投影一致，按OpenGL列主序存储 (转置)
+            self._projection_matrix = np.array([
                 [2.0 / (right - left), 0, 0, -(right + left) / (right - left)],
                 [0, 2.0 / (top - bottom), 0, -(top + bottom) / (top - bottom)],
                 [0, 0, -2.0 / (far - near), -(far + near) / (far - near)],
                 [0, 0, 0, 1.0]
-            ])
+            ]).T
         else:
             raise ValueError(f"Unknown projection type: {self.projection_type}")
+
+        self._projection_dirty = False
     
     # ============ 相机控制方法 ============
     
@@ -160,8 +292,6 @@ class Camera(Entity):
         
         # 转换为四元数
         self.rotation = self._matrix_to_quaternion(rotation_matrix).normalized()
-        self.is_dirty = True
-        self.calculate_view_matrix()
     
     def rotate_by_quaternion(self, quat):
         """使用四元数旋转相机"""
@@ -184,8 +314,6 @@ class Camera(Entity):
         self.front = np.array(self.rotation.rotate_vector([0, 0, -1]), dtype=np.float32)
         self.right = np.array(self.rotation.rotate_vector([1, 0, 0]), dtype=np.float32)
         self.up = np.array(self.rotation.rotate_vector([0, 1, 0]), dtype=np.float32)
-        
-        self.is_dirty = True
     
     # ============ 工具方法 ============
     
@@ -232,25 +360,71 @@ class Camera(Entity):
     
     def get_view_matrix(self):
         """获取视图矩阵（自动更新）"""
-        if self.is_dirty:
-            self.calculate_view_matrix()
         return self.view_matrix
     
     def get_projection_matrix(self):
-        """获取投影矩阵"""
+        """获取投影矩阵（自动更新）"""
         return self.projection_matrix
+
+    def _update_derived(self):
+        """视图或投影版本变化后使派生缓存失效"""
+        versions = (self.view_version, self.projection_version)
+        if versions != self._derived_versions:
+            self._view_projection_matrix = np.dot(self.projection_matrix.T, self.view_matrix.T)
+            self._inverse_view_projection_matrix = None
+            self._frustum_planes = None
+            self._derived_versions = versions
+    
+    def get_view_projection_matrix(self):
+        """
+        获取视图投影矩阵 (列向量约定，供CPU端剔除等计算使用)
+        view_matrix和projection_matrix按OpenGL列主序存储，这里转置回数学形式
+        返回的是缓存数组，调用方不要修改
+        """
+        self._update_derived()
+        return self._view_projection_matrix
+
+    def get_inverse_view_projection_matrix(self):
+        """获取视图投影矩阵的逆 (缓存)"""
+        self._update_derived()
+        if self._inverse_view_projection_matrix is None:
+            self._inverse_view_projection_matrix = np.linalg.inv(self._view_projection_matrix)
+        return self._inverse_view_projection_matrix
+
+    def get_frustum_planes(self):
+        """获取世界空间的6个视锥平面 (缓存)"""
+        self._update_derived()
+        if self._frustum_planes is None:
+            self._frustum_planes = extract_frustum_planes(self._view_projection_matrix)
+        return self._frustum_planes
+
+    def screen_point_to_ray(self, x, y, width, height):
+        """
+        把屏幕坐标转换为世界空间射线 (参考Unity Camera.ScreenPointToRay)
+        Args:
+            x, y: 屏幕坐标 (像素，原点在左上角)
+            width, height: 屏幕尺寸 (像素)
+        Returns:
+            (origin, direction) 射线起点位于近裁剪面，direction为单位向量
+        """
+        ndc_x = 2.0 * x / width - 1.0
+        ndc_y = 1.0 - 2.0 * y / height
+        inverse = self.get_inverse_view_projection_matrix()
+
+        near = np.dot(inverse, [ndc_x, ndc_y, -1.0, 1.0])
+        far = np.dot(inverse, [ndc_x, ndc_y, 1.0, 1.0])
+        near = near[:3] / near[3]
+        far = far[:3] / far[3]
+        return near, self.normalize(far - near)
     
     def set_aspect_ratio(self, width, height):
         """设置宽高比"""
         self.aspect_ratio = width / height
-        self.calculate_projection_matrix()
     
     def set_fov(self, fov):
         """设置视场角"""
         self.fov = fov
-        self.calculate_projection_matrix()
     
     def move(self, direction, distance):
         """沿指定方向移动"""
-        self.position += direction * distance
-        self.is_dirty = True
+        self.position = self.position + direction * distance
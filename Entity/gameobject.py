@@ -4,14 +4,29 @@ from core.ecs import Entity
 
 
 class GameObject(Entity):
+    layer_version = 0  # 任意GameObject的layer变化时递增 (渲染代理据此重新读取层号)
+
     def __init__(self, entity_id=None, name=None):
         super().__init__(entity_id)
         self.name = name if name is not None else f"GameObject_{self.entity_id}"
+        self._layer = 0  # 所在层 (0~31)，与Camera.culling_mask配合决定哪些相机渲染该物体
+        self.is_static = False  # 静态物体参与静态合批 (RenderSystem.build_static_batches)，合批后不应再移动
         
         # 添加Transform组件
         trans = Transform()
         self.add_component(trans)
 
+    @property
+    def layer(self):
+        """所在层 (0~31)"""
+        return self._layer
+
+    @layer.setter
+    def layer(self, value):
+        if value != self._layer:
+            self._layer = value
+            GameObject.layer_version += 1
+
     # ============ Python风格的Transform访问 ============
     
     @property
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+BlendShapeWeights组件 - 参考Unity SkinnedMeshRenderer的BlendShape权重
+每个Entity独立保存形变权重，共享的Mesh只存储稀疏的形变目标
+权重限制在[-1, 1]内，Mesh的包围体按此范围覆盖所有目标叠加后的顶点 (剔除不会裁掉可见的形变)
+"""
+import numpy as np
+from core.ecs import Component
+
+
+class BlendShapeWeights(Component):
+    def __init__(self, weights=None):
+        super().__init__()
+        self.weights = np.zeros(0, dtype=np.float32) if weights is None else \
+            np.clip(np.array(weights, dtype=np.float32), -1.0, 1.0)
+
+        # 混合后的Mesh (由BlendShapeSystem生成，渲染时替代原始Mesh)
+        self.deformed_mesh = None
+
+        # 权重变化后需要重新混合
+        self.is_dirty = True
+
+    def ensure_count(self, count):
+        """保证权重数组长度覆盖count个形变目标 (新增的权重为0，不会缩短)"""
+        if len(self.weights) < count:
+            self.weights = np.concatenate([self.weights, np.zeros(count - len(self.weights), dtype=np.float32)])
+
+    def _resolve_index(self, name_or_index):
+        """把形变目标名称解析为索引 (需要Entity上有Mesh)"""
+        if isinstance(name_or_index, str):
+            from components.mesh import Mesh
+            mesh = self.owner.get_component(Mesh) if self.owner is not None else None
+            index = mesh.get_blend_shape_index(name_or_index) if mesh is not None else -1
+            if index < 0:
+                raise KeyError(f"BlendShape '{name_or_index}' not found")
+            return index
+        return int(name_or_index)
+
+    def set_weight(self, name_or_index, value):
+        """设置形变目标权重 (可通过名称或索引)，限制在[-1, 1]内"""
+        index = self._resolve_index(name_or_index)
+        value = min(max(float(value), -1.0), 1.0)
+        self.ensure_count(index + 1)
+        if self.weights[index] != value:
+            self.weights[index] = value
+            self.is_dirty = True
+
+    def get_weight(self, name_or_index):
+        """获取形变目标权重"""
+        index = self._resolve_index(name_or_index)
+        return float(self.weights[index]) if index < len(self.weights) else 0.0
+
+    def set_weights(self, weights):
+        """一次性设置全部权重 (适合动画曲线批量驱动)，限制在[-1, 1]内"""
+        weights = np.clip(np.asarray(weights, dtype=np.float32), -1.0, 1.0)
+        if weights.shape != self.weights.shape or not np.array_equal(weights, self.weights):
+            self.weights = weights.copy()
+            self.is_dirty = True
+
+    # ============ Unity风格别名 (兼容性接口) ============
+
+    def SetBlendShapeWeight(self, index, value):
+        """Unity风格别名"""
+        return self.set_weight(index, value)
+
+    def GetBlendShapeWeight(self, index):
+        """Unity风格别名"""
+        return self.get_weight(index)
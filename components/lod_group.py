@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+LODGroup组件 - 多级细节 (参考Unity LODGroup)
+每一级包含一个Mesh和屏幕相对高度阈值：物体在屏幕上的高度占比
+不小于阈值时使用该级别，小于最后一级阈值时整体剔除
+"""
+import numpy as np
+from core.ecs import Component
+
+
+class LODLevel(object):
+    def __init__(self, mesh, screen_relative_height):
+        """
+        Args:
+            mesh: 该级别使用的Mesh
+            screen_relative_height: 切换阈值 (0~1，物体高度 / 屏幕高度)
+        """
+        self.mesh = mesh
+        self.screen_relative_height = float(screen_relative_height)
+
+
+class LODGroup(Component):
+    CULLED = -1  # current_level为该值表示已被剔除
+
+    def __init__(self, levels=None, hysteresis=0.1):
+        """
+        Args:
+            levels: [(mesh, screen_relative_height), ...] 从最精细到最粗糙，阈值递减
+            hysteresis: 切换阈值的相对滞后量，避免在阈值附近来回切换
+        """
+        super().__init__()
+        self.levels = []
+        self.hysteresis = hysteresis
+        self.current_level = 0
+        self._thresholds = np.zeros(0, dtype=np.float32)
+        for mesh, screen_relative_height in (levels or []):
+            self.add_level(mesh, screen_relative_height)
+
+    def add_level(self, mesh, screen_relative_height):
+        """追加一个更粗糙的级别，阈值必须小于上一级"""
+        if self.levels and screen_relative_height >= self.levels[-1].screen_relative_height:
+            raise ValueError("LOD thresholds must be strictly decreasing")
+        self.levels.append(LODLevel(mesh, screen_relative_height))
+        self._thresholds = np.array([level.screen_relative_height for level in self.levels], dtype=np.float32)
+
+    @property
+    def level_count(self):
+        return len(self.levels)
+
+    @property
+    def thresholds(self):
+        """各级阈值数组 (递减)"""
+        return self._thresholds
+
+    @property
+    def bounds_mesh(self):
+        """用于包围体计算的Mesh (最精细级别)"""
+        return self.levels[0].mesh if self.levels else None
+
+    @property
+    def current_mesh(self):
+        """当前级别的Mesh，被剔除时为None"""
+        if self.current_level == LODGroup.CULLED or not self.levels:
+            return None
+        return self.levels[self.current_level].mesh
+
+
+def select_lod_levels(screen_heights, thresholds, current_levels, hysteresis):
+    """
+    批量选择LOD级别
+    阈值在当前级别之上的边界需要超过 t·(1+h) 才切换到更精细的级别，
+    当前级别及以下的边界需要低于 t·(1-h) 才切换到更粗糙的级别
+    Args:
+        screen_heights: (N,) 屏幕相对高度
+        thresholds: (N, L) 各物体的阈值 (递减，不足L级的用-inf填充)
+        current_levels: (N,) 当前级别 (已剔除的为级别数量)
+        hysteresis: (N,) 或标量，相对滞后量
+    Returns:
+        (N,) 新级别，等于该物体级别数量时表示剔除
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float32)
+    columns = np.arange(thresholds.shape[1])
+    hysteresis = np.asarray(hysteresis, dtype=np.float32).reshape(-1, 1)
+    scale = np.where(columns[np.newaxis, :] < np.asarray(current_levels)[:, np.newaxis],
+                     1.0 + hysteresis, 1.0 - hysteresis)
+    effective = thresholds * scale
+    return np.sum(np.asarray(screen_heights)[:, np.newaxis] < effective, axis=1)
@@ -6,7 +6,15 @@ from core.ecs import Component
 
 
 class Material(Component):
-    def __init__(self, shader=None):
+    # 渲染队列 (参考Unity Material.renderQueue)，大于2500的按半透明由远到近绘制
+    RENDER_QUEUE_BACKGROUND = 1000
+    RENDER_QUEUE_GEOMETRY = 2000
+    RENDER_QUEUE_ALPHA_TEST = 2450
+    RENDER_QUEUE_TRANSPARENT = 3000
+    RENDER_QUEUE_OVERLAY = 4000
+
+    def __init__(self, shader=None, render_queue=RENDER_QUEUE_GEOMETRY):
         super().__init__()
         self.shader = shader
         self.properties = {}
+        self.render_queue = render_queue
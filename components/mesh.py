@@ -3,6 +3,31 @@ import numpy as np
 from core.ecs import Component
 
 
+class BlendShape(object):
+    """
+    形变目标 (Morph Target) - 参考Unity Mesh的BlendShape
+    稀疏存储：只记录被移动的顶点索引及其位置/法线增量
+    """
+
+    def __init__(self, name, indices, position_deltas, normal_deltas=None):
+        self.name = name
+        self.indices = np.asarray(indices, dtype=np.intp).reshape(-1)
+        self.position_deltas = np.asarray(position_deltas, dtype=np.float32).reshape(-1, 3)
+        self.normal_deltas = None
+        if normal_deltas is not None:
+            self.normal_deltas = np.asarray(normal_deltas, dtype=np.float32).reshape(-1, 3)
+
+        if len(self.indices) != len(self.position_deltas):
+            raise ValueError(f"BlendShape '{name}': indices and position_deltas length mismatch")
+        if self.normal_deltas is not None and len(self.normal_deltas) != len(self.indices):
+            raise ValueError(f"BlendShape '{name}': indices and normal_deltas length mismatch")
+
+    @property
+    def vertex_count(self):
+        """该形变目标影响的顶点数量"""
+        return len(self.indices)
+
+
 class Mesh(Component):
     def __init__(self, vertices, indices=None):
         super().__init__()
@@ -14,7 +39,31 @@ class Mesh(Component):
         
         # 固定的顶点格式：[x, y, z, nx, ny, nz, u, v] - 8个float
         self._stride = 8
+
+        # 形变目标 (稀疏存储)
+        self.blend_shapes = []
+        self._blend_shape_names = {}
+        # 每个顶点在形变目标作用下的可达范围: 各目标位置增量的绝对值之和 (V, 3)，没有形变目标时为None
+        self._blend_reach = None
+
+        # 局部空间包围盒和包围球 (加载时计算一次，用于剔除)
+        self.bounds_min = None
+        self.bounds_max = None
+        self.bounds_center = None
+        self.bounds_extents = None
+        self.bounding_radius = 0.0
+        self.recalculate_bounds()
+
+        # 网格簇 (util.meshlet.MeshletData)，由资源管理器按需构建，None表示整体提交
+        self.meshlets = None
+
+        # 数据版本号: 原地修改vertices/indices后调用mark_modified()，GPU缓存据此重新上传
+        self.version = 0
     
+    def mark_modified(self):
+        """标记顶点或索引数据已修改 (参考Unity Mesh.MarkModified)"""
+        self.version += 1
+
     def get_vertex_count(self):
         """获取顶点数量"""
         return len(self.vertices) // self._stride if len(self.vertices) > 0 else 0
@@ -27,6 +76,18 @@ class Mesh(Component):
             positions.extend(pos)
         return np.array(positions, dtype=np.float32)
     
+    def get_triangles(self):
+        """
+        获取三角形数据 (用于射线检测、遮挡光栅化等CPU端几何计算)
+        Returns:
+            (positions, triangles): (V, 3) 顶点位置与 (T, 3) 顶点索引；没有索引时按顶点顺序每3个组成一个三角形
+        """
+        positions = np.asarray(self.vertices, dtype=np.float32).reshape(-1, self._stride)[:, :3]
+        indices = np.asarray(self.indices, dtype=np.intp).reshape(-1)
+        if len(indices) == 0:
+            indices = np.arange(len(positions) - len(positions) % 3, dtype=np.intp)
+        return positions, indices.reshape(-1, 3)
+    
     def get_normals(self):
         """提取法线数据"""
         normals = []
@@ -54,3 +115,139 @@ class Mesh(Component):
             'uv_offset': 6,        # UV在偏移6
             'uv_size': 2           # UV 2个分量
         }
+
+    # ============ 包围体 ============
+
+    def recalculate_bounds(self):
+        """
+        根据顶点位置重新计算局部包围盒和包围球 (参考Unity Mesh.RecalculateBounds)
+        有形变目标时包含所有目标以[-1, 1]内任意权重叠加后的顶点
+        """
+        positions = np.asarray(self.vertices, dtype=np.float32).reshape(-1, self._stride)[:, 0:3]
+        reach = self._blend_reach
+        self._update_bounds(positions, reach if reach is not None and len(reach) == len(positions) else None)
+
+    def set_bounds(self, bounds_min, bounds_max):
+        """直接指定包围盒 (包围球取包围盒的外接球)"""
+        self.bounds_min = np.array(bounds_min, dtype=np.float32)
+        self.bounds_max = np.array(bounds_max, dtype=np.float32)
+        self.bounds_center = (self.bounds_min + self.bounds_max) * 0.5
+        self.bounds_extents = (self.bounds_max - self.bounds_min) * 0.5
+        self.bounding_radius = float(np.linalg.norm(self.bounds_extents))
+
+    def _update_bounds(self, positions, reach=None):
+        if len(positions) == 0:
+            self.set_bounds(np.zeros(3), np.zeros(3))
+            return
+        if reach is None:
+            self.set_bounds(positions.min(axis=0), positions.max(axis=0))
+            # 包围球以包围盒中心为球心，半径取最远顶点距离，比外接球更紧
+            self.bounding_radius = float(np.sqrt(np.max(np.sum((positions - self.bounds_center) ** 2, axis=1))))
+            return
+        self.set_bounds((positions - reach).min(axis=0), (positions + reach).max(axis=0))
+        # 顶点的可达范围是以原位置为中心、reach为半边长的盒子，到球心的距离不超过|p - c| + |reach|
+        distances = np.linalg.norm(positions - self.bounds_center, axis=1) + np.linalg.norm(reach, axis=1)
+        self.bounding_radius = min(self.bounding_radius, float(distances.max()))
+
+    # ============ 形变目标 (BlendShape) ============
+
+    @property
+    def blend_shape_count(self):
+        """形变目标数量"""
+        return len(self.blend_shapes)
+
+    def add_blend_shape(self, name, indices, position_deltas, normal_deltas=None):
+        """
+        添加稀疏形变目标
+        Args:
+            name: 形变目标名称
+            indices: 被移动的顶点索引
+            position_deltas: 对应顶点的位置增量 (N, 3)
+            normal_deltas: 对应顶点的法线增量 (N, 3)，可选
+        Returns:
+            形变目标索引
+        """
+        if name in self._blend_shape_names:
+            raise ValueError(f"BlendShape '{name}' already exists")
+        shape = BlendShape(name, indices, position_deltas, normal_deltas)
+        if len(shape.indices) > 0 and shape.indices.max() >= self.get_vertex_count():
+            raise IndexError(f"BlendShape '{name}' references vertex out of range")
+
+        self.blend_shapes.append(shape)
+        self._blend_shape_names[name] = len(self.blend_shapes) - 1
+
+        # 扩展包围体，使其覆盖多个目标叠加 (每个权重在[-1, 1]内) 后的顶点
+        if shape.vertex_count > 0:
+            if self._blend_reach is None:
+                self._blend_reach = np.zeros((self.get_vertex_count(), 3), dtype=np.float32)
+            np.add.at(self._blend_reach, shape.indices, np.abs(shape.position_deltas))
+            self.recalculate_bounds()
+        return self._blend_shape_names[name]
+
+    def add_blend_shape_from_positions(self, name, target_positions, target_normals=None, threshold=1e-6):
+        """
+        从完整的目标顶点数据创建形变目标，只保留真正被移动的顶点
+        Args:
+            target_positions: 目标位置 (vertex_count, 3)
+            target_normals: 目标法线 (vertex_count, 3)，可选
+            threshold: 小于该值的增量视为未移动
+        """
+        data = np.asarray(self.vertices, dtype=np.float32).reshape(-1, self._stride)
+        position_deltas = np.asarray(target_positions, dtype=np.float32).reshape(-1, 3) - data[:, 0:3]
+        moved = np.any(np.abs(position_deltas) > threshold, axis=1)
+
+        normal_deltas = None
+        if target_normals is not None:
+            normal_deltas = np.asarray(target_normals, dtype=np.float32).reshape(-1, 3) - data[:, 3:6]
+            moved |= np.any(np.abs(normal_deltas) > threshold, axis=1)
+
+        indices = np.nonzero(moved)[0]
+        return self.add_blend_shape(name, indices, position_deltas[indices],
+                                    normal_deltas[indices] if normal_deltas is not None else None)
+
+    def get_blend_shape_index(self, name):
+        """按名称获取形变目标索引，不存在返回-1"""
+        return self._blend_shape_names.get(name, -1)
+
+    def compute_blended_vertices(self, weights, out=None):
+        """
+        按权重混合所有形变目标，返回新的8个float格式顶点数组
+        只处理权重非零的形变目标，使用scatter-add一次性累加增量
+        Args:
+            weights: 每个形变目标的权重
+            out: 可选的输出数组 (复用内存)，形状必须与vertices相同
+        """
+        weights = np.asarray(weights, dtype=np.float32)
+        base = np.asarray(self.vertices, dtype=np.float32)
+        if out is None:
+            out = np.empty_like(base)
+        elif out.shape != base.shape:
+            raise ValueError(f"out has shape {out.shape}, expected {base.shape}")
+        np.copyto(out, base)
+
+        active = np.nonzero(weights[:len(self.blend_shapes)])[0]
+        if len(active) == 0:
+            return out
+
+        data = out.reshape(-1, self._stride)
+        positions = data[:, 0:3]
+        normals = data[:, 3:6]
+
+        # 把所有激活的形变目标拼接起来，一次scatter-add完成累加
+        shapes = [self.blend_shapes[i] for i in active]
+        indices = np.concatenate([shape.indices for shape in shapes])
+        position_deltas = np.concatenate([shape.position_deltas * weights[i] for i, shape in zip(active, shapes)])
+        np.add.at(positions, indices, position_deltas)
+
+        normal_shapes = [(i, shape) for i, shape in zip(active, shapes) if shape.normal_deltas is not None]
+        if normal_shapes:
+            normal_indices = np.concatenate([shape.indices for _, shape in normal_shapes])
+            normal_deltas = np.concatenate([shape.normal_deltas * weights[i] for i, shape in normal_shapes])
+            np.add.at(normals, normal_indices, normal_deltas)
+
+            # 只重新归一化被修改过的法线
+            touched = np.unique(normal_indices)
+            lengths = np.linalg.norm(normals[touched], axis=1, keepdims=True)
+            normals[touched] = normals[touched] / np.maximum(lengths, 1e-8)
+
+        return out
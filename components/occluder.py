@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Occluder组件 - 标记遮挡体 (参考Unity Occluder Static)
+RenderSystem的软件遮挡剔除会把所有遮挡体的代理网格光栅化到低分辨率深度缓冲，
+再用层级深度测试其余物体的包围盒
+"""
+import numpy as np
+from components.mesh import Mesh
+from core.ecs import Component
+
+
+class Occluder(Component):
+    def __init__(self, proxy_mesh=None):
+        """
+        Args:
+            proxy_mesh: 用于光栅化的简化网格 (局部空间)，为None时使用Entity自身的Mesh
+                        代理网格必须完全位于原物体内部，否则会错误地遮挡其后的物体
+        """
+        super().__init__()
+        self.proxy_mesh = proxy_mesh
+        self._cached_mesh = None
+        self._cached_triangles = None
+
+    def get_mesh(self):
+        """用于光栅化的网格"""
+        if self.proxy_mesh is not None:
+            return self.proxy_mesh
+        if self.owner is None:
+            return None
+        return self.owner.get_component(Mesh)
+
+    def get_local_triangles(self):
+        """
+        获取局部空间的三角形顶点
+        Returns:
+            (T, 3, 4) 齐次坐标 (w=1)，没有可用网格时返回None
+        """
+        mesh = self.get_mesh()
+        if mesh is None:
+            return None
+        if mesh is not self._cached_mesh:
+            positions, triangles = mesh.get_triangles()
+            homogeneous = np.ones((len(positions), 4), dtype=np.float32)
+            homogeneous[:, :3] = positions
+            self._cached_triangles = homogeneous[triangles]
+            self._cached_mesh = mesh
+        return self._cached_triangles
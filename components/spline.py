@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Spline资源 - 路径曲线
+支持Catmull-Rom和三次Bezier曲线，创建时预计算弧长查找表，
+之后按距离采样只需一次np.interp，可被大量SplineFollower共享
+"""
+import numpy as np
+from enum import Enum
+
+
+class SplineType(Enum):
+    CATMULL_ROM = 0
+    BEZIER = 1
+
+
+# 三次曲线的基矩阵：每段曲线 P(t) = [1, t, t², t³] · M · [P0, P1, P2, P3]
+CATMULL_ROM_BASIS = 0.5 * np.array([
+    [0.0, 2.0, 0.0, 0.0],
+    [-1.0, 0.0, 1.0, 0.0],
+    [2.0, -5.0, 4.0, -1.0],
+    [-1.0, 3.0, -3.0, 1.0],
+], dtype=np.float64)
+
+BEZIER_BASIS = np.array([
+    [1.0, 0.0, 0.0, 0.0],
+    [-3.0, 3.0, 0.0, 0.0],
+    [3.0, -6.0, 3.0, 0.0],
+    [-1.0, 3.0, -3.0, 1.0],
+], dtype=np.float64)
+
+
+class Spline(object):
+    def __init__(self, control_points, spline_type=SplineType.CATMULL_ROM, closed=False, samples_per_segment=32):
+        """
+        Args:
+            control_points: 控制点 (N, 3)
+            spline_type: 曲线类型
+            closed: 是否闭合 (仅Catmull-Rom)
+            samples_per_segment: 每段曲线构建弧长表时的采样数
+        """
+        self.control_points = np.asarray(control_points, dtype=np.float64).reshape(-1, 3)
+        self.spline_type = spline_type
+        self.closed = closed
+        self.samples_per_segment = samples_per_segment
+
+        # 每段曲线的多项式系数 (segment_count, 4, 3)
+        self._coefficients = self._build_coefficients()
+
+        # 弧长查找表：累计距离 -> 曲线参数
+        self._table_distances = None
+        self._table_params = None
+        self._build_arc_length_table()
+
+    # ============ 构建 ============
+
+    def _build_coefficients(self):
+        """把控制点转换为每段曲线的多项式系数"""
+        points = self.control_points
+        if self.spline_type == SplineType.CATMULL_ROM:
+            if len(points) < 2:
+                raise ValueError("Catmull-Rom spline needs at least 2 control points")
+            if self.closed:
+                count = len(points)
+                idx = np.arange(count)
+                segments = np.stack([points[(idx - 1) % count], points[idx],
+                                     points[(idx + 1) % count], points[(idx + 2) % count]], axis=1)
+            else:
+                # 首尾各复制一个端点，使曲线经过所有控制点
+                padded = np.vstack([points[:1], points, points[-1:]])
+                segments = np.stack([padded[i:i + 4] for i in range(len(points) - 1)])
+            basis = CATMULL_ROM_BASIS
+        elif self.spline_type == SplineType.BEZIER:
+            if len(points) < 4 or (len(points) - 1) % 3 != 0:
+                raise ValueError("Bezier spline needs 3k+1 control points")
+            segments = np.stack([points[i:i + 4] for i in range(0, len(points) - 1, 3)])
+            basis = BEZIER_BASIS
+        else:
+            raise ValueError(f"Unknown spline type: {self.spline_type}")
+
+        return np.einsum('ij,sjk->sik', basis, segments)
+
+    def _build_arc_length_table(self):
+        """采样曲线并累计弧长，只在创建时执行一次"""
+        sample_count = self.segment_count * self.samples_per_segment + 1
+        params = np.linspace(0.0, float(self.segment_count), sample_count)
+        positions = self.evaluate(params)
+        step_lengths = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+
+        self._table_params = params
+        self._table_distances = np.concatenate([[0.0], np.cumsum(step_lengths)])
+
+    # ============ 属性 ============
+
+    @property
+    def segment_count(self):
+        """曲线段数量"""
+        return len(self._coefficients)
+
+    @property
+    def length(self):
+        """曲线总长度"""
+        return float(self._table_distances[-1])
+
+    # ============ 采样 ============
+
+    def _split_params(self, params):
+        """把全局参数拆分为 (段索引, 段内t)"""
+        params = np.clip(np.asarray(params, dtype=np.float64), 0.0, float(self.segment_count))
+        segments = np.minimum(params.astype(np.intp), self.segment_count - 1)
+        return segments, params - segments
+
+    def evaluate(self, params):
+        """
+        按曲线参数采样位置
+        Args:
+            params: 参数数组，范围 [0, segment_count]
+        Returns:
+            (N, 3) 位置数组
+        """
+        segments, t = self._split_params(params)
+        c = self._coefficients[segments]
+        t = t[:, np.newaxis]
+        return c[:, 0] + t * (c[:, 1] + t * (c[:, 2] + t * c[:, 3]))
+
+    def evaluate_tangent(self, params):
+        """按曲线参数采样切线 (未归一化的导数)"""
+        segments, t = self._split_params(params)
+        c = self._coefficients[segments]
+        t = t[:, np.newaxis]
+        return c[:, 1] + t * (2.0 * c[:, 2] + t * 3.0 * c[:, 3])
+
+    def distance_to_param(self, distances):
+        """通过弧长表把距离转换为曲线参数 (向量化)"""
+        return np.interp(distances, self._table_distances, self._table_params)
+
+    def evaluate_at_distance(self, distances):
+        """
+        按弧长距离采样位置和单位切线，保证匀速运动
+        Args:
+            distances: 距离数组，范围 [0, length]
+        Returns:
+            (positions, tangents) 两个 (N, 3) 数组
+        """
+        params = self.distance_to_param(np.asarray(distances, dtype=np.float64).reshape(-1))
+        positions = self.evaluate(params)
+        tangents = self.evaluate_tangent(params)
+        tangents /= np.maximum(np.linalg.norm(tangents, axis=1, keepdims=True), 1e-12)
+        return positions, tangents
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+SplineFollower组件 - 让Transform沿Spline匀速运动
+只保存运动状态，位置和朝向由SplineSystem批量计算
+"""
+from enum import Enum
+from core.ecs import Component
+
+
+class SplineWrapMode(Enum):
+    ONCE = 0        # 到达终点后停止
+    LOOP = 1        # 回到起点继续
+    PING_PONG = 2   # 到达端点后反向
+
+
+class SplineFollower(Component):
+    def __init__(self, spline=None, speed=1.0, distance=0.0, wrap_mode=SplineWrapMode.LOOP,
+                 align_to_tangent=True, up=None):
+        super().__init__()
+        self.spline = spline
+        self.speed = speed                      # 沿曲线的速度 (单位/秒)
+        self.distance = distance                # 当前已走过的弧长
+        self.wrap_mode = wrap_mode
+        self.align_to_tangent = align_to_tangent  # 是否让朝向跟随切线
+        self.up = up if up is not None else [0.0, 1.0, 0.0]
+        self.direction = 1.0                    # PING_PONG模式下的运动方向
+        self.is_playing = True
+
+    def play(self):
+        self.is_playing = True
+
+    def stop(self):
+        self.is_playing = False
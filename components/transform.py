@@ -26,6 +26,11 @@ class Transform(Component):
         self._local_to_world_matrix = None
         self._world_to_local_matrix = None
 
+        # 变化版本号：每次自身或父物体变化时递增，供缓存判断是否过期
+        self._version = 0
+        # 变化回调 (例如Scene的空间索引)，参数为发生变化的Transform
+        self._change_listener = None
+
     # ============ Python风格的属性接口 ============
     
     @property
@@ -237,8 +242,11 @@ class Transform(Component):
             parent_world_matrix = self._parent.local_to_world_matrix
             self._local_to_world_matrix = np.dot(parent_world_matrix, local_matrix)
         
-        # 计算逆矩阵
-        self._world_to_local_matrix = np.linalg.inv(self._local_to_world_matrix)
+        # 计算逆矩阵 (某个轴缩放为0时不可逆，使用伪逆)
+        try:
+            self._world_to_local_matrix = np.linalg.inv(self._local_to_world_matrix)
+        except np.linalg.LinAlgError:
+            self._world_to_local_matrix = np.linalg.pinv(self._local_to_world_matrix)
         
         self._dirty = False
     
@@ -269,9 +277,17 @@ class Transform(Component):
     def _mark_dirty(self):
         """标记为需要更新，并递归标记所有子物体"""
         self._dirty = True
+        self._version += 1
+        if self._change_listener is not None:
+            self._change_listener(self)
         for child in self._children:
             child._mark_dirty()
 
+    @property
+    def version(self):
+        """变化版本号"""
+        return self._version
+
     # ============ 坐标系转换方法 ============
     
     def transform_point(self, point):
@@ -483,3 +499,16 @@ class Transform(Component):
 
             # Mark as dirty to recompute world matrix later
             self.mark_dirty()
+
+
+def stack_world_matrices(transforms):
+    """
+    把多个Transform的世界矩阵堆叠为一个数组，供批量计算使用
+    Args:
+        transforms: Transform列表
+    Returns:
+        (N, 4, 4) float32数组 (列向量约定)
+    """
+    if not transforms:
+        return np.zeros((0, 4, 4), dtype=np.float32)
+    return np.array([transform.local_to_world_matrix for transform in transforms], dtype=np.float32)
@@ -5,10 +5,12 @@ from enum import Enum, auto
 
 class WindowType(Enum):
     GLFW = auto()
+    RECORDING = auto()  # 无界面窗口，不创建系统窗口 (graphics.recording_window)
 
 
 class RendererType(Enum):
     OPENGL = auto()
+    NULL = auto()  # 不调用图形API，只记录绘制和状态统计 (graphics.null_renderer)
 
 
 class RendererConfig(object):
@@ -17,3 +19,6 @@ class RendererConfig(object):
     Title = "OpenGL Renderer"
     WindowType = WindowType.GLFW
     RendererType = RendererType.OPENGL
+    # 发布模式: 关闭PyOpenGL的错误检查并使用低开销调用层 (graphics/opengl_dispatch.py)
+    # 必须在第一次导入OpenGL.GL之前设置
+    ReleaseMode = False
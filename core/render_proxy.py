@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+常驻渲染代理 (参考UE的FPrimitiveSceneProxy)
+每个可渲染的Entity (Transform + Material + Mesh或LODGroup) 在场景中对应一个RenderProxy，
+在添加Mesh/Material组件时创建，只在Transform或Material变化时更新:
+- 世界矩阵、列主序的模型/法线矩阵、世界包围盒和包围球保存在预分配的连续数组中，
+  每个代理占一行，Transform变化时只重新计算该行
+- 单个绘制的渲染元组 (model_matrix, mesh, material, None, normal_matrix) 在代理上缓存，
+  矩阵为所在行的视图，内容原地更新，每帧不再创建
+- 删除代理时把最后一行移到空出的位置，数组保持紧凑
+- 每行记录内容最后一次变化时的代数 (generations)，命令列表据此判断能否复用，不再比较矩阵内容
+
+Mesh的包围盒被原地修改时 (不经过组件替换) 需要调用mark_dirty()
+"""
+import numpy as np
+
+from components.blend_shape_weights import BlendShapeWeights
+from components.lod_group import LODGroup
+from components.material import Material
+from components.mesh import Mesh
+from components.transform import Transform, stack_world_matrices
+from Entity.gameobject import GameObject
+from util.geometry import normal_matrices, transform_aabbs, transform_spheres
+
+
+class RenderProxy(object):
+    """一个可渲染Entity在渲染侧的常驻数据"""
+
+    def __init__(self, entity, index):
+        self.entity = entity
+        self.index = index          # 在RenderProxySet数组中的行
+        self.transform = None
+        self.material = None
+        self.mesh = None            # 参与剔除的Mesh (LOD物体为最精细级别，形变物体为混合后的Mesh)
+        self.lod_group = None
+        self.blend_weights = None
+        self.model = None           # (16,) 模型矩阵视图
+        self.normal = None          # (9,) 法线矩阵视图
+        self.item = None            # 缓存的单个绘制渲染元组
+
+    @property
+    def dynamic(self):
+        """参与剔除的Mesh可能在组件不变的情况下变化 (LOD级别、首次混合形变)"""
+        return self.lod_group is not None or self.blend_weights is not None
+
+
+class RenderProxySet(object):
+    """
+    场景中所有RenderProxy的集合
+    entities/meshes/materials/transforms/lod_groups/items为按行排列的并行列表，
+    world_matrices/model_matrices/normal_matrices/bounds/spheres/layers为当前行数的数组视图
+    """
+
+    def __init__(self, capacity=64):
+        self.proxies = []
+        self.entities = []
+        self.meshes = []
+        self.materials = []
+        self.transforms = []
+        self.lod_groups = []
+        self.items = []
+        self.lod_count = 0
+        self.structure_version = 0  # 增删代理时递增，按行缓存的数据据此失效
+        self.generation = 0         # 任意行的内容变化时递增，变化的行记录新的代数
+        self._by_entity = {}        # entity_id -> RenderProxy
+        self._dynamic = []
+        self._layer_version = None
+        self._allocate(capacity)
+
+    # ============ 增删 ============
+
+    @property
+    def count(self):
+        return len(self.proxies)
+
+    def get(self, entity):
+        return self._by_entity.get(entity.entity_id)
+
+    def track(self, entity):
+        """
+        Entity可渲染时创建或刷新其代理，不再可渲染时移除 (组件增删后调用)
+        Returns:
+            Entity是否有代理
+        """
+        proxy = self._by_entity.get(entity.entity_id)
+        if not self._is_renderable(entity):
+            if proxy is not None:
+                self.untrack(entity)
+            return False
+
+        if proxy is None:
+            if self.count == len(self._world):
+                self._allocate(len(self._world) * 2)
+            proxy = RenderProxy(entity, self.count)
+            self._by_entity[entity.entity_id] = proxy
+            self.proxies.append(proxy)
+            self.entities.append(entity)
+            for column in (self.meshes, self.materials, self.transforms, self.lod_groups, self.items):
+                column.append(None)
+            self._layers[proxy.index] = 1 << getattr(entity, 'layer', 0)
+            self._bind_views(proxy)
+            self.structure_version += 1
+        elif proxy.lod_group is not None:
+            self.lod_count -= 1
+        if proxy in self._dynamic:
+            self._dynamic.remove(proxy)
+
+        proxy.transform = entity.get_component(Transform)
+        proxy.material = entity.get_component(Material)
+        proxy.blend_weights = entity.get_component(BlendShapeWeights)
+        lod_group = entity.get_component(LODGroup)
+        proxy.lod_group = lod_group if lod_group is not None and lod_group.level_count > 0 else None
+        if proxy.lod_group is not None:
+            self.lod_count += 1
+        if proxy.dynamic:
+            self._dynamic.append(proxy)
+        self.transforms[proxy.index] = proxy.transform
+        self.materials[proxy.index] = proxy.material
+        self.lod_groups[proxy.index] = proxy.lod_group
+        self._resolve(proxy)
+        self.mark_dirty(entity)
+        return True
+
+    def untrack(self, entity):
+        """移除Entity的代理，最后一行移到空出的位置"""
+        proxy = self._by_entity.pop(entity.entity_id, None)
+        if proxy is None:
+            return False
+        if proxy.lod_group is not None:
+            self.lod_count -= 1
+        if proxy in self._dynamic:
+            self._dynamic.remove(proxy)
+
+        row, last = proxy.index, self.count - 1
+        moved = self.proxies[last]
+        if moved is not proxy:
+            for array in self._arrays:
+                array[row] = array[last]
+            moved.index = row
+            for column in self._columns:
+                column[row] = column[last]
+            self._bind_views(moved)
+            # 空出的行换成了另一个物体的数据
+            self.generation += 1
+            self._generations[row] = self.generation
+        for column in self._columns:
+            column.pop()
+        self._dirty[last] = False
+        self.structure_version += 1
+        return True
+
+    def mark_dirty(self, entity):
+        """Transform (或Mesh包围盒) 变化后调用，下次update时重新计算该行"""
+        proxy = self._by_entity.get(entity.entity_id)
+        if proxy is not None:
+            self._dirty[proxy.index] = True
+
+    # ============ 每帧更新 ============
+
+    def update(self):
+        """
+        刷新变化过的行: 只为标记过的代理重新计算矩阵和包围体
+        所有Entity的层号在任意GameObject.layer变化后整体重新读取一次
+        """
+        for proxy in self._dynamic:
+            if self._resolve(proxy):
+                self._dirty[proxy.index] = True
+
+        if GameObject.layer_version != self._layer_version:
+            self._layer_version = GameObject.layer_version
+            self._layers[:self.count] = [1 << getattr(entity, 'layer', 0) for entity in self.entities]
+
+        rows = np.nonzero(self._dirty[:self.count])[0]
+        if len(rows) == 0:
+            return 0
+        self._dirty[rows] = False
+        self.generation += 1
+        self._generations[rows] = self.generation
+        world = stack_world_matrices([self.transforms[i] for i in rows])
+        meshes = [self.meshes[i] for i in rows]
+        self._world[rows] = world
+        self._model[rows] = world.transpose(0, 2, 1).reshape(-1, 16)
+        self._normal[rows] = normal_matrices(world).transpose(0, 2, 1).reshape(-1, 9)
+        centers = np.array([mesh.bounds_center for mesh in meshes], dtype=np.float32)
+        self._centers[rows], self._extents[rows] = transform_aabbs(
+            centers, [mesh.bounds_extents for mesh in meshes], world)
+        self._sphere_centers[rows], self._radii[rows] = transform_spheres(
+            centers, [mesh.bounding_radius for mesh in meshes], world)
+        return len(rows)
+
+    @property
+    def world_matrices(self):
+        return self._world[:self.count]
+
+    @property
+    def model_matrices(self):
+        return self._model[:self.count]
+
+    @property
+    def normal_matrices(self):
+        return self._normal[:self.count]
+
+    @property
+    def bounds(self):
+        """世界AABB (centers, extents)"""
+        return self._centers[:self.count], self._extents[:self.count]
+
+    @property
+    def spheres(self):
+        """世界包围球 (centers, radii)"""
+        return self._sphere_centers[:self.count], self._radii[:self.count]
+
+    @property
+    def generations(self):
+        """每行内容 (矩阵、包围体) 最后一次变化时的代数，行号相同且代数相同时内容未变"""
+        return self._generations[:self.count]
+
+    @property
+    def layers(self):
+        """每行的层位掩码 (1 << layer)"""
+        return self._layers[:self.count]
+
+    # ============ 内部 ============
+
+    @staticmethod
+    def _is_renderable(entity):
+        if entity.get_component(Transform) is None or entity.get_component(Material) is None:
+            return False
+        if entity.get_component(Mesh) is not None:
+            return True
+        lod_group = entity.get_component(LODGroup)
+        return lod_group is not None and lod_group.level_count > 0
+
+    def _resolve(self, proxy):
+        """
+        确定参与剔除的Mesh (与RenderSystem._collect_renderables相同)
+        Returns:
+            Mesh是否变化
+        """
+        if proxy.lod_group is not None:
+            mesh = proxy.lod_group.bounds_mesh
+        else:
+            mesh = proxy.entity.get_component(Mesh)
+            # 有形变权重的Entity使用混合后的Mesh
+            if proxy.blend_weights is not None and proxy.blend_weights.deformed_mesh is not None:
+                mesh = proxy.blend_weights.deformed_mesh
+        changed = mesh is not proxy.mesh or proxy.item is None or proxy.item[2] is not proxy.material
+        if changed:
+            proxy.mesh = mesh
+            self.meshes[proxy.index] = mesh
+            self._bind_item(proxy)
+        return changed
+
+    def _bind_views(self, proxy):
+        proxy.model = self._model[proxy.index]
+        proxy.normal = self._normal[proxy.index]
+        self._bind_item(proxy)
+
+    def _bind_item(self, proxy):
+        proxy.item = (proxy.model, proxy.mesh, proxy.material, None, proxy.normal)
+        self.items[proxy.index] = proxy.item
+
+    @property
+    def _columns(self):
+        return self.proxies, self.entities, self.meshes, self.materials, self.transforms, self.lod_groups, self.items
+
+    @property
+    def _arrays(self):
+        return (self._world, self._model, self._normal, self._centers, self._extents, self._sphere_centers,
+                self._radii, self._layers, self._generations, self._dirty)
+
+    def _allocate(self, capacity):
+        """分配 (或按2倍增长) 各行数组，已有的行拷贝过去，代理的视图和渲染元组重新绑定"""
+        old = self._arrays if hasattr(self, '_world') else None
+        self._world = np.zeros((capacity, 4, 4), dtype=np.float32)
+        self._model = np.zeros((capacity, 16), dtype=np.float32)
+        self._normal = np.zeros((capacity, 9), dtype=np.float32)
+        self._centers = np.zeros((capacity, 3), dtype=np.float32)
+        self._extents = np.zeros((capacity, 3), dtype=np.float32)
+        self._sphere_centers = np.zeros((capacity, 3), dtype=np.float32)
+        self._radii = np.zeros(capacity, dtype=np.float32)
+        self._layers = np.zeros(capacity, dtype=np.int64)
+        self._generations = np.zeros(capacity, dtype=np.int64)
+        self._dirty = np.zeros(capacity, dtype=bool)
+        if old is not None:
+            for array, previous in zip(self._arrays, old):
+                array[:self.count] = previous[:self.count]
+            for proxy in self.proxies:
+                self._bind_views(proxy)
@@ -7,6 +7,21 @@ Scene系统 - 场景管理
 from bson import ObjectId
 from typing import List, Optional, Dict
 from core.ecs import Entity
+from util.aabb_tree import DynamicAABBTree
+
+
+class RaycastHit:
+    """
+    射线检测结果 - 参考Unity RaycastHit
+    """
+    
+    def __init__(self, entity: Entity, distance: float, point, normal, triangle_index: int, barycentric):
+        self.entity = entity
+        self.distance = distance  # 射线起点到命中点的距离
+        self.point = point  # 世界空间命中点
+        self.normal = normal  # 世界空间面法线 (单位向量)
+        self.triangle_index = triangle_index  # 命中的三角形编号
+        self.barycentric = barycentric  # 命中点的重心坐标 (w, u, v)
 
 
 class Scene:
@@ -28,6 +43,19 @@ class Scene:
         
         # 场景统计信息
         self._entity_count = 0
+
+        # 按Entity类型查询的缓存 (增删Entity时清空)
+        self._type_cache: Dict[type, List[Entity]] = {}
+        
+        # 空间索引 (首次空间查询时才构建)
+        self.spatial_margin = 0.1
+        self._spatial_tree: Optional[DynamicAABBTree] = None
+        self._spatial_proxies: Dict[ObjectId, int] = {}  # Entity ID到树代理ID的映射
+        self._spatial_dirty: Dict[ObjectId, Entity] = {}  # Transform变化后待更新的Entity
+        self._spatial_moves = 0  # 上次重建以来树结构变化次数
+
+        # 常驻渲染代理 (首次渲染时才构建，之后随组件增删和Transform变化增量维护)
+        self._render_proxies = None
     
     # ============ Entity 生命周期管理 ============
     
@@ -45,6 +73,7 @@ class Scene:
         # 添加到全局管理
         self._entities[entity.entity_id] = entity
         self._entity_count += 1
+        self._type_cache.clear()
         
         # 添加到名称映射（如果Entity有name属性）
         if hasattr(entity, 'name') and entity.name:
@@ -55,6 +84,11 @@ class Scene:
         # 添加到组件映射
         self._update_component_mappings(entity, add=True)
         
+        if self._spatial_tree is not None:
+            self._spatial_track(entity)
+        if self._render_proxies is not None:
+            self._render_track(entity)
+        
         self._mark_dirty()
         entity_name = getattr(entity, 'name', str(entity.entity_id))
         print(f"✅ Entity '{entity_name}' 已添加到场景 '{self.name}'")
@@ -75,9 +109,15 @@ class Scene:
         # 从组件映射中移除
         self._update_component_mappings(entity, add=False)
         
+        if self._spatial_tree is not None:
+            self._spatial_untrack(entity)
+        if self._render_proxies is not None:
+            self._render_untrack(entity)
+        
         # 从字典映射中移除
         del self._entities[entity.entity_id]
         self._entity_count -= 1
+        self._type_cache.clear()
         
         # 从名称映射中移除
         if hasattr(entity, 'name') and entity.name and entity.name in self._name_to_entity:
@@ -149,6 +189,17 @@ class Scene:
         entities = self._component_to_entities.get(component_type, [])
         return entities[0] if entities else None
     
+    def get_entities_of_type(self, entity_type: type) -> List[Entity]:
+        """
+        获取指定类型 (含子类) 的所有Entity，如Camera
+        结果缓存到下一次增删Entity
+        """
+        entities = self._type_cache.get(entity_type)
+        if entities is None:
+            entities = [entity for entity in self._entities.values() if isinstance(entity, entity_type)]
+            self._type_cache[entity_type] = entities
+        return list(entities)
+    
     # ============ 场景属性和状态 ============
     
     @property
@@ -240,6 +291,15 @@ class Scene:
             self._component_to_entities[component_type] = []
         if entity not in self._component_to_entities[component_type]:
             self._component_to_entities[component_type].append(entity)
+        
+        # Transform或Mesh变化会影响包围盒
+        if self._spatial_tree is not None:
+            self._spatial_track(entity)
+            if entity.entity_id in self._spatial_proxies:
+                self._spatial_dirty[entity.entity_id] = entity
+        # Mesh/Material添加后创建渲染代理，替换时刷新
+        if self._render_proxies is not None:
+            self._render_track(entity)
     
     def notify_component_removed(self, entity: Entity, component_type: type):
         """
@@ -256,6 +316,308 @@ class Scene:
                 self._component_to_entities[component_type].remove(entity)
             if not self._component_to_entities[component_type]:
                 del self._component_to_entities[component_type]
+        
+        if entity.entity_id in self._spatial_proxies:
+            self._spatial_dirty[entity.entity_id] = entity
+        if self._render_proxies is not None:
+            self._render_track(entity)
+    
+    # ============ 空间查询 ============
+    
+    def query_aabb(self, bounds_min, bounds_max) -> List[Entity]:
+        """
+        查询世界空间包围盒与给定AABB重叠的Entity
+        Args:
+            bounds_min: AABB最小点
+            bounds_max: AABB最大点
+        Returns:
+            匹配的Entity列表
+        """
+        return self.update_spatial_index().query_aabb(bounds_min, bounds_max)
+    
+    def query_sphere(self, center, radius: float) -> List[Entity]:
+        """查询世界空间包围盒与球体相交的Entity"""
+        return self.update_spatial_index().query_sphere(center, radius)
+    
+    def query_frustum(self, frustum) -> List[Entity]:
+        """
+        查询与视锥相交的Entity
+        Args:
+            frustum: Camera对象，或 (6, 4) 视锥平面数组
+        """
+        planes = frustum.get_frustum_planes() if hasattr(frustum, 'get_frustum_planes') else frustum
+        return self.update_spatial_index().query_frustum(planes)
+    
+    def nearest_k(self, point, k: int) -> List[Entity]:
+        """
+        查询距离点最近的k个Entity (按到世界空间包围盒的距离升序)
+        """
+        return [entity for _, entity in self.update_spatial_index().nearest_k(point, k)]
+    
+    def raycast(self, origin, direction, max_distance: float = float('inf')) -> Optional[RaycastHit]:
+        """
+        射线检测，返回最近的命中结果
+        Args:
+            origin: 世界空间射线起点
+            direction: 世界空间射线方向
+            max_distance: 最大检测距离
+        Returns:
+            RaycastHit或None
+        """
+        return self.raycast_batch([origin], [direction], max_distance)[0]
+    
+    def raycast_batch(self, origins, directions, max_distance: float = float('inf'),
+                      chunk_size: int = 256) -> List[Optional[RaycastHit]]:
+        """
+        批量射线检测
+        先用物体世界包围盒筛选，再在每个Mesh的三角形BVH中做精确检测
+        BlendShape形变不参与检测，使用原始Mesh
+        Args:
+            origins: (R, 3) 世界空间射线起点
+            directions: (R, 3) 世界空间射线方向
+            max_distance: 最大检测距离
+            chunk_size: 每次与所有包围盒一起测试的射线数量，限制内存占用
+        Returns:
+            与射线一一对应的RaycastHit或None
+        """
+        import numpy as np
+        from components.lod_group import LODGroup
+        from components.mesh import Mesh
+        from components.transform import Transform
+        from resource_manager.file_resource_manager import FileResourceManager
+        
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        directions = directions / np.maximum(np.linalg.norm(directions, axis=1, keepdims=True), 1e-12)
+        ray_count = len(origins)
+        
+        tree = self.update_spatial_index()
+        shaped = self._component_to_entities.get(Mesh, []) + self._component_to_entities.get(LODGroup, [])
+        entities = [entity for entity in dict.fromkeys(shaped)
+                    if entity.entity_id in self._spatial_proxies and self._get_shape_mesh(entity) is not None]
+        if ray_count == 0 or not entities:
+            return [None] * ray_count
+        bounds = [tree.get_aabb(self._spatial_proxies[entity.entity_id]) for entity in entities]
+        lowers = np.array([lower for lower, _ in bounds])
+        uppers = np.array([upper for _, upper in bounds])
+        
+        resource_manager = FileResourceManager()
+        best_t = np.full(ray_count, float(max_distance))
+        best_entity = np.full(ray_count, -1, dtype=np.intp)
+        best_tri = np.full(ray_count, -1, dtype=np.intp)
+        best_uv = np.zeros((ray_count, 2))
+        
+        for chunk_start in range(0, ray_count, chunk_size):
+            rays = np.arange(chunk_start, min(chunk_start + chunk_size, ray_count))
+            
+            # 射线 × 物体包围盒 的slab测试
+            safe = np.where(np.abs(directions[rays]) < 1e-12, 1e-12, directions[rays])
+            inv = (1.0 / safe)[:, np.newaxis, :]
+            t0 = (lowers[np.newaxis] - origins[rays][:, np.newaxis, :]) * inv
+            t1 = (uppers[np.newaxis] - origins[rays][:, np.newaxis, :]) * inv
+            t_near = np.maximum(np.minimum(t0, t1).max(axis=2), 0.0)
+            t_far = np.maximum(t0, t1).min(axis=2)
+            box_hit = (t_near <= t_far) & (t_near < best_t[rays][:, np.newaxis])
+            
+            # 按包围盒进入距离从近到远处理物体，远处物体常被已有结果剔除
+            entry = np.where(box_hit, t_near, np.inf).min(axis=0)
+            for e in np.argsort(entry):
+                if not np.isfinite(entry[e]):
+                    break
+                candidates = rays[box_hit[:, e] & (t_near[:, e] < best_t[rays])]
+                if len(candidates) == 0:
+                    continue
+                
+                entity = entities[e]
+                world_to_local = entity.get_component(Transform).world_to_local_matrix
+                linear = world_to_local[:3, :3]
+                # 仿射变换保持射线参数t不变，局部方向不归一化
+                local_origins = origins[candidates] @ linear.T + world_to_local[:3, 3]
+                local_directions = directions[candidates] @ linear.T
+                
+                bvh = resource_manager.get_mesh_bvh(self._get_shape_mesh(entity))
+                t, tri, u, v = bvh.intersect_rays(local_origins, local_directions, best_t[candidates])
+                hit = tri >= 0
+                hit_rays = candidates[hit]
+                best_t[hit_rays] = t[hit]
+                best_entity[hit_rays] = e
+                best_tri[hit_rays] = tri[hit]
+                best_uv[hit_rays, 0] = u[hit]
+                best_uv[hit_rays, 1] = v[hit]
+        
+        results = []
+        for i in range(ray_count):
+            if best_entity[i] < 0:
+                results.append(None)
+                continue
+            entity = entities[best_entity[i]]
+            results.append(RaycastHit(
+                entity=entity,
+                distance=float(best_t[i]),
+                point=origins[i] + directions[i] * best_t[i],
+                normal=self._triangle_world_normal(entity, int(best_tri[i]), directions[i]),
+                triangle_index=int(best_tri[i]),
+                barycentric=np.array([1.0 - best_uv[i, 0] - best_uv[i, 1], best_uv[i, 0], best_uv[i, 1]])
+            ))
+        return results
+    
+    @staticmethod
+    def _triangle_world_normal(entity: Entity, triangle_index: int, direction):
+        """命中三角形的世界空间法线，朝向射线来的方向"""
+        import numpy as np
+        from components.transform import Transform
+        
+        mesh = Scene._get_shape_mesh(entity)
+        positions = np.asarray(mesh.vertices, dtype=np.float64).reshape(-1, 8)[:, :3]
+        indices = np.asarray(mesh.indices, dtype=np.intp).reshape(-1)
+        corners = indices[triangle_index * 3:triangle_index * 3 + 3] if len(indices) else \
+            np.arange(triangle_index * 3, triangle_index * 3 + 3)
+        
+        matrix = entity.get_component(Transform).local_to_world_matrix
+        world = positions[corners] @ matrix[:3, :3].T + matrix[:3, 3]
+        normal = np.cross(world[1] - world[0], world[2] - world[0])
+        normal /= max(np.linalg.norm(normal), 1e-12)
+        return -normal if np.dot(normal, direction) > 0.0 else normal
+    
+    def update_spatial_index(self) -> DynamicAABBTree:
+        """
+        刷新空间索引：只重新计算Transform变化过的Entity的包围盒
+        树结构变化累计超过物体数量时整体重建一次以保持平衡
+        Returns:
+            场景的DynamicAABBTree
+        """
+        if self._spatial_tree is None:
+            self._spatial_tree = DynamicAABBTree(margin=self.spatial_margin)
+            for entity in self._entities.values():
+                self._spatial_track(entity)
+        
+        tree = self._spatial_tree
+        if self._spatial_dirty:
+            entities = list(self._spatial_dirty.values())
+            self._spatial_dirty.clear()
+            lowers, uppers = self._compute_world_bounds(entities)
+            for entity, lower, upper in zip(entities, lowers, uppers):
+                proxy_id = self._spatial_proxies[entity.entity_id]
+                old_lower, old_upper = tree.get_fat_aabb(proxy_id)
+                # 用包围盒中心的位移预测运动方向
+                displacement = (lower + upper - old_lower - old_upper) * 0.5
+                if tree.move_proxy(proxy_id, lower, upper, displacement):
+                    self._spatial_moves += 1
+        
+        if self._spatial_moves > max(tree.proxy_count, 64):
+            tree.rebuild()
+            self._spatial_moves = 0
+        return tree
+    
+    def _spatial_track(self, entity: Entity):
+        """把带Transform的Entity加入空间索引"""
+        from components.transform import Transform
+        transform = entity.get_component(Transform)
+        if transform is None or entity.entity_id in self._spatial_proxies:
+            return
+        
+        lowers, uppers = self._compute_world_bounds([entity])
+        self._spatial_proxies[entity.entity_id] = self._spatial_tree.create_proxy(lowers[0], uppers[0], entity)
+        transform._change_listener = self._on_transform_changed
+    
+    def _spatial_untrack(self, entity: Entity):
+        """把Entity移出空间索引"""
+        proxy_id = self._spatial_proxies.pop(entity.entity_id, None)
+        if proxy_id is None:
+            return
+        self._spatial_tree.destroy_proxy(proxy_id)
+        self._spatial_dirty.pop(entity.entity_id, None)
+        
+        from components.transform import Transform
+        transform = entity.get_component(Transform)
+        if transform is not None and transform._change_listener == self._on_transform_changed \
+                and not self._render_tracked(entity):
+            transform._change_listener = None
+    
+    def _on_transform_changed(self, transform):
+        """Transform变化回调：只记录，等下次查询或渲染时批量更新"""
+        entity = transform.owner
+        if entity is None:
+            return
+        if entity.entity_id in self._spatial_proxies:
+            self._spatial_dirty[entity.entity_id] = entity
+        if self._render_proxies is not None:
+            self._render_proxies.mark_dirty(entity)
+    
+    # ============ 渲染代理 ============
+    
+    def update_render_proxies(self):
+        """
+        刷新渲染代理：首次调用时为所有可渲染的Entity创建代理，之后只重新计算Transform变化过的代理
+        Returns:
+            场景的RenderProxySet
+        """
+        if self._render_proxies is None:
+            from core.render_proxy import RenderProxySet
+            self._render_proxies = RenderProxySet()
+            for entity in self._entities.values():
+                self._render_track(entity)
+        self._render_proxies.update()
+        return self._render_proxies
+    
+    def _render_tracked(self, entity: Entity) -> bool:
+        return self._render_proxies is not None and self._render_proxies.get(entity) is not None
+    
+    def _render_track(self, entity: Entity):
+        """Entity可渲染时创建 (或刷新) 渲染代理，并监听其Transform变化"""
+        if self._render_proxies.track(entity):
+            from components.transform import Transform
+            entity.get_component(Transform)._change_listener = self._on_transform_changed
+        else:
+            self._render_untrack(entity)
+    
+    def _render_untrack(self, entity: Entity):
+        """移除Entity的渲染代理"""
+        self._render_proxies.untrack(entity)
+        from components.transform import Transform
+        transform = entity.get_component(Transform)
+        if transform is not None and transform._change_listener == self._on_transform_changed \
+                and entity.entity_id not in self._spatial_proxies:
+            transform._change_listener = None
+    
+    @staticmethod
+    def _get_shape_mesh(entity: Entity):
+        """
+        Entity用于包围盒和射线检测的Mesh
+        优先使用Mesh组件，只有LODGroup时使用最精细级别
+        """
+        from components.mesh import Mesh
+        from components.lod_group import LODGroup
+        mesh = entity.get_component(Mesh)
+        if mesh is None:
+            lod_group = entity.get_component(LODGroup)
+            if lod_group is not None:
+                mesh = lod_group.bounds_mesh
+        return mesh
+    
+    @staticmethod
+    def _compute_world_bounds(entities: List[Entity]):
+        """
+        批量计算Entity的世界空间AABB
+        有Mesh的使用Mesh局部包围盒，否则退化为世界坐标上的一个点
+        Returns:
+            (lowers, uppers) 两个 (N, 3) 数组
+        """
+        import numpy as np
+        from components.transform import Transform, stack_world_matrices
+        from util.geometry import transform_aabbs
+        
+        centers = np.zeros((len(entities), 3), dtype=np.float32)
+        extents = np.zeros((len(entities), 3), dtype=np.float32)
+        for i, entity in enumerate(entities):
+            mesh = Scene._get_shape_mesh(entity)
+            if mesh is not None:
+                centers[i] = mesh.bounds_center
+                extents[i] = mesh.bounds_extents
+        
+        matrices = stack_world_matrices([entity.get_component(Transform) for entity in entities])
+        world_centers, world_extents = transform_aabbs(centers, extents, matrices)
+        return world_centers - world_extents, world_centers + world_extents
 
 
 class SceneManager:
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+与图形API无关的渲染命令列表
+RenderSystem把排好序的渲染元组在材质变化处或达到块大小时切块，每块录制为一个CommandList (可以在工作线程中并行录制)，
+再交给渲染后端执行 (Renderer.execute)。命令为元组，第一个元素为操作码:
+- (SET_PIPELINE, shader, instanced)                        切换管线，instanced时后端使用Shader的实例化变体
+- (BIND_MATERIAL, material)                                绑定材质的纹理和uniform (执行时读取属性的当前值)
+- (DRAW, mesh, model_matrix, normal_matrix, draw_ranges)   单个绘制，draw_ranges为None时绘制整个Mesh
+- (DRAW_INSTANCED, mesh, model_matrices, normal_matrices)  实例化绘制
+每块从未知状态开始录制 (块之间不继承状态)，块内相同的管线和材质只录制一次
+输入未变化的块直接复用之前录制的CommandList，后端缓存在CommandList.prepared中的执行数据也随之复用；
+RenderSystem为每个渲染元组提供矩阵的版本 (渲染代理行的代数)，块的键不需要序列化矩阵
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SET_PIPELINE = 0
+BIND_MATERIAL = 1
+DRAW = 2
+DRAW_INSTANCED = 3
+
+
+def chunk_key(render_objects, versions=None):
+    """
+    一块渲染元组的内容键: Mesh和Material的身份、模型矩阵的版本和网格簇区间的字节
+    (法线矩阵由模型矩阵决定；Mesh的顶点和材质属性在执行时读取，不影响命令本身)
+    单个绘制的模型矩阵可能是渲染代理数组中原地更新的视图，键中同时记录视图的身份，
+    保证复用的命令引用的正是当前物体的矩阵 (被缓存的命令持有视图，身份不会被重用)
+    Args:
+        versions: 与render_objects对应的矩阵版本 (可哈希，矩阵内容变化时版本一定变化)；
+                  为None时使用模型矩阵的字节
+    """
+    parts = []
+    for k, (model_matrix, mesh, material, draw_ranges, _) in enumerate(render_objects):
+        ranges = None if draw_ranges is None else \
+            (np.asarray(draw_ranges[0]).tobytes(), np.asarray(draw_ranges[1]).tobytes())
+        matrix_id = id(model_matrix) if model_matrix.ndim == 1 else None
+        version = model_matrix.tobytes() if versions is None else versions[k]
+        parts.append((id(mesh), id(material), matrix_id, version, ranges))
+    return tuple(parts)
+
+
+class CommandList(object):
+    def __init__(self, key=None):
+        self.key = key
+        self.commands = []
+        self.draw_count = 0
+        self.prepared = None  # 后端首次执行时生成的数据 (如OpenGL后端的绘制对象)
+        self._shader = None
+        self._instanced = None
+        self._material = None
+
+    def set_pipeline(self, shader, instanced):
+        if shader is self._shader and instanced == self._instanced:
+            return
+        self.commands.append((SET_PIPELINE, shader, instanced))
+        self._shader = shader
+        self._instanced = instanced
+        self._material = None  # uniform属于程序，切换管线后重新绑定材质
+
+    def bind_material(self, material):
+        if material is self._material:
+            return
+        self.commands.append((BIND_MATERIAL, material))
+        self._material = material
+
+    def draw(self, mesh, model_matrix, normal_matrix, draw_ranges=None):
+        self.commands.append((DRAW, mesh, model_matrix, normal_matrix, draw_ranges))
+        self.draw_count += 1
+
+    def draw_instanced(self, mesh, model_matrices, normal_matrices):
+        self.commands.append((DRAW_INSTANCED, mesh, model_matrices, normal_matrices))
+        self.draw_count += 1
+
+    def record(self, render_objects):
+        """录制渲染元组 (model_matrix, mesh, material, draw_ranges, normal_matrix)"""
+        for model_matrix, mesh, material, draw_ranges, normal_matrix in render_objects:
+            instanced = model_matrix.ndim == 2
+            self.set_pipeline(material.shader, instanced)
+            self.bind_material(material)
+            if instanced:
+                self.draw_instanced(mesh, model_matrix, normal_matrix)
+            else:
+                self.draw(mesh, model_matrix, normal_matrix, draw_ranges)
+        return self
+
+    def render_objects(self):
+        """还原为渲染元组 (供只实现了draw()的后端使用)"""
+        items = []
+        material = None
+        for command in self.commands:
+            if command[0] == BIND_MATERIAL:
+                material = command[1]
+            elif command[0] == DRAW:
+                _, mesh, model_matrix, normal_matrix, draw_ranges = command
+                items.append((model_matrix, mesh, material, draw_ranges, normal_matrix))
+            elif command[0] == DRAW_INSTANCED:
+                _, mesh, model_matrices, normal_matrices = command
+                items.append((model_matrices, mesh, material, None, normal_matrices))
+        return items
+
+
+class CommandListBuilder(object):
+    """
+    把排好序的渲染元组切块录制为CommandList (排序后同材质的绘制相邻，块不跨越材质)
+    workers > 0时各块在线程池中计算键和录制；缓存保留本帧和上一帧用过的列表，更早的列表被丢弃
+    """
+
+    def __init__(self, chunk_size=256, workers=0):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self._executor = None
+        self._current = {}  # 键 -> 本帧用过的CommandList
+        self._previous = {}
+        self.stats = {'chunks': 0, 'built': 0, 'reused': 0, 'commands': 0}
+
+    def begin_frame(self):
+        self._previous = self._current
+        self._current = {}
+        self.stats = dict.fromkeys(self.stats, 0)
+
+    def build(self, render_objects, versions=None):
+        """
+        Args:
+            versions: 与render_objects对应的矩阵版本 (见chunk_key)，为None时比较矩阵内容
+        Returns:
+            按顺序排列的CommandList，依次执行等价于按顺序提交render_objects
+        """
+        chunks = [(render_objects[start:end], None if versions is None else versions[start:end])
+                  for start, end in self._split(render_objects)]
+        if self.workers > 0 and len(chunks) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="CommandListBuilder")
+            results = list(self._executor.map(self._build_chunk, chunks))
+        else:
+            results = [self._build_chunk(chunk) for chunk in chunks]
+
+        # 工作线程只读缓存，结果在主线程中写回
+        command_lists = []
+        for command_list, reused in results:
+            self._current[command_list.key] = command_list
+            command_lists.append(command_list)
+            self.stats['reused' if reused else 'built'] += 1
+            self.stats['commands'] += len(command_list.commands)
+        self.stats['chunks'] += len(chunks)
+        return command_lists
+
+    def _split(self, render_objects):
+        """
+        在材质变化处或达到chunk_size时分块，一个材质内的变化不会移动其他材质的块边界
+        Returns:
+            每块的 (start, end)
+        """
+        bounds = []
+        start = 0
+        for i in range(1, len(render_objects) + 1):
+            if i == len(render_objects) or i - start == self.chunk_size or \
+                    render_objects[i][2] is not render_objects[start][2]:
+                bounds.append((start, i))
+                start = i
+        return bounds
+
+    def _build_chunk(self, chunk):
+        render_objects, versions = chunk
+        key = chunk_key(render_objects, versions)
+        command_list = self._current.get(key) or self._previous.get(key)
+        if command_list is not None:
+            return command_list, True
+        return CommandList(key).record(render_objects), False
+
+    def clear(self):
+        self._current = {}
+        self._previous = {}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -9,6 +9,9 @@ def create_window(**kwargs) -> Window:
     if RendererConfig.WindowType == WindowType.GLFW:
         from graphics.glfw_window import GlfwWindow
         return GlfwWindow(**kwargs)
+    if RendererConfig.WindowType == WindowType.RECORDING:
+        from graphics.recording_window import RecordingWindow
+        return RecordingWindow(**kwargs)
 
     raise ValueError("Invalid window type")
 
@@ -17,5 +20,8 @@ def create_renderer(**kwargs) -> Renderer:
     if RendererConfig.RendererType == RendererType.OPENGL:
         from graphics.opengl_renderer import OpenGLRenderer
         return OpenGLRenderer(**kwargs)
+    if RendererConfig.RendererType == RendererType.NULL:
+        from graphics.null_renderer import NullRenderer
+        return NullRenderer(**kwargs)
 
     raise ValueError("Invalid renderer type")
@@ -81,6 +81,14 @@ class GlfwWindow(Window):
         glfw.terminate()
         return
 
+    def get_cursor_position(self):
+        """当前鼠标位置 (屏幕坐标，原点在左上角)"""
+        return glfw.get_cursor_pos(self.window)
+
+    def get_size(self):
+        """窗口尺寸 (与鼠标坐标单位一致)"""
+        return glfw.get_window_size(self.window)
+
     def pop_keyboard_event(self):
         if self.keyboard_events:
             yield self.keyboard_events.popleft()
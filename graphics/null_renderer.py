@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+无GPU的渲染后端 (RendererType.NULL)
+完整接收RenderSystem提交的绘制，但不调用任何图形API，只按OpenGL后端的行为统计:
+- 绘制调用、实例数和三角形数
+- 状态切换: 程序和纹理绑定 (与OpenGLStateCache一样跳过重复绑定)；
+  实例化绘制使用Shader的实例化变体，与普通绘制是不同的程序
+- 上传字节数: Mesh首次使用或修改后的顶点/索引、实例数据、每帧uniform缓冲
+- uniform写入: 与OpenGLShader一样，值未变化的uniform不计入
+用于在CI或无显卡的服务器上做CPU端帧耗时的基准测试和渲染结果的回归测试
+本模块和NULL后端的资源加载路径 (NullShader/NullTexture) 都不导入OpenGL，不需要可加载的libGL
+"""
+import weakref
+
+import numpy as np
+
+from graphics.command_list import BIND_MATERIAL, DRAW, DRAW_INSTANCED, SET_PIPELINE
+from graphics.recording_window import RecordingWindow
+from graphics.renderer import Renderer, RenderObject
+from resource_manager.texture import BaseTexture
+
+# 与graphics.opengl_frame_uniforms中FrameData块 (std140) 的大小一致
+_FRAME_DATA_BYTES = 224
+_TIME_BYTES = 4
+# 每个实例的模型矩阵和法线矩阵 (与graphics.opengl_instance_buffer一致)
+_INSTANCE_BYTES = (16 + 9) * 4
+
+
+class NullRenderer(Renderer):
+    def __init__(self, max_frames=None, record_commands=False):
+        """
+        Args:
+            max_frames: 传给RecordingWindow，呈现指定帧数后窗口请求关闭
+            record_commands: 是否记录每帧的命令列表 (用于回归测试，会增加开销)
+        """
+        self.title = None
+        self.width = None
+        self.height = None
+        self.window = None
+        self.max_frames = max_frames
+        self.shaders = []
+        self.camera = None
+        self.render_objects = []
+        self.record_commands = record_commands
+        # 本帧的命令: ('view', camera) / ('camera', camera) / ('pipeline', shader, instanced) /
+        # ('draw', mesh, material, 实例数, 三角形数)
+        self.commands = []
+        self.stats = {}
+        self.reset_stats()
+        self.frame_stats = dict(self.stats)  # 上一帧的统计
+        self.total_stats = dict.fromkeys(self.stats, 0)  # 所有帧的累计
+        self.frame_count = 0
+
+        # 模拟GPU端缓存的状态
+        self._meshes = weakref.WeakKeyDictionary()  # Mesh -> (version, 上传的索引数组)
+        self._program = None  # 当前管线 (shader, instanced)
+        self._textures = {}  # 纹理单元 -> 纹理
+        self._uniforms = {}  # (id(shader), instanced, uniform名称) -> 上一次写入的值
+
+    def reset_stats(self):
+        self.stats = {'draw_calls': 0, 'instances': 0, 'triangles': 0, 'views': 0, 'program_changes': 0,
+                      'texture_changes': 0, 'state_skipped': 0, 'uniform_writes': 0, 'mesh_uploads': 0,
+                      'bytes_uploaded': 0}
+
+    def initialize(self, width, height, title):
+        self.width = width
+        self.height = height
+        self.title = title
+        self.window = RecordingWindow(self.max_frames)
+        self.window.initialize(width, height, title)
+
+    def add_shader(self, shader):
+        self.shaders.append(shader)
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        """相机数据与OpenGL后端一样整体写入一次每帧uniform缓冲"""
+        self.camera = camera
+        self.stats['bytes_uploaded'] += _FRAME_DATA_BYTES
+        self._record('camera', camera)
+
+    def render(self, render_objects):
+        self.begin_frame()
+        self.draw(render_objects)
+        self.end_frame()
+
+    def begin_frame(self):
+        self.reset_stats()
+        self.commands = []
+        self.render_objects = []
+        # 与OpenGL后端一样，每帧从未知的绑定状态开始
+        self._program = None
+        self._textures = {}
+        self.stats['bytes_uploaded'] += _TIME_BYTES
+
+    def begin_view(self, camera):
+        self.stats['views'] += 1
+        self._record('view', camera)
+
+    def draw(self, render_objects):
+        for render_data in render_objects:
+            render_object = RenderObject(*render_data)
+            self._draw(render_object)
+            self.render_objects.append(render_object)
+
+    def execute(self, command_lists):
+        """按命令执行，管线和材质只在命令中出现时绑定"""
+        for command_list in command_lists:
+            pipeline = material = None
+            for command in command_list.commands:
+                op = command[0]
+                if op == SET_PIPELINE:
+                    pipeline = command[1:]
+                    self._use_program(pipeline)
+                elif op == BIND_MATERIAL:
+                    material = command[1]
+                    self._bind_material(pipeline, material)
+                elif op == DRAW:
+                    _, mesh, model_matrix, normal_matrix, draw_ranges = command
+                    render_object = RenderObject(model_matrix, mesh, material, draw_ranges, normal_matrix)
+                    self._submit(pipeline, render_object)
+                    self.render_objects.append(render_object)
+                elif op == DRAW_INSTANCED:
+                    _, mesh, model_matrices, normal_matrices = command
+                    render_object = RenderObject(model_matrices, mesh, material, None, normal_matrices)
+                    self._submit(pipeline, render_object)
+                    self.render_objects.append(render_object)
+
+    def end_frame(self):
+        if self.window is not None:
+            self.window.swap_buffers()
+        self.frame_count += 1
+        self.frame_stats = dict(self.stats)
+        for key, value in self.stats.items():
+            self.total_stats[key] += value
+
+    def release_mesh(self, mesh):
+        self._meshes.pop(mesh, None)
+
+    def cleanup(self):
+        self._meshes.clear()
+        if self.window is not None:
+            self.window.cleanup()
+
+    # ============ 模拟的绘制 ============
+
+    def _draw(self, render_object):
+        pipeline = (render_object.material.shader, render_object.model_matrix.ndim == 2)
+        self._use_program(pipeline)
+        self._bind_material(pipeline, render_object.material)
+        self._submit(pipeline, render_object)
+
+    def _use_program(self, pipeline):
+        """pipeline为 (shader, instanced)，同一Shader的普通和实例化变体是两个程序"""
+        if self._program is not None and pipeline[0] is self._program[0] and pipeline[1] == self._program[1]:
+            self.stats['state_skipped'] += 1
+        else:
+            self._program = pipeline
+            self.stats['program_changes'] += 1
+            self._record('pipeline', *pipeline)
+
+    def _bind_material(self, pipeline, material):
+        texture_unit = 0
+        for name, value in material.properties.items():
+            if isinstance(value, BaseTexture):
+                if self._textures.get(texture_unit) is value:
+                    self.stats['state_skipped'] += 1
+                else:
+                    self._textures[texture_unit] = value
+                    self.stats['texture_changes'] += 1
+                self._write_uniform(pipeline, name, texture_unit)
+                texture_unit += 1
+            elif isinstance(value, float):
+                self._write_uniform(pipeline, name, value)
+
+    def _submit(self, pipeline, render_object):
+        instance_count = render_object.instance_count
+        if render_object.model_matrix.ndim == 2:
+            self.stats['bytes_uploaded'] += instance_count * _INSTANCE_BYTES
+        else:
+            self._write_uniform(pipeline, "model", render_object.model_matrix)
+            if render_object.normal_matrices is not None:
+                self._write_uniform(pipeline, "normalMatrix", render_object.normal_matrices)
+
+        index_count = self._upload_mesh(render_object.mesh)
+        if render_object.draw_ranges is not None:
+            index_count = int(np.sum(render_object.draw_ranges[1]))
+        triangles = index_count // 3 * instance_count
+        self.stats['draw_calls'] += 1
+        self.stats['instances'] += instance_count
+        self.stats['triangles'] += triangles
+        self._record('draw', render_object.mesh, render_object.material, instance_count, triangles)
+
+    def _upload_mesh(self, mesh):
+        """Mesh首次使用或修改后计入上传字节数，返回要绘制的索引数"""
+        meshlets = mesh.meshlets
+        source = meshlets.indices if meshlets is not None else mesh.indices
+        vertex_count = mesh.get_vertex_count()
+        index_count = len(source) if len(source) > 0 else vertex_count - vertex_count % 3
+        uploaded = self._meshes.get(mesh)
+        if uploaded is None or uploaded[0] != mesh.version or uploaded[1] is not source:
+            self._meshes[mesh] = (mesh.version, source)
+            self.stats['mesh_uploads'] += 1
+            self.stats['bytes_uploaded'] += vertex_count * mesh._stride * 4 + len(source) * 4
+        return index_count
+
+    def _write_uniform(self, pipeline, name, value):
+        key = (id(pipeline[0]), pipeline[1], name)
+        data = np.asarray(value, dtype=np.float32).tobytes()
+        if self._uniforms.get(key) == data:
+            return
+        self._uniforms[key] = data
+        self.stats['uniform_writes'] += 1
+
+    def _record(self, *command):
+        if self.record_commands:
+            self.commands.append(command)
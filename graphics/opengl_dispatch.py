@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+低开销GL调用层
+PyOpenGL的每次调用都要经过参数转换包装，并在调用后执行glGetError检查；Python驱动的渲染中，
+逐次调用的开销就是帧时间的上限 (见tools/benchmark_gl_dispatch.py)。这里提供:
+- 发布模式: 关闭OpenGL.ERROR_CHECKING和ERROR_LOGGING，必须在第一次导入OpenGL.GL之前设置
+- 缓存的原始函数指针: 绕过PyOpenGL的包装直接调用驱动入口，指针参数直接传地址
+- 预分配的uniform暂存区: 一次draw之前的uniform写入先拷贝到暂存区，同一位置只保留最后一次，
+  在绘制或切换程序前一起提交
+
+调试模式下 (默认) GL保持未加载，所有调用仍走PyOpenGL，出错时能得到带函数名和参数的异常
+"""
+import sys
+from ctypes import CFUNCTYPE, c_float, c_int, c_ssize_t, c_ubyte, c_uint, c_void_p, cast
+
+import numpy as np
+import OpenGL
+
+from config.renderer import RendererConfig
+
+
+def configure_error_checking(release=None):
+    """
+    按发布模式设置PyOpenGL的错误检查 (release为None时读取RendererConfig.ReleaseMode)
+    PyOpenGL在导入OpenGL.GL时决定是否安装错误检查，之后修改不再生效
+    Returns:
+        设置是否生效
+    """
+    if release is None:
+        release = RendererConfig.ReleaseMode
+    if not release:
+        return True
+    if 'OpenGL.GL' in sys.modules and OpenGL.ERROR_CHECKING:
+        print("⚠️ OpenGL.GL已导入，发布模式需要在导入之前设置 (RendererConfig.ReleaseMode)")
+        return False
+    OpenGL.ERROR_CHECKING = False
+    OpenGL.ERROR_LOGGING = False
+    return True
+
+
+configure_error_checking()
+
+from OpenGL import platform  # noqa: E402  必须在设置错误检查之后导入
+from OpenGL.GL import GL_FALSE  # noqa: E402
+
+# 热路径上的函数签名: 指针参数一律为c_void_p，直接传入预分配缓冲的地址，没有参数转换
+_SIGNATURES = {
+    'glUniform1i': (c_int, c_int),
+    'glUniform1iv': (c_int, c_int, c_void_p),
+    'glUniform1f': (c_int, c_float),
+    'glUniform1fv': (c_int, c_int, c_void_p),
+    'glUniform2fv': (c_int, c_int, c_void_p),
+    'glUniform3fv': (c_int, c_int, c_void_p),
+    'glUniform4fv': (c_int, c_int, c_void_p),
+    'glUniformMatrix3fv': (c_int, c_int, c_ubyte, c_void_p),
+    'glUniformMatrix4fv': (c_int, c_int, c_ubyte, c_void_p),
+    'glUseProgram': (c_uint,),
+    'glDrawElements': (c_uint, c_int, c_uint, c_void_p),
+    'glDrawElementsBaseVertex': (c_uint, c_int, c_uint, c_void_p, c_int),
+    'glDrawElementsInstanced': (c_uint, c_int, c_uint, c_void_p, c_int),
+    'glDrawElementsInstancedBaseVertex': (c_uint, c_int, c_uint, c_void_p, c_int, c_int),
+    'glBufferSubData': (c_uint, c_ssize_t, c_ssize_t, c_void_p),
+}
+
+# 暂存区中的uniform种类 -> (提交函数, 每个元素的分量数, 是否为矩阵)
+# int种类的值按int32的位模式保存在同一个暂存数组中
+UNIFORM_KINDS = {
+    'int': ('glUniform1iv', 1, False),
+    'float': ('glUniform1fv', 1, False),
+    'vec2': ('glUniform2fv', 2, False),
+    'vec3': ('glUniform3fv', 3, False),
+    'vec4': ('glUniform4fv', 4, False),
+    'mat3': ('glUniformMatrix3fv', 9, True),
+    'mat4': ('glUniformMatrix4fv', 16, True),
+}
+
+
+def resolve_function(name):
+    """从驱动获取函数地址并按_SIGNATURES创建ctypes函数，取不到时返回None"""
+    address = platform.PLATFORM.getExtensionProcedure(name.encode('ascii'))
+    if not address:
+        return None
+    return CFUNCTYPE(None, *_SIGNATURES[name])(address)
+
+
+def resolve_core_function(name):
+    """
+    GL 1.1的函数 (如glDrawElements) 从PyOpenGL底层的ctypes函数取地址，不是GL 1.1的函数返回None
+    WGL的wglGetProcAddress对opengl32.dll直接导出的GL 1.1入口返回NULL，resolve_function取不到
+    """
+    from OpenGL.raw.GL.VERSION import GL_1_1
+    function = getattr(GL_1_1, name, None)
+    if not function:  # 不存在，或库中没有该入口 (PyOpenGL的空函数指针)
+        return None
+    return CFUNCTYPE(None, *_SIGNATURES[name])(cast(function, c_void_p).value)
+
+
+class UniformBatch(object):
+    """
+    预分配的uniform暂存区
+    写入时把值拷贝到连续的32位数组中 (int种类按位拷贝)，同一位置再次写入时覆盖原来的槽位；
+    flush()按写入顺序逐个提交，指针为暂存区地址加偏移，不再创建临时数组
+    """
+
+    def __init__(self, capacity=1024):
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.address = self.data.ctypes.data
+        self.used = 0
+        self.pending = {}  # uniform位置 -> [种类, 偏移, 元素个数]
+        self.stats = {'writes': 0, 'coalesced': 0, 'flushes': 0, 'calls': 0}
+
+    def write(self, location, kind, values):
+        """values为展平的float32数组 (int种类为int32)，长度是该种类分量数的整数倍"""
+        components = UNIFORM_KINDS[kind][1]
+        size = len(values)
+        slot = self.pending.get(location)
+        self.stats['writes'] += 1
+        if slot is not None and slot[0] == kind and slot[2] * components == size:
+            self.stats['coalesced'] += 1
+            offset = slot[1]
+        else:
+            if self.used + size > len(self.data):
+                self._grow(self.used + size)
+            offset = self.used
+            self.used += size
+            self.pending[location] = [kind, offset, size // components]
+        target = self.data.view(np.int32) if values.dtype == np.int32 else self.data
+        target[offset:offset + size] = values
+
+    def _grow(self, required):
+        data = np.zeros(max(required, len(self.data) * 2), dtype=np.float32)
+        data.view(np.int32)[:self.used] = self.data.view(np.int32)[:self.used]  # 按位拷贝，保留int种类的值
+        self.data = data
+        self.address = data.ctypes.data
+
+    def flush(self, functions):
+        """用functions (GLDispatch) 中的原始函数提交所有待写入的uniform"""
+        if not self.pending:
+            return 0
+        for location, (kind, offset, count) in self.pending.items():
+            name, _, matrix = UNIFORM_KINDS[kind]
+            pointer = self.address + offset * 4
+            if matrix:
+                getattr(functions, name)(location, count, GL_FALSE, pointer)
+            else:
+                getattr(functions, name)(location, count, pointer)
+        calls = len(self.pending)
+        self.pending.clear()
+        self.used = 0
+        self.stats['flushes'] += 1
+        self.stats['calls'] += calls
+        return calls
+
+
+class GLDispatch(object):
+    """
+    热路径GL函数的原始指针缓存，load()之后以属性访问 (如GL.glDrawElementsBaseVertex)
+    需要在创建GL上下文之后加载；未加载时loaded为False，调用方继续使用PyOpenGL
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.uniform_batch = UniformBatch()
+        for name in _SIGNATURES:
+            setattr(self, name, None)
+
+    def load(self, resolve=resolve_function, fallback=resolve_core_function):
+        """
+        解析所有热路径函数，resolve取不到时再用fallback (GL 1.1的入口)，仍有取不到的时放弃加载 (保持PyOpenGL路径)
+        Returns:
+            是否加载成功
+        """
+        functions = {name: resolve(name) or fallback(name) for name in _SIGNATURES}
+        missing = [name for name, function in functions.items() if function is None]
+        if missing:
+            print(f"⚠️ 无法获取GL函数 {missing}，继续使用PyOpenGL调用")
+            return False
+        for name, function in functions.items():
+            setattr(self, name, function)
+        self.loaded = True
+        return True
+
+    def unload(self):
+        self.flush_uniforms()
+        for name in _SIGNATURES:
+            setattr(self, name, None)
+        self.loaded = False
+
+    def flush_uniforms(self):
+        """提交暂存的uniform (绘制之前、切换程序之前调用)"""
+        if self.uniform_batch.pending:
+            self.uniform_batch.flush(self)
+
+
+# 全局调度表；OpenGLRenderer在发布模式下创建窗口后加载
+GL = GLDispatch()
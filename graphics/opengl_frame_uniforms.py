@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+每帧共享的uniform缓冲 (std140)，绑定在固定的绑定点上，所有声明了FrameData块的Shader共用
+相机变化时整体更新一次，时间每帧只更新一个float，开销与加载的Shader数量无关
+
+GLSL中的声明 (见resources/shaders/vertex_shader.glsl):
+    layout(std140) uniform FrameData {
+        mat4 view;            // offset 0
+        mat4 projection;      // offset 64
+        mat4 viewProjection;  // offset 128
+        vec4 cameraPosition;  // offset 192 (xyz为位置)
+        float time;           // offset 208
+    };
+"""
+import numpy as np
+from OpenGL.GL import *
+from resource_manager.opengl_shader import UNIFORM_BLOCK_BINDINGS
+
+FRAME_DATA_BLOCK = "FrameData"
+FRAME_DATA_BINDING = UNIFORM_BLOCK_BINDINGS[FRAME_DATA_BLOCK]
+
+_VIEW_OFFSET = 0
+_PROJECTION_OFFSET = 16
+_VIEW_PROJECTION_OFFSET = 32
+_CAMERA_POSITION_OFFSET = 48
+_TIME_OFFSET = 52
+# std140下块的大小向上取整到16字节
+FRAME_DATA_FLOATS = 56
+
+
+def pack_frame_data(camera, time=0.0, out=None):
+    """
+    按std140布局打包相机数据
+    Returns:
+        (56,) float32，矩阵为列主序
+    """
+    data = np.zeros(FRAME_DATA_FLOATS, dtype=np.float32) if out is None else out
+    # Camera中的view/projection已按OpenGL列主序存储 (数学形式的转置)
+    data[_VIEW_OFFSET:_VIEW_OFFSET + 16] = np.asarray(camera.view_matrix, dtype=np.float32).reshape(-1)
+    data[_PROJECTION_OFFSET:_PROJECTION_OFFSET + 16] = \
+        np.asarray(camera.projection_matrix, dtype=np.float32).reshape(-1)
+    data[_VIEW_PROJECTION_OFFSET:_VIEW_PROJECTION_OFFSET + 16] = camera.get_view_projection_matrix().T.reshape(-1)
+    data[_CAMERA_POSITION_OFFSET:_CAMERA_POSITION_OFFSET + 3] = camera.position
+    data[_CAMERA_POSITION_OFFSET + 3] = 1.0
+    data[_TIME_OFFSET] = time
+    return data
+
+
+class OpenGLFrameUniforms(object):
+    def __init__(self, binding=FRAME_DATA_BINDING):
+        self.binding = binding
+        self.data = np.zeros(FRAME_DATA_FLOATS, dtype=np.float32)
+        self.ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, self.binding, self.ubo)
+        self.stats = {'uploads': 0, 'bytes_uploaded': 0}
+
+    def update_camera(self, camera):
+        """上传相机矩阵和位置 (保留当前时间)"""
+        pack_frame_data(camera, self.data[_TIME_OFFSET], out=self.data)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self.data.nbytes, self.data)
+        self._count(self.data.nbytes)
+
+    def update_time(self, time):
+        """只更新time (每帧一次)"""
+        self.data[_TIME_OFFSET] = time
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, _TIME_OFFSET * 4, 4, self.data[_TIME_OFFSET:_TIME_OFFSET + 1])
+        self._count(4)
+
+    def _count(self, nbytes):
+        self.stats['uploads'] += 1
+        self.stats['bytes_uploaded'] += nbytes
+
+    def cleanup(self):
+        glDeleteBuffers(1, [self.ubo])
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+OpenGL几何大缓冲 (mega-buffer)
+所有Mesh的顶点 (固定的8个float格式) 和索引放在同一对VBO/EBO中，由空闲链表分配器划分区间，
+所有Mesh共用一个VAO:
+- 每个Mesh记录自己的base_vertex和first_index，用glDrawElementsBaseVertex绘制，切换Mesh不再切换VAO
+- 区间按连续的 (index_count, first_index, base_vertex) 描述，可以填入间接绘制缓冲，
+  用glMultiDrawElementsIndirect一次提交多个绘制
+- 容量不足时缓冲按2倍增长，旧数据用glCopyBufferSubData在GPU上复制
+- Mesh被回收后留下的区间在下一帧开始时归还分配器
+没有索引的Mesh按顶点顺序生成索引，所有绘制都走索引路径
+"""
+import bisect
+import weakref
+from ctypes import c_void_p
+
+import numpy as np
+from OpenGL.GL import *
+
+VERTEX_FLOATS = 8
+VERTEX_BYTES = VERTEX_FLOATS * 4
+INDEX_BYTES = 4
+
+# 间接绘制命令: count, instanceCount, firstIndex, baseVertex, baseInstance
+INDIRECT_COMMAND_UINTS = 5
+
+
+class FreeListAllocator(object):
+    """首次适配的空闲链表分配器，释放时与相邻的空闲块合并 (单位由调用方决定)"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.free_blocks = [(0, capacity)] if capacity > 0 else []  # 按起点排序的 (offset, size)
+
+    @property
+    def free_size(self):
+        return sum(size for _, size in self.free_blocks)
+
+    def allocate(self, size):
+        """
+        Returns:
+            区间起点，没有足够大的空闲块时返回None
+        """
+        if size == 0:
+            return 0
+        for k, (offset, block_size) in enumerate(self.free_blocks):
+            if block_size >= size:
+                if block_size == size:
+                    del self.free_blocks[k]
+                else:
+                    self.free_blocks[k] = (offset + size, block_size - size)
+                return offset
+        return None
+
+    def free(self, offset, size):
+        if size == 0:
+            return
+        k = bisect.bisect_left(self.free_blocks, (offset, 0))
+        if k < len(self.free_blocks) and offset + size == self.free_blocks[k][0]:
+            size += self.free_blocks[k][1]
+            del self.free_blocks[k]
+        if k > 0 and sum(self.free_blocks[k - 1]) == offset:
+            offset, previous_size = self.free_blocks[k - 1]
+            size += previous_size
+            del self.free_blocks[k - 1]
+            k -= 1
+        self.free_blocks.insert(k, (offset, size))
+
+    def grow(self, capacity):
+        """扩大容量，新增部分与末尾的空闲块合并"""
+        if capacity <= self.capacity:
+            return
+        extra = capacity - self.capacity
+        self.free(self.capacity, extra)
+        self.capacity = capacity
+
+
+class GeometryAllocation(object):
+    """单个Mesh在大缓冲中的区间 (以顶点和索引为单位)"""
+
+    def __init__(self):
+        self.base_vertex = 0
+        self.vertex_count = 0
+        self.first_index = 0
+        self.index_count = 0
+        self.version = -1
+        self.index_source = None  # 上传的索引数组 (Mesh.indices或网格簇重排后的索引)
+        self.finalizer = None
+
+
+class OpenGLGeometryArena(object):
+    def __init__(self, state_cache=None, vertex_capacity=1 << 16, index_capacity=1 << 18):
+        """
+        Args:
+            state_cache: 可选的OpenGLStateCache，VAO绑定经过它以跳过重复绑定
+            vertex_capacity / index_capacity: 初始容量 (顶点数 / 索引数)，不足时自动增长
+        """
+        self.state_cache = state_cache
+        self.vertex_allocator = FreeListAllocator(vertex_capacity)
+        self.index_allocator = FreeListAllocator(index_capacity)
+        self._allocations = weakref.WeakKeyDictionary()  # Mesh -> GeometryAllocation
+        self._pending_free = []  # 被回收的Mesh留下的GeometryAllocation
+        self.instancing_configured = False  # 共享VAO中是否已配置实例属性
+        self.stats = {'uploads': 0, 'bytes_uploaded': 0, 'reallocations': 0}
+
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+        self.ebo = glGenBuffers(1)
+        self._bind_vertex_array()
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertex_capacity * VERTEX_BYTES, None, GL_DYNAMIC_DRAW)
+        self._setup_attributes()
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, index_capacity * INDEX_BYTES, None, GL_DYNAMIC_DRAW)
+
+    def __len__(self):
+        return len(self._allocations)
+
+    def __contains__(self, mesh):
+        return mesh in self._allocations
+
+    def bind(self, mesh):
+        """
+        绑定共享VAO，Mesh首次使用或修改后上传到自己的区间
+        Returns:
+            GeometryAllocation
+        """
+        self._bind_vertex_array()
+        allocation = self._allocations.get(mesh)
+        if allocation is None:
+            allocation = GeometryAllocation()
+            allocation.finalizer = weakref.finalize(mesh, self._pending_free.append, allocation)
+            self._allocations[mesh] = allocation
+        meshlets = mesh.meshlets
+        source = meshlets.indices if meshlets is not None else mesh.indices
+        if allocation.version != mesh.version or allocation.index_source is not source:
+            self._upload(mesh, allocation, source)
+        return allocation
+
+    def bind_instanced(self, mesh, instance_buffer):
+        """绑定Mesh并保证共享VAO中配置了实例缓冲的属性 (OpenGLInstanceBuffer)"""
+        allocation = self.bind(mesh)
+        if not self.instancing_configured:
+            instance_buffer.setup_attributes()
+            self.instancing_configured = True
+        return allocation
+
+    def release(self, mesh):
+        """立即归还Mesh占用的区间"""
+        allocation = self._allocations.pop(mesh, None)
+        if allocation is None:
+            return
+        allocation.finalizer.detach()
+        self._free(allocation)
+
+    def collect_garbage(self):
+        """归还已被回收的Mesh留下的区间，每帧开始时调用"""
+        while self._pending_free:
+            self._free(self._pending_free.pop())
+
+    def clear(self):
+        for mesh in list(self._allocations.keys()):
+            self.release(mesh)
+        self.collect_garbage()
+
+    def cleanup(self):
+        self.clear()
+        if self.state_cache is not None:
+            self.state_cache.forget_vertex_array(self.vao)
+        glDeleteVertexArrays(1, [self.vao])
+        glDeleteBuffers(2, [self.vbo, self.ebo])
+
+    def _bind_vertex_array(self):
+        if self.state_cache is not None:
+            self.state_cache.bind_vertex_array(self.vao)
+        else:
+            glBindVertexArray(self.vao)
+
+    def _free(self, allocation):
+        self.vertex_allocator.free(allocation.base_vertex, allocation.vertex_count)
+        self.index_allocator.free(allocation.first_index, allocation.index_count)
+        allocation.vertex_count = allocation.index_count = 0
+
+    def _upload(self, mesh, allocation, source):
+        """上传顶点和索引，数量变化时重新分配区间，调用前共享VAO已绑定"""
+        vertices = np.ascontiguousarray(mesh.vertices, dtype=np.float32)
+        vertex_count = len(vertices) // VERTEX_FLOATS
+        indices = np.ascontiguousarray(source, dtype=np.uint32)
+        if len(indices) == 0:
+            indices = np.arange(vertex_count - vertex_count % 3, dtype=np.uint32)
+
+        if vertex_count != allocation.vertex_count or len(indices) != allocation.index_count:
+            self._free(allocation)
+            allocation.base_vertex = self._allocate(self.vertex_allocator, vertex_count, self._grow_vertices)
+            allocation.vertex_count = vertex_count
+            allocation.first_index = self._allocate(self.index_allocator, len(indices), self._grow_indices)
+            allocation.index_count = len(indices)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, allocation.base_vertex * VERTEX_BYTES, vertices.nbytes, vertices)
+        if len(indices) > 0:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            glBufferSubData(GL_ELEMENT_ARRAY_BUFFER, allocation.first_index * INDEX_BYTES, indices.nbytes, indices)
+        allocation.index_source = source
+        allocation.version = mesh.version
+        self.stats['uploads'] += 1
+        self.stats['bytes_uploaded'] += vertices.nbytes + indices.nbytes
+
+    @staticmethod
+    def _allocate(allocator, size, grow):
+        offset = allocator.allocate(size)
+        if offset is None:
+            grow(max(allocator.capacity * 2, allocator.capacity + size))
+            offset = allocator.allocate(size)
+        return offset
+
+    def _grow_vertices(self, capacity):
+        self.vbo = self._grow_buffer(self.vbo, self.vertex_allocator.capacity * VERTEX_BYTES, capacity * VERTEX_BYTES)
+        self.vertex_allocator.grow(capacity)
+        # 顶点属性记录的是旧缓冲，需要重新指向新的VBO
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        self._setup_attributes()
+
+    def _grow_indices(self, capacity):
+        self.ebo = self._grow_buffer(self.ebo, self.index_allocator.capacity * INDEX_BYTES, capacity * INDEX_BYTES)
+        self.index_allocator.grow(capacity)
+        # 共享VAO已绑定，GL_ELEMENT_ARRAY_BUFFER的绑定记录在VAO中
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+
+    def _grow_buffer(self, old_buffer, old_bytes, new_bytes):
+        """分配更大的缓冲并在GPU上复制旧数据"""
+        new_buffer = glGenBuffers(1)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, new_buffer)
+        glBufferData(GL_COPY_WRITE_BUFFER, new_bytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_COPY_READ_BUFFER, old_buffer)
+        glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, 0, 0, old_bytes)
+        glDeleteBuffers(1, [old_buffer])
+        self.stats['reallocations'] += 1
+        return new_buffer
+
+    @staticmethod
+    def _setup_attributes():
+        # 固定的顶点属性设置 - 8个float格式 [x, y, z, nx, ny, nz, u, v]
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, VERTEX_BYTES, c_void_p(0))
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, VERTEX_BYTES, c_void_p(12))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, VERTEX_BYTES, c_void_p(24))
+        glEnableVertexAttribArray(2)
+
+
+class OpenGLIndirectBuffer(object):
+    """glMultiDrawElementsIndirect的命令缓冲，每次提交前由CPU填充"""
+
+    def __init__(self):
+        self.buffer = glGenBuffers(1)
+        self.capacity = 0
+
+    @staticmethod
+    def pack(allocations, instance_counts):
+        """
+        Args:
+            allocations: GeometryAllocation列表
+            instance_counts: 每个命令的实例数，baseInstance按顺序累加 (实例缓冲中的起始下标)
+        Returns:
+            (K, 5) uint32命令数组
+        """
+        instance_counts = np.asarray(instance_counts, dtype=np.uint32)
+        commands = np.empty((len(allocations), INDIRECT_COMMAND_UINTS), dtype=np.uint32)
+        commands[:, 0] = [allocation.index_count for allocation in allocations]
+        commands[:, 1] = instance_counts
+        commands[:, 2] = [allocation.first_index for allocation in allocations]
+        commands[:, 3] = [allocation.base_vertex for allocation in allocations]
+        commands[:, 4] = np.cumsum(instance_counts) - instance_counts
+        return commands
+
+    def upload(self, commands):
+        """上传命令 (调用后GL_DRAW_INDIRECT_BUFFER绑定为该缓冲)"""
+        glBindBuffer(GL_DRAW_INDIRECT_BUFFER, self.buffer)
+        if commands.nbytes > self.capacity:
+            self.capacity = max(commands.nbytes, self.capacity * 2)
+        glBufferData(GL_DRAW_INDIRECT_BUFFER, self.capacity, None, GL_STREAM_DRAW)
+        glBufferSubData(GL_DRAW_INDIRECT_BUFFER, 0, commands.nbytes, commands)
+
+    def cleanup(self):
+        glDeleteBuffers(1, [self.buffer])
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+OpenGL实例缓冲 - 实例化绘制时每个实例的模型矩阵和法线矩阵
+布局: 每个实例25个float = 列主序mat4模型矩阵 (location 3-6) + 列主序mat3法线矩阵 (location 7-9)，divisor为1
+所有Mesh的VAO共用同一个缓冲；每个实例组上传前先重新分配 (orphan)，避免等待GPU读完上一组
+"""
+from ctypes import c_void_p
+
+import numpy as np
+from graphics.opengl_dispatch import GL
+from OpenGL.GL import *
+
+INSTANCE_MODEL_LOCATION = 3
+INSTANCE_NORMAL_LOCATION = 7
+INSTANCE_FLOATS = 16 + 9
+
+
+class OpenGLInstanceBuffer(object):
+    def __init__(self):
+        self.vbo = glGenBuffers(1)
+        self.capacity = 0  # 已分配的字节数
+        self.staging = np.empty((0, INSTANCE_FLOATS), dtype=np.float32)  # 复用的打包缓冲，按2倍增长
+        self.stats = {'uploads': 0, 'bytes_uploaded': 0}
+
+    @staticmethod
+    def pack(model_matrices, normal_matrices):
+        """把 (K, 16) 模型矩阵和 (K, 9) 法线矩阵交错为 (K, 25) float32"""
+        data = np.empty((len(model_matrices), INSTANCE_FLOATS), dtype=np.float32)
+        data[:, :16] = model_matrices
+        data[:, 16:] = normal_matrices
+        return data
+
+    def stage(self, model_matrices, normal_matrices):
+        """
+        与pack()相同，但写入复用的暂存缓冲，不为每个实例组分配新数组
+        model_matrices / normal_matrices也可以是多个数组的列表 (多重绘制时按顺序拼接)
+        Returns:
+            暂存缓冲的 (K, 25) 视图，下一次stage()之前有效
+        """
+        if isinstance(model_matrices, list):
+            counts = [len(models) for models in model_matrices]
+        else:
+            counts = [len(model_matrices)]
+            model_matrices, normal_matrices = [model_matrices], [normal_matrices]
+        total = sum(counts)
+        if total > len(self.staging):
+            self.staging = np.empty((max(total, len(self.staging) * 2), INSTANCE_FLOATS), dtype=np.float32)
+        start = 0
+        for count, models, normals in zip(counts, model_matrices, normal_matrices):
+            self.staging[start:start + count, :16] = models
+            self.staging[start:start + count, 16:] = normals
+            start += count
+        return self.staging[:total]
+
+    def upload(self, data):
+        """上传一组实例数据 (调用后GL_ARRAY_BUFFER绑定为实例缓冲)"""
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if data.nbytes > self.capacity:
+            # 按2倍增长，减少重新分配
+            self.capacity = max(data.nbytes, self.capacity * 2)
+        glBufferData(GL_ARRAY_BUFFER, self.capacity, None, GL_STREAM_DRAW)
+        if GL.loaded:
+            GL.glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data.ctypes.data)
+        else:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        self.stats['uploads'] += 1
+        self.stats['bytes_uploaded'] += data.nbytes
+
+    def setup_attributes(self):
+        """在当前绑定的VAO上配置实例属性 (每个VAO只需一次)"""
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if self.capacity == 0:
+            # 保证非实例化绘制读取divisor属性时缓冲区不为空
+            self.capacity = INSTANCE_FLOATS * 4
+            glBufferData(GL_ARRAY_BUFFER, self.capacity, None, GL_STREAM_DRAW)
+        stride = INSTANCE_FLOATS * 4
+        for column in range(4):
+            location = INSTANCE_MODEL_LOCATION + column
+            glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, stride, c_void_p(column * 16))
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+        for column in range(3):
+            location = INSTANCE_NORMAL_LOCATION + column
+            glVertexAttribPointer(location, 3, GL_FLOAT, GL_FALSE, stride, c_void_p(64 + column * 12))
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+
+    def cleanup(self):
+        glDeleteBuffers(1, [self.vbo])
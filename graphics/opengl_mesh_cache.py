@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+OpenGL网格缓存 - 每个Mesh只创建一次VAO/VBO/EBO
+- 首次绘制时上传并配置好顶点属性，之后直接绑定VAO
+- Mesh.version变化 (mark_modified) 时重新上传: 大小不变用glBufferSubData，否则重新分配
+- 显式release()或Mesh被垃圾回收后释放显存；回收发生在任意时刻，所以只记录待删除的对象，
+  在下一帧开始 (有GL上下文时) 统一删除
+"""
+import weakref
+from ctypes import c_void_p
+
+import numpy as np
+from OpenGL.GL import *
+
+
+class OpenGLMeshBuffer(object):
+    """单个Mesh在GPU上的缓冲区"""
+
+    def __init__(self):
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+        self.ebo = glGenBuffers(1)
+        self.version = -1
+        self.vertex_bytes = 0
+        self.index_bytes = 0
+        self.index_source = None  # 上传的索引数组 (Mesh.indices或网格簇重排后的索引)
+        self.index_count = 0
+        self.vertex_count = 0
+        self.instancing_configured = False  # VAO中是否已配置实例属性
+        self.finalizer = None
+
+    def handles(self):
+        return self.vao, self.vbo, self.ebo
+
+
+class OpenGLMeshCache(object):
+    def __init__(self, state_cache=None):
+        """
+        Args:
+            state_cache: 可选的OpenGLStateCache，VAO绑定经过它以跳过重复绑定
+        """
+        self.state_cache = state_cache
+        self._buffers = weakref.WeakKeyDictionary()  # Mesh -> OpenGLMeshBuffer
+        self._pending_delete = []  # 被回收的Mesh留下的 (vao, vbo, ebo)
+        self.stats = {'uploads': 0, 'sub_uploads': 0, 'bytes_uploaded': 0}
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def __contains__(self, mesh):
+        return mesh in self._buffers
+
+    def bind(self, mesh):
+        """
+        绑定Mesh的VAO，需要时先上传数据
+        Returns:
+            OpenGLMeshBuffer (index_count为0时使用glDrawArrays)
+        """
+        buffer = self._buffers.get(mesh)
+        if buffer is None:
+            buffer = OpenGLMeshBuffer()
+            buffer.finalizer = weakref.finalize(mesh, self._pending_delete.append, buffer.handles())
+            self._buffers[mesh] = buffer
+            self._bind_vertex_array(buffer.vao)
+            self._upload(mesh, buffer)
+            self._setup_attributes(mesh)
+            return buffer
+
+        self._bind_vertex_array(buffer.vao)
+        meshlets = mesh.meshlets
+        indices = meshlets.indices if meshlets is not None else mesh.indices
+        if buffer.version != mesh.version or buffer.index_source is not indices:
+            self._upload(mesh, buffer)
+        return buffer
+
+    def bind_instanced(self, mesh, instance_buffer):
+        """绑定Mesh的VAO并保证其中配置了实例缓冲的属性 (OpenGLInstanceBuffer)"""
+        buffer = self.bind(mesh)
+        if not buffer.instancing_configured:
+            instance_buffer.setup_attributes()
+            buffer.instancing_configured = True
+        return buffer
+
+    def release(self, mesh):
+        """立即释放Mesh的显存 (需要当前有GL上下文)"""
+        buffer = self._buffers.pop(mesh, None)
+        if buffer is None:
+            return
+        buffer.finalizer.detach()
+        self._delete(buffer.handles())
+
+    def collect_garbage(self):
+        """删除已被回收的Mesh留下的缓冲区，每帧开始时调用"""
+        while self._pending_delete:
+            self._delete(self._pending_delete.pop())
+
+    def clear(self):
+        for mesh in list(self._buffers.keys()):
+            self.release(mesh)
+        self.collect_garbage()
+
+    def _bind_vertex_array(self, vao):
+        if self.state_cache is not None:
+            self.state_cache.bind_vertex_array(vao)
+        else:
+            glBindVertexArray(vao)
+
+    def _upload(self, mesh, buffer):
+        """上传顶点和索引，调用前VAO已绑定 (GL_ELEMENT_ARRAY_BUFFER绑定记录在VAO中)"""
+        vertices = np.ascontiguousarray(mesh.vertices, dtype=np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, buffer.vbo)
+        self._write(GL_ARRAY_BUFFER, vertices, buffer.vertex_bytes)
+        buffer.vertex_bytes = vertices.nbytes
+        buffer.vertex_count = mesh.get_vertex_count()
+
+        meshlets = mesh.meshlets
+        source = meshlets.indices if meshlets is not None else mesh.indices
+        indices = np.ascontiguousarray(source, dtype=np.uint32)
+        if len(indices) > 0:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, buffer.ebo)
+            self._write(GL_ELEMENT_ARRAY_BUFFER, indices, buffer.index_bytes)
+        buffer.index_bytes = indices.nbytes
+        buffer.index_count = len(indices)
+        buffer.index_source = source
+        buffer.version = mesh.version
+
+    def _write(self, target, data, allocated_bytes):
+        """大小不变时原地更新，否则重新分配"""
+        if data.nbytes == allocated_bytes and allocated_bytes > 0:
+            glBufferSubData(target, 0, data.nbytes, data)
+            self.stats['sub_uploads'] += 1
+        else:
+            glBufferData(target, data.nbytes, data, GL_STATIC_DRAW)
+            self.stats['uploads'] += 1
+        self.stats['bytes_uploaded'] += data.nbytes
+
+    @staticmethod
+    def _setup_attributes(mesh):
+        # 固定的顶点属性设置 - 8个float格式 [x, y, z, nx, ny, nz, u, v]
+        itemsize = np.dtype(np.float32).itemsize
+        stride = mesh._stride * itemsize
+
+        # 位置属性 (location = 0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, c_void_p(0))
+        glEnableVertexAttribArray(0)
+
+        # 法线属性 (location = 1)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, c_void_p(3 * itemsize))
+        glEnableVertexAttribArray(1)
+
+        # UV属性 (location = 2)
+        glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, stride, c_void_p(6 * itemsize))
+        glEnableVertexAttribArray(2)
+
+    def _delete(self, handles):
+        vao, vbo, ebo = handles
+        if self.state_cache is not None:
+            self.state_cache.forget_vertex_array(vao)
+        glDeleteVertexArrays(1, [vao])
+        glDeleteBuffers(2, [vbo, ebo])
@@ -1,85 +1,135 @@
 ﻿# -*- coding:utf-8 -*-
 
+import time
 from ctypes import c_void_p
+
+import numpy as np
+from config.renderer import RendererConfig
+from graphics.opengl_dispatch import GL  # 必须在OpenGL.GL之前导入 (发布模式关闭错误检查)
 from OpenGL.GL import *
-from graphics.renderer import Renderer, RenderObject
+from graphics.renderer import Renderer, RenderObject, viewport_pixels
+from graphics.command_list import BIND_MATERIAL, DRAW, DRAW_INSTANCED, SET_PIPELINE
 from graphics.factory import create_window
+from graphics.opengl_frame_uniforms import FRAME_DATA_BLOCK, OpenGLFrameUniforms
+from graphics.opengl_geometry_arena import INDEX_BYTES, OpenGLGeometryArena, OpenGLIndirectBuffer
+from graphics.opengl_instance_buffer import OpenGLInstanceBuffer
+from graphics.opengl_mesh_cache import OpenGLMeshCache
+from graphics.opengl_state_cache import OpenGLStateCache
 # TODO 目前感觉graphics不应该import上层的resource_manager，要么是texture的位置放置不对，要么是这里的依赖不应该出现
 from resource_manager.opengl_texture import OpenGLTexture
+from util.geometry import normal_matrices
 
 
 class OpenGLRenderObject(RenderObject):
-    def __init__(self, model_matrix, mesh, material):
-        super().__init__(model_matrix, mesh, material)
-
-    def render(self):
-        shader = self.material.shader
-        shader.use()
+    def __init__(self, model_matrix, mesh, material, draw_ranges=None, normal_matrices=None):
+        super().__init__(model_matrix, mesh, material, draw_ranges, normal_matrices)
+
+    def render(self, renderer):
+        instanced = self.model_matrix.ndim == 2
+        shader = renderer.get_instanced_shader(self.material.shader) if instanced else self.material.shader
+        self.bind_material(renderer, shader)
+        self.submit(renderer, shader)
+
+    def submit(self, renderer, shader):
+        """在已绑定程序和材质的状态下上传模型矩阵并绘制"""
+        if self.model_matrix.ndim == 2:
+            self._render_instanced(renderer)
+            return
+        shader.set_mat4("model", self.model_matrix)
+        shader.set_mat3("normalMatrix", self.column_normal_matrices())
+
+        # 顶点数据只在首次绘制或Mesh修改后上传，之后直接绑定缓存的VAO
+        # 有网格簇时EBO中是按簇重排的索引，簇的索引区间在其中连续
+        if renderer.geometry_arena is not None:
+            self._render_base_vertex(renderer)
+            return
+        state_cache = renderer.state_cache
+        buffer = renderer.mesh_cache.bind(self.mesh)
+        GL.flush_uniforms()
+        if self.draw_ranges is not None:
+            for start, count in zip(*self.draw_ranges):
+                glDrawElements(GL_TRIANGLES, int(count), GL_UNSIGNED_INT, c_void_p(int(start) * 4))
+            state_cache.count_draw(len(self.draw_ranges[0]))
+        elif buffer.index_count > 0:
+            glDrawElements(GL_TRIANGLES, buffer.index_count, GL_UNSIGNED_INT, None)
+            state_cache.count_draw()
+        else:
+            glDrawArrays(GL_TRIANGLES, 0, buffer.vertex_count)
+            state_cache.count_draw()
+
+    def column_normal_matrices(self):
+        """
+        列主序的法线矩阵 (单个绘制为 (9,)，实例化为 (K, 9))
+        RenderSystem已批量计算好；直接调用Renderer.draw且没有提供时在这里补算
+        """
+        if self.normal_matrices is None:
+            models = self.model_matrix.reshape(-1, 4, 4).transpose(0, 2, 1)
+            normals = normal_matrices(models).transpose(0, 2, 1).reshape(-1, 9)
+            self.normal_matrices = normals if self.model_matrix.ndim == 2 else normals[0]
+        return self.normal_matrices
+
+    def bind_material(self, renderer, shader):
+        """切换程序并上传材质属性 (经过状态缓存，重复的绑定和未变化的uniform被跳过)"""
+        state_cache = renderer.state_cache
+        state_cache.use_program(shader)
 
         texture_unit_index = 0  # 从 0 号纹理单元开始
         for prop_name, prop_value in self.material.properties.items():
             if prop_value is None:
                 continue
 
-            # 简单判断类型：如果是 Texture，我们假设 prop_value 为 Texture 实例
-            # 如果是 float，我们用 glUniform1f 绑定
+            # uniform位置和类型在Shader链接时已反射缓存，值未变化的uniform不会重新上传
             if isinstance(prop_value, OpenGLTexture):  # 说明是 Texture (带 texture_id)
-                tex_location = glGetUniformLocation(shader.shader_program, prop_name)
-                if tex_location == -1:
-                    # 如果 Shader 里没有对应 uniform，可能要报个警告或者跳过
-                    print(f"Warning: uniform '{prop_name}' not found in Shader")
+                if not shader.has_uniform(prop_name):
+                    # 如果 Shader 里没有对应 uniform，只提示一次
+                    if prop_name not in shader.missing_uniform_warnings:
+                        shader.missing_uniform_warnings.add(prop_name)
+                        print(f"Warning: uniform '{prop_name}' not found in Shader")
                     continue
 
-                glActiveTexture(GL_TEXTURE0 + texture_unit_index)
-                glBindTexture(GL_TEXTURE_2D, prop_value.id)
-                glUniform1i(tex_location, texture_unit_index)
+                # 与上一个绘制使用相同纹理时不重新绑定
+                state_cache.bind_texture(texture_unit_index, prop_value.id)
+                shader.set_texture(prop_name, texture_unit_index)
                 texture_unit_index += 1
 
             elif isinstance(prop_value, float):
                 # 假设这个 uniform 在 GLSL 中也是 float
-                float_location = glGetUniformLocation(shader.shader_program, prop_name)
-                if float_location != -1:
-                    glUniform1f(float_location, prop_value)
-
-        model_loc = glGetUniformLocation(shader.shader_program, "model")
-        glUniformMatrix4fv(model_loc, 1, GL_FALSE, self.model_matrix)
-
-        VAO = glGenVertexArrays(1)
-        VBO = glGenBuffers(1)
-        EBO = glGenBuffers(1)
-
-        glBindVertexArray(VAO)
-        glBindBuffer(GL_ARRAY_BUFFER, VBO)
-        glBufferData(GL_ARRAY_BUFFER, self.mesh.vertices.nbytes, self.mesh.vertices, GL_STATIC_DRAW)
-
-        if len(self.mesh.indices) > 0:
-            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, EBO)
-            glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.mesh.indices.nbytes, self.mesh.indices, GL_STATIC_DRAW)
-
-        # 固定的顶点属性设置 - 8个float格式 [x, y, z, nx, ny, nz, u, v]
-        stride = 8 * self.mesh.vertices.itemsize
-        
-        # 位置属性 (location = 0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, c_void_p(0))
-        glEnableVertexAttribArray(0)
-
-        # 法线属性 (location = 1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, c_void_p(3 * self.mesh.vertices.itemsize))
-        glEnableVertexAttribArray(1)
-
-        # UV属性 (location = 2)
-        glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, stride, c_void_p(6 * self.mesh.vertices.itemsize))
-        glEnableVertexAttribArray(2)
-
-        if len(self.mesh.indices) > 0:
-            glDrawElements(GL_TRIANGLES, len(self.mesh.indices), GL_UNSIGNED_INT, None)
+                shader.set_float(prop_name, prop_value)
+
+    def _render_base_vertex(self, renderer):
+        """从几何大缓冲中绘制 (共享VAO)，多个索引区间一次glMultiDrawElementsBaseVertex提交"""
+        allocation = renderer.geometry_arena.bind(self.mesh)
+        GL.flush_uniforms()
+        if self.draw_ranges is None:
+            (GL.glDrawElementsBaseVertex or glDrawElementsBaseVertex)(
+                GL_TRIANGLES, allocation.index_count, GL_UNSIGNED_INT, c_void_p(allocation.first_index * INDEX_BYTES),
+                allocation.base_vertex)
         else:
-            vertex_count = self.mesh.get_vertex_count()
-            glDrawArrays(GL_TRIANGLES, 0, vertex_count)
-
-        glDeleteVertexArrays(1, [VAO])
-        glDeleteBuffers(1, [VBO])
-        glDeleteBuffers(1, [EBO])
+            starts, counts = self.draw_ranges
+            offsets = (np.asarray(starts, dtype=np.int64) + allocation.first_index) * INDEX_BYTES
+            glMultiDrawElementsBaseVertex(GL_TRIANGLES, np.asarray(counts, dtype=np.int32), GL_UNSIGNED_INT,
+                                          (c_void_p * len(offsets))(*offsets.tolist()), len(offsets),
+                                          np.full(len(offsets), allocation.base_vertex, dtype=np.int32))
+        renderer.state_cache.count_draw()
+
+    def _render_instanced(self, renderer):
+        """一次glDrawElementsInstanced绘制所有实例，实例的矩阵经由实例缓冲传入"""
+        renderer.instance_buffer.upload(renderer.instance_buffer.stage(self.model_matrix,
+                                                                       self.column_normal_matrices()))
+        count = len(self.model_matrix)
+        GL.flush_uniforms()
+        if renderer.geometry_arena is not None:
+            allocation = renderer.geometry_arena.bind_instanced(self.mesh, renderer.instance_buffer)
+            (GL.glDrawElementsInstancedBaseVertex or glDrawElementsInstancedBaseVertex)(
+                GL_TRIANGLES, allocation.index_count, GL_UNSIGNED_INT, c_void_p(allocation.first_index * INDEX_BYTES),
+                count, allocation.base_vertex)
+        else:
+            buffer = renderer.mesh_cache.bind_instanced(self.mesh, renderer.instance_buffer)
+            if buffer.index_count > 0:
+                glDrawElementsInstanced(GL_TRIANGLES, buffer.index_count, GL_UNSIGNED_INT, None, count)
+            else:
+                glDrawArraysInstanced(GL_TRIANGLES, 0, buffer.vertex_count, count)
+        renderer.state_cache.count_draw()
 
 
 class OpenGLRenderer(Renderer):
@@ -90,6 +140,23 @@ class OpenGLRenderer(Renderer):
         self.window = None
         self.render_objects = []
         self.shaders = []
+        self.state_cache = OpenGLStateCache()
+        self.mesh_cache = OpenGLMeshCache(self.state_cache)
+        # 上一帧的绘制调用与状态切换次数 (见OpenGLStateCache.stats)
+        self.frame_stats = dict(self.state_cache.stats)
+        self.instance_buffer = None
+        self.instanced_shaders = {}  # Shader -> 实例化变体
+        self.camera = None  # 最近一次setup_camera的相机，新注册的旧式Shader需要补传矩阵
+        # 每帧共享的uniform缓冲 (FrameData块)；没有声明该块的旧式Shader仍逐个上传view/projection
+        self.frame_uniforms = None
+        self.legacy_camera_shaders = []
+        self.start_time = time.perf_counter()
+        # 几何大缓冲 (GL 3.2起支持glDrawElementsBaseVertex时使用，否则退回每个Mesh一个VAO的mesh_cache)
+        self.geometry_arena = None
+        # 连续的同材质绘制合并为一次glMultiDrawElementsIndirect (需要GL 4.3)
+        self.indirect_buffer = None
+        self.multi_draw_indirect_enabled = True
+        self.multi_draw_stats = {'multi_draws': 0, 'merged_draws': 0}
 
     def initialize(self, width, height, title):
         self.width = width
@@ -98,28 +165,193 @@ class OpenGLRenderer(Renderer):
 
         self.window = create_window()
         self.window.initialize(width, height, title)
+        if RendererConfig.ReleaseMode:
+            # 上下文创建后缓存热路径函数的原始指针，并启用uniform暂存区
+            GL.load()
 
         # init opengl
         self.init_opengl()
+        self.instance_buffer = OpenGLInstanceBuffer()
+        self.frame_uniforms = OpenGLFrameUniforms()
+        self.start_time = time.perf_counter()
+        version = (int(glGetIntegerv(GL_MAJOR_VERSION)), int(glGetIntegerv(GL_MINOR_VERSION)))
+        if version >= (3, 2):
+            self.geometry_arena = OpenGLGeometryArena(self.state_cache)
+        if version >= (4, 3):
+            self.indirect_buffer = OpenGLIndirectBuffer()
 
         # init shaders
         # self.shader_program = self.create_shader_program("graphics/shaders/vertex_shader.glsl",
         #                                                  "graphics/shaders/fragment_shader.glsl")
 
     def render(self, render_object_datas):
+        """单视口渲染 (使用当前已上传的相机)"""
+        self.begin_frame()
+        self.draw(render_object_datas)
+        self.end_frame()
+
+    def begin_frame(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(0, 0, self.width, self.height)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         self.render_objects = []
-        for render_data in render_object_datas:
-            render_object = OpenGLRenderObject(render_data[0], render_data[1], render_data[2])
-            render_object.render()
-            self.render_objects.append(render_object)
-
+        self.mesh_cache.collect_garbage()
+        if self.geometry_arena is not None:
+            self.geometry_arena.collect_garbage()
+        self.multi_draw_stats = dict.fromkeys(self.multi_draw_stats, 0)
+        # 帧之间可能有纹理创建等直接修改绑定的调用，每帧从未知状态开始
+        self.state_cache.invalidate()
+        self.state_cache.reset_stats()
+        self.frame_uniforms.update_time(time.perf_counter() - self.start_time)
+
+    def begin_view(self, camera):
+        target = camera.render_target
+        if target is not None:
+            glBindFramebuffer(GL_FRAMEBUFFER, target.framebuffer_id)
+            width, height = target.width, target.height
+        else:
+            glBindFramebuffer(GL_FRAMEBUFFER, 0)
+            width, height = self.width, self.height
+
+        x, y, w, h = viewport_pixels(camera.viewport_rect, width, height)
+        glViewport(x, y, w, h)
+
+        # 只清除自己的视口区域；深度总是清除，避免被先渲染的相机遮挡
+        clear_bits = GL_DEPTH_BUFFER_BIT
+        if camera.clear_color is not None:
+            glClearColor(*camera.clear_color)
+            clear_bits |= GL_COLOR_BUFFER_BIT
+        glEnable(GL_SCISSOR_TEST)
+        glScissor(x, y, w, h)
+        glClear(clear_bits)
+        glDisable(GL_SCISSOR_TEST)
+
+    def draw(self, render_object_datas):
+        render_objects = [OpenGLRenderObject(*render_data) for render_data in render_object_datas]
+        self._submit(render_objects)
+        self.render_objects.extend(render_objects)
+
+    def execute(self, command_lists):
+        """
+        按命令列表绘制: 每个BIND_MATERIAL之后的绘制共享管线和材质，只绑定一次
+        命令转换得到的绘制对象缓存在CommandList.prepared中，列表被复用时不再转换
+        """
+        for command_list in command_lists:
+            if command_list.prepared is None:
+                command_list.prepared = self._prepare_commands(command_list)
+            for shader, instanced, render_objects in command_list.prepared:
+                pipeline = self.get_instanced_shader(shader) if instanced else shader
+                render_objects[0].bind_material(self, pipeline)
+                self._submit(render_objects, pipeline)
+                self.render_objects.extend(render_objects)
+
+    @staticmethod
+    def _prepare_commands(command_list):
+        """
+        Returns:
+            [(shader, instanced, [OpenGLRenderObject, ...]), ...] 每个材质绑定一组
+        """
+        groups = []
+        shader, instanced, material, render_objects = None, False, None, None
+        for command in command_list.commands:
+            op = command[0]
+            if op == SET_PIPELINE:
+                _, shader, instanced = command
+            elif op == BIND_MATERIAL:
+                material = command[1]
+                render_objects = []
+                groups.append((shader, instanced, render_objects))
+            elif op == DRAW:
+                _, mesh, model_matrix, normal_matrix, draw_ranges = command
+                render_objects.append(OpenGLRenderObject(model_matrix, mesh, material, draw_ranges, normal_matrix))
+            elif op == DRAW_INSTANCED:
+                _, mesh, model_matrices, normal_matrices = command
+                render_objects.append(OpenGLRenderObject(model_matrices, mesh, material, None, normal_matrices))
+        return groups
+
+    def _submit(self, render_objects, shader=None):
+        """
+        依次绘制，连续的同材质绘制合并为一次间接多重绘制
+        shader不为None时程序和材质已经绑定，直到多重绘制切换为实例化变体为止
+        """
+        multi_draw = self.multi_draw_indirect_enabled and self.indirect_buffer is not None
+        start = 0
+        while start < len(render_objects):
+            end = start + 1
+            if multi_draw and render_objects[start].draw_ranges is None:
+                # 排序后相同材质的绘制相邻，只有模型矩阵不同
+                material = render_objects[start].material
+                while end < len(render_objects) and render_objects[end].material is material \
+                        and render_objects[end].draw_ranges is None:
+                    end += 1
+            if end - start > 1:
+                self._multi_draw_indirect(render_objects[start:end])
+                shader = None
+            elif shader is not None:
+                render_objects[start].submit(self, shader)
+            else:
+                render_objects[start].render(self)
+            start = end
+
+    def _multi_draw_indirect(self, render_objects):
+        """
+        用一次glMultiDrawElementsIndirect提交多个相同材质的绘制
+        每个绘制的模型矩阵和法线矩阵按baseInstance写入实例缓冲，使用Shader的实例化变体
+        """
+        first = render_objects[0]
+        first.bind_material(self, self.get_instanced_shader(first.material.shader))
+        allocations = []
+        models = []
+        normals = []
+        for render_object in render_objects:
+            allocations.append(self.geometry_arena.bind_instanced(render_object.mesh, self.instance_buffer))
+            models.append(render_object.model_matrix.reshape(-1, 16))
+            normals.append(render_object.column_normal_matrices().reshape(-1, 9))
+        commands = self.indirect_buffer.pack(allocations, [len(model) for model in models])
+        self.instance_buffer.upload(self.instance_buffer.stage(models, normals))
+        self.indirect_buffer.upload(commands)
+        GL.flush_uniforms()
+        glMultiDrawElementsIndirect(GL_TRIANGLES, GL_UNSIGNED_INT, None, len(commands), 0)
+        self.state_cache.count_draw()
+        self.multi_draw_stats['multi_draws'] += 1
+        self.multi_draw_stats['merged_draws'] += len(commands)
+
+    def end_frame(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
         self.window.swap_buffers()
+        self.frame_stats = dict(self.state_cache.stats)
+
+    def get_instanced_shader(self, shader):
+        """获取Shader的实例化变体 (定义INSTANCING宏)，新编译的变体注册后立即上传当前相机"""
+        variant = self.instanced_shaders.get(shader)
+        if variant is not None:
+            return variant
+        variant, created = shader.get_variant("INSTANCING")
+        self.instanced_shaders[shader] = variant
+        if created:
+            self.add_shader(variant)
+        return variant
+
+    def release_mesh(self, mesh):
+        self.mesh_cache.release(mesh)
+        if self.geometry_arena is not None:
+            self.geometry_arena.release(mesh)
 
     def cleanup(self):
-        glDeleteVertexArrays(1, [self.VAO])
-        glDeleteBuffers(1, [self.VBO])
-        glDeleteProgram(self.shader_program)
+        self.mesh_cache.clear()
+        if self.geometry_arena is not None:
+            self.geometry_arena.cleanup()
+        if self.indirect_buffer is not None:
+            self.indirect_buffer.cleanup()
+        if self.instance_buffer is not None:
+            self.instance_buffer.cleanup()
+        if self.frame_uniforms is not None:
+            self.frame_uniforms.cleanup()
+        # 变体由原Shader的cleanup()一起释放
+        for shader in self.shaders:
+            if not shader.defines:
+                shader.cleanup()
+        GL.unload()
         self.window.cleanup()
 
     def init_opengl(self):
@@ -159,15 +391,27 @@ class OpenGLRenderer(Renderer):
 
     def add_shader(self, shader):
         self.shaders.append(shader)
-
-    def setup_camera(self, camera):
-        """设置相机，camera现在是Camera实体而不是CameraSetting组件"""
-        for shader in self.shaders:
-            shader.use()
-            camera_loc = glGetUniformLocation(shader.shader_program, "view")
-            glUniformMatrix4fv(camera_loc, 1, GL_FALSE, camera.view_matrix)
-            projection_loc = glGetUniformLocation(shader.shader_program, "projection")
-            glUniformMatrix4fv(projection_loc, 1, GL_FALSE, camera.projection_matrix)
-
-        glUseProgram(0)
+        if FRAME_DATA_BLOCK not in shader.uniform_blocks and \
+                (shader.has_uniform("view") or shader.has_uniform("projection")):
+            self.legacy_camera_shaders.append(shader)
+            if self.camera is not None:
+                self._upload_legacy_camera(shader, self.camera, True, True)
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        """
+        设置相机，camera现在是Camera实体而不是CameraSetting组件
+        相机数据写入FrameData uniform缓冲一次，与Shader数量无关；
+        update_view / update_projection 只影响没有声明FrameData块的旧式Shader
+        """
+        self.camera = camera
+        self.frame_uniforms.update_camera(camera)
+        for shader in self.legacy_camera_shaders:
+            self._upload_legacy_camera(shader, camera, update_view, update_projection)
         return
+
+    def _upload_legacy_camera(self, shader, camera, update_view, update_projection):
+        self.state_cache.use_program(shader)
+        if update_view:
+            shader.set_mat4("view", camera.view_matrix)
+        if update_projection:
+            shader.set_mat4("projection", camera.projection_matrix)
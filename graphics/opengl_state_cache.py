@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+OpenGL状态缓存 - 记录当前绑定的程序、纹理和VAO，跳过重复的绑定调用
+缓存只知道经过它的调用；其他代码直接修改了绑定时 (如创建纹理)，需要调用invalidate()
+"""
+from OpenGL.GL import *
+
+
+class OpenGLStateCache(object):
+    def __init__(self):
+        self.stats = {}
+        self.reset_stats()
+        self.invalidate()
+
+    def invalidate(self):
+        """忘记所有已知绑定，下一次调用必定执行"""
+        self._program = None
+        self._active_unit = None
+        self._textures = {}  # 纹理单元 -> 纹理id
+        self._vertex_array = None
+
+    def reset_stats(self):
+        self.stats = {'draw_calls': 0, 'program_changes': 0, 'texture_changes': 0, 'vertex_array_changes': 0,
+                      'skipped': 0}
+
+    def use_program(self, shader):
+        if shader.shader_program == self._program:
+            self.stats['skipped'] += 1
+            return False
+        shader.use()
+        self._program = shader.shader_program
+        self.stats['program_changes'] += 1
+        return True
+
+    def bind_texture(self, unit, texture_id):
+        if self._textures.get(unit) == texture_id:
+            self.stats['skipped'] += 1
+            return False
+        if self._active_unit != unit:
+            glActiveTexture(GL_TEXTURE0 + unit)
+            self._active_unit = unit
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        self._textures[unit] = texture_id
+        self.stats['texture_changes'] += 1
+        return True
+
+    def bind_vertex_array(self, vertex_array):
+        if vertex_array == self._vertex_array:
+            self.stats['skipped'] += 1
+            return False
+        glBindVertexArray(vertex_array)
+        self._vertex_array = vertex_array
+        self.stats['vertex_array_changes'] += 1
+        return True
+
+    def forget_vertex_array(self, vertex_array):
+        """VAO被删除后调用 (OpenGL会把已删除的当前VAO解绑为0)"""
+        if vertex_array == self._vertex_array:
+            self._vertex_array = 0
+
+    def count_draw(self, calls=1):
+        self.stats['draw_calls'] += calls
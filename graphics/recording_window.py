@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+无界面窗口 - 不创建系统窗口和图形上下文，供NullRenderer在CI/无GPU的服务器上运行
+输入事件由测试或脚本通过push_*方法注入，与GlfwWindow回调产生的事件格式相同；
+设置max_frames后呈现指定帧数即请求关闭，MainLoop可以无人值守地运行固定帧数
+"""
+from collections import deque
+
+from graphics.window import Window
+
+
+class RecordingWindow(Window):
+    def __init__(self, max_frames=None):
+        """
+        Args:
+            max_frames: 呈现多少帧后should_close()返回True，None表示不自动关闭
+        """
+        super().__init__()
+        self.width = 0
+        self.height = 0
+        self.title = None
+        self.max_frames = max_frames
+        self.frame_count = 0  # swap_buffers的调用次数
+        self.closed = False
+        self.cursor_position = (0.0, 0.0)
+        self.keyboard_events = deque()
+        self.mouse_button_events = deque()
+        self.mouse_move_events = deque()
+        self.scroll_events = deque()
+
+    def initialize(self, width, height, title):
+        self.width = width
+        self.height = height
+        self.title = title
+
+    def poll_events(self):
+        pass
+
+    def should_close(self):
+        return self.closed or (self.max_frames is not None and self.frame_count >= self.max_frames)
+
+    def close(self):
+        self.closed = True
+
+    def swap_buffers(self):
+        self.frame_count += 1
+
+    def cleanup(self):
+        self.closed = True
+
+    def get_cursor_position(self):
+        """当前鼠标位置 (屏幕坐标，原点在左上角)"""
+        return self.cursor_position
+
+    def get_size(self):
+        return self.width, self.height
+
+    # ============ 事件注入 ============
+
+    def push_keyboard_event(self, key, action):
+        self.keyboard_events.append((key, action))
+
+    def push_mouse_button_event(self, button, action):
+        self.mouse_button_events.append((button, action))
+
+    def push_mouse_move_event(self, x, y):
+        last_x, last_y = self.cursor_position
+        self.mouse_move_events.append((x, y, x - last_x, y - last_y))
+        self.cursor_position = (x, y)
+
+    def push_scroll_event(self, xoffset, yoffset):
+        self.scroll_events.append((xoffset, yoffset))
+
+    # ============ 事件读取 (与GlfwWindow一致，每次最多取出一个) ============
+
+    def pop_keyboard_event(self):
+        if self.keyboard_events:
+            yield self.keyboard_events.popleft()
+
+    def pop_mouse_button_event(self):
+        if self.mouse_button_events:
+            yield self.mouse_button_events.popleft()
+
+    def pop_mouse_move_event(self):
+        if self.mouse_move_events:
+            yield self.mouse_move_events.popleft()
+
+    def pop_scroll_event(self):
+        if self.scroll_events:
+            yield self.scroll_events.popleft()
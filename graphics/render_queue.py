@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+渲染队列 - 用64位排序键重排绘制顺序，减少渲染状态切换
+键的布局 (高位到低位):
+- 不透明 (render_queue <= 2500): 队列(13) | shader(10) | material(13) | texture(10) | 深度(18)，同状态内由近到远
+- 半透明 (render_queue > 2500):  队列(13) | 反转深度(18) | shader(10) | material(13) | texture(10)，由远到近混合
+shader/material/texture使用队列内部分配的小整数编号，超出位宽时回绕 (只影响排序效果，不影响正确性)
+编号表只持有弱引用，切换场景后不再使用的资源可以正常释放
+"""
+import weakref
+
+import numpy as np
+
+from resource_manager.texture import BaseTexture
+
+QUEUE_BITS = 13
+SHADER_BITS = 10
+MATERIAL_BITS = 13
+TEXTURE_BITS = 10
+DEPTH_BITS = 18
+
+# 与Unity相同，大于该值的渲染队列按半透明处理 (由远到近排序)
+TRANSPARENT_QUEUE_THRESHOLD = 2500
+
+
+class _ObjectIds(object):
+    """为对象分配递增的小整数编号 (0保留给None)，对象释放后表项自动移除"""
+
+    def __init__(self, bits):
+        self._ids = weakref.WeakKeyDictionary()
+        self._next = 0
+        self._mask = (1 << bits) - 1
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, obj):
+        if obj is None:
+            return 0
+        value = self._ids.get(obj)
+        if value is None:
+            self._next += 1
+            value = self._next & self._mask
+            self._ids[obj] = value
+        return value
+
+
+class RenderQueue(object):
+    def __init__(self):
+        self._shader_ids = _ObjectIds(SHADER_BITS)
+        self._material_ids = _ObjectIds(MATERIAL_BITS)
+        self._texture_ids = _ObjectIds(TEXTURE_BITS)
+        self.keys = np.zeros(0, dtype=np.uint64)  # 上一次排序的键 (已排好序)
+        self.order = np.zeros(0, dtype=np.int64)  # 上一次排序的顺序: 排序后第k个绘制为输入的第order[k]个
+
+    @staticmethod
+    def material_texture(material):
+        """材质的第一张纹理 (决定排序键中的纹理编号)"""
+        for value in material.properties.values():
+            if isinstance(value, BaseTexture):
+                return value
+        return None
+
+    def build_keys(self, materials, depths):
+        """
+        Args:
+            materials: 每个绘制的Material
+            depths: (N,) 归一化到[0, 1]的视图深度 (0为近裁剪面)
+        Returns:
+            (N,) uint64排序键
+        """
+        count = len(materials)
+        state = np.zeros((count, 4), dtype=np.uint64)  # queue, shader, material, texture
+        per_material = {}
+        for i, material in enumerate(materials):
+            row = per_material.get(material)
+            if row is None:
+                row = (min(getattr(material, 'render_queue', 0), (1 << QUEUE_BITS) - 1),
+                       self._shader_ids.get(material.shader),
+                       self._material_ids.get(material),
+                       self._texture_ids.get(self.material_texture(material)))
+                per_material[material] = row
+            state[i] = row
+
+        depth_max = (1 << DEPTH_BITS) - 1
+        depth = np.clip(np.asarray(depths, dtype=np.float64), 0.0, 1.0)
+        depth = np.round(depth * depth_max).astype(np.uint64)
+        queue, shader, material, texture = state.T
+
+        state_bits = (shader << np.uint64(MATERIAL_BITS + TEXTURE_BITS)) | \
+                     (material << np.uint64(TEXTURE_BITS)) | texture
+        state_width = SHADER_BITS + MATERIAL_BITS + TEXTURE_BITS
+        opaque = (state_bits << np.uint64(DEPTH_BITS)) | depth
+        transparent = ((np.uint64(depth_max) - depth) << np.uint64(state_width)) | state_bits
+        keys = np.where(queue > TRANSPARENT_QUEUE_THRESHOLD, transparent, opaque)
+        return keys | (queue << np.uint64(64 - QUEUE_BITS))
+
+    def sort(self, render_objects, depths):
+        """
+        按排序键重排绘制
+        Args:
+            render_objects: 渲染元组列表 (model_matrix, mesh, material, ...)
+            depths: (N,) 归一化视图深度
+        Returns:
+            排序后的新列表
+        """
+        if not render_objects:
+            self.keys = np.zeros(0, dtype=np.uint64)
+            self.order = np.zeros(0, dtype=np.int64)
+            return []
+        keys = self.build_keys([item[2] for item in render_objects], depths)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.order = order
+        return [render_objects[i] for i in order]
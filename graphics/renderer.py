@@ -4,10 +4,40 @@ from abc import ABC, abstractmethod
 
 
 class RenderObject:
-    def __init__(self, model_matrix, mesh, material):
+    """
+    一次绘制，由RenderSystem提交的元组 (model_matrix, mesh, material[, draw_ranges[, normal_matrices]]) 构造
+    model_matrix为 (16,) 列主序矩阵时单独绘制；为 (K, 16) 时与 (K, 9) 的normal_matrices一起实例化绘制K次
+    """
+
+    def __init__(self, model_matrix, mesh, material, draw_ranges=None, normal_matrices=None):
+        """
+        Args:
+            draw_ranges: 可选的 (starts, counts)，只绘制mesh.meshlets.indices中的这些索引区间 (网格簇剔除的结果)
+            normal_matrices: 实例化绘制时每个实例的列主序法线矩阵
+        """
         self.model_matrix = model_matrix
         self.mesh = mesh
         self.material = material
+        self.draw_ranges = draw_ranges
+        self.normal_matrices = normal_matrices
+
+    @property
+    def instance_count(self):
+        return 1 if self.model_matrix.ndim == 1 else len(self.model_matrix)
+
+
+def viewport_pixels(viewport_rect, width, height):
+    """
+    把归一化视口 (x, y, w, h) 换算为像素矩形，原点在左下角
+    Returns:
+        (x, y, width, height) 整数像素，宽高至少为1
+    """
+    x0 = int(round(viewport_rect[0] * width))
+    y0 = int(round(viewport_rect[1] * height))
+    x1 = int(round((viewport_rect[0] + viewport_rect[2]) * width))
+    y1 = int(round((viewport_rect[1] + viewport_rect[3]) * height))
+    x0, y0 = min(max(x0, 0), width - 1), min(max(y0, 0), height - 1)
+    return x0, y0, max(min(x1, width) - x0, 1), max(min(y1, height) - y0, 1)
 
 
 class Renderer(ABC):
@@ -21,13 +51,44 @@ class Renderer(ABC):
         pass
    
     @abstractmethod
-    def setup_camera(self, camera_setting):
+    def setup_camera(self, camera_setting, update_view=True, update_projection=True):
         pass
 
     @abstractmethod
     def render(self, render_objects):
         pass
 
+    # ============ 多相机渲染 ============
+    # 一帧的调用顺序: begin_frame → (begin_view → setup_camera → draw) × 相机数量 → end_frame
+
+    @abstractmethod
+    def begin_frame(self):
+        pass
+
+    @abstractmethod
+    def begin_view(self, camera):
+        """切换到相机的渲染目标和视口，并按相机设置清除"""
+        pass
+
+    @abstractmethod
+    def draw(self, render_objects):
+        pass
+
+    def execute(self, command_lists):
+        """
+        执行RenderSystem录制的命令列表 (graphics.command_list)，可以代替draw()
+        默认还原为渲染元组交给draw()；后端可以直接按命令执行，并在CommandList.prepared中缓存执行数据
+        """
+        self.draw([item for command_list in command_lists for item in command_list.render_objects()])
+
+    @abstractmethod
+    def end_frame(self):
+        pass
+
+    def release_mesh(self, mesh):
+        """释放Mesh在GPU上的缓冲区 (卸载资源时调用)，没有GPU缓存的后端无需实现"""
+        pass
+
     @abstractmethod
     def cleanup(self):
         pass
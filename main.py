@@ -1,4 +1,13 @@
 ﻿# -*- coding: utf-8 -*-
+import sys
+
+from config.renderer import RendererConfig
+
+# 发布模式 (python main.py --release) 需要在导入OpenGL之前设置
+RendererConfig.ReleaseMode = "--release" in sys.argv
+# 在任何引擎模块之前导入: 按ReleaseMode设置PyOpenGL的错误检查 (之后导入OpenGL.GL的模块不再影响)
+import graphics.opengl_dispatch  # noqa: E402,F401
+
 import numpy as np
 
 from Entity.camera import Camera
@@ -7,9 +16,11 @@ from components.mesh import Mesh
 from components.transform import Transform
 from core.main_loop import MainLoop
 from core.ecs import ECSManager
+from systems.blend_shape_system import BlendShapeSystem
 from systems.input_system import InputSystem
 from systems.logic_system import LogicSystem, LogicModule
 from systems.render_system import RenderSystem
+from systems.spline_system import SplineSystem
 from Context.context import global_data as GD
 from input.event_types import Key, KeyAction, MouseButton, MouseAction
 from resource_manager.file_resource_manager import FileResourceManager
@@ -177,7 +188,6 @@ class CameraMovementModule(LogicModule):
             
             # 更新相机位置
             camera.position += movement
-            camera.is_dirty = True
     
     def _update_rotation(self, camera, delta_time):
         """更新相机旋转 (使用直接角度更新)"""
@@ -185,12 +195,12 @@ class CameraMovementModule(LogicModule):
             return
         
         # 直接更新相机的角度
+        # 角度真正变化时相机才会标记视图矩阵为脏
         camera.yaw = self.target_yaw
         camera.pitch = self.target_pitch
         
-        # 触发相机更新方向向量
+        # 同步更新方向向量，供本帧的移动计算使用
         camera.update_direction_vectors()
-        camera.is_dirty = True
 
 
 def main():
@@ -219,6 +229,10 @@ def main():
     logic_system = LogicSystem()
     ecs.add_system(logic_system)
 
+    # 路径跟随与形变目标混合 (在逻辑更新之后、下一帧渲染之前)
+    ecs.add_system(SplineSystem())
+    ecs.add_system(BlendShapeSystem())
+
     camera_move_module = CameraMovementModule()
     logic_system.add_logic_module(camera_move_module)
 
@@ -1,15 +1,20 @@
 ﻿# -*- coding: utf-8 -*-
+import hashlib
 import json
 import os
+import weakref
 import numpy as np
-from typing import Optional
+from typing import List, Optional, Union
 
 from util.singleton import SingletonMeta
 from config.renderer import RendererConfig
-from resource_manager.opengl_texture import OpenGLTexture
-from resource_manager.opengl_shader import OpenGLShader
+from resource_manager.null_shader import NullShader
+from resource_manager.null_texture import NullTexture
 from components.material import Material
 from components.mesh import Mesh
+from util.triangle_bvh import TriangleBVH
+from util.mesh_simplifier import generate_lod_chain
+from util.meshlet import MAX_MESHLET_TRIANGLES, MAX_MESHLET_VERTICES, MeshletData, build_meshlets
 from Context.context import global_data as GD
 
 
@@ -20,12 +25,21 @@ class FileResourceManager(object, metaclass=SingletonMeta):
         self.material_map = {}
         self.mesh_cache = {}  # 新增：缓存已解析的原始模型数据
         self.mesh_map = {}    # 新增：缓存生成的Mesh组件
+        self.mesh_bvh_map = weakref.WeakKeyDictionary()  # Mesh -> TriangleBVH，首次射线检测时构建
+        self.lod_map = {}     # (文件路径, LOD比例) -> [Mesh, ...]
+        self.lod_cache_dir_name = ".lod_cache"  # 简化结果的磁盘缓存目录 (位于模型文件旁)
+
+    # 简化算法变化时递增，使旧的磁盘缓存失效
+    LOD_CACHE_VERSION = 1
 
     def load_texture(self, file_path):
         if file_path in self.texture_map:
             return self.texture_map[file_path]
         if RendererConfig.RendererType == RendererConfig.RendererType.OPENGL:
+            from resource_manager.opengl_texture import OpenGLTexture  # NULL后端不导入OpenGL
             self.texture_map[file_path] = OpenGLTexture(file_path)
+        elif RendererConfig.RendererType == RendererConfig.RendererType.NULL:
+            self.texture_map[file_path] = NullTexture(file_path)
         else:
             raise NotImplementedError(f"Renderer type {RendererConfig.RendererType} not supported yet.")
         return self.texture_map[file_path]
@@ -35,11 +49,16 @@ class FileResourceManager(object, metaclass=SingletonMeta):
         if key in self.shader_map:
             return self.shader_map[key]
         if RendererConfig.RendererType == RendererConfig.RendererType.OPENGL:
+            from resource_manager.opengl_shader import OpenGLShader
             shader = OpenGLShader()
             # TODO 以后再考虑加载策略
             shader.load(vertex_path, fragment_path)
             shader.compile()
             self.shader_map[key] = shader
+        elif RendererConfig.RendererType == RendererConfig.RendererType.NULL:
+            shader = NullShader()
+            shader.load(vertex_path, fragment_path)
+            self.shader_map[key] = shader
         else:
             raise NotImplementedError(f"Renderer type {RendererConfig.RendererType} not supported yet.")
         GD.renderer.add_shader(self.shader_map[key])
@@ -67,7 +86,7 @@ class FileResourceManager(object, metaclass=SingletonMeta):
         shader = self.load_shader(vertex_path, fragment_path)
 
         # 3. 创建一个 Material，里面除了 `shader` 外，还要根据 properties 初始化属性
-        material = Material()
+        material = Material(render_queue=config_data.get("render_queue", Material.RENDER_QUEUE_GEOMETRY))
         material.shader = shader
         material.properties = {}  # 用于存储各类可编辑属性（texture2D、float等）
 
@@ -94,18 +113,35 @@ class FileResourceManager(object, metaclass=SingletonMeta):
         self.material_map[config_path] = material
         return material
 
-    def load_mesh_from_file(self, file_path: str) -> Optional[Mesh]:
+    def load_mesh_from_file(self, file_path: str, lod_ratios: Optional[List[float]] = None,
+                            meshlets: bool = False) -> Union[Optional[Mesh], Optional[List[Mesh]]]:
         """
         根据文件后缀加载3D模型文件，生成Mesh组件
         Args:
             file_path: 模型文件路径
+            lod_ratios: 可选，LOD级别的目标三角形比例，例如 [0.5, 0.25, 0.1]
+            meshlets: 为True时为每个Mesh构建网格簇，渲染时按簇剔除
         Returns:
-            Mesh组件或None
+            未指定lod_ratios时返回Mesh组件或None；
+            指定时返回 [原始Mesh, 各比例的简化Mesh...] 或None
         """
         if not os.path.exists(file_path):
             print(f"❌ 模型文件不存在: {file_path}")
             return None
 
+        if lod_ratios is not None:
+            meshes = self._load_lod_chain(file_path, list(lod_ratios))
+            if meshes and meshlets:
+                for mesh in meshes:
+                    self.build_meshlets(mesh)
+            return meshes
+
+        if meshlets:
+            mesh = self.load_mesh_from_file(file_path)
+            if mesh is not None:
+                self.build_meshlets(mesh)
+            return mesh
+
         # 检查缓存
         if file_path in self.mesh_map:
             return self.mesh_map[file_path]
@@ -125,6 +161,110 @@ class FileResourceManager(object, metaclass=SingletonMeta):
             
         return mesh
 
+    def unload_mesh(self, file_path: str) -> bool:
+        """
+        卸载模型文件对应的Mesh (包括其LOD链)，释放GPU缓冲区
+        仍被Entity引用的Mesh在下次绘制时会重新上传
+        Returns:
+            是否有Mesh被卸载
+        """
+        meshes = []
+        if file_path in self.mesh_map:
+            meshes.append(self.mesh_map.pop(file_path))
+        for key in [key for key in self.lod_map if key[0] == file_path]:
+            meshes.extend(mesh for mesh in self.lod_map.pop(key) if all(mesh is not m for m in meshes))
+
+        for mesh in meshes:
+            self.mesh_bvh_map.pop(mesh, None)
+            if GD.renderer is not None:
+                GD.renderer.release_mesh(mesh)
+        return len(meshes) > 0
+
+    def _load_lod_chain(self, file_path: str, lod_ratios: List[float]) -> Optional[List[Mesh]]:
+        """
+        加载模型并生成LOD链，简化结果缓存在内存和磁盘中，每个资源只简化一次
+        """
+        key = (file_path, tuple(lod_ratios))
+        if key in self.lod_map:
+            return self.lod_map[key]
+
+        base_mesh = self.load_mesh_from_file(file_path)
+        if base_mesh is None:
+            return None
+
+        cache_path = self._get_lod_cache_path(file_path, lod_ratios)
+        levels = self._read_lod_cache(cache_path, len(lod_ratios))
+        if levels is None:
+            indices = base_mesh.indices if base_mesh.indices is not None else []
+            levels = generate_lod_chain(base_mesh.vertices, indices, lod_ratios, base_mesh._stride)
+            self._write_lod_cache(cache_path, levels)
+            print(f"✅ LOD生成完成: {file_path} -> {[len(i) // 3 for _, i in levels]} 三角形")
+
+        meshes = [base_mesh] + [Mesh(vertices.flatten(), indices) for vertices, indices in levels]
+        self.lod_map[key] = meshes
+        return meshes
+
+    def _get_lod_cache_path(self, file_path: str, lod_ratios: List[float]) -> str:
+        """缓存文件名由模型内容、LOD比例和算法版本决定，模型修改后自动重新生成"""
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            digest.update(f.read())
+        digest.update(json.dumps([self.LOD_CACHE_VERSION, lod_ratios]).encode('utf-8'))
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), self.lod_cache_dir_name)
+        file_name = f"{os.path.basename(file_path)}.{digest.hexdigest()[:16]}.npz"
+        return os.path.join(cache_dir, file_name)
+
+    def _read_lod_cache(self, cache_path: str, level_count: int):
+        """读取磁盘缓存，不存在或损坏时返回None"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with np.load(cache_path) as data:
+                return [(data[f"vertices_{i}"], data[f"indices_{i}"]) for i in range(level_count)]
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ LOD缓存读取失败，重新生成: {cache_path} ({e})")
+            return None
+
+    def _write_lod_cache(self, cache_path: str, levels):
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            arrays = {}
+            for i, (vertices, indices) in enumerate(levels):
+                arrays[f"vertices_{i}"] = vertices
+                arrays[f"indices_{i}"] = indices
+            np.savez_compressed(cache_path, **arrays)
+        except OSError as e:
+            print(f"⚠️ LOD缓存写入失败: {cache_path} ({e})")
+
+    def get_mesh_bvh(self, mesh: Mesh) -> TriangleBVH:
+        """
+        获取Mesh的三角形BVH (首次调用时构建并缓存)
+        Args:
+            mesh: Mesh组件
+        Returns:
+            TriangleBVH
+        """
+        bvh = self.mesh_bvh_map.get(mesh)
+        if bvh is None:
+            bvh = TriangleBVH.from_mesh(mesh)
+            self.mesh_bvh_map[mesh] = bvh
+        return bvh
+
+    def build_meshlets(self, mesh: Mesh, max_vertices: int = MAX_MESHLET_VERTICES,
+                       max_triangles: int = MAX_MESHLET_TRIANGLES) -> MeshletData:
+        """
+        为Mesh构建网格簇 (已构建时直接返回)，RenderSystem会对有网格簇的Mesh做逐簇剔除
+        Args:
+            mesh: Mesh组件
+            max_vertices, max_triangles: 每个簇的顶点/三角形上限
+        Returns:
+            MeshletData
+        """
+        if mesh.meshlets is None:
+            positions, triangles = mesh.get_triangles()
+            mesh.meshlets = build_meshlets(positions, triangles, max_vertices, max_triangles)
+        return mesh.meshlets
+
     def _load_obj_mesh(self, file_path: str) -> Optional[Mesh]:
         """
         加载OBJ格式文件并生成Mesh
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from resource_manager.shader import BaseShader
+
+
+class NullShader(BaseShader):
+    """不编译的Shader，只保存源代码 (RendererType.NULL时由资源管理器创建)"""
+
+    def __init__(self):
+        self.shader_program = None
+        self.vertex_source = None
+        self.fragment_source = None
+        self.defines = ()
+        self.uniforms = {}
+        self.uniform_blocks = {}
+        self.missing_uniform_warnings = set()
+
+    def load(self, vertex_path, fragment_path):
+        with open(vertex_path, 'r', encoding="utf-8-sig") as file:
+            self.vertex_source = file.read()
+        with open(fragment_path, 'r', encoding="utf-8-sig") as file:
+            self.fragment_source = file.read()
+
+    def compile(self):
+        pass
+
+    def use(self):
+        pass
+
+    def cleanup(self):
+        pass
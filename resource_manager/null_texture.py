@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+from resource_manager.texture import BaseTexture
+
+
+class NullTexture(BaseTexture):
+    """不上传到GPU的Texture (RendererType.NULL时由资源管理器创建)"""
+
+    _next_id = itertools.count(1)
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.id = next(self._next_id)
+
+    def bind(self, unit):
+        pass
+
+    def unbind(self):
+        pass
+
+    def cleanup(self):
+        pass
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from OpenGL.GL import *
+from resource_manager.opengl_texture import OpenGLTexture
+
+
+class OpenGLRenderTexture(OpenGLTexture):
+    """
+    可作为相机渲染目标的纹理 (参考Unity RenderTexture)
+    颜色附件本身就是OpenGLTexture，可以直接放进Material属性中使用 (如小地图)
+    """
+
+    def __init__(self, width, height):
+        self.file_path = None
+        self.width = width
+        self.height = height
+        self.id = self.create_color_texture(width, height)
+        self.depth_buffer_id = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_buffer_id)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        self.framebuffer_id = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer_id)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.id, 0)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, self.depth_buffer_id)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise Exception(f"Render texture framebuffer incomplete: {status}")
+
+    def cleanup(self):
+        glDeleteFramebuffers(1, [self.framebuffer_id])
+        glDeleteRenderbuffers(1, [self.depth_buffer_id])
+        super().cleanup()
+
+    @staticmethod
+    def create_color_texture(width, height):
+        texture_id = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        return texture_id
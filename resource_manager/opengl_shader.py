@@ -1,22 +1,137 @@
-﻿from OpenGL.GL import *
+﻿from graphics.opengl_dispatch import GL  # 必须在OpenGL.GL之前导入 (发布模式关闭错误检查)
+from OpenGL.GL import *
+import numpy as np
 from resource_manager.shader import BaseShader
 
 
+# uniform块名称 -> 固定的绑定点，链接时自动绑定 (FrameData见graphics/opengl_frame_uniforms.py)
+UNIFORM_BLOCK_BINDINGS = {
+    "FrameData": 0,
+}
+
+
+class ShaderVariable(object):
+    """链接后反射得到的uniform或顶点属性"""
+
+    def __init__(self, name, location, gl_type, size):
+        self.name = name
+        self.location = location
+        self.gl_type = gl_type
+        self.size = size
+        self.value = None  # 上一次上传的值 (只用于uniform)
+
+
+# 上传函数: data为展平的数组，数组uniform时包含多个元素
+def _upload_float(location, data):
+    glUniform1fv(location, len(data), data)
+
+
+def _upload_vec2(location, data):
+    glUniform2fv(location, len(data) // 2, data)
+
+
+def _upload_vec3(location, data):
+    glUniform3fv(location, len(data) // 3, data)
+
+
+def _upload_vec4(location, data):
+    glUniform4fv(location, len(data) // 4, data)
+
+
+def _upload_matrix3(location, data):
+    glUniformMatrix3fv(location, len(data) // 9, GL_FALSE, data)
+
+
+def _upload_matrix4(location, data):
+    glUniformMatrix4fv(location, len(data) // 16, GL_FALSE, data)
+
+
+def _upload_int(location, data):
+    glUniform1iv(location, len(data), data)
+
+
+def _sampler_types():
+    types = [GL_SAMPLER_2D, GL_SAMPLER_3D, GL_SAMPLER_CUBE, GL_SAMPLER_2D_SHADOW, GL_SAMPLER_2D_ARRAY]
+    return {int(t) for t in types}
+
+
+# 反射类型 -> (numpy dtype, 每个元素的分量数, 上传函数, 暂存区种类)
+# 加载了GL调度表时uniform写入暂存区批量提交 (见graphics/opengl_dispatch.py)
+_UNIFORM_UPLOADERS = {
+    int(GL_FLOAT): (np.float32, 1, _upload_float, 'float'),
+    int(GL_FLOAT_VEC2): (np.float32, 2, _upload_vec2, 'vec2'),
+    int(GL_FLOAT_VEC3): (np.float32, 3, _upload_vec3, 'vec3'),
+    int(GL_FLOAT_VEC4): (np.float32, 4, _upload_vec4, 'vec4'),
+    int(GL_FLOAT_MAT3): (np.float32, 9, _upload_matrix3, 'mat3'),
+    int(GL_FLOAT_MAT4): (np.float32, 16, _upload_matrix4, 'mat4'),
+    int(GL_INT): (np.int32, 1, _upload_int, 'int'),
+    int(GL_BOOL): (np.int32, 1, _upload_int, 'int'),
+}
+for _sampler in _sampler_types():
+    _UNIFORM_UPLOADERS[_sampler] = _UNIFORM_UPLOADERS[int(GL_INT)]
+
+SAMPLER_TYPES = frozenset(_sampler_types())
+
+
 class OpenGLShader(BaseShader):
     def __init__(self):
         self.shader_program = None
         self.vertex_shader = None
         self.fragment_shader = None
+        # 链接时反射的活动uniform与顶点属性 (名称 -> ShaderVariable)，数组uniform去掉"[0]"后缀
+        self.uniforms = {}
+        self.attributes = {}
+        self.uniform_blocks = {}  # 已绑定的uniform块名称 -> 绑定点
+        self.missing_uniform_warnings = set()  # 已提示过的缺失uniform名称
+        # 源代码与预处理宏，用于编译变体 (如实例化版本)
+        self.vertex_source = None
+        self.fragment_source = None
+        self.defines = ()
+        self._variants = {}
 
     def load(self, vertex_path, fragment_path):
-        # 加载着色器源代码
-        with open(vertex_path, 'r', encoding="utf-8") as file:
+        # 加载着色器源代码 (去掉可能存在的BOM)
+        with open(vertex_path, 'r', encoding="utf-8-sig") as file:
             vertex_src = file.read()
-        with open(fragment_path, 'r', encoding="utf-8") as file:
+        with open(fragment_path, 'r', encoding="utf-8-sig") as file:
             fragment_src = file.read()
+        self.load_source(vertex_src, fragment_src)
+
+    def load_source(self, vertex_src, fragment_src, defines=()):
+        """编译源代码，defines中的宏插入到#version之后"""
+        self.vertex_source = vertex_src
+        self.fragment_source = fragment_src
+        self.defines = tuple(defines)
+        self.vertex_shader = self.compile_shader(self.inject_defines(vertex_src, self.defines), GL_VERTEX_SHADER)
+        self.fragment_shader = self.compile_shader(self.inject_defines(fragment_src, self.defines),
+                                                   GL_FRAGMENT_SHADER)
 
-        self.vertex_shader = self.compile_shader(vertex_src, GL_VERTEX_SHADER)
-        self.fragment_shader = self.compile_shader(fragment_src, GL_FRAGMENT_SHADER)
+    @staticmethod
+    def inject_defines(source, defines):
+        if not defines:
+            return source
+        lines = source.split('\n')
+        insert_at = 1 if lines and lines[0].lstrip().startswith('#version') else 0
+        lines[insert_at:insert_at] = [f"#define {define}" for define in defines]
+        return '\n'.join(lines)
+
+    def get_variant(self, *defines):
+        """
+        获取附加了预处理宏的变体 (首次调用时编译并缓存)，例如 get_variant("INSTANCING")
+        Returns:
+            (shader, created) 变体与是否为新编译的
+        """
+        key = tuple(sorted(set(self.defines) | set(defines)))
+        if key == tuple(sorted(self.defines)):
+            return self, False
+        variant = self._variants.get(key)
+        if variant is not None:
+            return variant, False
+        variant = OpenGLShader()
+        variant.load_source(self.vertex_source, self.fragment_source, key)
+        variant.compile()
+        self._variants[key] = variant
+        return variant, True
 
     def compile(self):
         # 编译着色器
@@ -29,9 +144,128 @@ class OpenGLShader(BaseShader):
 
         glDeleteShader(self.vertex_shader)
         glDeleteShader(self.fragment_shader)
+        self.reflect()
+
+    def reflect(self):
+        """枚举活动uniform和顶点属性，缓存位置和类型，并把已知的uniform块绑定到固定绑定点 (链接后调用一次)"""
+        self.uniforms = {}
+        for index in range(int(glGetProgramiv(self.shader_program, GL_ACTIVE_UNIFORMS))):
+            name, size, gl_type = glGetActiveUniform(self.shader_program, index)
+            name = self._variable_name(name)
+            location = glGetUniformLocation(self.shader_program, name)
+            if location < 0:  # uniform block中的成员没有位置
+                continue
+            self.uniforms[name] = ShaderVariable(name, location, int(gl_type), int(size))
+
+        self.uniform_blocks = {}
+        for block_name, binding in UNIFORM_BLOCK_BINDINGS.items():
+            block_index = glGetUniformBlockIndex(self.shader_program, block_name)
+            if block_index == GL_INVALID_INDEX:
+                continue
+            glUniformBlockBinding(self.shader_program, block_index, binding)
+            self.uniform_blocks[block_name] = binding
+
+        self.attributes = {}
+        for index in range(int(glGetProgramiv(self.shader_program, GL_ACTIVE_ATTRIBUTES))):
+            name, size, gl_type = glGetActiveAttrib(self.shader_program, index)
+            name = self._variable_name(name)
+            location = glGetAttribLocation(self.shader_program, name)
+            self.attributes[name] = ShaderVariable(name, location, int(gl_type), int(size))
+
+    @staticmethod
+    def _variable_name(name):
+        if isinstance(name, bytes):
+            name = name.decode('utf-8')
+        return name[:-3] if name.endswith('[0]') else name
 
     def use(self):
-        glUseProgram(self.shader_program)
+        if GL.loaded:
+            # 暂存的uniform属于当前程序，切换前提交
+            GL.flush_uniforms()
+            GL.glUseProgram(self.shader_program)
+        else:
+            glUseProgram(self.shader_program)
+
+    # ============ uniform设置 (调用前需要先use()) ============
+
+    def has_uniform(self, name):
+        return name in self.uniforms
+
+    def get_uniform_location(self, name):
+        """缓存的uniform位置，不存在 (或被编译器优化掉) 时返回-1"""
+        variable = self.uniforms.get(name)
+        return variable.location if variable is not None else -1
+
+    def set_uniform(self, name, value):
+        """
+        按反射的类型上传uniform，值与上一次上传的相同时跳过GL调用
+        Returns:
+            是否调用了GL (uniform不存在或值未变化时为False)
+        """
+        variable = self.uniforms.get(name)
+        if variable is None:
+            return False
+        uploader = _UNIFORM_UPLOADERS.get(variable.gl_type)
+        if uploader is None:
+            raise TypeError(f"Unsupported uniform type {variable.gl_type:#x} for '{name}'")
+        dtype, components, upload, kind = uploader
+        data = np.ascontiguousarray(value, dtype=dtype).reshape(-1)
+        if len(data) == 0 or len(data) % components != 0:
+            raise ValueError(f"Uniform '{name}' expects a multiple of {components} values, got {len(data)}")
+        key = data.tobytes()
+        if key == variable.value:
+            return False
+        if GL.loaded:
+            GL.uniform_batch.write(variable.location, kind, data)
+        else:
+            upload(variable.location, data)
+        variable.value = key
+        return True
+
+    def set_float(self, name, value):
+        return self._set_values(name, value, np.float32, _upload_float, 'float')
+
+    def set_int(self, name, value):
+        return self._set_values(name, value, np.int32, _upload_int, 'int')
+
+    def set_texture(self, name, unit):
+        """把sampler绑定到纹理单元"""
+        return self.set_int(name, unit)
+
+    def set_vec3(self, name, value):
+        return self._set_values(name, value, np.float32, _upload_vec3, 'vec3')
+
+    def set_vec4(self, name, value):
+        return self._set_values(name, value, np.float32, _upload_vec4, 'vec4')
+
+    def set_mat3(self, name, value):
+        """value为列主序的9个float"""
+        return self._set_values(name, value, np.float32, _upload_matrix3, 'mat3')
+
+    def set_mat4(self, name, value):
+        """value为列主序的16个float (与Camera/RenderSystem中存储的矩阵一致)"""
+        return self._set_values(name, value, np.float32, _upload_matrix4, 'mat4')
+
+    def _set_values(self, name, value, dtype, upload, kind):
+        """与set_uniform相同的缓存和提交方式: 以数据的字节为缓存值，加载了GL调度表时写入暂存区"""
+        variable = self.uniforms.get(name)
+        if variable is None:
+            return False
+        data = np.ascontiguousarray(value, dtype=dtype).reshape(-1)
+        key = data.tobytes()
+        if key == variable.value:
+            return False
+        if GL.loaded:
+            GL.uniform_batch.write(variable.location, kind, data)
+        else:
+            upload(variable.location, data)
+        variable.value = key
+        return True
+
+    def invalidate_uniform_cache(self):
+        """绕过setter直接修改了uniform之后调用，下一次设置时强制上传"""
+        for variable in self.uniforms.values():
+            variable.value = None
 
     def compile_shader(self, source, shader_type):
         shader = glCreateShader(shader_type)
@@ -42,4 +276,7 @@ class OpenGLShader(BaseShader):
         return shader
 
     def cleanup(self):
+        for variant in self._variants.values():
+            variant.cleanup()
+        self._variants = {}
         glDeleteProgram(self.shader_program)
@@ -1,4 +1,5 @@
-﻿from OpenGL.GL import *
+﻿import graphics.opengl_dispatch  # noqa: F401  必须在OpenGL.GL之前导入 (发布模式关闭错误检查)
+from OpenGL.GL import *
 from PIL import Image
 from resource_manager.texture import BaseTexture
 
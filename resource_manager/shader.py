@@ -1,6 +1,4 @@
-﻿from OpenGL.GL import *
-
-from abc import ABC, abstractmethod
+﻿from abc import ABC, abstractmethod
 
 
 class BaseShader(ABC):
@@ -1,7 +1,6 @@
 ﻿# -*- coding: utf-8 -*-
 import os
 from PIL import Image
-from OpenGL.GL import *
 from abc import ABC, abstractmethod
 
 
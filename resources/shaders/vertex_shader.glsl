@@ -10,20 +10,42 @@ out vec2 TexCoord;
 out vec3 Normal;        // 新增：传递法线到片段着色器
 out vec3 FragPos;       // 新增：传递世界坐标位置
 
+#ifdef INSTANCING
+// 实例化绘制: 模型矩阵和法线矩阵来自实例缓冲 (attribute divisor = 1)
+layout(location = 3) in mat4 instanceModel;   // 占用location 3-6
+layout(location = 7) in mat3 instanceNormal;  // 占用location 7-9
+#else
 uniform mat4 model;
-uniform mat4 view;
-uniform mat4 projection;
+uniform mat3 normalMatrix;  // 模型矩阵左上3x3的逆转置，由CPU批量计算
+#endif
+
+// 每帧共享数据 (std140)，由渲染器每帧更新一次，所有Shader共用同一个绑定点
+layout(std140) uniform FrameData {
+    mat4 view;
+    mat4 projection;
+    mat4 viewProjection;
+    vec4 cameraPosition;
+    float time;
+};
 
 void main()
 {
+#ifdef INSTANCING
+    mat4 modelMatrix = instanceModel;
+    mat3 worldNormalMatrix = instanceNormal;
+#else
+    mat4 modelMatrix = model;
+    mat3 worldNormalMatrix = normalMatrix;
+#endif
+
     // 计算世界坐标位置
-    FragPos = vec3(model * vec4(inPosition, 1.0));
+    FragPos = vec3(modelMatrix * vec4(inPosition, 1.0));
     
     // 计算世界坐标下的法线（需要使用法线矩阵）
-    Normal = mat3(transpose(inverse(model))) * inNormal;
+    Normal = worldNormalMatrix * inNormal;
     
     // 传递纹理坐标
     TexCoord = inTexCoord;
     
-    gl_Position = projection * view * model * vec4(inPosition, 1.0);
+    gl_Position = viewProjection * modelMatrix * vec4(inPosition, 1.0);
 }
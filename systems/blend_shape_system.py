@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+BlendShapeSystem - 形变目标混合系统
+权重变化的Entity才会重新混合顶点，结果写入BlendShapeWeights.deformed_mesh
+"""
+
+import numpy as np
+
+from core.ecs import System
+from components.mesh import Mesh
+from components.blend_shape_weights import BlendShapeWeights
+from Context.context import global_data as GD
+
+
+class BlendShapeSystem(System):
+    def __init__(self):
+        super(BlendShapeSystem, self).__init__()
+
+    def update(self, delta_time):
+        for entity in GD.ecs_manager.get_entities_with_component(BlendShapeWeights):
+            self.update_entity(entity)
+        return
+
+    def update_entity(self, entity):
+        """重新混合单个Entity的形变 (只在权重变化时执行)"""
+        blend_weights = entity.get_component(BlendShapeWeights)
+        mesh = entity.get_component(Mesh)
+        if mesh is None or not blend_weights.is_dirty:
+            return
+
+        blend_weights.ensure_count(mesh.blend_shape_count)
+        deformed = blend_weights.deformed_mesh
+        # 首次混合，或原始Mesh的顶点数组被替换 (数量变化) 时重新创建
+        if deformed is None or deformed.vertices.shape != np.shape(mesh.vertices):
+            deformed = Mesh(mesh.compute_blended_vertices(blend_weights.weights), mesh.indices)
+            deformed.obj_data = mesh.obj_data
+            # 原始Mesh的包围体已覆盖所有形变目标，避免每次混合后重新计算
+            deformed.set_bounds(mesh.bounds_min, mesh.bounds_max)
+            deformed.bounding_radius = mesh.bounding_radius
+            blend_weights.deformed_mesh = deformed
+        else:
+            # 复用上一帧的顶点数组，避免每次分配
+            mesh.compute_blended_vertices(blend_weights.weights, out=deformed.vertices)
+            deformed.mark_modified()
+
+        blend_weights.is_dirty = False
@@ -4,6 +4,7 @@ from bson import ObjectId
 from core.ecs import System
 from Context.context import global_data as GD
 from collections import defaultdict
+from input.event_types import MouseAction, MouseButton
 
 
 class InputSystem(System):
@@ -13,8 +14,13 @@ class InputSystem(System):
         self.mouse_button_listener = defaultdict(list)
         self.keyboard_listener = defaultdict(list)
         self.scroll_listener = []
+        self.pick_listener = []
         self.id_2_callback = {}
 
+        # 鼠标点选: 左键按下时从相机发射射线，结果保存在selection中
+        self.pick_button = MouseButton.LEFT
+        self.selection = None  # 最近一次点选的RaycastHit (未命中为None)
+
     def update(self, dt):
         self.handle_keyboard_input()
         self.handle_mouse_button_input()
@@ -35,6 +41,10 @@ class InputSystem(System):
         for button, action in window.pop_mouse_button_event():
             for callback in self.mouse_button_listener[(button, action)]:
                 callback()
+            if button == self.pick_button and action == MouseAction.PRESSED and self.pick_listener:
+                x, y = window.get_cursor_position()
+                width, height = window.get_size()
+                self.pick(x, y, width, height)
 
     def handle_mouse_move_input(self):
         window = GD.renderer.window
@@ -48,6 +58,23 @@ class InputSystem(System):
             for callback in self.scroll_listener:
                 callback(xoffset, yoffset)
 
+    def pick(self, x, y, width, height):
+        """
+        从主相机经过屏幕坐标发射射线，选中最近的物体并通知监听者
+        Returns:
+            RaycastHit或None
+        """
+        camera = GD.main_camera
+        scene = GD.ecs_manager.get_active_scene() if GD.ecs_manager else None
+        if camera is None or scene is None:
+            return None
+
+        origin, direction = camera.screen_point_to_ray(x, y, width, height)
+        self.selection = scene.raycast(origin, direction, camera.far_clip)
+        for callback in self.pick_listener:
+            callback(self.selection)
+        return self.selection
+
     def register_keyboard_listener(self, key, action, callback):
         listener_id = ObjectId()
         self.keyboard_listener[(key, action)].append(callback)
@@ -91,3 +118,15 @@ class InputSystem(System):
         callback = self.id_2_callback[listener_id]
         self.scroll_listener.remove(callback)
         return
+
+    def register_pick_listener(self, callback):
+        """注册点选监听，callback参数为RaycastHit或None"""
+        listener_id = ObjectId()
+        self.pick_listener.append(callback)
+        self.id_2_callback[listener_id] = callback
+        return listener_id
+
+    def unregister_pick_listener(self, listener_id):
+        callback = self.id_2_callback[listener_id]
+        self.pick_listener.remove(callback)
+        return
@@ -1,53 +1,621 @@
 ﻿# -*- coding:utf-8 -*-
 import numpy as np
 
+from components.blend_shape_weights import BlendShapeWeights
+from components.lod_group import LODGroup, select_lod_levels
 from components.material import Material
 from components.mesh import Mesh
-from components.transform import Transform
+from components.occluder import Occluder
+from components.transform import Transform, stack_world_matrices
 from core.ecs import System
+from core.render_proxy import RenderProxySet
 from config.renderer import RendererConfig
+from graphics.command_list import CommandListBuilder
 from graphics.factory import create_renderer
+from graphics.render_queue import TRANSPARENT_QUEUE_THRESHOLD, RenderQueue
 from Context.context import global_data as GD
-from Entity.camera import Camera
+from Entity.camera import Camera, ProjectionType
+from util.geometry import transform_aabbs, transform_spheres, frustum_cull_aabbs, screen_relative_heights
+from util.occlusion import OcclusionBuffer
+from util.pvs import PVSData, object_keys
+from util.static_batch import combine_static_meshes
+
+# 静态合批的网格已在世界空间，模型矩阵和法线矩阵为单位矩阵 (列主序)
+_IDENTITY_MODEL = np.eye(4, dtype=np.float32).reshape(-1)
+_IDENTITY_NORMAL = np.eye(3, dtype=np.float32).reshape(-1)
+
+
+def collect_renderable_entities(ecs_manager):
+    """
+    按渲染顺序收集所有可渲染的Entity (带Mesh的，以及只有LODGroup的)
+    PVS烘焙工具使用同一顺序生成物体键
+    """
+    mesh_entities = ecs_manager.get_entities_with_component(Mesh)
+    lod_entities = [entity for entity in ecs_manager.get_entities_with_component(LODGroup)
+                    if entity.get_component(Mesh) is None]
+    return mesh_entities + lod_entities
+
+
+def _is_uniform_scale(matrix, tolerance=1e-4):
+    """世界矩阵是否为均匀缩放且不镜像 (此时局部空间的法线锥测试与世界空间等价)"""
+    linear = matrix[:3, :3]
+    scales = np.linalg.norm(linear, axis=0)
+    if scales.min() <= 0.0 or np.linalg.det(linear) <= 0.0:
+        return False
+    if scales.max() - scales.min() > tolerance * scales.max():
+        return False
+    # 列向量两两正交 (排除切变)
+    gram = linear.T @ linear / (scales.max() ** 2)
+    return bool(np.all(np.abs(gram - np.eye(3)) <= tolerance * 10))
 
 
 class RenderSystem(System):
-    def __init__(self):
+    def __init__(self, renderer=None):
+        """
+        Args:
+            renderer: 已初始化的Renderer，为None时按RendererConfig创建并初始化窗口
+        """
         super().__init__()
-        # 之后需要重构，应该由工厂类返回对应的Renderer
-        self.renderer = create_renderer()
+        if renderer is None:
+            # 之后需要重构，应该由工厂类返回对应的Renderer
+            renderer = create_renderer()
+            renderer.initialize(RendererConfig.Width, RendererConfig.Height, RendererConfig.Title)
+        self.renderer = renderer
         GD.renderer = self.renderer
-        self.renderer.initialize(RendererConfig.Width, RendererConfig.Height, RendererConfig.Title)
+
+        # 视锥剔除开关与每帧统计
+        self.frustum_culling_enabled = True
+        self.stats = {'candidates': 0, 'visible': 0, 'culled': 0, 'lod_culled': 0, 'occluded': 0, 'pvs_culled': 0,
+                      'layer_culled': 0, 'meshlets': 0, 'meshlet_culled': 0, 'draws': 0, 'instanced': 0,
+                      'static_batched': 0, 'command_lists': 0, 'command_lists_reused': 0}
+        self.camera_stats = {}  # 每个相机本帧的统计，stats为所有相机之和
+
+        # 烘焙的潜在可见集 (通过load_pvs加载)
+        self.pvs = None
+        self._pvs_key = None  # (RenderProxySet, structure_version)，代理增删后重新建立映射
+        self._pvs_indices = None
+
+        # 已上传到Shader的相机及其 (view_version, projection_version)
+        self._uploaded_camera = None
+        self._uploaded_camera_versions = None
+
+        # 软件遮挡剔除 (场景中存在Occluder时生效)
+        self.occlusion_culling_enabled = True
+        self.occlusion_buffer = OcclusionBuffer()
+
+        # 网格簇剔除 (只对构建了meshlets的Mesh生效)
+        # 背面簇剔除假设网格是封闭或单面的，双面显示的薄片网格应关闭cone剔除或不构建网格簇
+        self.meshlet_culling_enabled = True
+        self.meshlet_cone_culling_enabled = True
+
+        # 按排序键 (队列、shader、材质、纹理、深度) 重排绘制，减少状态切换
+        self.sort_draws_enabled = True
+        self.render_queue = RenderQueue()
+
+        # 自动实例化: 共享同一Mesh和Material的可见物体合并为一次实例化绘制
+        # 半透明材质的物体需要逐个由远到近混合，不参与实例化
+        self.instancing_enabled = True
+        self.instancing_min_count = 2
+
+        # 静态合批: is_static的物体按Material合并为世界空间的网格，切换场景后的第一帧自动构建
+        self.static_batching_enabled = True
+        self.static_batches = []
+        self._static_batch_scene = None  # 已构建合批的场景
+        self._static_slots = {}  # entity_id -> (合批下标, submesh下标)
+        self._static_slots_key = None
+        self._static_batch_of = None
+        self._static_submesh_of = None
+
+        # 渲染命令列表: 排好序的绘制按块录制为与图形API无关的命令，再交给渲染器执行
+        # command_list_builder.workers > 0时在工作线程中录制；内容未变化的块复用之前的命令列表
+        # command_lists_enabled为False时跳过录制，直接把渲染元组交给renderer.draw()
+        self.command_lists_enabled = True
+        self.command_list_builder = CommandListBuilder()
 
     def update(self, delta_time):
         """
         渲染系统更新
+        渲染对象来自场景维护的常驻渲染代理 (core/render_proxy.py): 世界矩阵、列主序的模型/法线矩阵、
+        世界包围体和层掩码只在Transform变化时按行更新，所有相机共用；
+        之后每个相机只做各自的向量化可见性测试，可见的普通物体直接复用代理上缓存的渲染元组
         """
         # 确保有可用的相机
         self._ensure_camera_available()
-        
-        # 渲染所有网格对象
-        if GD.main_camera:
-            # 确保相机矩阵被正确设置
-            if GD.main_camera.is_dirty or not hasattr(self, '_camera_setup_done'):
-                GD.main_camera.calculate_view_matrix()
-                self.renderer.setup_camera(GD.main_camera)
-                self._camera_setup_done = True
-
-            # 收集渲染对象
-            render_objects = []
-            mesh_entities = GD.ecs_manager.get_entities_with_component(Mesh)
-            for entity in mesh_entities:
-                transform = entity.get_component(Transform)
-                assert (transform is not None)
+        cameras = self._collect_cameras()
+        if not cameras:
+            return
+
+        # 收集渲染对象
+        scene = GD.ecs_manager.get_active_scene()
+        proxies = scene.update_render_proxies() if scene is not None else RenderProxySet(capacity=1)
+        if self.static_batching_enabled and scene is not self._static_batch_scene:
+            self.build_static_batches()
+        static_slots = self._static_batch_slots(proxies.entities, (proxies, proxies.structure_version))
+        occluders, occluder_matrices = self._collect_occluders()
+
+        totals = dict.fromkeys(self.stats, 0)
+        self.camera_stats = {}
+        self.command_list_builder.begin_frame()
+        self.renderer.begin_frame()
+        for camera in cameras:
+            # 多个相机时由主相机维护LOD的切换状态
+            update_lod_state = camera is GD.main_camera or len(cameras) == 1
+            camera_meshes, visible = self._cull_for_camera(camera, proxies, occluders, occluder_matrices,
+                                                           update_lod_state)
+            draw_ranges = self._cull_meshlets(camera, camera_meshes, proxies.world_matrices, visible)
+            render_objects, versions = self._build_render_objects(
+                camera, visible, camera_meshes, proxies.materials, proxies.model_matrices, proxies.normal_matrices,
+                draw_ranges, proxies.bounds[0], static_slots, proxies.items, proxies.generations)
+
+            # 执行渲染 (只在相机矩阵版本变化或切换相机时重新上传)
+            self.renderer.begin_view(camera)
+            self._upload_camera(camera)
+            self._submit(render_objects, versions)
+
+            self.camera_stats[camera] = dict(self.stats)
+            for key, value in self.stats.items():
+                totals[key] = totals.get(key, 0) + value
+        self.renderer.end_frame()
+        self.stats = totals
+
+    def _submit(self, render_objects, versions=None):
+        """
+        录制命令列表并交给渲染器执行，关闭命令列表时直接提交渲染元组
+        Args:
+            versions: 每个渲染元组的矩阵版本，决定命令列表能否复用 (见graphics.command_list.chunk_key)
+        """
+        if not self.command_lists_enabled:
+            self.stats['command_lists'] = self.stats['command_lists_reused'] = 0
+            self.renderer.draw(render_objects)
+            return
+        reused = self.command_list_builder.stats['reused']
+        command_lists = self.command_list_builder.build(render_objects, versions)
+        self.stats['command_lists'] = len(command_lists)
+        self.stats['command_lists_reused'] = self.command_list_builder.stats['reused'] - reused
+        self.renderer.execute(command_lists)
+
+    def _collect_cameras(self):
+        """收集启用的相机，按priority从小到大排序 (同优先级时主相机在前)"""
+        cameras = []
+        scene = GD.ecs_manager.get_active_scene() if GD.ecs_manager else None
+        if scene:
+            cameras = [camera for camera in scene.get_entities_of_type(Camera) if camera.enabled]
+        if GD.main_camera is not None and GD.main_camera.enabled and GD.main_camera not in cameras:
+            cameras.append(GD.main_camera)
+        cameras.sort(key=lambda camera: (camera.priority, camera is not GD.main_camera))
+        return cameras
+
+    def _cull_for_camera(self, camera, proxies, occluders, occluder_matrices, update_lod_state=True):
+        """
+        单个相机的可见性测试，依次为 层掩码 → PVS → 视锥 → LOD → 遮挡
+        Args:
+            proxies: 场景的RenderProxySet (已update)
+        Returns:
+            (camera_meshes, visible) LOD替换后的Mesh列表与 (N,) bool数组
+        """
+        count = proxies.count
+        world_matrices = proxies.world_matrices
+        in_layers = (proxies.layers & camera.culling_mask) != 0
+        visible = self._pvs_cull(camera, proxies.entities, (proxies, proxies.structure_version)) & in_layers
+        visible = self._frustum_cull(camera, proxies.meshes, world_matrices, visible, proxies.bounds)
+        self.stats['layer_culled'] = count - int(np.count_nonzero(in_layers))
+
+        # LOD选择把替换后的Mesh写回列表，只有存在LOD物体时才复制
+        camera_meshes = proxies.meshes
+        if proxies.lod_count > 0:
+            camera_meshes = list(camera_meshes)
+            self._select_lods(camera, camera_meshes, proxies.lod_groups, world_matrices, visible, proxies.spheres,
+                              update_lod_state)
+        else:
+            self.stats['lod_culled'] = 0
+        if camera.use_occlusion_culling:
+            self._occlusion_cull(camera, camera_meshes, world_matrices, visible, occluders, occluder_matrices,
+                                 proxies.bounds)
+        else:
+            self.stats['occluded'] = 0
+        return camera_meshes, visible
+
+    def _collect_renderables(self):
+        """
+        收集所有带Mesh或LODGroup的Entity及其 (mesh, material, transform, lod_group)
+        LOD物体先使用最精细级别的Mesh参与剔除，没有LODGroup的lod_group为None
+        每帧渲染使用场景的渲染代理，这里只在构建静态合批时使用
+        """
+        meshes = []
+        materials = []
+        transforms = []
+        lod_groups = []
+        entities = collect_renderable_entities(GD.ecs_manager)
+        for entity in entities:
+            transform = entity.get_component(Transform)
+            assert (transform is not None)
+            material = entity.get_component(Material)
+            assert (material is not None)
+            lod_group = entity.get_component(LODGroup)
+            if lod_group is not None and lod_group.level_count > 0:
+                mesh = lod_group.bounds_mesh
+            else:
+                lod_group = None
                 mesh = entity.get_component(Mesh)
-                assert (mesh is not None)
-                material = entity.get_component(Material)
-                assert (material is not None)
-                render_objects.append((transform.calculate_world_matrix().flatten("F"), mesh, material))
+                # 有形变权重的Entity使用混合后的Mesh
+                blend_weights = entity.get_component(BlendShapeWeights)
+                if blend_weights is not None and blend_weights.deformed_mesh is not None:
+                    mesh = blend_weights.deformed_mesh
+            meshes.append(mesh)
+            materials.append(material)
+            transforms.append(transform)
+            lod_groups.append(lod_group)
+        return entities, meshes, materials, transforms, lod_groups
+
+    def build_static_batches(self):
+        """
+        静态合批: 把标记为is_static的物体按Material合并为世界空间的网格 (参考Unity StaticBatchingUtility.Combine)
+        切换场景后的第一帧自动调用；静态物体移动、增删后需要手动重新调用
+        有LODGroup、形变权重或网格簇的物体不参与合批
+        Returns:
+            util.static_batch.StaticBatch列表
+        """
+        return self._build_static_batches(*self._collect_renderables())
+
+    def _build_static_batches(self, entities, meshes, materials, transforms, lod_groups):
+        self._static_batch_scene = GD.ecs_manager.get_active_scene()
+        self._static_slots = {}
+        self._static_slots_key = None
+        candidates = [k for k, entity in enumerate(entities)
+                      if getattr(entity, 'is_static', False) and lod_groups[k] is None
+                      and meshes[k] is entity.get_component(Mesh) and meshes[k].meshlets is None]
+        self.static_batches = combine_static_meshes([entities[k].entity_id for k in candidates],
+                                                    [meshes[k] for k in candidates],
+                                                    [materials[k] for k in candidates],
+                                                    stack_world_matrices([transforms[k] for k in candidates]))
+        for b, batch in enumerate(self.static_batches):
+            for s, entity_id in enumerate(batch.entity_ids):
+                self._static_slots[entity_id] = (b, s)
+        return self.static_batches
+
+    def _static_batch_slots(self, entities, key=None):
+        """
+        每个物体所在的合批和submesh (key不变时复用)
+        Args:
+            key: Entity列表的缓存键 (渲染代理集合及其structure_version)，为None时使用Entity id元组
+        Returns:
+            (batch_of, submesh_of) 两个 (N,) 数组，不在合批中的为-1；没有合批时返回None
+        """
+        if not self.static_batching_enabled or not self._static_slots:
+            return None
+        if key is None:
+            key = tuple(entity.entity_id for entity in entities)
+        if key != self._static_slots_key:
+            slots = np.array([self._static_slots.get(entity.entity_id, (-1, -1)) for entity in entities],
+                             dtype=np.intp).reshape(-1, 2)
+            self._static_batch_of, self._static_submesh_of = slots[:, 0], slots[:, 1]
+            self._static_slots_key = key
+        return self._static_batch_of, self._static_submesh_of
+
+    def load_pvs(self, path):
+        """加载tools/bake_pvs.py烘焙的PVS文件，传入None时关闭PVS"""
+        self.pvs = PVSData.load(path) if path is not None else None
+        self._pvs_key = None
+        self._pvs_indices = None
+
+    def _pvs_cull(self, camera, entities, key=None):
+        """
+        按相机所在格子查询PVS
+        相机不在烘焙范围内、或物体不在PVS中 (动态物体、无名物体) 时视为可见
+        Args:
+            key: entities的缓存键 (渲染代理集合及其structure_version)；
+                 为None时entities应按烘焙顺序 (collect_renderable_entities) 排列，以Entity id元组为键
+        Returns:
+            (N,) bool数组，True表示可能可见
+        """
+        count = len(entities)
+        visible = np.ones(count, dtype=bool)
+        self.stats['pvs_culled'] = 0
+        if self.pvs is None or count == 0:
+            return visible
+        cell = self.pvs.cell_of(camera.position)
+        if cell < 0:
+            return visible
+
+        # Entity列表不变时复用键到位索引的映射；物体键按烘焙时的收集顺序生成，再按entities排列
+        ordered = entities
+        if key is None:
+            key = tuple(entity.entity_id for entity in entities)
+        elif key != self._pvs_key:
+            ordered = collect_renderable_entities(GD.ecs_manager)
+        if key != self._pvs_key:
+            object_key = {entity.entity_id: name for entity, name in zip(ordered, object_keys(ordered))}
+            self._pvs_indices = np.array([self.pvs.key_to_index.get(object_key.get(entity.entity_id), -1)
+                                          for entity in entities], dtype=np.intp)
+            self._pvs_key = key
+
+        known = self._pvs_indices >= 0
+        visible[known] = self.pvs.visible_objects(cell)[self._pvs_indices[known]]
+        self.stats['pvs_culled'] = count - int(np.count_nonzero(visible))
+        return visible
+
+    @staticmethod
+    def _compute_world_bounds(meshes, world_matrices):
+        """
+        批量计算所有渲染对象的世界AABB (LOD物体使用最精细级别的包围盒)
+        Returns:
+            (centers, extents) 两个 (N, 3) 数组
+        """
+        if not meshes:
+            return np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32)
+        local_centers = np.array([mesh.bounds_center for mesh in meshes], dtype=np.float32)
+        local_extents = np.array([mesh.bounds_extents for mesh in meshes], dtype=np.float32)
+        return transform_aabbs(local_centers, local_extents, world_matrices)
+
+    @staticmethod
+    def _compute_world_spheres(meshes, world_matrices):
+        """批量计算所有渲染对象的世界包围球 (centers, radii)"""
+        if not meshes:
+            return np.zeros((0, 3), dtype=np.float32), np.zeros(0, dtype=np.float32)
+        local_centers = np.array([mesh.bounds_center for mesh in meshes], dtype=np.float32)
+        local_radii = np.array([mesh.bounding_radius for mesh in meshes], dtype=np.float32)
+        return transform_spheres(local_centers, local_radii, world_matrices)
+
+    def _frustum_cull(self, camera, meshes, world_matrices, candidates=None, bounds=None):
+        """
+        视锥剔除：局部包围盒按世界矩阵批量变换后，一次向量化测试所有候选
+        Args:
+            candidates: (N,) bool数组，只测试其中为True的物体 (其余直接视为不可见)
+            bounds: 预先计算的世界包围盒 (centers, extents)，多个相机共用
+        Returns:
+            (N,) bool数组，True表示可见
+        """
+        count = len(meshes)
+        visible = np.ones(count, dtype=bool) if candidates is None else np.array(candidates, dtype=bool)
+        indices = np.nonzero(visible)[0]
+        if self.frustum_culling_enabled and len(indices) > 0:
+            if bounds is None:
+                bounds = self._compute_world_bounds([meshes[i] for i in indices], world_matrices[indices])
+            else:
+                bounds = (bounds[0][indices], bounds[1][indices])
+            visible[indices] = frustum_cull_aabbs(camera.get_frustum_planes(), bounds[0], bounds[1])
+
+        visible_count = int(np.count_nonzero(visible))
+        self.stats['candidates'] = count
+        self.stats['visible'] = visible_count
+        self.stats['culled'] = len(indices) - visible_count
+        return visible
+
+    def _select_lods(self, camera, meshes, lod_groups, world_matrices, visible, spheres=None, update_state=True):
+        """
+        为所有可见的LOD物体一次向量化计算屏幕相对高度并选择级别
+        结果写回meshes，低于最后一级阈值的物体在visible中置为False
+        Args:
+            spheres: 预先计算的世界包围球 (centers, radii)，多个相机共用
+            update_state: 是否把选择结果写回LODGroup.current_level (作为下一帧的滞后参考)
+        """
+        indices = [i for i in np.nonzero(visible)[0] if lod_groups[i] is not None]
+        self.stats['lod_culled'] = 0
+        if not indices:
+            return
+
+        groups = [lod_groups[i] for i in indices]
+        if spheres is None:
+            spheres = self._compute_world_spheres([meshes[i] for i in indices], world_matrices[indices])
+            centers, radii = spheres
+        else:
+            centers, radii = spheres[0][indices], spheres[1][indices]
+
+        projection = camera.get_projection_matrix().T
+        heights = screen_relative_heights(centers, radii, camera.position, projection[1, 1],
+                                          camera.projection_type == ProjectionType.PERSPECTIVE)
+
+        # 级别数量不同的物体用-inf补齐阈值
+        thresholds = np.full((len(groups), max(group.level_count for group in groups)), -np.inf, dtype=np.float32)
+        current = np.empty(len(groups), dtype=np.intp)
+        for k, group in enumerate(groups):
+            thresholds[k, :group.level_count] = group.thresholds
+            current[k] = group.level_count if group.current_level == LODGroup.CULLED else group.current_level
+        levels = select_lod_levels(heights, thresholds, current, [group.hysteresis for group in groups])
+
+        for k, i in enumerate(indices):
+            group = groups[k]
+            level = int(levels[k])
+            if level >= group.level_count:
+                level = LODGroup.CULLED
+                visible[i] = False
+                self.stats['lod_culled'] += 1
+            else:
+                meshes[i] = group.levels[level].mesh
+            if update_state:
+                group.current_level = level
+        self.stats['visible'] -= self.stats['lod_culled']
+
+    def _collect_occluders(self):
+        """
+        收集所有遮挡体
+        Returns:
+            (occluders, world_matrices) 遮挡体列表与对应的 (M, 4, 4) 世界矩阵
+        """
+        occluders = []
+        transforms = []
+        for entity in GD.ecs_manager.get_entities_with_component(Occluder):
+            transform = entity.get_component(Transform)
+            occluder = entity.get_component(Occluder)
+            if transform is None or occluder.get_mesh() is None:
+                continue
+            occluders.append(occluder)
+            transforms.append(transform)
+        return occluders, stack_world_matrices(transforms)
+
+    def _occlusion_cull(self, camera, meshes, world_matrices, visible, occluders, occluder_matrices, bounds=None):
+        """
+        把遮挡体光栅化到低分辨率深度缓冲，再用层级深度批量测试可见物体的世界包围盒
+        被遮挡的物体在visible中置为False
+        Args:
+            bounds: 预先计算的世界包围盒 (centers, extents)，多个相机共用
+        """
+        self.stats['occluded'] = 0
+        if not self.occlusion_culling_enabled or not occluders:
+            return
+        indices = np.nonzero(visible)[0]
+        if len(indices) == 0:
+            return
+
+        view_projection = camera.get_view_projection_matrix()
+        self.occlusion_buffer.render_occluders(view_projection,
+                                               [occluder.get_local_triangles() for occluder in occluders],
+                                               occluder_matrices)
+
+        if bounds is None:
+            centers, extents = self._compute_world_bounds([meshes[i] for i in indices], world_matrices[indices])
+        else:
+            centers, extents = bounds[0][indices], bounds[1][indices]
+        passed = self.occlusion_buffer.test_aabbs(centers, extents, view_projection)
+
+        visible[indices[~passed]] = False
+        self.stats['occluded'] = int(np.count_nonzero(~passed))
+        self.stats['visible'] -= self.stats['occluded']
+
+    def _cull_meshlets(self, camera, meshes, world_matrices, visible):
+        """
+        对可见物体的网格簇做视锥和背面剔除
+        世界空间的视锥平面和相机位置变换到每个物体的局部空间，再一次向量化测试该物体的所有簇
+        所有簇都被剔除的物体在visible中置为False
+        Returns:
+            {物体下标: (starts, counts)} 部分簇可见的物体需要提交的索引区间，全部可见的物体不在其中
+        """
+        self.stats['meshlets'] = 0
+        self.stats['meshlet_culled'] = 0
+        draw_ranges = {}
+        if not self.meshlet_culling_enabled:
+            return draw_ranges
+        indices = [i for i in np.nonzero(visible)[0] if meshes[i].meshlets is not None]
+        if not indices:
+            return draw_ranges
+
+        planes = camera.get_frustum_planes().astype(np.float64)
+        perspective = camera.projection_type == ProjectionType.PERSPECTIVE
+        eye = np.append(np.asarray(camera.position, dtype=np.float64), 1.0)
+        forward = -camera.get_view_matrix().T[2, :3].astype(np.float64)
+        for i in indices:
+            meshlets = meshes[i].meshlets
+            matrix = world_matrices[i].astype(np.float64)
+            view_position = view_direction = None
+            if self.meshlet_cone_culling_enabled and _is_uniform_scale(matrix):
+                inverse = np.linalg.inv(matrix)
+                if perspective:
+                    view_position = (inverse @ eye)[:3]
+                else:
+                    view_direction = inverse[:3, :3] @ forward
+            passed = meshlets.cull(planes @ matrix, view_position, view_direction)
+
+            culled = meshlets.count - int(np.count_nonzero(passed))
+            self.stats['meshlets'] += meshlets.count
+            self.stats['meshlet_culled'] += culled
+            if culled == meshlets.count:
+                visible[i] = False
+                self.stats['visible'] -= 1
+            elif culled > 0:
+                draw_ranges[i] = meshlets.draw_ranges(passed)
+        return draw_ranges
+
+    def _build_render_objects(self, camera, visible, meshes, materials, model_matrices, normals, draw_ranges,
+                              centers, static_slots=None, items=None, generations=None):
+        """
+        把可见物体整理为渲染元组并排序
+        单个物体: (model_matrix (16,), mesh, material, draw_ranges或None, normal_matrix (9,))
+        共享同一Mesh和Material的不透明物体 (没有网格簇区间时) 合并为一个实例化元组:
+        (model_matrices (K, 16), mesh, material, None, normal_matrices (K, 9))
+        同一静态合批中的可见物体合并为一个元组，只提交可见submesh的索引区间
+        Args:
+            items: 渲染代理缓存的单个绘制元组，Mesh未被LOD替换且没有网格簇区间的物体直接复用
+            generations: 渲染代理每行的代数，用于生成矩阵版本
+        Returns:
+            (render_objects, versions) versions为每个元组的矩阵版本 (没有generations时为None):
+            单个绘制为所在行的代数，实例化绘制为 (行号的字节, 各行代数的最大值)，静态合批为None (矩阵不变)
+        """
+        visible_indices = np.nonzero(visible)[0]
+        depths = self._view_depths(camera, centers[visible_indices]) if self.sort_draws_enabled else None
+
+        groups = {}
+        batched = {}
+        singles = []
+        for k, i in enumerate(visible_indices):
+            if static_slots is not None and static_slots[0][i] >= 0:
+                batched.setdefault(int(static_slots[0][i]), []).append(k)
+            elif not self.instancing_enabled or i in draw_ranges or \
+                    getattr(materials[i], 'render_queue', 0) > TRANSPARENT_QUEUE_THRESHOLD:
+                singles.append(k)
+            else:
+                groups.setdefault((meshes[i], materials[i]), []).append(k)
+
+        render_objects = []
+        versions = []
+        item_depths = []
+        instanced = []
+        static_batched = 0
+        for b, members in batched.items():
+            batch = self.static_batches[b]
+            members = np.array(members)
+            ranges = batch.draw_ranges(static_slots[1][visible_indices[members]])
+            render_objects.append((_IDENTITY_MODEL, batch.mesh, batch.material, ranges, _IDENTITY_NORMAL))
+            if generations is not None:
+                versions.append(None)
+            static_batched += len(members)
+            if depths is not None:
+                item_depths.append(depths[members].min())
+        for (mesh, material), members in groups.items():
+            if len(members) < self.instancing_min_count:
+                singles.extend(members)
+                continue
+            members = np.array(members)
+            indices = visible_indices[members]
+            render_objects.append((model_matrices[indices], mesh, material, None, normals[indices]))
+            if generations is not None:
+                versions.append((indices.tobytes(), int(generations[indices].max())))
+            instanced.append(len(indices))
+            if depths is not None:
+                item_depths.append(depths[members].min())
+        for k in singles:
+            i = visible_indices[k]
+            ranges = draw_ranges.get(i)
+            if items is None:
+                render_objects.append((model_matrices[i], meshes[i], materials[i], ranges, normals[i]))
+            elif ranges is None and items[i][1] is meshes[i]:
+                render_objects.append(items[i])
+            else:
+                # 仍使用代理上的矩阵视图，命令列表按视图身份复用
+                render_objects.append((items[i][0], meshes[i], materials[i], ranges, items[i][4]))
+            if generations is not None:
+                versions.append(int(generations[i]))
+            if depths is not None:
+                item_depths.append(depths[k])
+
+        self.stats['draws'] = len(render_objects)
+        self.stats['instanced'] = int(sum(instanced))
+        self.stats['static_batched'] = static_batched
+        if depths is not None:
+            render_objects = self.render_queue.sort(render_objects, np.array(item_depths))
+            if generations is not None:
+                versions = [versions[i] for i in self.render_queue.order]
+        return render_objects, versions if generations is not None else None
+
+    @staticmethod
+    def _view_depths(camera, centers):
+        """世界包围盒中心沿视线方向的深度，按近/远裁剪面归一化到[0, 1]"""
+        forward = -camera.get_view_matrix().T[2, :3]
+        depths = (np.asarray(centers, dtype=np.float32) - camera.position) @ forward
+        return (depths - camera.near_clip) / max(camera.far_clip - camera.near_clip, 1e-6)
 
-            # 执行渲染
-            self.renderer.render(render_objects)
+    def _upload_camera(self, camera):
+        """比较相机的视图/投影版本号，只上传发生变化的矩阵"""
+        versions = (camera.view_version, camera.projection_version)
+        if camera is not self._uploaded_camera:
+            self.renderer.setup_camera(camera)
+        elif versions != self._uploaded_camera_versions:
+            self.renderer.setup_camera(camera,
+                                       update_view=versions[0] != self._uploaded_camera_versions[0],
+                                       update_projection=versions[1] != self._uploaded_camera_versions[1])
+        else:
+            return
+        self._uploaded_camera = camera
+        self._uploaded_camera_versions = versions
 
     def _ensure_camera_available(self):
         """确保有可用的相机"""
@@ -58,5 +626,4 @@ class RenderSystem(System):
                 for entity in scene.all_entities:
                     if isinstance(entity, Camera):
                         GD.main_camera = entity
-                        self.renderer.setup_camera(GD.main_camera)
                         break
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+SplineSystem - 沿路径运动系统
+每帧把使用同一Spline的所有SplineFollower收集为数组，
+一次向量化计算推进距离、查弧长表、求位置和朝向，再写回Transform
+"""
+import numpy as np
+
+from core.ecs import System
+from components.spline_follower import SplineFollower, SplineWrapMode
+from components.transform import Transform
+from Context.context import global_data as GD
+from util.quaternion import Quaternion
+
+
+class SplineSystem(System):
+    def __init__(self):
+        super(SplineSystem, self).__init__()
+
+    def update(self, delta_time):
+        # 按Spline分组，同一条路径上的跟随者一起计算
+        groups = {}
+        for entity in GD.ecs_manager.get_entities_with_component(SplineFollower):
+            follower = entity.get_component(SplineFollower)
+            if follower.spline is None or not follower.is_playing:
+                continue
+            groups.setdefault(id(follower.spline), []).append(follower)
+
+        for followers in groups.values():
+            self.update_followers(followers, delta_time)
+        return
+
+    def update_followers(self, followers, delta_time):
+        """批量更新使用同一Spline的跟随者"""
+        spline = followers[0].spline
+        length = spline.length
+
+        distances = np.array([f.distance for f in followers], dtype=np.float64)
+        speeds = np.array([f.speed for f in followers], dtype=np.float64)
+        directions = np.array([f.direction for f in followers], dtype=np.float64)
+        modes = np.array([f.wrap_mode.value for f in followers])
+
+        distances = distances + speeds * directions * delta_time
+        distances, directions, finished = self._wrap_distances(distances, directions, modes, length)
+
+        positions, tangents = spline.evaluate_at_distance(distances)
+
+        # 朝向沿运动方向 (倒退或PING_PONG返程时切线取反)
+        aligned = np.array([f.align_to_tangent for f in followers], dtype=bool)
+        rotations = None
+        if np.any(aligned):
+            moving_sign = np.where(speeds * directions < 0, -1.0, 1.0)[:, np.newaxis]
+            ups = np.array([f.up for f in followers], dtype=np.float64)
+            rotations = Quaternion.look_rotation_batch(tangents * moving_sign, ups)
+
+        for i, follower in enumerate(followers):
+            follower.distance = float(distances[i])
+            follower.direction = float(directions[i])
+            if finished[i]:
+                follower.is_playing = False
+
+            transform = follower.owner.get_component(Transform) if follower.owner is not None else None
+            if transform is None:
+                continue
+            transform.position = positions[i]
+            if aligned[i]:
+                transform.rotation_quaternion = Quaternion.from_array(rotations[i])
+
+    def _wrap_distances(self, distances, directions, modes, length):
+        """按循环模式处理越界的距离"""
+        if length <= 0.0:
+            return np.zeros_like(distances), directions, np.zeros(len(distances), dtype=bool)
+
+        loop = modes == SplineWrapMode.LOOP.value
+        distances[loop] = np.mod(distances[loop], length)
+
+        # 往返的周期为2 * length，折叠到一个周期内；落在后半周期时位置镜像、方向反向
+        # (一步越界多倍长度时同样正确)
+        ping_pong = (modes == SplineWrapMode.PING_PONG.value) & ((distances > length) | (distances < 0.0))
+        folded = np.mod(distances[ping_pong], 2.0 * length)
+        reflected = folded > length
+        distances[ping_pong] = np.where(reflected, 2.0 * length - folded, folded)
+        directions[ping_pong] *= np.where(reflected, -1.0, 1.0)
+
+        once = modes == SplineWrapMode.ONCE.value
+        finished = once & ((distances >= length) | (distances < 0.0))
+
+        return np.clip(distances, 0.0, length), directions, finished
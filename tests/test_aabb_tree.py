@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+动态AABB树测试
+验证树的插入/移动/删除/重建，以及Scene的空间查询接口
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from util.aabb_tree import DynamicAABBTree
+from util.geometry import extract_frustum_planes, frustum_cull_aabbs
+
+
+def random_boxes(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-50.0, 50.0, (count, 3))
+    extents = rng.uniform(0.1, 2.0, (count, 3))
+    return centers - extents, centers + extents
+
+
+def brute_force_aabb(lowers, uppers, lower, upper):
+    mask = np.all(lowers <= upper, axis=1) & np.all(uppers >= lower, axis=1)
+    return set(np.nonzero(mask)[0].tolist())
+
+
+def test_tree_queries_match_brute_force():
+    """测试AABB/球体/视锥/最近邻查询结果与暴力遍历一致"""
+    print("🚀 测试AABB树查询:")
+    lowers, uppers = random_boxes(300)
+    tree = DynamicAABBTree(margin=0.5)
+    for i in range(len(lowers)):
+        tree.create_proxy(lowers[i], uppers[i], i)
+    tree.validate()
+    print(f"   物体数: {tree.proxy_count}, 树高度: {tree.height}")
+    assert tree.height < 20
+
+    # AABB查询
+    query_lower, query_upper = np.array([-10.0, -10.0, -10.0]), np.array([15.0, 5.0, 20.0])
+    assert set(tree.query_aabb(query_lower, query_upper)) == brute_force_aabb(lowers, uppers, query_lower, query_upper)
+
+    # 球体查询
+    center, radius = np.array([5.0, -3.0, 2.0]), 12.0
+    closest = np.clip(center, lowers, uppers)
+    expected = set(np.nonzero(np.sum((closest - center) ** 2, axis=1) <= radius ** 2)[0].tolist())
+    assert set(tree.query_sphere(center, radius)) == expected
+
+    # 视锥查询
+    camera = Camera(position=np.array([0.0, 0.0, 40.0]), fov=60.0, aspect_ratio=1.0, far_clip=60.0)
+    planes = extract_frustum_planes(camera.get_view_projection_matrix())
+    visible = frustum_cull_aabbs(planes, (lowers + uppers) * 0.5, (uppers - lowers) * 0.5)
+    assert set(tree.query_frustum(planes)) == set(np.nonzero(visible)[0].tolist())
+
+    # 最近邻查询
+    point = np.array([1.0, 2.0, 3.0])
+    distances = np.linalg.norm(np.clip(point, lowers, uppers) - point, axis=1)
+    result = tree.nearest_k(point, 5)
+    assert [d for d, _ in result] == sorted(d for d, _ in result)
+    assert np.allclose([d for d, _ in result], np.sort(distances)[:5], atol=1e-5)
+    print(f"   最近5个: {[index for _, index in result]}")
+    print()
+
+
+def test_tree_move_remove_rebuild():
+    """测试小幅移动不改树结构、大幅移动重插入、删除和重建"""
+    print("🚀 测试AABB树更新:")
+    lowers, uppers = random_boxes(100, seed=1)
+    tree = DynamicAABBTree(margin=0.5)
+    proxies = [tree.create_proxy(lowers[i], uppers[i], i) for i in range(len(lowers))]
+
+    # 在加胖范围内的移动不会修改树
+    assert not tree.move_proxy(proxies[0], lowers[0] + 0.2, uppers[0] + 0.2)
+    # 超出范围需要重新插入
+    assert tree.move_proxy(proxies[0], lowers[0] + 10.0, uppers[0] + 10.0, displacement=[10.0, 10.0, 10.0])
+    assert 0 in tree.query_aabb(lowers[0] + 10.0, uppers[0] + 10.0)
+    tree.validate()
+
+    for proxy in proxies[:50]:
+        tree.destroy_proxy(proxy)
+    assert tree.proxy_count == 50
+    tree.validate()
+
+    tree.rebuild()
+    tree.validate()
+    assert set(tree.query_aabb([-100.0] * 3, [100.0] * 3)) == set(range(50, 100))
+    print(f"   重建后树高度: {tree.height}")
+    print()
+
+
+def test_scene_spatial_queries():
+    """测试Scene空间查询跟随Transform变化"""
+    print("🚀 测试Scene空间查询:")
+    ecs = ECSManager()
+    ecs.create_scene("SpatialScene")
+
+    vertices = np.array([[x, y, z, 0.0, 0.0, 1.0, 0.0, 0.0]
+                         for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)], dtype=np.float32)
+    objects = []
+    for i in range(10):
+        obj = ecs.create_entity(GameObject, name=f"Box_{i}")
+        ecs.add_component(obj, Mesh(vertices.flatten()))
+        obj.transform.position = [i * 3.0, 0.0, 0.0]
+        objects.append(obj)
+    scene = ecs.get_active_scene()
+
+    near = scene.query_sphere([0.0, 0.0, 0.0], 4.0)
+    assert set(near) == {objects[0], objects[1]}
+
+    # 移动后查询结果跟随更新
+    objects[9].transform.position = [0.0, 3.0, 0.0]
+    assert objects[9] in scene.query_aabb([-1.0, 2.0, -1.0], [1.0, 4.0, 1.0])
+    assert scene.nearest_k([27.0, 0.0, 0.0], 1) == [objects[8]]
+
+    # 子物体随父物体移动
+    objects[5].set_parent(objects[4])
+    objects[4].transform.position = [100.0, 0.0, 0.0]
+    assert set(scene.query_sphere([103.0, 0.0, 0.0], 1.0)) == {objects[5]}
+
+    # 删除后不再出现在结果中
+    scene.remove_entity(objects[0])
+    assert objects[0] not in scene.query_sphere([0.0, 0.0, 0.0], 4.0)
+    print(f"   空间索引物体数: {scene.update_spatial_index().proxy_count}")
+    print()
+
+
+if __name__ == "__main__":
+    test_tree_queries_match_brute_force()
+    test_tree_move_remove_rebuild()
+    test_scene_spatial_queries()
+    print("✅ 所有AABB树测试完成")
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+BlendShape测试
+验证稀疏形变目标的存储、混合和按Entity权重驱动
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.gameobject import GameObject
+from core.ecs import ECSManager
+from components.mesh import Mesh
+from components.blend_shape_weights import BlendShapeWeights
+from systems.blend_shape_system import BlendShapeSystem
+from Context.context import global_data as GD
+
+
+def create_quad_mesh():
+    """创建一个4顶点的测试Mesh (8个float格式)"""
+    vertices = np.array([
+        0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0,
+        1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 0.0,
+        1.0, 1.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0,
+        0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 1.0,
+    ], dtype=np.float32)
+    indices = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+    return Mesh(vertices, indices)
+
+
+def test_sparse_storage():
+    """测试形变目标只存储被移动的顶点"""
+    print("🚀 测试稀疏存储:")
+    mesh = create_quad_mesh()
+
+    targets = mesh.vertices.reshape(-1, 8)[:, 0:3].copy()
+    targets[2] += [0.0, 0.0, 1.0]
+    index = mesh.add_blend_shape_from_positions("Smile", targets)
+
+    shape = mesh.blend_shapes[index]
+    print(f"   形变目标: {shape.name}, 影响顶点数: {shape.vertex_count}")
+    assert shape.vertex_count == 1
+    assert list(shape.indices) == [2]
+    assert mesh.get_blend_shape_index("Smile") == 0
+    assert mesh.get_blend_shape_index("Missing") == -1
+    print()
+
+
+def test_blended_vertices():
+    """测试按权重混合位置和法线"""
+    print("🚀 测试顶点混合:")
+    mesh = create_quad_mesh()
+    mesh.add_blend_shape("Raise", [2, 3], [[0.0, 0.0, 2.0], [0.0, 0.0, 2.0]])
+    mesh.add_blend_shape("Tilt", [0], [[0.0, 0.0, 1.0]], normal_deltas=[[1.0, 0.0, -1.0]])
+
+    # 零权重应直接返回原始顶点
+    result = mesh.compute_blended_vertices([0.0, 0.0])
+    assert np.allclose(result, mesh.vertices)
+
+    result = mesh.compute_blended_vertices([0.5, 1.0]).reshape(-1, 8)
+    print(f"   顶点2位置: {result[2, 0:3]}")
+    print(f"   顶点0法线: {result[0, 3:6]}")
+    assert np.allclose(result[2, 0:3], [1.0, 1.0, 1.0])
+    assert np.allclose(result[0, 0:3], [0.0, 0.0, 1.0])
+    assert np.isclose(np.linalg.norm(result[0, 3:6]), 1.0)
+    # 未被移动的顶点保持不变
+    assert np.allclose(result[1], mesh.vertices.reshape(-1, 8)[1])
+
+    # 输出数组的形状不匹配时报错，不会悄悄分配新数组
+    try:
+        mesh.compute_blended_vertices([0.5, 1.0], out=np.empty(8, dtype=np.float32))
+        assert False, "mismatched out should raise"
+    except ValueError:
+        pass
+    print()
+
+
+def test_bounds_cover_stacked_targets():
+    """测试包围体覆盖多个目标叠加、正负权重下形变后的顶点"""
+    print("🚀 测试形变包围体:")
+    mesh = create_quad_mesh()
+    mesh.add_blend_shape("Raise", [2, 3], [[0.0, 0.0, 2.0], [0.0, 0.0, 2.0]])
+    mesh.add_blend_shape("RaiseMore", [2], [[0.5, 0.0, 1.0]])
+    print(f"   包围盒: {mesh.bounds_min} - {mesh.bounds_max}, 半径: {mesh.bounding_radius:.3f}")
+    for weights in ([1.0, 1.0], [-1.0, -1.0], [1.0, -1.0], [0.5, 1.0]):
+        positions = mesh.compute_blended_vertices(weights).reshape(-1, 8)[:, 0:3]
+        assert np.all(positions >= mesh.bounds_min - 1e-6) and np.all(positions <= mesh.bounds_max + 1e-6)
+        distances = np.linalg.norm(positions - mesh.bounds_center, axis=1)
+        assert np.all(distances <= mesh.bounding_radius + 1e-6)
+    assert np.allclose(mesh.bounds_max, [1.5, 1.0, 3.0]) and np.allclose(mesh.bounds_min, [0.0, 0.0, -3.0])
+
+    # 重新计算包围体时保留形变目标的范围；权重限制在[-1, 1]内
+    mesh.recalculate_bounds()
+    assert np.allclose(mesh.bounds_max, [1.5, 1.0, 3.0])
+    weights = BlendShapeWeights([3.0, -0.5])
+    assert np.allclose(weights.weights, [1.0, -0.5])
+    weights.set_weight(1, -2.0)
+    weights.set_weights([0.25, 4.0])
+    assert np.allclose(weights.weights, [0.25, 1.0])
+    print()
+
+
+def test_blend_shape_system():
+    """测试按Entity的权重驱动形变"""
+    print("🚀 测试BlendShapeSystem:")
+    ecs = ECSManager()
+    GD.ecs_manager = ecs
+
+    mesh = create_quad_mesh()
+    mesh.add_blend_shape("Raise", [2], [[0.0, 0.0, 2.0]])
+
+    face_a = ecs.create_entity(GameObject, name="FaceA")
+    face_b = ecs.create_entity(GameObject, name="FaceB")
+    for face in (face_a, face_b):
+        ecs.add_component(face, mesh)
+        ecs.add_component(face, BlendShapeWeights())
+
+    face_a.get_component(BlendShapeWeights).set_weight("Raise", 1.0)
+
+    system = BlendShapeSystem()
+    system.update(0.016)
+
+    deformed_a = face_a.get_component(BlendShapeWeights).deformed_mesh
+    deformed_b = face_b.get_component(BlendShapeWeights).deformed_mesh
+    print(f"   FaceA顶点2: {deformed_a.vertices.reshape(-1, 8)[2, 0:3]}")
+    print(f"   FaceB顶点2: {deformed_b.vertices.reshape(-1, 8)[2, 0:3]}")
+    assert np.isclose(deformed_a.vertices.reshape(-1, 8)[2, 2], 2.0)
+    assert np.isclose(deformed_b.vertices.reshape(-1, 8)[2, 2], 0.0)
+
+    # 权重不变时不应重新混合
+    weights = face_a.get_component(BlendShapeWeights)
+    assert not weights.is_dirty
+    weights.set_weight(0, 0.5)
+    assert weights.is_dirty
+    system.update(0.016)
+    assert np.isclose(deformed_a.vertices.reshape(-1, 8)[2, 2], 1.0)
+
+    # 权重数组按形变目标数量补齐
+    assert len(face_b.get_component(BlendShapeWeights).weights) == mesh.blend_shape_count
+    print()
+
+
+if __name__ == "__main__":
+    test_sparse_storage()
+    test_blended_vertices()
+    test_bounds_cover_stacked_targets()
+    test_blend_shape_system()
+    print("✅ BlendShape测试完成!")
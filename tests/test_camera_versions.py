@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+相机矩阵版本测试
+验证视图/投影版本号只在输入真正改变时递增、派生矩阵缓存，以及RenderSystem按版本上传
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera, ProjectionType
+from systems.render_system import RenderSystem
+
+
+def test_versions_track_inputs():
+    """测试视图和投影版本分别由各自的输入驱动"""
+    print("🚀 测试相机版本号:")
+    camera = Camera(position=np.array([0.0, 0.0, 5.0]))
+    view, projection = camera.view_version, camera.projection_version
+    assert not camera.is_dirty
+
+    # 赋相同的值不改变版本
+    camera.position = np.array([0.0, 0.0, 5.0])
+    camera.fov = camera.fov
+    camera.yaw = camera.yaw
+    assert (camera.view_version, camera.projection_version) == (view, projection)
+
+    # 内部更新方向向量不改变版本
+    camera.update_direction_vectors()
+    assert camera.view_version == view
+
+    camera.position += np.array([1.0, 0.0, 0.0])
+    assert camera.view_version == view + 1 and camera.projection_version == projection
+    assert np.isclose(camera.view_matrix[3, 0], -1.0)
+
+    camera.yaw = 0.0
+    assert camera.view_version == view + 2
+    assert np.allclose(camera.get_view_matrix(), camera.view_matrix)
+    assert np.allclose(camera.front, [1.0, 0.0, 0.0])
+
+    camera.set_fov(60.0)
+    camera.projection_type = ProjectionType.ORTHOGRAPHIC
+    assert camera.view_version == view + 2 and camera.projection_version == projection + 2
+    assert np.isclose(camera.projection_matrix[0, 0], 0.1)
+    print(f"   view_version={camera.view_version}, projection_version={camera.projection_version}")
+    print()
+
+
+def test_derived_matrices_cached():
+    """测试视图投影矩阵、逆矩阵和视锥平面只在版本变化后重新计算"""
+    print("🚀 测试派生矩阵缓存:")
+    camera = Camera(position=np.array([1.0, 2.0, 3.0]), fov=60.0, aspect_ratio=1.5)
+    view_projection = camera.get_view_projection_matrix()
+    planes = camera.get_frustum_planes()
+    inverse = camera.get_inverse_view_projection_matrix()
+    assert camera.get_view_projection_matrix() is view_projection
+    assert camera.get_frustum_planes() is planes
+    assert camera.get_inverse_view_projection_matrix() is inverse
+    assert np.allclose(view_projection, camera.projection_matrix.T @ camera.view_matrix.T)
+    assert np.allclose(inverse @ view_projection, np.eye(4), atol=1e-9)
+
+    camera.aspect_ratio = 2.0
+    assert camera.get_view_projection_matrix() is not view_projection
+    assert camera.get_frustum_planes() is not planes
+    assert np.allclose(camera.get_inverse_view_projection_matrix() @ camera.get_view_projection_matrix(),
+                       np.eye(4), atol=1e-9)
+    print("   输入不变时返回同一缓存对象")
+    print()
+
+
+class RecordingRenderer(object):
+    """记录setup_camera调用的渲染器"""
+
+    def __init__(self):
+        self.calls = []
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        self.calls.append((update_view, update_projection))
+
+
+def test_render_system_uploads_on_change():
+    """测试RenderSystem只在版本变化时上传，并只上传变化的矩阵"""
+    print("🚀 测试相机上传:")
+    camera = Camera(position=np.array([0.0, 0.0, 5.0]))
+
+    # 不创建窗口，只测试上传逻辑
+    render_system = RenderSystem.__new__(RenderSystem)
+    render_system.renderer = RecordingRenderer()
+    render_system._uploaded_camera = None
+    render_system._uploaded_camera_versions = None
+
+    render_system._upload_camera(camera)
+    render_system._upload_camera(camera)
+    camera.position += np.array([0.0, 1.0, 0.0])
+    render_system._upload_camera(camera)
+    camera.fov = 30.0
+    render_system._upload_camera(camera)
+    render_system._upload_camera(camera)
+    render_system._upload_camera(Camera())
+    print(f"   上传记录: {render_system.renderer.calls}")
+    assert render_system.renderer.calls == [(True, True), (True, False), (False, True), (True, True)]
+    print()
+
+
+if __name__ == "__main__":
+    test_versions_track_inputs()
+    test_derived_matrices_cached()
+    test_render_system_uploads_on_change()
+    print("✅ 所有相机版本测试完成")
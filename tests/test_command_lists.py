@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+渲染命令列表测试
+验证命令录制时的冗余状态消除、按块复用、线程池录制，以及RenderSystem经由命令列表驱动渲染后端
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.material import Material
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from graphics.command_list import (BIND_MATERIAL, DRAW, DRAW_INSTANCED, SET_PIPELINE, CommandList,
+                                   CommandListBuilder)
+from graphics.null_renderer import NullRenderer
+from graphics.opengl_renderer import OpenGLRenderer
+from resource_manager.null_shader import NullShader
+from systems.render_system import RenderSystem
+from Context.context import global_data as GD
+
+
+def create_cube_mesh(size=1.0):
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([[*c, 0.0, 0.0, 1.0, 0.0, 0.0] for c in corners], dtype=np.float32).flatten()
+    indices = np.array([0, 1, 2, 1, 3, 2, 4, 6, 5, 5, 6, 7], dtype=np.uint32)
+    return Mesh(vertices, indices)
+
+
+def single(mesh, material, x, draw_ranges=None):
+    model = np.eye(4, dtype=np.float32)
+    model[3, 0] = x  # 列主序的平移
+    return model.reshape(-1), mesh, material, draw_ranges, np.eye(3, dtype=np.float32).reshape(-1)
+
+
+def test_record_and_reuse():
+    """测试录制消除重复的管线和材质绑定，内容未变化的块在下一帧复用"""
+    print("🚀 测试命令列表录制与复用:")
+    shader = NullShader()
+    brick, stone = Material(shader), Material(shader)
+    mesh = create_cube_mesh()
+    models = np.tile(np.eye(4, dtype=np.float32).reshape(-1), (3, 1))
+    normals = np.tile(np.eye(3, dtype=np.float32).reshape(-1), (3, 1))
+    ranges = (np.array([0]), np.array([6]))
+    items = [single(mesh, brick, 0.0), single(mesh, brick, 1.0), (models, mesh, brick, None, normals),
+             single(mesh, stone, 2.0, ranges)]
+
+    command_list = CommandList().record(items)
+    ops = [command[0] for command in command_list.commands]
+    print(f"   命令: {ops}")
+    assert ops == [SET_PIPELINE, BIND_MATERIAL, DRAW, DRAW,
+                   SET_PIPELINE, BIND_MATERIAL, DRAW_INSTANCED,  # 实例化变体是另一条管线
+                   SET_PIPELINE, BIND_MATERIAL, DRAW]
+    assert command_list.draw_count == 4
+    # 还原的渲染元组与输入一致 (供只实现draw()的后端使用)
+    restored = command_list.render_objects()
+    assert [(item[1], item[2], item[3] is None) for item in restored] == \
+           [(item[1], item[2], item[3] is None) for item in items]
+
+    builder = CommandListBuilder(chunk_size=2)
+    builder.begin_frame()
+    first = builder.build(items)
+    assert [len(command_list.commands) for command_list in first] == [4, 3, 3]  # 达到块大小或材质变化处分块
+    assert builder.stats['built'] == 3
+    # 下一帧只有最后一块中的物体移动
+    moved = items[:3] + [single(mesh, stone, 5.0, ranges)]
+    builder.begin_frame()
+    second = builder.build(moved)
+    print(f"   第二帧统计: {builder.stats}")
+    assert second[:2] == first[:2] and second[2] is not first[2]
+    assert builder.stats['reused'] == 2 and builder.stats['built'] == 1
+
+    # 提供矩阵版本时按版本判断，不再比较矩阵内容
+    versioned = CommandListBuilder(chunk_size=2)
+    versioned.begin_frame()
+    lists = versioned.build(items, [1, 1, 2, 3])
+    items[3][0][12] = 5.0  # 原地修改矩阵 (如渲染代理的行)，版本随之变化
+    versioned.begin_frame()
+    assert versioned.build(items, [1, 1, 2, 3])[2] is lists[2]
+    versioned.begin_frame()
+    assert versioned.build(items, [1, 1, 2, 4])[2] is not lists[2] and versioned.stats['reused'] == 2
+
+    # 线程池录制与单线程结果相同，且能复用单线程录制的列表
+    threaded = CommandListBuilder(chunk_size=1, workers=4)
+    threaded.begin_frame()
+    lists = threaded.build(items)
+    assert [command_list.commands[0][0] for command_list in lists] == [SET_PIPELINE] * 4
+    assert sum(len(command_list.commands) for command_list in lists) == 12
+    threaded.begin_frame()
+    assert threaded.build(items)[2] is lists[2] and threaded.stats['reused'] == 4
+    threaded.shutdown()
+
+    # OpenGL后端把命令转换为按材质分组的绘制对象，缓存在CommandList.prepared中
+    groups = OpenGLRenderer._prepare_commands(command_list)
+    assert [(shader_, instanced, len(objects)) for shader_, instanced, objects in groups] == \
+           [(shader, False, 2), (shader, True, 1), (shader, False, 1)]
+    assert groups[2][2][0].material is stone and groups[2][2][0].draw_ranges is ranges
+    print()
+
+
+def test_render_system_executes_command_lists():
+    """测试RenderSystem录制命令列表交给渲染后端，静止的场景在下一帧复用全部命令列表"""
+    print("🚀 测试RenderSystem命令列表:")
+    ecs = ECSManager()
+    ecs.create_scene("CommandScene")
+    shader = NullShader()
+    materials = [Material(shader) for _ in range(4)]
+    for material in materials:
+        material.properties["MyFloatParam"] = 0.5
+    crates = []
+    for k in range(40):
+        crate = ecs.create_entity(GameObject, name="Crate")
+        ecs.add_component(crate, create_cube_mesh(1.0 + k))  # 每个物体的Mesh不同，不会实例化
+        ecs.add_component(crate, materials[k % 4])
+        crate.transform.position = [float(k % 8) * 2.0 - 8.0, float(k // 8), -20.0]
+        crates.append(crate)
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]))
+    old_ecs, old_camera, old_renderer = GD.ecs_manager, GD.main_camera, GD.renderer
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        renderer = NullRenderer()
+        render_system = RenderSystem(renderer)
+        render_system.command_list_builder = CommandListBuilder(chunk_size=8, workers=2)
+
+        render_system.update(0.016)
+        first = dict(render_system.stats)
+        first_frame = dict(renderer.frame_stats)
+        render_system.update(0.016)
+        second = dict(render_system.stats)
+        crates[0].transform.position = [-9.0, 0.0, -20.0]  # 深度不变，排序不变，只影响一个块
+        render_system.update(0.016)
+        third = dict(render_system.stats)
+        # 块的键由代理行的代数组成，不包含矩阵的字节
+        keys = [key for command_list in render_system.command_list_builder._current.values()
+                for key in command_list.key]
+        assert all(isinstance(part[3], int) for part in keys)
+
+        # 与直接提交渲染元组的结果相同
+        render_system.command_lists_enabled = False
+        render_system.update(0.016)
+        direct = dict(renderer.frame_stats)
+        render_system.command_list_builder.shutdown()
+    finally:
+        GD.ecs_manager, GD.main_camera, GD.renderer = old_ecs, old_camera, old_renderer
+
+    print(f"   命令列表: {first['command_lists']}, 第二帧复用: {second['command_lists_reused']}, "
+          f"移动一个物体后复用: {third['command_lists_reused']}")
+    # 每个材质10个绘制，分为8 + 2两块
+    assert first['draws'] == 40 and first['command_lists'] == 8 and first['command_lists_reused'] == 0
+    assert second['command_lists_reused'] == 8
+    assert third['command_lists_reused'] == 7
+    assert first_frame['draw_calls'] == direct['draw_calls'] == 40
+    assert first_frame['triangles'] == direct['triangles'] and first_frame['program_changes'] == 1
+    assert render_system.stats['command_lists'] == 0
+    print()
+
+
+if __name__ == "__main__":
+    test_record_and_reuse()
+    test_render_system_executes_command_lists()
+    print("✅ 所有渲染命令列表测试完成")
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+每帧uniform缓冲测试
+验证FrameData的std140打包偏移，以及相机数据每帧只上传一次、与Shader数量无关
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import graphics.opengl_frame_uniforms as opengl_frame_uniforms
+from Entity.camera import Camera
+from core.ecs import ECSManager
+from graphics.opengl_frame_uniforms import FRAME_DATA_BINDING, FRAME_DATA_FLOATS, OpenGLFrameUniforms, pack_frame_data
+
+
+def create_camera():
+    ecs = ECSManager()
+    ecs.create_scene("FrameScene")
+    camera = ecs.create_entity(Camera, position=np.array([1.0, 2.0, 3.0]), far_clip=500.0)
+    camera.look_at(np.array([0.0, 0.0, -5.0]))
+    return camera
+
+
+def test_pack_frame_data_layout():
+    """测试std140布局中各成员的偏移"""
+    print("🚀 测试FrameData打包:")
+    camera = create_camera()
+    data = pack_frame_data(camera, time=1.5)
+    assert data.shape == (FRAME_DATA_FLOATS,) and data.dtype == np.float32 and data.nbytes == 224
+    assert np.allclose(data[0:16], np.asarray(camera.view_matrix).reshape(-1))
+    assert np.allclose(data[16:32], np.asarray(camera.projection_matrix).reshape(-1))
+    # viewProjection按列主序存放，等于view * projection的列主序乘积
+    view_projection = camera.get_view_projection_matrix()
+    assert np.allclose(data[32:48], view_projection.T.reshape(-1), atol=1e-5)
+    assert np.allclose(data[48:52], [*camera.position, 1.0])
+    assert data[52] == np.float32(1.5)
+    print()
+
+
+def test_camera_uploaded_once_per_frame():
+    """测试相机更新是一次整块上传，时间只写4字节"""
+    print("🚀 测试每帧uniform缓冲上传:")
+    calls = []
+    saved = {}
+    fakes = {
+        'glGenBuffers': lambda count: 7,
+        'glBindBuffer': lambda target, buffer: None,
+        'glBufferData': lambda target, size, data, usage: calls.append(('data', size)),
+        'glBindBufferBase': lambda target, index, buffer: calls.append(('base', index, buffer)),
+        'glBufferSubData': lambda target, offset, size, data: calls.append(('sub', offset, size)),
+    }
+    for name, function in fakes.items():
+        saved[name] = getattr(opengl_frame_uniforms, name)
+        setattr(opengl_frame_uniforms, name, function)
+    try:
+        frame_uniforms = OpenGLFrameUniforms()
+        frame_uniforms.update_time(0.25)
+        frame_uniforms.update_camera(create_camera())
+    finally:
+        for name, function in saved.items():
+            setattr(opengl_frame_uniforms, name, function)
+    print(f"   调用: {calls}")
+    assert calls == [('data', 224), ('base', FRAME_DATA_BINDING, 7), ('sub', 208, 4), ('sub', 0, 224)]
+    assert frame_uniforms.data[52] == np.float32(0.25)  # 更新相机时保留时间
+    assert frame_uniforms.stats == {'uploads': 2, 'bytes_uploaded': 228}
+
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "resources", "shaders", "vertex_shader.glsl"), encoding="utf-8-sig") as f:
+        vertex_source = f.read()
+    assert "layout(std140) uniform FrameData" in vertex_source and "uniform mat4 view;" not in vertex_source
+    print()
+
+
+if __name__ == "__main__":
+    test_pack_frame_data_layout()
+    test_camera_uploaded_once_per_frame()
+    print("✅ 所有每帧uniform缓冲测试完成")
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+视锥剔除测试
+验证Mesh包围体、世界空间包围盒变换以及视锥平面测试
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.mesh import Mesh
+from components.transform import stack_world_matrices
+from core.ecs import ECSManager
+from util.geometry import transform_aabbs, frustum_cull_aabbs, frustum_cull_spheres, transform_spheres
+
+
+def create_cube_mesh(size=1.0):
+    """创建8个顶点的立方体Mesh"""
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([[*c, 0.0, 0.0, 1.0, 0.0, 0.0] for c in corners], dtype=np.float32).flatten()
+    return Mesh(vertices)
+
+
+def test_mesh_bounds():
+    """测试加载时计算的局部包围盒和包围球"""
+    print("🚀 测试Mesh包围体:")
+    mesh = create_cube_mesh(2.0)
+    print(f"   包围盒: {mesh.bounds_min} ~ {mesh.bounds_max}, 包围球半径: {mesh.bounding_radius:.4f}")
+    assert np.allclose(mesh.bounds_center, [0.0, 0.0, 0.0])
+    assert np.allclose(mesh.bounds_extents, [1.0, 1.0, 1.0])
+    assert np.isclose(mesh.bounding_radius, np.sqrt(3.0))
+
+    # 形变目标会扩展包围体
+    mesh.add_blend_shape("Stretch", [7], [[0.0, 3.0, 0.0]])
+    assert np.isclose(mesh.bounds_max[1], 4.0)
+    print()
+
+
+def test_world_bounds():
+    """测试包围体随Transform批量变换"""
+    print("🚀 测试世界空间包围体:")
+    ecs = ECSManager()
+    obj = ecs.create_entity(GameObject, name="Box")
+    obj.transform.position = [10.0, 0.0, 0.0]
+    obj.transform.rotation = [0.0, 45.0, 0.0]
+    obj.transform.scale = [2.0, 1.0, 1.0]
+
+    matrices = stack_world_matrices([obj.transform])
+    centers, extents = transform_aabbs([[0.0, 0.0, 0.0]], [[1.0, 1.0, 1.0]], matrices)
+    print(f"   世界中心: {centers[0]}, 世界半长: {extents[0]}")
+    assert np.allclose(centers[0], [10.0, 0.0, 0.0], atol=1e-5)
+    expected = 2.0 * np.cos(np.radians(45.0)) + np.sin(np.radians(45.0))
+    assert np.isclose(extents[0][0], expected, atol=1e-5)
+
+    sphere_centers, radii = transform_spheres([[0.0, 0.0, 0.0]], [1.0], matrices)
+    assert np.isclose(radii[0], 2.0, atol=1e-5)
+    print()
+
+
+def test_camera_frustum():
+    """测试相机视锥平面剔除"""
+    print("🚀 测试视锥剔除:")
+    camera = Camera(position=np.array([0.0, 0.0, 3.0]))
+    planes = camera.get_frustum_planes()
+
+    centers = np.array([
+        [0.0, 0.0, -5.0],     # 正前方 - 可见
+        [0.0, 0.0, 10.0],     # 相机背后 - 剔除
+        [100.0, 0.0, -5.0],   # 右侧很远 - 剔除
+        [0.0, 0.0, -200.0],   # 超过远裁剪面 - 剔除
+        [3.5, 0.0, -5.0],     # 与视锥边缘相交 - 可见
+    ], dtype=np.float32)
+    extents = np.full((len(centers), 3), 1.0, dtype=np.float32)
+
+    visible = frustum_cull_aabbs(planes, centers, extents)
+    print(f"   AABB可见性: {visible}")
+    assert list(visible) == [True, False, False, False, True]
+
+    visible_spheres = frustum_cull_spheres(planes, centers, np.full(len(centers), np.sqrt(3.0)))
+    assert list(visible_spheres) == [True, False, False, False, True]
+    print()
+
+
+if __name__ == "__main__":
+    test_mesh_bounds()
+    test_world_bounds()
+    test_camera_frustum()
+    print("✅ 视锥剔除测试完成!")
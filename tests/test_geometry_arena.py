@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+几何大缓冲测试
+验证空闲链表分配器的分配、合并与增长，以及所有Mesh共用一个VAO、按base_vertex/first_index定位和间接绘制命令
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gc
+import numpy as np
+import graphics.opengl_geometry_arena as opengl_geometry_arena
+from components.mesh import Mesh
+from graphics.opengl_geometry_arena import (FreeListAllocator, OpenGLGeometryArena, OpenGLIndirectBuffer,
+                                            VERTEX_BYTES, INDEX_BYTES)
+
+
+class RecordingGL(object):
+    """记录调用的GL函数，替换opengl_geometry_arena模块中的同名函数"""
+
+    NAMES = ('glGenVertexArrays', 'glGenBuffers', 'glBindVertexArray', 'glBindBuffer', 'glBufferData',
+             'glBufferSubData', 'glCopyBufferSubData', 'glVertexAttribPointer', 'glEnableVertexAttribArray',
+             'glDeleteVertexArrays', 'glDeleteBuffers')
+
+    def __init__(self):
+        self.calls = []
+        self.next_id = 1
+        self._saved = {}
+
+    def __enter__(self):
+        for name in self.NAMES:
+            self._saved[name] = getattr(opengl_geometry_arena, name)
+            setattr(opengl_geometry_arena, name, self._make(name))
+        return self
+
+    def __exit__(self, *exc):
+        for name, function in self._saved.items():
+            setattr(opengl_geometry_arena, name, function)
+
+    def _make(self, name):
+        def call(*args):
+            self.calls.append((name,) + args[:3])
+            if name in ('glGenVertexArrays', 'glGenBuffers'):
+                self.next_id += 1
+                return self.next_id
+            return None
+        return call
+
+    def named(self, name):
+        return [call for call in self.calls if call[0] == name]
+
+
+def create_grid_mesh(quads):
+    """quads个四边形组成的网格"""
+    vertices = []
+    indices = []
+    for q in range(quads):
+        base = len(vertices)
+        vertices += [[q, 0, 0, 0, 0, 1, 0, 0], [q + 1, 0, 0, 0, 0, 1, 1, 0],
+                     [q + 1, 1, 0, 0, 0, 1, 1, 1], [q, 1, 0, 0, 0, 1, 0, 1]]
+        indices += [base, base + 1, base + 2, base, base + 2, base + 3]
+    return Mesh(np.array(vertices, dtype=np.float32).flatten(), np.array(indices, dtype=np.uint32))
+
+
+def test_free_list_allocator():
+    """测试首次适配、释放合并和增长"""
+    print("🚀 测试空闲链表分配器:")
+    allocator = FreeListAllocator(100)
+    a, b, c = allocator.allocate(30), allocator.allocate(30), allocator.allocate(30)
+    assert (a, b, c) == (0, 30, 60) and allocator.allocate(20) is None
+    allocator.free(b, 30)
+    assert allocator.allocate(10) == 30  # 首次适配复用中间的空洞
+    allocator.free(30, 10)
+    allocator.free(a, 30)
+    assert allocator.free_blocks == [(0, 60), (90, 10)]  # 与相邻的空闲块合并
+    allocator.free(c, 30)
+    assert allocator.free_blocks == [(0, 100)]
+    assert allocator.allocate(0) == 0 and allocator.free_size == 100
+
+    allocator.allocate(100)
+    allocator.grow(150)
+    assert allocator.free_blocks == [(100, 50)] and allocator.allocate(50) == 100
+    print()
+
+
+def test_meshes_share_one_vertex_array():
+    """测试多个Mesh共用VAO、区间定位、扩容复制与回收后复用"""
+    print("🚀 测试几何大缓冲:")
+    with RecordingGL() as gl:
+        arena = OpenGLGeometryArena(vertex_capacity=16, index_capacity=24)
+        quad, strip = create_grid_mesh(1), create_grid_mesh(2)
+        first, second = arena.bind(quad), arena.bind(strip)
+        assert (first.base_vertex, first.vertex_count, first.first_index, first.index_count) == (0, 4, 0, 6)
+        assert (second.base_vertex, second.vertex_count, second.first_index, second.index_count) == (4, 8, 6, 12)
+        uploads = gl.named('glBufferSubData')
+        assert uploads[-2][2] == 4 * VERTEX_BYTES and uploads[-1][2] == 6 * INDEX_BYTES
+
+        # 之后的绘制只有一个VAO，不再上传
+        gl.calls.clear()
+        for _ in range(5):
+            arena.bind(quad)
+            arena.bind(strip)
+        assert set(call[0] for call in gl.calls) == {'glBindVertexArray'}
+
+        # 容量不足时按2倍增长，旧数据在GPU上复制，顶点属性重新指向新缓冲
+        gl.calls.clear()
+        big = create_grid_mesh(3)
+        third = arena.bind(big)
+        assert third.base_vertex == 12 and arena.vertex_allocator.capacity == 32
+        assert arena.index_allocator.capacity == 48 and arena.stats['reallocations'] == 2
+        assert len(gl.named('glCopyBufferSubData')) == 2 and len(gl.named('glVertexAttribPointer')) == 3
+
+        # Mesh被回收后，下一帧归还区间并被新的Mesh复用
+        del quad
+        gc.collect()
+        arena.collect_garbage()
+        replacement = create_grid_mesh(1)
+        reused = arena.bind(replacement)
+        assert reused.base_vertex == 0 and reused.first_index == 0
+        assert len(arena) == 3 and replacement in arena
+
+        commands = OpenGLIndirectBuffer.pack([second, third], [1, 5])
+        print(f"   间接绘制命令: {commands.tolist()}")
+        assert commands.tolist() == [[12, 1, 6, 4, 0], [18, 5, 18, 12, 1]]
+    print()
+
+
+if __name__ == "__main__":
+    test_free_list_allocator()
+    test_meshes_share_one_vertex_array()
+    print("✅ 所有几何大缓冲测试完成")
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+低开销GL调用层测试
+用记录调用的假函数代替驱动入口加载调度表，验证uniform暂存区的合并与提交、Shader在发布模式下的调用路径，
+以及实例数据的复用暂存缓冲
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ctypes
+import subprocess
+
+import numpy as np
+import OpenGL
+from OpenGL.GL import GL_FLOAT, GL_FLOAT_MAT3, GL_FLOAT_MAT4, GL_SAMPLER_2D
+from OpenGL.raw.GL.VERSION import GL_1_1
+from graphics.opengl_dispatch import GL, GLDispatch, UniformBatch, configure_error_checking
+from graphics.opengl_instance_buffer import OpenGLInstanceBuffer
+from resource_manager.opengl_shader import OpenGLShader, ShaderVariable
+
+
+class FakeDriver(object):
+    """按名称返回记录调用的假函数；指针参数在调用时读出为float列表"""
+
+    FLOATS = {'glUniform1fv': 1, 'glUniform3fv': 3, 'glUniformMatrix3fv': 9, 'glUniformMatrix4fv': 16}
+    INTS = {'glUniform1iv': 1}
+
+    def __init__(self):
+        self.calls = []
+
+    def resolve(self, name):
+        def function(*args):
+            if name in self.FLOATS:
+                location, count, pointer = args[0], args[1], args[-1]
+                values = (ctypes.c_float * (count * self.FLOATS[name])).from_address(pointer)
+                self.calls.append((name, location, [round(v, 3) for v in values]))
+            elif name in self.INTS:
+                location, count, pointer = args
+                self.calls.append((name, location, list((ctypes.c_int * count).from_address(pointer))))
+            else:
+                self.calls.append((name,) + args)
+        return function
+
+
+def test_uniform_batch_coalesces_writes():
+    """测试暂存区合并同一位置的写入，提交时指针指向暂存区中的数据"""
+    print("🚀 测试uniform暂存区:")
+    driver = FakeDriver()
+    dispatch = GLDispatch()
+    assert dispatch.load(driver.resolve) and dispatch.loaded
+    batch = UniformBatch(capacity=20)  # 容量不足时增长，已暂存的数据保留
+
+    model = np.arange(16, dtype=np.float32)
+    batch.write(10, 'mat4', model)
+    batch.write(11, 'mat3', np.ones(9, dtype=np.float32))
+    batch.write(10, 'mat4', model * 2)  # 覆盖原槽位
+    batch.write(12, 'vec3', np.array([1.0, 2.0, 3.0], dtype=np.float32))
+    assert batch.used == 16 + 9 + 3 and len(batch.data) >= batch.used
+    assert batch.flush(dispatch) == 3 and batch.flush(dispatch) == 0
+    print(f"   统计: {batch.stats}")
+    assert driver.calls == [('glUniformMatrix4fv', 10, [2.0 * k for k in range(16)]),
+                            ('glUniformMatrix3fv', 11, [1.0] * 9),
+                            ('glUniform3fv', 12, [1.0, 2.0, 3.0])]
+    assert batch.stats == {'writes': 4, 'coalesced': 1, 'flushes': 1, 'calls': 3}
+
+    # 缺少任何一个函数时放弃加载
+    incomplete = GLDispatch()
+    assert not incomplete.load(lambda name: None if name == 'glUseProgram' else driver.resolve(name))
+    assert not incomplete.loaded and incomplete.glUniform1f is None
+
+    # OpenGL.GL已导入后再要求发布模式不会生效
+    checking = OpenGL.ERROR_CHECKING
+    assert configure_error_checking(release=False)
+    if checking:
+        assert not configure_error_checking(release=True) and OpenGL.ERROR_CHECKING
+    print()
+
+
+def test_core_functions_fall_back_to_raw_pyopengl():
+    """测试驱动取不到GL 1.1入口时 (WGL的wglGetProcAddress)，从PyOpenGL底层的ctypes函数取地址"""
+    print("🚀 测试GL 1.1函数的回退:")
+    driver = FakeDriver()
+    calls = []
+    # 代替opengl32.dll导出的glDrawElements
+    exported = ctypes.CFUNCTYPE(None, ctypes.c_uint, ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p)(
+        lambda *args: calls.append(args))
+    original = GL_1_1.glDrawElements
+    GL_1_1.glDrawElements = exported
+    try:
+        dispatch = GLDispatch()
+        assert dispatch.load(lambda name: None if name == 'glDrawElements' else driver.resolve(name))
+        dispatch.glDrawElements(4, 36, 5125, 64)
+        dispatch.glUseProgram(3)
+    finally:
+        GL_1_1.glDrawElements = original
+    print(f"   glDrawElements调用: {calls}")
+    assert calls == [(4, 36, 5125, 64)] and driver.calls == [('glUseProgram', 3)]
+    print()
+
+
+def test_shader_uses_dispatch_when_loaded():
+    """测试加载调度表后Shader的uniform (包括标量和sampler) 进入暂存区，切换程序和绘制前提交"""
+    print("🚀 测试发布模式下的Shader调用:")
+    driver = FakeDriver()
+    assert GL.load(driver.resolve)
+    try:
+        shader = OpenGLShader()
+        shader.shader_program = 7
+        shader.uniforms = {"model": ShaderVariable("model", 1, int(GL_FLOAT_MAT4), 1),
+                           "normalMatrix": ShaderVariable("normalMatrix", 2, int(GL_FLOAT_MAT3), 1),
+                           "weights": ShaderVariable("weights", 3, int(GL_FLOAT), 2),
+                           "value": ShaderVariable("value", 4, int(GL_FLOAT), 1),
+                           "MainTex": ShaderVariable("MainTex", 5, int(GL_SAMPLER_2D), 1)}
+
+        assert shader.set_mat4("model", np.eye(4))
+        assert shader.set_mat3("normalMatrix", np.eye(3))
+        assert shader.set_uniform("weights", [0.25, 0.75])
+        assert shader.set_mat4("model", np.eye(4) * 2.0)  # 提交前再次写入，只上传最后的值
+        # set_uniform与set_float共用缓存和暂存槽位: 提交时只上传最后写入的值
+        assert shader.set_uniform("value", 1.0) and shader.set_float("value", np.float32(0.5))
+        assert not shader.set_float("value", 0.5) and not shader.set_uniform("value", [0.5])
+        assert shader.set_texture("MainTex", 3) and not shader.set_uniform("MainTex", 3)
+        assert driver.calls == []  # 全部等待提交
+
+        shader.use()
+        print(f"   GL调用: {[call[:2] for call in driver.calls]}")
+        assert [call[:2] for call in driver.calls] == [('glUniformMatrix4fv', 1), ('glUniformMatrix3fv', 2),
+                                                       ('glUniform1fv', 3), ('glUniform1fv', 4),
+                                                       ('glUniform1iv', 5), ('glUseProgram', 7)]
+        assert driver.calls[0][2][0] == 2.0 and driver.calls[2][2] == [0.25, 0.75]
+        assert driver.calls[3][2] == [0.5] and driver.calls[4][2] == [3]
+        assert not GL.uniform_batch.pending
+    finally:
+        GL.unload()
+    assert not GL.loaded and GL.glUseProgram is None
+
+    # 实例数据写入复用的暂存缓冲，多个实例组按顺序拼接
+    buffer = OpenGLInstanceBuffer.__new__(OpenGLInstanceBuffer)
+    buffer.staging = np.empty((2, 25), dtype=np.float32)
+    models = np.arange(32, dtype=np.float32).reshape(2, 16)
+    normals = np.ones((2, 9), dtype=np.float32)
+    data = buffer.stage(models, normals)
+    assert np.array_equal(data, OpenGLInstanceBuffer.pack(models, normals))
+    assert buffer.stage(models[:1], normals[:1]).base is buffer.staging  # 容量足够时不重新分配
+    data = buffer.stage([models[:1], models], [normals[:1], normals])
+    assert len(data) == 3 and len(buffer.staging) == 4  # 按2倍增长
+    assert np.array_equal(data[1:, :16], models)
+    print()
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_main_release_flag_disables_error_checking():
+    """测试python main.py --release的导入顺序: 导入main的全部依赖后PyOpenGL错误检查已关闭 (在新进程中检查)"""
+    print("🚀 测试main.py发布模式:")
+    script = ("import sys; sys.argv = ['main.py', '--release']; import main, OpenGL; "
+              "print(OpenGL.ERROR_CHECKING, OpenGL.ERROR_LOGGING, 'OpenGL.GL' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    output = result.stdout.strip().splitlines()
+    print(f"   输出: {output[-1:]}")
+    assert result.returncode == 0, result.stderr
+    assert output[-1] == "False False True"
+    print()
+
+
+if __name__ == "__main__":
+    test_uniform_batch_coalesces_writes()
+    test_core_functions_fall_back_to_raw_pyopengl()
+    test_shader_uses_dispatch_when_loaded()
+    test_main_release_flag_disables_error_checking()
+    print("✅ 所有GL调用层测试完成")
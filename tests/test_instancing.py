@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+自动实例化测试
+验证共享Mesh和Material的可见物体合并为实例化绘制、实例的法线矩阵，以及Shader变体的宏注入
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.material import Material
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from graphics.opengl_instance_buffer import INSTANCE_FLOATS, OpenGLInstanceBuffer
+from graphics.renderer import Renderer
+from resource_manager.opengl_shader import OpenGLShader
+from systems.render_system import RenderSystem
+from Context.context import global_data as GD
+
+
+def create_cube_mesh(size=1.0):
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([[*c, 0.0, 0.0, 1.0, 0.0, 0.0] for c in corners], dtype=np.float32).flatten()
+    return Mesh(vertices)
+
+
+class RecordingRenderer(object):
+    def __init__(self):
+        self.render_objects = []
+
+    def begin_frame(self):
+        self.render_objects = []
+
+    def begin_view(self, camera):
+        pass
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        pass
+
+    def draw(self, render_objects):
+        self.render_objects.extend(render_objects)
+
+    # 命令列表还原为渲染元组交给draw() (Renderer的默认实现)
+    execute = Renderer.execute
+
+    def end_frame(self):
+        pass
+
+
+def test_forest_is_instanced():
+    """测试1万棵相同的树只产生少量绘制"""
+    print("🚀 测试森林实例化:")
+    ecs = ECSManager()
+    ecs.create_scene("ForestScene")
+    tree_mesh, rock_mesh = create_cube_mesh(1.0), create_cube_mesh(0.5)
+    bark, moss = Material(), Material()
+    rng = np.random.default_rng(0)
+    positions = np.column_stack([rng.uniform(-100, 100, 10000), np.zeros(10000), rng.uniform(-200, -2, 10000)])
+    for k, position in enumerate(positions):
+        tree = ecs.create_entity(GameObject, name="Tree")
+        ecs.add_component(tree, tree_mesh)
+        ecs.add_component(tree, bark)
+        tree.transform.position = position
+        tree.transform.rotation = [0.0, float(k % 360), 0.0]
+    for material in (bark, moss):
+        rock = ecs.create_entity(GameObject, name="Rock")
+        ecs.add_component(rock, rock_mesh)
+        ecs.add_component(rock, material)
+        rock.transform.position = [0.0, 0.0, -5.0]
+    # 只有一个实例的组仍然单独绘制
+    lonely = ecs.create_entity(GameObject, name="Lonely")
+    ecs.add_component(lonely, create_cube_mesh(2.0))
+    ecs.add_component(lonely, bark)
+    lonely.transform.position = [0.0, 0.0, -10.0]
+
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]), far_clip=1000.0)
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        render_system = RenderSystem(RecordingRenderer())
+        start = time.perf_counter()
+        render_system.update(0.016)
+        elapsed = time.perf_counter() - start
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+
+    objects = render_system.renderer.render_objects
+    stats = render_system.stats
+    print(f"   可见 {stats['visible']}, 绘制 {stats['draws']}, 实例化物体 {stats['instanced']}, "
+          f"耗时 {elapsed * 1000:.1f}ms")
+    assert stats['draws'] == len(objects) <= 4
+    instanced = [item for item in objects if item[0].ndim == 2]
+    assert len(instanced) == 1 and instanced[0][1] is tree_mesh
+    assert len(instanced[0][0]) == stats['instanced'] == stats['visible'] - 3
+    assert instanced[0][0].shape[1] == 16 and instanced[0][4].shape == (len(instanced[0][0]), 9)
+    assert sum(1 for item in objects if item[1] is rock_mesh) == 2  # 材质不同，不合并
+
+    # 实例的法线矩阵为模型矩阵左上3x3的逆转置 (均为列主序)
+    models = instanced[0][0].reshape(-1, 4, 4).transpose(0, 2, 1)
+    normals = instanced[0][4].reshape(-1, 3, 3).transpose(0, 2, 1)
+    for k in (0, len(models) // 2, len(models) - 1):
+        expected = np.linalg.inv(models[k][:3, :3]).T
+        assert np.allclose(normals[k], expected, atol=1e-5)
+
+    render_system.instancing_enabled = False
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        render_system.update(0.016)
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+    assert render_system.stats['draws'] == render_system.stats['visible']
+    print()
+
+
+def test_transparent_objects_are_not_instanced():
+    """测试半透明物体不合并为实例化绘制，仍按由远到近的顺序逐个混合"""
+    print("🚀 测试半透明物体不实例化:")
+    ecs = ECSManager()
+    ecs.create_scene("GlassScene")
+    pane_mesh, smoke_mesh = create_cube_mesh(1.0), create_cube_mesh(2.0)
+    glass = Material(render_queue=Material.RENDER_QUEUE_TRANSPARENT)
+    smoke = Material(render_queue=Material.RENDER_QUEUE_TRANSPARENT)
+    names = {}
+    for name, mesh, material, z in (("glass_near", pane_mesh, glass, -3.0), ("smoke", smoke_mesh, smoke, -10.0),
+                                    ("glass_far", pane_mesh, glass, -30.0)):
+        entity = ecs.create_entity(GameObject, name=name)
+        ecs.add_component(entity, mesh)
+        ecs.add_component(entity, material)
+        entity.transform.position = [0.0, 0.0, z]
+        names[z] = name
+
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]), far_clip=100.0)
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        render_system = RenderSystem(RecordingRenderer())
+        render_system.update(0.016)
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+
+    objects = render_system.renderer.render_objects
+    order = [names[float(item[0][14])] for item in objects]
+    print(f"   绘制顺序: {order}")
+    assert all(item[0].ndim == 1 for item in objects) and render_system.stats['instanced'] == 0
+    assert order == ["glass_far", "smoke", "glass_near"]
+    print()
+
+
+def test_instance_packing_and_shader_variant():
+    """测试实例数据交错布局和INSTANCING宏注入位置"""
+    print("🚀 测试实例缓冲布局与Shader变体:")
+    models = np.arange(32, dtype=np.float32).reshape(2, 16)
+    normals = -np.arange(18, dtype=np.float32).reshape(2, 9)
+    data = OpenGLInstanceBuffer.pack(models, normals)
+    assert data.shape == (2, INSTANCE_FLOATS) and data.dtype == np.float32
+    assert np.array_equal(data[1, :16], models[1]) and np.array_equal(data[1, 16:], normals[1])
+
+    source = "#version 300 es\nprecision mediump float;\nvoid main() {}"
+    injected = OpenGLShader.inject_defines(source, ("INSTANCING",))
+    assert injected.split("\n")[:3] == ["#version 300 es", "#define INSTANCING", "precision mediump float;"]
+    assert OpenGLShader.inject_defines(source, ()) == source
+
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "resources", "shaders", "vertex_shader.glsl"), encoding="utf-8-sig") as f:
+        vertex_source = f.read()
+    assert "#ifdef INSTANCING" in vertex_source and "layout(location = 3) in mat4 instanceModel" in vertex_source
+    print()
+
+
+if __name__ == "__main__":
+    test_forest_is_instanced()
+    test_transparent_objects_are_not_instanced()
+    test_instance_packing_and_shader_variant()
+    print("✅ 所有实例化测试完成")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+LODGroup测试
+验证屏幕相对高度计算、带滞后的级别选择以及RenderSystem中的LOD替换与剔除
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from components.lod_group import LODGroup, select_lod_levels
+from components.mesh import Mesh
+from components.transform import Transform, stack_world_matrices
+from systems.render_system import RenderSystem
+from util.geometry import screen_relative_heights
+
+
+def create_quad_mesh(size=1.0):
+    half = size * 0.5
+    vertices = np.array([[x, y, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0] for x in (-half, half) for y in (-half, half)],
+                        dtype=np.float32).flatten()
+    return Mesh(vertices, np.array([0, 1, 2, 1, 3, 2], dtype=np.uint32))
+
+
+def test_screen_relative_heights():
+    """测试包围球的屏幕相对高度随距离反比变化"""
+    print("🚀 测试屏幕相对高度:")
+    scale = 1.0 / np.tan(np.radians(60.0) / 2)
+    heights = screen_relative_heights([[0.0, 0.0, -10.0], [0.0, 0.0, -20.0], [0.0, 0.0, 0.5]],
+                                      [1.0, 1.0, 1.0], [0.0, 0.0, 0.0], scale)
+    print(f"   高度: {heights}")
+    assert np.isclose(heights[0], 2.0 * heights[1])
+    assert np.isclose(heights[0], scale / 10.0)
+    assert np.isinf(heights[2])  # 相机在包围球内
+
+    ortho = screen_relative_heights([[0.0, 0.0, -10.0], [0.0, 0.0, -50.0]], [1.0, 1.0], [0.0, 0.0, 0.0], 0.1,
+                                    perspective=False)
+    assert np.allclose(ortho, 0.1)
+    print()
+
+
+def test_select_lod_levels_with_hysteresis():
+    """测试级别选择与滞后"""
+    print("🚀 测试LOD级别选择:")
+    thresholds = np.array([[0.5, 0.2, 0.05], [0.3, -np.inf, -np.inf]], dtype=np.float32)
+    levels = select_lod_levels([0.6, 0.31], thresholds, [0, 0], 0.0)
+    assert list(levels) == [0, 0]
+    levels = select_lod_levels([0.1, 0.1], thresholds, [0, 0], 0.0)
+    assert list(levels) == [2, 1]  # 第二个物体只有一级，低于阈值被剔除
+    levels = select_lod_levels([0.01, 0.01], thresholds, [0, 0], 0.0)
+    assert list(levels) == [3, 1]
+
+    # 滞后: 在阈值附近不切换
+    assert select_lod_levels([0.48], thresholds[:1], [0], 0.1)[0] == 0   # 需低于0.45才降级
+    assert select_lod_levels([0.44], thresholds[:1], [0], 0.1)[0] == 1
+    assert select_lod_levels([0.52], thresholds[:1], [1], 0.1)[0] == 1   # 需高于0.55才升级
+    assert select_lod_levels([0.56], thresholds[:1], [1], 0.1)[0] == 0
+    print("   滞后区间内保持当前级别")
+    print()
+
+
+def test_render_system_lod_selection():
+    """测试RenderSystem按距离替换Mesh并剔除过小物体"""
+    print("🚀 测试RenderSystem LOD选择:")
+    levels = [create_quad_mesh(2.0), create_quad_mesh(2.0), create_quad_mesh(2.0)]
+    camera = Camera(position=np.array([0.0, 0.0, 0.0]), fov=60.0, aspect_ratio=1.0, far_clip=1000.0)
+
+    groups = []
+    transforms = []
+    for distance in (3.0, 20.0, 80.0, 500.0):
+        group = LODGroup([(levels[0], 0.3), (levels[1], 0.1), (levels[2], 0.02)], hysteresis=0.0)
+        groups.append(group)
+        transforms.append(Transform(position=[0.0, 0.0, -distance]))
+    groups.append(None)
+    transforms.append(Transform(position=[0.0, 0.0, -500.0]))
+
+    # 不创建窗口，只测试LOD选择逻辑
+    render_system = RenderSystem.__new__(RenderSystem)
+    render_system.stats = {'candidates': 5, 'visible': 5, 'culled': 0, 'lod_culled': 0}
+    meshes = [levels[0]] * 4 + [create_quad_mesh(2.0)]
+    visible = np.ones(5, dtype=bool)
+    render_system._select_lods(camera, meshes, groups, stack_world_matrices(transforms), visible)
+
+    current = [group.current_level for group in groups[:4]]
+    print(f"   各距离级别: {current}, 统计: {render_system.stats}")
+    assert current == [0, 1, 2, LODGroup.CULLED]
+    assert meshes[1] is levels[1] and meshes[2] is levels[2]
+    assert list(visible) == [True, True, True, False, True]
+    assert render_system.stats['lod_culled'] == 1 and render_system.stats['visible'] == 4
+    print()
+
+
+if __name__ == "__main__":
+    test_screen_relative_heights()
+    test_select_lod_levels_with_hysteresis()
+    test_render_system_lod_selection()
+    print("✅ 所有LODGroup测试完成")
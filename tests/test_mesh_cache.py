@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+GPU网格缓存测试
+用记录调用的GL函数替换模块中的OpenGL入口，验证只上传一次、修改后原地更新、卸载和回收后释放显存
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gc
+import numpy as np
+import graphics.opengl_mesh_cache as opengl_mesh_cache
+from components.mesh import Mesh
+from graphics.opengl_mesh_cache import OpenGLMeshCache
+from resource_manager.file_resource_manager import FileResourceManager
+from util.meshlet import build_meshlets
+from Context.context import global_data as GD
+
+
+class RecordingGL(object):
+    """记录调用的GL函数，替换opengl_mesh_cache模块中的同名函数"""
+
+    NAMES = ('glGenVertexArrays', 'glGenBuffers', 'glBindVertexArray', 'glBindBuffer', 'glBufferData',
+             'glBufferSubData', 'glVertexAttribPointer', 'glEnableVertexAttribArray', 'glDeleteVertexArrays',
+             'glDeleteBuffers')
+
+    def __init__(self):
+        self.calls = []
+        self.next_id = 1
+        self.alive = set()
+        self._saved = {}
+
+    def __enter__(self):
+        for name in self.NAMES:
+            self._saved[name] = getattr(opengl_mesh_cache, name)
+            setattr(opengl_mesh_cache, name, self._make(name))
+        return self
+
+    def __exit__(self, *exc):
+        for name, function in self._saved.items():
+            setattr(opengl_mesh_cache, name, function)
+
+    def _make(self, name):
+        def call(*args):
+            self.calls.append(name)
+            if name in ('glGenVertexArrays', 'glGenBuffers'):
+                self.next_id += 1
+                self.alive.add(self.next_id)
+                return self.next_id
+            if name in ('glDeleteVertexArrays', 'glDeleteBuffers'):
+                self.alive.difference_update(args[1])
+            return None
+        return call
+
+    def count(self, name):
+        return self.calls.count(name)
+
+
+def create_quad_mesh():
+    vertices = np.array([[0, 0, 0, 0, 0, 1, 0, 0], [1, 0, 0, 0, 0, 1, 1, 0],
+                         [1, 1, 0, 0, 0, 1, 1, 1], [0, 1, 0, 0, 0, 1, 0, 1]], dtype=np.float32).flatten()
+    return Mesh(vertices, np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32))
+
+
+def test_upload_once_and_sub_data_on_change():
+    """测试首次绘制上传并配置VAO，之后只绑定；修改后用glBufferSubData更新"""
+    print("🚀 测试网格缓存上传:")
+    with RecordingGL() as gl:
+        cache = OpenGLMeshCache()
+        mesh = create_quad_mesh()
+        buffer = cache.bind(mesh)
+        assert buffer.index_count == 6 and buffer.vertex_count == 4
+        assert gl.count('glBufferData') == 2 and gl.count('glVertexAttribPointer') == 3
+
+        gl.calls.clear()
+        for _ in range(10):
+            assert cache.bind(mesh) is buffer
+        print(f"   之后10次绘制的GL调用: {set(gl.calls)}")
+        assert gl.calls == ['glBindVertexArray'] * 10
+
+        # 原地修改顶点后标记，大小不变时原地更新
+        gl.calls.clear()
+        mesh.vertices[0] = 0.5
+        mesh.mark_modified()
+        cache.bind(mesh)
+        assert gl.count('glBufferSubData') == 2 and gl.count('glBufferData') == 0
+        assert gl.count('glVertexAttribPointer') == 0
+
+        # 顶点数量变化时重新分配
+        gl.calls.clear()
+        mesh.vertices = np.concatenate([mesh.vertices, mesh.vertices[:8]])
+        mesh.mark_modified()
+        assert cache.bind(mesh).vertex_count == 5
+        assert gl.count('glBufferData') == 1 and gl.count('glBufferSubData') == 1
+
+        # 构建网格簇后改为上传重排的索引
+        gl.calls.clear()
+        positions, triangles = mesh.get_triangles()
+        mesh.meshlets = build_meshlets(positions, triangles)
+        assert cache.bind(mesh).index_source is mesh.meshlets.indices
+        assert gl.count('glBufferSubData') == 2
+        print(f"   统计: {cache.stats}")
+    print()
+
+
+def test_release_and_garbage_collection():
+    """测试卸载资源时立即释放，被回收的Mesh在下一帧释放"""
+    print("🚀 测试显存释放:")
+    old_renderer = GD.renderer
+
+    class CacheRenderer(object):
+        def __init__(self):
+            self.mesh_cache = OpenGLMeshCache()
+
+        def release_mesh(self, mesh):
+            self.mesh_cache.release(mesh)
+
+    with RecordingGL() as gl:
+        GD.renderer = CacheRenderer()
+        try:
+            cache = GD.renderer.mesh_cache
+            manager = FileResourceManager()
+            mesh = create_quad_mesh()
+            manager.mesh_map["unit_test_quad.obj"] = mesh
+            cache.bind(mesh)
+            assert len(gl.alive) == 3
+
+            assert manager.unload_mesh("unit_test_quad.obj")
+            assert "unit_test_quad.obj" not in manager.mesh_map
+            assert mesh not in cache and len(gl.alive) == 0
+            assert not manager.unload_mesh("unit_test_quad.obj")
+
+            # 没有显式卸载的Mesh被回收后，在下一帧开始时释放
+            temporary = create_quad_mesh()
+            cache.bind(temporary)
+            del temporary
+            gc.collect()
+            assert len(cache) == 0 and len(gl.alive) == 3
+            cache.collect_garbage()
+            assert len(gl.alive) == 0
+        finally:
+            GD.renderer = old_renderer
+    print()
+
+
+if __name__ == "__main__":
+    test_upload_once_and_sub_data_on_change()
+    test_release_and_garbage_collection()
+    print("✅ 所有网格缓存测试完成")
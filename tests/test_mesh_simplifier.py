@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+网格简化测试
+验证二次误差简化的三角形数量、接缝保持、LOD链生成与磁盘缓存
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+import numpy as np
+import resource_manager.file_resource_manager as file_resource_manager
+from resource_manager.file_resource_manager import FileResourceManager
+from util.mesh_simplifier import QuadricSimplifier, generate_lod_chain, simplify_mesh
+
+
+def create_uv_sphere(segments=48, rings=24):
+    """创建带UV接缝的球体 (经度0与360度处的顶点位置相同、UV不同)"""
+    vertices = []
+    for j in range(rings + 1):
+        theta = np.pi * j / rings
+        for i in range(segments + 1):
+            phi = 2.0 * np.pi * i / segments
+            p = [np.sin(theta) * np.cos(phi), np.cos(theta), np.sin(theta) * np.sin(phi)]
+            vertices.append(p + p + [i / segments, j / rings])
+    indices = []
+    for j in range(rings):
+        for i in range(segments):
+            a = j * (segments + 1) + i
+            c = a + segments + 1
+            indices += [a, c, a + 1, a + 1, c, c + 1]
+    return np.array(vertices, dtype=np.float32), np.array(indices, dtype=np.uint32)
+
+
+def count_open_edges(vertices, indices):
+    """按位置焊接后统计只属于一个三角形的边 (接缝被撕开时会出现)"""
+    simplifier = QuadricSimplifier(vertices, indices)
+    pa, pb, _, _, _ = simplifier._edge_table()
+    _, counts = np.unique(np.stack([pa, pb], axis=1), axis=0, return_counts=True)
+    return int(np.sum(counts == 1))
+
+
+def test_simplify_preserves_shape_and_seams():
+    """测试简化后三角形数量、形状误差和接缝"""
+    print("🚀 测试二次误差简化:")
+    vertices, indices = create_uv_sphere()
+    original = QuadricSimplifier(vertices, indices).triangle_count
+    simple_vertices, simple_indices = simplify_mesh(vertices, indices, 0.25)
+    print(f"   三角形: {original} -> {len(simple_indices) // 3}, 顶点: {len(vertices)} -> {len(simple_vertices)}")
+
+    assert len(simple_indices) // 3 <= original * 0.25
+    assert len(simple_indices) // 3 > original * 0.2
+    # 半边折叠保留原始顶点，所有顶点仍在球面上
+    assert np.allclose(np.linalg.norm(simple_vertices[:, :3], axis=1), 1.0, atol=1e-5)
+    # 接缝两侧同步收缩，焊接后仍是封闭网格
+    assert count_open_edges(simple_vertices, simple_indices) == 0
+    # 接缝上的顶点仍然成对存在 (UV u=0 与 u=1)
+    seam = np.isclose(simple_vertices[:, 2], 0.0, atol=1e-6) & (simple_vertices[:, 0] > 0.0)
+    assert np.any(np.isclose(simple_vertices[seam, 6], 0.0)) and np.any(np.isclose(simple_vertices[seam, 6], 1.0))
+    print()
+
+
+def test_lod_chain():
+    """测试LOD链按比例逐级简化"""
+    print("🚀 测试LOD链:")
+    vertices, indices = create_uv_sphere()
+    levels = generate_lod_chain(vertices, indices, [0.5, 0.1, 0.25])
+    counts = [len(level_indices) // 3 for _, level_indices in levels]
+    print(f"   各级三角形数: {counts}")
+    assert counts[0] > counts[2] > counts[1]
+    for level_vertices, level_indices in levels:
+        assert level_indices.max() < len(level_vertices)
+    print()
+
+
+def write_obj(path, vertices, indices):
+    with open(path, 'w') as f:
+        for v in vertices:
+            f.write(f"v {v[0]:.6f} {v[1]:.6f} {v[2]:.6f}\n")
+        for v in vertices:
+            f.write(f"vt {v[6]:.6f} {v[7]:.6f}\n")
+        for v in vertices:
+            f.write(f"vn {v[3]:.6f} {v[4]:.6f} {v[5]:.6f}\n")
+        for tri in indices.reshape(-1, 3) + 1:
+            f.write("f " + " ".join(f"{i}/{i}/{i}" for i in tri) + "\n")
+
+
+def test_load_mesh_with_lods_uses_disk_cache():
+    """测试load_mesh_from_file(lod_ratios=...)及磁盘缓存"""
+    print("🚀 测试LOD磁盘缓存:")
+    temp_dir = tempfile.mkdtemp()
+    original_generate = file_resource_manager.generate_lod_chain
+    try:
+        path = os.path.join(temp_dir, "sphere.obj")
+        write_obj(path, *create_uv_sphere(24, 12))
+        manager = FileResourceManager()
+
+        meshes = manager.load_mesh_from_file(path, lod_ratios=[0.5, 0.2])
+        assert len(meshes) == 3 and meshes[0] is manager.load_mesh_from_file(path)
+        counts = [len(mesh.indices) // 3 for mesh in meshes]
+        print(f"   各级三角形数: {counts}")
+        assert counts[0] > counts[1] > counts[2]
+        assert os.listdir(os.path.join(temp_dir, manager.lod_cache_dir_name))
+
+        # 模拟重新启动：清空内存缓存，简化算法不应再被调用
+        manager.lod_map.clear()
+        manager.mesh_map.pop(path)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("LOD should be loaded from disk cache")
+        file_resource_manager.generate_lod_chain = fail
+        cached = manager.load_mesh_from_file(path, lod_ratios=[0.5, 0.2])
+        assert [len(mesh.indices) // 3 for mesh in cached] == counts
+        assert np.allclose(cached[2].vertices, meshes[2].vertices)
+    finally:
+        file_resource_manager.generate_lod_chain = original_generate
+        FileResourceManager().mesh_map.pop(os.path.join(temp_dir, "sphere.obj"), None)
+        shutil.rmtree(temp_dir)
+    print()
+
+
+if __name__ == "__main__":
+    test_simplify_preserves_shape_and_seams()
+    test_lod_chain()
+    test_load_mesh_with_lods_uses_disk_cache()
+    print("✅ 所有网格简化测试完成")
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+网格簇测试
+验证簇的顶点/三角形上限、法线锥背面剔除、视锥剔除、索引区间合并，以及RenderSystem的逐簇剔除阶段
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.material import Material
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from graphics.renderer import Renderer
+from resource_manager.file_resource_manager import FileResourceManager
+from systems.render_system import RenderSystem
+from util.meshlet import build_meshlets
+from Context.context import global_data as GD
+
+
+def create_sphere(segments=64, rings=32):
+    """创建外法线朝外 (逆时针) 的球体，返回 (vertices (V, 8), triangles (T, 3))"""
+    vertices = []
+    for j in range(rings + 1):
+        theta = np.pi * j / rings
+        for i in range(segments):
+            phi = 2.0 * np.pi * i / segments
+            p = [np.sin(theta) * np.cos(phi), np.cos(theta), np.sin(theta) * np.sin(phi)]
+            vertices.append(p + p + [i / segments, j / rings])
+    triangles = []
+    for j in range(rings):
+        for i in range(segments):
+            a = j * segments + i
+            b = j * segments + (i + 1) % segments
+            triangles += [[a, b, a + segments], [b, b + segments, a + segments]]
+    return np.array(vertices, dtype=np.float32), np.array(triangles, dtype=np.int64)
+
+
+# 包含整个场景的宽松视锥 (法线朝内)
+OPEN_PLANES = np.array([[1, 0, 0, 100], [-1, 0, 0, 100], [0, 1, 0, 100],
+                        [0, -1, 0, 100], [0, 0, 1, 100], [0, 0, -1, 100]], dtype=np.float64)
+
+
+def front_facing(positions, triangles, eye):
+    v0, v1, v2 = positions[triangles[:, 0]], positions[triangles[:, 1]], positions[triangles[:, 2]]
+    normals = np.cross(v1 - v0, v2 - v0)
+    return np.einsum('ij,ij->i', normals, np.asarray(eye) - v0) > 1e-9
+
+
+def test_build_respects_limits():
+    """测试每个簇的顶点和三角形上限，且每个三角形恰好出现一次"""
+    print("🚀 测试网格簇构建:")
+    vertices, triangles = create_sphere()
+    meshlets = build_meshlets(vertices[:, :3], triangles)
+    print(f"   {len(triangles)} 三角形 -> {meshlets.count} 个簇, "
+          f"最大顶点 {meshlets.vertex_counts.max()}, 最大三角形 {meshlets.triangle_counts.max()}")
+    assert meshlets.vertex_counts.max() <= 64
+    assert meshlets.triangle_counts.max() <= 124
+    assert meshlets.triangle_counts.sum() == len(triangles)
+    assert np.array_equal(meshlets.triangle_offsets[1:], np.cumsum(meshlets.triangle_counts)[:-1])
+
+    reordered = meshlets.indices.reshape(-1, 3)
+    assert sorted(map(tuple, reordered.tolist())) == sorted(map(tuple, triangles.tolist()))
+    # 包围球包含簇内所有顶点
+    for k in range(meshlets.count):
+        start = meshlets.triangle_offsets[k]
+        points = vertices[reordered[start:start + meshlets.triangle_counts[k]].ravel(), :3]
+        assert np.all(np.linalg.norm(points - meshlets.centers[k], axis=1) <= meshlets.radii[k] + 1e-5)
+
+    smaller = build_meshlets(vertices[:, :3], triangles, max_vertices=16, max_triangles=20)
+    assert smaller.vertex_counts.max() <= 16 and smaller.triangle_counts.max() <= 20
+    print()
+
+
+def test_cone_and_frustum_culling():
+    """测试背面簇剔除不会误剔正面三角形，以及视锥平面剔除"""
+    print("🚀 测试法线锥与视锥剔除:")
+    vertices, triangles = create_sphere()
+    positions = vertices[:, :3]
+    meshlets = build_meshlets(positions, triangles)
+    reordered = meshlets.indices.reshape(-1, 3).astype(np.int64)
+
+    eye = np.array([0.0, 0.0, 5.0])
+    passed = meshlets.cull(OPEN_PLANES, view_position=eye)
+    culled_triangles = np.repeat(~passed, meshlets.triangle_counts)
+    culled_count = int(culled_triangles.sum())
+    print(f"   透视: 剔除 {np.count_nonzero(~passed)}/{meshlets.count} 个簇, {culled_count} 个三角形")
+    assert culled_count > len(triangles) * 0.15
+    assert not np.any(front_facing(positions, reordered, eye) & culled_triangles)
+
+    # 正交投影沿-z看向球体
+    passed = meshlets.cull(OPEN_PLANES, view_direction=[0.0, 0.0, -1.0])
+    culled_triangles = np.repeat(~passed, meshlets.triangle_counts)
+    assert np.any(~passed)
+    assert not np.any(front_facing(positions, reordered, eye * 1e6) & culled_triangles)
+
+    # 只保留 x >= 0.5 的半空间
+    planes = OPEN_PLANES.copy()
+    planes[1] = [1.0, 0.0, 0.0, -0.5]
+    passed = meshlets.cull(planes)
+    assert np.all(meshlets.centers[passed, 0] + meshlets.radii[passed] >= 0.5)
+    assert np.all(meshlets.centers[~passed, 0] + meshlets.radii[~passed] < 0.5)
+    print()
+
+
+def test_draw_ranges_merge_adjacent():
+    """测试相邻的可见簇合并为一个索引区间"""
+    print("🚀 测试索引区间合并:")
+    vertices, triangles = create_sphere(16, 8)
+    meshlets = build_meshlets(vertices[:, :3], triangles, max_vertices=16, max_triangles=20)
+    assert meshlets.count >= 5
+    visible = np.zeros(meshlets.count, dtype=bool)
+    visible[[0, 1, 3]] = True
+    starts, counts = meshlets.draw_ranges(visible)
+    offsets, sizes = meshlets.triangle_offsets, meshlets.triangle_counts
+    assert starts.tolist() == [0, offsets[3] * 3]
+    assert counts.tolist() == [(sizes[0] + sizes[1]) * 3, sizes[3] * 3]
+
+    starts, counts = meshlets.draw_ranges(np.ones(meshlets.count, dtype=bool))
+    assert starts.tolist() == [0] and counts.tolist() == [len(triangles) * 3]
+    assert len(meshlets.draw_ranges(np.zeros(meshlets.count, dtype=bool))[0]) == 0
+    print()
+
+
+class RecordingRenderer(object):
+    def __init__(self):
+        self.render_objects = []
+
+    def begin_frame(self):
+        pass
+
+    def begin_view(self, camera):
+        pass
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        pass
+
+    def draw(self, render_objects):
+        self.render_objects.extend(render_objects)
+
+    # 命令列表还原为渲染元组交给draw() (Renderer的默认实现)
+    execute = Renderer.execute
+
+    def end_frame(self):
+        pass
+
+
+def test_render_system_meshlet_stage():
+    """测试RenderSystem只提交幸存簇的索引区间，非均匀缩放的物体跳过背面剔除"""
+    print("🚀 测试RenderSystem逐簇剔除:")
+    vertices, triangles = create_sphere()
+    ecs = ECSManager()
+    ecs.create_scene("MeshletScene")
+    mesh = Mesh(vertices.flatten(), triangles.astype(np.uint32).flatten())
+    FileResourceManager().build_meshlets(mesh)
+    assert mesh.meshlets is not None
+
+    sphere = ecs.create_entity(GameObject, name="Sphere")
+    ecs.add_component(sphere, mesh)
+    ecs.add_component(sphere, Material())
+    sphere.transform.position = [0.0, 0.0, -5.0]
+    stretched = ecs.create_entity(GameObject, name="Stretched")
+    ecs.add_component(stretched, Mesh(vertices.flatten(), triangles.astype(np.uint32).flatten()))
+    stretched.get_component(Mesh).meshlets = mesh.meshlets
+    ecs.add_component(stretched, Material())
+    stretched.transform.position = [3.0, 0.0, -8.0]
+    stretched.transform.scale = [1.0, 2.0, 1.0]
+
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]))
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        render_system = RenderSystem(RecordingRenderer())
+        render_system.update(0.016)
+        objects = render_system.renderer.render_objects
+
+        render_system.meshlet_culling_enabled = False
+        render_system.renderer.render_objects = []
+        render_system.update(0.016)
+        unculled = render_system.renderer.render_objects
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+
+    print(f"   统计: {render_system.camera_stats[camera]}")
+    by_mesh = {id(item[1]): item for item in objects}
+    starts, counts = by_mesh[id(mesh)][3]
+    submitted = int(np.sum(counts)) // 3
+    print(f"   球体提交 {submitted}/{len(triangles)} 个三角形, 区间数 {len(starts)}")
+    assert submitted < len(triangles) * 0.85
+    # 提交的区间覆盖所有朝向相机的三角形
+    eye = np.array([0.0, 0.0, 5.0])  # 相机在球体局部空间的位置
+    reordered = mesh.meshlets.indices.reshape(-1, 3).astype(np.int64)
+    covered = np.zeros(len(reordered), dtype=bool)
+    for start, count in zip(starts, counts):
+        covered[start // 3:(start + count) // 3] = True
+    assert np.all(covered[front_facing(vertices[:, :3], reordered, eye)])
+    # 非均匀缩放的物体没有背面剔除，整体在视锥内时按原样提交
+    assert by_mesh[id(stretched.get_component(Mesh))][3] is None
+    assert all(item[3] is None for item in unculled)
+    print()
+
+
+if __name__ == "__main__":
+    test_build_respects_limits()
+    test_cone_and_frustum_culling()
+    test_draw_ranges_merge_adjacent()
+    test_render_system_meshlet_stage()
+    print("✅ 所有网格簇测试完成")
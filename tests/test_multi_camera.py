@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+多相机渲染测试
+验证视口换算、按类型查询相机、层掩码，以及所有相机共享一次包围体计算的渲染流程
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera, layer_mask
+from Entity.gameobject import GameObject
+from components.material import Material
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from graphics.renderer import Renderer, viewport_pixels
+from systems.render_system import RenderSystem
+from Context.context import global_data as GD
+
+
+def create_cube_mesh(size=1.0):
+    """创建8个顶点的立方体Mesh"""
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([[*c, 0.0, 0.0, 1.0, 0.0, 0.0] for c in corners], dtype=np.float32).flatten()
+    return Mesh(vertices)
+
+
+class RecordingRenderer(object):
+    """记录多相机渲染调用顺序的渲染器"""
+
+    def __init__(self):
+        self.calls = []
+        self.views = []
+
+    def begin_frame(self):
+        self.calls.append('begin_frame')
+
+    def begin_view(self, camera):
+        self.calls.append('begin_view')
+        self.views.append((camera, []))
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        self.calls.append('setup_camera')
+
+    def draw(self, render_objects):
+        self.calls.append('draw')
+        self.views[-1][1].extend(render_objects)
+
+    # 命令列表还原为渲染元组交给draw() (Renderer的默认实现)
+    execute = Renderer.execute
+
+    def end_frame(self):
+        self.calls.append('end_frame')
+
+
+def test_viewport_pixels():
+    """测试归一化视口到像素矩形的换算"""
+    print("🚀 测试视口换算:")
+    assert viewport_pixels((0.0, 0.0, 1.0, 1.0), 800, 600) == (0, 0, 800, 600)
+    assert viewport_pixels((0.5, 0.0, 0.5, 1.0), 800, 600) == (400, 0, 400, 600)
+    assert viewport_pixels((0.75, 0.75, 0.25, 0.25), 800, 600) == (600, 450, 200, 150)
+    assert viewport_pixels((0.9, 0.9, 0.5, 0.5), 100, 100) == (90, 90, 10, 10)  # 超出部分被裁掉
+    print()
+
+
+def test_scene_entities_of_type():
+    """测试按类型查询Entity及缓存失效"""
+    print("🚀 测试按类型查询相机:")
+    ecs = ECSManager()
+    ecs.create_scene("TypeScene")
+    ecs.create_entity(GameObject, name="Box")
+    camera = ecs.create_entity(Camera)
+    scene = ecs.get_active_scene()
+    assert scene.get_entities_of_type(Camera) == [camera]
+    second = ecs.create_entity(Camera)
+    assert scene.get_entities_of_type(Camera) == [camera, second]
+    scene.remove_entity(camera)
+    assert scene.get_entities_of_type(Camera) == [second]
+    print()
+
+
+def test_multi_camera_render():
+    """测试主相机+小地图相机: 按优先级渲染、层掩码过滤、包围体只计算一次"""
+    print("🚀 测试多相机渲染:")
+    ecs = ECSManager()
+    ecs.create_scene("MultiCameraScene")
+    objects = {}
+    for name, position, layer in (("Player", [0.0, 0.0, -5.0], 0),
+                                  ("Marker", [1.0, 0.0, -5.0], 3),
+                                  ("Behind", [0.0, 0.0, 5.0], 0)):
+        entity = ecs.create_entity(GameObject, name=name)
+        ecs.add_component(entity, create_cube_mesh(1.0))
+        ecs.add_component(entity, Material())
+        entity.transform.position = position
+        entity.layer = layer
+        objects[name] = entity
+
+    main_camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]))
+    minimap = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]), priority=1,
+                                viewport_rect=(0.75, 0.75, 0.25, 0.25), culling_mask=layer_mask(3))
+    disabled = ecs.create_entity(Camera, priority=2)
+    disabled.enabled = False
+
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, main_camera
+    try:
+        render_system = RenderSystem(RecordingRenderer())
+        bound_calls = []
+        scene = ecs.get_active_scene()
+        refresh = scene.update_render_proxies
+        scene.update_render_proxies = lambda: bound_calls.append(1) or refresh()
+        render_system.update(0.016)
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+
+    renderer = render_system.renderer
+    print(f"   调用顺序: {renderer.calls}")
+    assert renderer.calls == ['begin_frame', 'begin_view', 'setup_camera', 'draw',
+                              'begin_view', 'setup_camera', 'draw', 'end_frame']
+    assert [camera for camera, _ in renderer.views] == [main_camera, minimap]
+    assert len(bound_calls) == 1
+
+    meshes = {id(entity.get_component(Mesh)): name for name, entity in objects.items()}
+    main_names = sorted(meshes[id(item[1])] for item in renderer.views[0][1])
+    minimap_names = sorted(meshes[id(item[1])] for item in renderer.views[1][1])
+    print(f"   主相机: {main_names}, 小地图: {minimap_names}")
+    assert main_names == ["Marker", "Player"]
+    assert minimap_names == ["Marker"]
+
+    # 模型矩阵按列主序
+    player_matrix = objects["Player"].transform.local_to_world_matrix
+    model = [item[0] for item in renderer.views[0][1] if meshes[id(item[1])] == "Player"][0]
+    assert np.allclose(model, player_matrix.flatten("F"))
+
+    print(f"   统计: {render_system.stats}")
+    assert render_system.camera_stats[minimap]['layer_culled'] == 2
+    assert render_system.stats['visible'] == 3 and render_system.stats['candidates'] == 6
+    print()
+
+
+if __name__ == "__main__":
+    test_viewport_pixels()
+    test_scene_entities_of_type()
+    test_multi_camera_render()
+    print("✅ 所有多相机测试完成")
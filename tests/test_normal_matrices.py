@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+法线矩阵测试
+验证批量计算的法线矩阵 (均匀缩放快速路径与一般求逆)、渲染元组携带的法线矩阵，以及内置Shader不再逐顶点求逆
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.material import Material
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from graphics.renderer import Renderer
+from systems.render_system import RenderSystem
+from util.geometry import normal_matrices
+from Context.context import global_data as GD
+
+
+class RecordingRenderer(object):
+    def __init__(self):
+        self.render_objects = []
+
+    def begin_frame(self):
+        self.render_objects = []
+
+    def begin_view(self, camera):
+        pass
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        pass
+
+    def draw(self, render_objects):
+        self.render_objects.extend(render_objects)
+
+    # 命令列表还原为渲染元组交给draw() (Renderer的默认实现)
+    execute = Renderer.execute
+
+    def end_frame(self):
+        pass
+
+
+def rotation_matrix(yaw, pitch):
+    cy, sy, cp, sp = np.cos(yaw), np.sin(yaw), np.cos(pitch), np.sin(pitch)
+    yaw_matrix = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    pitch_matrix = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]])
+    return yaw_matrix @ pitch_matrix
+
+
+def test_uniform_scale_fast_path_matches_inverse():
+    """测试均匀缩放、镜像、非均匀缩放和切变的法线矩阵都等于逆转置"""
+    print("🚀 测试批量法线矩阵:")
+    rng = np.random.default_rng(1)
+    matrices = np.tile(np.eye(4, dtype=np.float32), (400, 1, 1))
+    for k in range(len(matrices)):
+        rotation = rotation_matrix(*rng.uniform(0.0, 2.0 * np.pi, 2))
+        kind = k % 4
+        if kind == 0:
+            linear = rotation * rng.uniform(0.1, 10.0)              # 均匀缩放
+        elif kind == 1:
+            linear = rotation @ np.diag([-2.0, 2.0, 2.0])          # 均匀缩放且镜像
+        elif kind == 2:
+            linear = rotation @ np.diag(rng.uniform(0.5, 3.0, 3))  # 非均匀缩放
+        else:
+            linear = rotation @ np.array([[1.0, 0.5, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])  # 切变
+        matrices[k, :3, :3] = linear
+        matrices[k, :3, 3] = rng.uniform(-50.0, 50.0, 3)
+
+    result = normal_matrices(matrices)
+    expected = np.linalg.inv(matrices[:, :3, :3].astype(np.float64)).transpose(0, 2, 1)
+    error = np.abs(result - expected).max(axis=(1, 2)) / np.abs(expected).max(axis=(1, 2))
+    print(f"   最大相对误差: {error.max():.2e}")
+    assert result.shape == (400, 3, 3) and result.dtype == np.float32
+    assert error.max() < 1e-5
+    assert normal_matrices(np.zeros((0, 4, 4))).shape == (0, 3, 3)
+
+    # 缩放为0 (压扁或隐藏) 的矩阵不可逆，不抛出异常，法线仍朝向未被压扁的方向
+    flattened = np.tile(np.eye(4, dtype=np.float32), (3, 1, 1))
+    flattened[0, :3, :3] = np.diag([1.0, 0.0, 1.0])
+    flattened[1, :3, :3] = rotation_matrix(0.7, 0.3) @ np.diag([2.0, 0.0, 0.0])
+    flattened[2, :3, :3] = 0.0
+    normals = normal_matrices(flattened)
+    assert np.all(np.isfinite(normals))
+    assert np.allclose(normals[0] @ [0.0, 1.0, 0.0], [0.0, 1.0, 0.0])
+    assert np.allclose(normals[2], np.eye(3))
+    print()
+
+
+def test_zero_scale_object_renders():
+    """测试缩放为0的物体不会让RenderSystem和静态合批抛出异常"""
+    print("🚀 测试缩放为0的物体:")
+    ecs = ECSManager()
+    ecs.create_scene("ZeroScaleScene")
+    vertices = np.array([[x, y, z, 0.0, 1.0, 0.0, 0.0, 0.0] for x in (-0.5, 0.5) for y in (-0.5, 0.5)
+                         for z in (-0.5, 0.5)], dtype=np.float32).flatten()
+    entity = ecs.create_entity(GameObject, name="Flat")
+    ecs.add_component(entity, Mesh(vertices, np.array([0, 1, 2, 1, 3, 2], dtype=np.uint32)))
+    ecs.add_component(entity, Material())
+    entity.transform.position = [0.0, 0.0, -5.0]
+    entity.transform.scale = [1.0, 0.0, 1.0]
+    entity.is_static = True
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]))
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        render_system = RenderSystem(RecordingRenderer())
+        render_system.update(0.016)
+        render_system.static_batching_enabled = False
+        render_system.update(0.016)
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+    assert len(render_system.static_batches) == 1
+    normal = render_system.renderer.render_objects[0][4]
+    print(f"   法线矩阵: {normal}")
+    assert np.all(np.isfinite(normal))
+    print()
+
+
+def test_render_objects_carry_normal_matrices():
+    """测试单个绘制的渲染元组携带列主序的法线矩阵，内置Shader直接使用"""
+    print("🚀 测试渲染元组中的法线矩阵:")
+    ecs = ECSManager()
+    ecs.create_scene("NormalScene")
+    vertices = np.array([[0, 0, 0, 0, 0, 1, 0, 0], [1, 0, 0, 0, 0, 1, 1, 0], [0, 1, 0, 0, 0, 1, 0, 1]],
+                        dtype=np.float32).flatten()
+    box = ecs.create_entity(GameObject, name="Box")
+    ecs.add_component(box, Mesh(vertices))
+    ecs.add_component(box, Material())
+    box.transform.position = [0.0, 0.0, -5.0]
+    box.transform.rotation = [0.0, 30.0, 0.0]
+    box.transform.scale = [1.0, 3.0, 0.5]
+
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]))
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        render_system = RenderSystem(RecordingRenderer())
+        render_system.update(0.016)
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+
+    (model, mesh, material, ranges, normal), = render_system.renderer.render_objects
+    assert ranges is None and normal.shape == (9,)
+    world = model.reshape(4, 4).T
+    assert np.allclose(normal.reshape(3, 3).T, np.linalg.inv(world[:3, :3]).T, atol=1e-5)
+
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "resources", "shaders", "vertex_shader.glsl"), encoding="utf-8-sig") as f:
+        vertex_source = f.read()
+    assert "inverse(" not in vertex_source and "uniform mat3 normalMatrix;" in vertex_source
+    print()
+
+
+if __name__ == "__main__":
+    test_uniform_scale_fast_path_matches_inverse()
+    test_render_objects_carry_normal_matrices()
+    test_zero_scale_object_renders()
+    print("✅ 所有法线矩阵测试完成")
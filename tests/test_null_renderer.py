@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+无GPU渲染后端测试
+通过RendererConfig选择NullRenderer/RecordingWindow，运行完整的RenderSystem和MainLoop，
+验证记录的绘制调用、状态切换、上传字节数和uniform写入
+"""
+import sys
+import os
+import subprocess
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.mesh import Mesh
+from config.renderer import RendererConfig, RendererType, WindowType
+from core.ecs import ECSManager
+from core.main_loop import MainLoop
+from graphics.factory import create_window
+from graphics.null_renderer import NullRenderer
+from graphics.recording_window import RecordingWindow
+from input.event_types import Key, KeyAction
+from resource_manager.file_resource_manager import FileResourceManager
+from resource_manager.null_shader import NullShader
+from resource_manager.null_texture import NullTexture
+from systems.input_system import InputSystem
+from systems.render_system import RenderSystem
+from Context.context import global_data as GD
+
+MATERIAL_CONFIG = "resources/shaders/my_first_shader.json"
+
+
+class HeadlessConfig(object):
+    """临时切换到无GPU后端，并在退出时恢复全局状态和资源缓存"""
+
+    def __enter__(self):
+        self.saved = (RendererConfig.RendererType, RendererConfig.WindowType, GD.ecs_manager, GD.main_camera,
+                      GD.renderer)
+        RendererConfig.RendererType = RendererType.NULL
+        RendererConfig.WindowType = WindowType.RECORDING
+        return self
+
+    def __exit__(self, *exc):
+        RendererConfig.RendererType, RendererConfig.WindowType, GD.ecs_manager, GD.main_camera, GD.renderer = \
+            self.saved
+        manager = FileResourceManager()
+        material = manager.material_map.pop(MATERIAL_CONFIG, None)
+        if material is not None:
+            manager.shader_map = {key: shader for key, shader in manager.shader_map.items()
+                                  if shader is not material.shader}
+            manager.texture_map = {key: texture for key, texture in manager.texture_map.items()
+                                   if not isinstance(texture, NullTexture)}
+
+
+def create_cube_mesh(size=1.0):
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([[*c, 0.0, 0.0, 1.0, 0.0, 0.0] for c in corners], dtype=np.float32).flatten()
+    indices = np.array([0, 1, 2, 1, 3, 2, 4, 6, 5, 5, 6, 7], dtype=np.uint32)
+    return Mesh(vertices, indices)
+
+
+def build_scene():
+    ecs = ECSManager()
+    ecs.create_scene("HeadlessScene")
+    GD.ecs_manager = ecs
+    material = FileResourceManager().load_material_from_config(MATERIAL_CONFIG)
+    crate, pillar = create_cube_mesh(1.0), create_cube_mesh(2.0)
+    for k in range(20):
+        crate_object = ecs.create_entity(GameObject, name="Crate")
+        ecs.add_component(crate_object, crate)
+        ecs.add_component(crate_object, material)
+        crate_object.transform.position = [float(k % 5) * 2.0 - 4.0, float(k // 5), -10.0]
+    pillar_object = ecs.create_entity(GameObject, name="Pillar")
+    ecs.add_component(pillar_object, pillar)
+    ecs.add_component(pillar_object, material)
+    pillar_object.transform.position = [0.0, 0.0, -6.0]
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]))
+    GD.main_camera = camera
+    return ecs, material, camera
+
+
+def test_render_system_on_null_renderer():
+    """测试通过配置创建无GPU后端，并记录每帧的绘制与上传"""
+    print("🚀 测试NullRenderer:")
+    with HeadlessConfig():
+        assert isinstance(create_window(), RecordingWindow)
+        render_system = RenderSystem()  # 按RendererConfig创建并初始化
+        renderer = render_system.renderer
+        renderer.record_commands = True
+        assert isinstance(renderer, NullRenderer) and isinstance(renderer.window, RecordingWindow)
+
+        ecs, material, camera = build_scene()
+        assert isinstance(material.shader, NullShader) and isinstance(material.properties["MainTex"], NullTexture)
+        render_system.update(0.016)
+        first = dict(renderer.frame_stats)
+        render_system.update(0.016)
+        second = dict(renderer.frame_stats)
+        commands = list(renderer.commands)
+
+    print(f"   第一帧: {first}")
+    print(f"   第二帧: {second}")
+    # 20个箱子实例化为一次绘制，柱子单独绘制
+    assert first['draw_calls'] == render_system.stats['draws'] == 2
+    assert first['instances'] == 21 and first['triangles'] == 21 * 4
+    # 实例化变体与普通Shader是两个程序 (与OpenGL后端的统计一致)
+    assert first['program_changes'] == 2 and first['texture_changes'] == 1 and first['views'] == 1
+    assert first['mesh_uploads'] == 2
+    # 第二帧不再上传网格和相机 (相机矩阵未变化)，只有时间和实例数据
+    assert second['mesh_uploads'] == 0
+    assert second['bytes_uploaded'] == 4 + 20 * 25 * 4
+    assert second['uniform_writes'] == 0 < first['uniform_writes']
+    assert [command[0] for command in commands] == ['view', 'pipeline', 'draw', 'pipeline', 'draw']
+    assert sorted(command[2] for command in commands if command[0] == 'pipeline') == [False, True]
+    assert renderer.window.frame_count == 2 and renderer.total_stats['draw_calls'] == 4
+    print()
+
+
+def test_main_loop_runs_headless():
+    """测试MainLoop在无界面窗口上运行固定帧数，注入的输入事件被InputSystem处理"""
+    print("🚀 测试无界面MainLoop:")
+    with HeadlessConfig():
+        render_system = RenderSystem(NullRenderer(max_frames=3))
+        render_system.renderer.initialize(320, 240, "Headless")
+        ecs, _, _ = build_scene()
+        pressed = []
+        input_system = InputSystem()
+        input_system.register_keyboard_listener(Key.W, KeyAction.PRESSED, lambda: pressed.append(Key.W))
+        ecs.add_system(input_system)
+        ecs.add_system(render_system)
+        render_system.renderer.window.push_keyboard_event(Key.W, KeyAction.PRESSED)
+
+        loop = MainLoop(target_fps=1000)
+        loop.run()
+        window = render_system.renderer.window
+    print(f"   运行帧数: {window.frame_count}")
+    assert window.frame_count == 3 and not loop.running
+    assert pressed == [Key.W]
+    print()
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADLESS_SCRIPT = """
+import sys
+from config.renderer import RendererConfig, RendererType, WindowType
+RendererConfig.RendererType = RendererType.NULL
+RendererConfig.WindowType = WindowType.RECORDING
+from resource_manager.file_resource_manager import FileResourceManager
+from systems.render_system import RenderSystem
+RenderSystem()
+FileResourceManager().load_material_from_config("%s")
+print('OpenGL.GL' in sys.modules)
+""" % MATERIAL_CONFIG
+
+
+def test_null_path_does_not_import_opengl():
+    """测试NULL后端的创建和资源加载不导入OpenGL.GL (在新进程中检查，其他测试已导入过OpenGL)"""
+    print("🚀 测试NULL后端不导入OpenGL:")
+    result = subprocess.run([sys.executable, "-c", HEADLESS_SCRIPT], cwd=PROJECT_ROOT, capture_output=True,
+                            text=True)
+    print(f"   输出: {result.stdout.strip().splitlines()[-1:]}")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "False"
+    print()
+
+
+if __name__ == "__main__":
+    test_render_system_on_null_renderer()
+    test_main_loop_runs_headless()
+    test_null_path_does_not_import_opengl()
+    print("✅ 所有无GPU渲染后端测试完成")
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+软件遮挡剔除测试
+验证近平面裁剪、深度缓冲光栅化、层级深度测试以及RenderSystem中的遮挡剔除
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from components.mesh import Mesh
+from components.occluder import Occluder
+from components.transform import Transform, stack_world_matrices
+from systems.render_system import RenderSystem
+from util.occlusion import OcclusionBuffer, clip_triangles_near
+
+
+def create_box_mesh(size=1.0):
+    """创建立方体网格 (12个三角形)"""
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([corner + [0.0, 0.0, 1.0, 0.0, 0.0] for corner in corners], dtype=np.float32).flatten()
+    indices = np.array([0, 1, 3, 0, 3, 2, 4, 6, 7, 4, 7, 5, 0, 4, 5, 0, 5, 1,
+                        2, 3, 7, 2, 7, 6, 0, 2, 6, 0, 6, 4, 1, 5, 7, 1, 7, 3], dtype=np.uint32)
+    return Mesh(vertices, indices)
+
+
+def create_wall_mesh(width, height):
+    """创建位于XY平面的矩形"""
+    hw, hh = width * 0.5, height * 0.5
+    vertices = np.array([[x, y, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0] for x in (-hw, hw) for y in (-hh, hh)],
+                        dtype=np.float32).flatten()
+    return Mesh(vertices, np.array([0, 1, 2, 1, 3, 2], dtype=np.uint32))
+
+
+def test_clip_triangles_near():
+    """测试近平面裁剪的三角形数量与裁剪后顶点位置"""
+    print("🚀 测试近平面裁剪:")
+    inside = [0.0, 0.0, 0.5, 1.0]
+    outside = [0.0, 0.0, -3.0, 1.0]
+    triangles = np.array([[inside, inside, inside],
+                          [inside, outside, outside],
+                          [inside, inside, outside],
+                          [outside, outside, outside]], dtype=np.float32)
+    clipped = clip_triangles_near(triangles)
+    print(f"   4个三角形裁剪后: {len(clipped)}")
+    assert len(clipped) == 1 + 1 + 2
+    assert np.all(clipped[:, :, 2] + clipped[:, :, 3] >= -1e-6)
+    print()
+
+
+def test_rasterize_and_hierarchy():
+    """测试光栅化深度与层级深度的最远值"""
+    print("🚀 测试深度光栅化:")
+    buffer = OcclusionBuffer(64, 32)
+    # 覆盖左半屏的两个三角形，NDC z = 0 (深度0.5)
+    quad = np.array([[[-1, -1, 0, 1], [0, -1, 0, 1], [0, 1, 0, 1]],
+                     [[-1, -1, 0, 1], [0, 1, 0, 1], [-1, 1, 0, 1]]], dtype=np.float32)
+    buffer.rasterize(quad)
+    buffer.build_hierarchy()
+    print(f"   写入深度的像素: {np.count_nonzero(buffer.depth < 1.0)}")
+    assert np.allclose(buffer.depth[:, :32], 0.5)
+    assert np.all(buffer.depth[:, 32:] == 1.0)
+    assert buffer.levels[-1].shape == (1, 1) and buffer.levels[-1][0, 0] == 1.0
+    assert np.allclose(buffer.levels[4][:, :2], 0.5)
+    print()
+
+
+def test_wall_occludes_boxes_behind():
+    """测试墙后的物体被剔除，墙前和墙外的物体保留"""
+    print("🚀 测试墙体遮挡:")
+    camera = Camera(position=np.array([0.0, 0.0, 0.0]), fov=60.0, aspect_ratio=2.0, far_clip=500.0)
+    view_projection = camera.get_view_projection_matrix()
+    wall = Occluder(create_wall_mesh(20.0, 10.0))
+    wall_matrix = Transform(position=[0.0, 0.0, -10.0]).local_to_world_matrix
+
+    buffer = OcclusionBuffer()
+    buffer.render_occluders(view_projection, [wall.get_local_triangles()], [wall_matrix])
+    centers = [[0.0, 0.0, -30.0],    # 墙后
+               [1.0, 1.0, -20.0],    # 墙后
+               [0.0, 0.0, -5.0],     # 墙前
+               [60.0, 0.0, -30.0],   # 墙外侧
+               [0.0, 0.0, -10.0]]    # 与墙相交
+    extents = [[1.0, 1.0, 1.0]] * 5
+    visible = buffer.test_aabbs(centers, extents, view_projection)
+    print(f"   可见性: {visible}")
+    assert list(visible) == [False, False, True, True, True]
+    print()
+
+
+def test_render_system_occlusion_cull():
+    """测试RenderSystem遮挡剔除阶段与统计"""
+    print("🚀 测试RenderSystem遮挡剔除:")
+    camera = Camera(position=np.array([0.0, 0.0, 0.0]), fov=60.0, aspect_ratio=2.0, far_clip=500.0)
+    box = create_box_mesh(2.0)
+    transforms = [Transform(position=[0.0, 0.0, -40.0]), Transform(position=[0.0, 0.0, -5.0]),
+                  Transform(position=[0.0, 0.0, -10.0])]
+    meshes = [box, box, create_box_mesh(1.0)]
+    occluder = Occluder(create_wall_mesh(30.0, 20.0))
+
+    # 不创建窗口，只测试遮挡剔除逻辑
+    render_system = RenderSystem.__new__(RenderSystem)
+    render_system.stats = {'candidates': 3, 'visible': 3, 'culled': 0, 'lod_culled': 0, 'occluded': 0}
+    render_system.occlusion_culling_enabled = True
+    render_system.occlusion_buffer = OcclusionBuffer()
+    visible = np.ones(3, dtype=bool)
+    render_system._occlusion_cull(camera, meshes, stack_world_matrices(transforms), visible,
+                                  [occluder], stack_world_matrices([Transform(position=[0.0, 0.0, -20.0])]))
+    print(f"   可见性: {visible}, 统计: {render_system.stats}")
+    assert list(visible) == [False, True, True]
+    assert render_system.stats['occluded'] == 1 and render_system.stats['visible'] == 2
+
+    # 关闭后不剔除
+    render_system.occlusion_culling_enabled = False
+    visible = np.ones(3, dtype=bool)
+    render_system._occlusion_cull(camera, meshes, stack_world_matrices(transforms), visible,
+                                  [occluder], stack_world_matrices([Transform(position=[0.0, 0.0, -20.0])]))
+    assert np.all(visible) and render_system.stats['occluded'] == 0
+    print()
+
+
+if __name__ == "__main__":
+    test_clip_triangles_near()
+    test_rasterize_and_hierarchy()
+    test_wall_occludes_boxes_behind()
+    test_render_system_occlusion_cull()
+    print("✅ 所有遮挡剔除测试完成")
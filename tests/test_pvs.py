@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+PVS测试
+验证两个被墙隔开的房间的烘焙结果、文件读写以及RenderSystem中的PVS查表
+"""
+import sys
+import os
+import tempfile
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from systems.render_system import RenderSystem, collect_renderable_entities
+from tools.bake_pvs import bake_scene_pvs
+from util.pvs import PVSData, object_keys
+
+
+def create_cube_mesh(size=1.0):
+    """创建12个三角形的立方体Mesh"""
+    half = size * 0.5
+    corners = np.array([[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)])
+    faces = [[0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3]]
+    indices = np.array([[f[0], f[1], f[2], f[0], f[2], f[3]] for f in faces], dtype=np.uint32).flatten()
+    vertices = np.hstack([corners, np.zeros((8, 3)), np.zeros((8, 2))]).astype(np.float32).flatten()
+    return Mesh(vertices, indices)
+
+
+def create_two_rooms():
+    """两个房间被x=0处的墙完全隔开，每个房间各有一个同名的Crate"""
+    ecs = ECSManager()
+    ecs.create_scene("PVSScene")
+    layout = [("Wall", [0.0, 0.0, 0.0], [0.5, 40.0, 40.0]),
+              ("Left", [-6.0, 0.0, 0.0], [2.0, 2.0, 2.0]),
+              ("Right", [6.0, 0.0, 0.0], [2.0, 2.0, 2.0]),
+              ("Crate", [-3.0, 0.0, 1.0], [1.0, 1.0, 1.0]),
+              ("Crate", [3.0, 0.0, 1.0], [1.0, 1.0, 1.0])]
+    for name, position, scale in layout:
+        entity = ecs.create_entity(GameObject, name=name)
+        ecs.add_component(entity, create_cube_mesh(1.0))
+        entity.transform.position = position
+        entity.transform.local_scale = scale
+    return ecs
+
+
+def test_object_keys():
+    """测试同名物体按出现顺序区分，无名物体不参与"""
+    print("🚀 测试物体键:")
+
+    class Named(object):
+        def __init__(self, name):
+            self.name = name
+
+    keys = object_keys([Named("Crate"), Named("Wall"), Named("Crate"), Named(None)])
+    print(f"   键: {keys}")
+    assert keys == ["Crate#0", "Wall#0", "Crate#1", None]
+    print()
+
+
+def bake_two_rooms(path):
+    ecs = create_two_rooms()
+    pvs = bake_scene_pvs(ecs, path, 4.0, bounds=([-10.0, -1.0, -1.0], [10.0, 1.0, 1.0]),
+                         samples_per_cell=8, rays_per_sample=64, targets_per_object=4, processes=2)
+    return ecs, pvs
+
+
+def test_bake_two_rooms():
+    """测试烘焙结果: 每个房间只看到墙和本房间的物体，并验证文件读写"""
+    print("🚀 测试PVS烘焙:")
+    path = os.path.join(tempfile.mkdtemp(), "rooms.pvs")
+    ecs, pvs = bake_two_rooms(path)
+    print(f"   格子: {pvs.dims}, 物体: {pvs.keys}, 文件大小: {os.path.getsize(path)} 字节")
+    assert list(pvs.dims) == [5, 1, 1]
+
+    loaded = PVSData.load(path)
+    assert loaded.keys == pvs.keys and np.array_equal(loaded.bits, pvs.bits)
+
+    left_cell = loaded.cell_of([-8.0, 0.0, 0.0])
+    right_cell = loaded.cell_of([8.0, 0.0, 0.0])
+    assert loaded.cell_of([20.0, 0.0, 0.0]) == -1
+    left = dict(zip(loaded.keys, loaded.visible_objects(left_cell)))
+    right = dict(zip(loaded.keys, loaded.visible_objects(right_cell)))
+    print(f"   左房间: {left}")
+    print(f"   右房间: {right}")
+    assert left == {"Wall#0": True, "Left#0": True, "Right#0": False, "Crate#0": True, "Crate#1": False}
+    assert right == {"Wall#0": True, "Left#0": False, "Right#0": True, "Crate#0": False, "Crate#1": True}
+    print()
+
+
+def test_render_system_pvs_cull():
+    """测试RenderSystem按相机格子查表，范围外与未烘焙物体保持可见"""
+    print("🚀 测试RenderSystem PVS查表:")
+    path = os.path.join(tempfile.mkdtemp(), "rooms.pvs")
+    ecs, _ = bake_two_rooms(path)
+    extra = ecs.create_entity(GameObject, name="Dynamic")
+    ecs.add_component(extra, create_cube_mesh(1.0))
+    entities = collect_renderable_entities(ecs)
+
+    # 不创建窗口，只测试PVS逻辑
+    render_system = RenderSystem.__new__(RenderSystem)
+    render_system.stats = {'pvs_culled': 0}
+    render_system.load_pvs(path)
+
+    camera = Camera(position=np.array([-8.0, 0.0, 0.0]))
+    visible = render_system._pvs_cull(camera, entities)
+    names = [entity.name for entity, flag in zip(entities, visible) if flag]
+    print(f"   左房间可见: {names}, 统计: {render_system.stats}")
+    assert names == ["Wall", "Left", "Crate", "Dynamic"]
+    assert render_system.stats['pvs_culled'] == 2
+
+    camera = Camera(position=np.array([0.0, 50.0, 0.0]))
+    assert np.all(render_system._pvs_cull(camera, entities))
+    print()
+
+
+if __name__ == "__main__":
+    test_object_keys()
+    test_bake_two_rooms()
+    test_render_system_pvs_cull()
+    print("✅ 所有PVS测试完成")
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+射线检测测试
+验证三角形BVH与暴力检测一致、Scene射线检测、屏幕射线和鼠标点选
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from resource_manager.file_resource_manager import FileResourceManager
+from systems.input_system import InputSystem
+from util.triangle_bvh import TriangleBVH
+from Context.context import global_data as GD
+
+
+def create_cube_mesh(size=1.0):
+    """创建12个三角形的立方体Mesh"""
+    half = size * 0.5
+    corners = np.array([[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)])
+    faces = [[0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3]]
+    indices = np.array([[f[0], f[1], f[2], f[0], f[2], f[3]] for f in faces], dtype=np.uint32).flatten()
+    vertices = np.hstack([corners, np.zeros((8, 3)), np.zeros((8, 2))]).astype(np.float32).flatten()
+    return Mesh(vertices, indices)
+
+
+def brute_force_raycast(positions, triangles, origin, direction):
+    v0 = positions[triangles[:, 0]]
+    e1 = positions[triangles[:, 1]] - v0
+    e2 = positions[triangles[:, 2]] - v0
+    p = np.cross(direction, e2)
+    det = np.sum(e1 * p, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1.0 / det
+        s = origin - v0
+        u = np.sum(s * p, axis=1) * inv
+        q = np.cross(s, e1)
+        v = np.sum(direction * q, axis=1) * inv
+        t = np.sum(e2 * q, axis=1) * inv
+    valid = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return t[valid].min() if np.any(valid) else np.inf
+
+
+def test_bvh_matches_brute_force():
+    """测试BVH射线检测与暴力遍历所有三角形一致"""
+    print("🚀 测试三角形BVH:")
+    rng = np.random.default_rng(0)
+    count = 5000
+    centers = rng.uniform(-5.0, 5.0, (count, 1, 3))
+    positions = (centers + rng.normal(0.0, 0.2, (count, 3, 3))).reshape(-1, 3)
+    triangles = np.arange(count * 3).reshape(-1, 3)
+    bvh = TriangleBVH(positions, triangles)
+    print(f"   三角形数: {bvh.triangle_count}, 节点数: {bvh.node_total}")
+
+    origins = rng.uniform(-6.0, 6.0, (50, 3))
+    directions = rng.normal(size=(50, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    t, tri, u, v = bvh.intersect_rays(origins, directions)
+    for i in range(len(origins)):
+        expected = brute_force_raycast(positions, triangles, origins[i], directions[i])
+        assert np.isclose(t[i], expected) or (tri[i] < 0 and np.isinf(expected))
+        if tri[i] >= 0:
+            # 重心坐标还原出的点在射线上
+            a, b, c = positions[triangles[tri[i]]]
+            point = a * (1.0 - u[i] - v[i]) + b * u[i] + c * v[i]
+            assert np.allclose(point, origins[i] + directions[i] * t[i], atol=1e-6)
+
+    hit = bvh.intersect(origins[0], directions[0])
+    assert (hit is None) == (tri[0] < 0)
+    print(f"   命中射线数: {int(np.sum(tri >= 0))}/{len(origins)}")
+    print()
+
+
+def test_scene_raycast():
+    """测试Scene射线检测选择最近物体并考虑Transform"""
+    print("🚀 测试Scene射线检测:")
+    ecs = ECSManager()
+    ecs.create_scene("RaycastScene")
+    mesh = create_cube_mesh(2.0)
+
+    near_box = ecs.create_entity(GameObject, name="NearBox")
+    ecs.add_component(near_box, mesh)
+    near_box.transform.position = [0.0, 0.0, -5.0]
+
+    far_box = ecs.create_entity(GameObject, name="FarBox")
+    ecs.add_component(far_box, Mesh(mesh.vertices, mesh.indices))
+    far_box.transform.position = [0.0, 0.0, -10.0]
+    far_box.transform.local_scale = [3.0, 3.0, 3.0]
+    scene = ecs.get_active_scene()
+
+    hit = scene.raycast([0.0, 0.0, 0.0], [0.0, 0.0, -1.0])
+    print(f"   命中: {hit.entity.name}, 距离: {hit.distance:.3f}")
+    assert hit.entity is near_box
+    assert np.isclose(hit.distance, 4.0)
+    assert np.allclose(hit.normal, [0.0, 0.0, 1.0])
+
+    # 偏离近处物体，命中被放大的远处物体
+    hits = scene.raycast_batch([[2.0, 0.0, 0.0], [0.0, 10.0, 0.0], [0.0, 0.0, 0.0]],
+                               [[0.0, 0.0, -1.0], [0.0, 0.0, -1.0], [0.0, 0.0, 1.0]])
+    assert hits[0].entity is far_box and np.isclose(hits[0].distance, 10.0 - 3.0)
+    assert hits[1] is None and hits[2] is None
+
+    # 最大距离限制
+    assert scene.raycast([0.0, 0.0, 0.0], [0.0, 0.0, -1.0], max_distance=3.0) is None
+
+    # 同一个Mesh的BVH只构建一次
+    assert FileResourceManager().get_mesh_bvh(mesh) is FileResourceManager().get_mesh_bvh(mesh)
+    print()
+
+
+def test_screen_point_picking():
+    """测试屏幕坐标转换为射线并完成点选"""
+    print("🚀 测试鼠标点选:")
+    ecs = ECSManager()
+    ecs.create_scene("PickScene")
+    box = ecs.create_entity(GameObject, name="PickBox")
+    ecs.add_component(box, create_cube_mesh(1.0))
+    box.transform.position = [0.0, 0.0, -5.0]
+
+    camera = Camera(position=np.array([0.0, 0.0, 0.0]), aspect_ratio=800 / 600)
+    origin, direction = camera.screen_point_to_ray(400, 300, 800, 600)
+    assert np.allclose(direction, [0.0, 0.0, -1.0], atol=1e-6)
+    assert np.isclose(origin[2], -camera.near_clip)
+
+    # 屏幕左上角的射线指向左上方
+    _, corner = camera.screen_point_to_ray(0, 0, 800, 600)
+    assert corner[0] < 0.0 and corner[1] > 0.0
+
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        input_system = InputSystem()
+        picked = []
+        input_system.register_pick_listener(picked.append)
+        input_system.pick(400, 300, 800, 600)
+        input_system.pick(10, 10, 800, 600)
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+
+    assert picked[0].entity is box
+    assert picked[1] is None and input_system.selection is None
+    print(f"   选中: {picked[0].entity.name}")
+    print()
+
+
+if __name__ == "__main__":
+    test_bvh_matches_brute_force()
+    test_scene_raycast()
+    test_screen_point_picking()
+    print("✅ 所有射线检测测试完成")
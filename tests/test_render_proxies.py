@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+常驻渲染代理测试
+验证代理随组件增删创建和移除、只重新计算Transform变化过的行、删除时的行交换与层号刷新，
+以及RenderSystem在静止的帧中直接复用代理上缓存的渲染元组
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.material import Material
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from core.render_proxy import RenderProxySet
+from graphics.null_renderer import NullRenderer
+from resource_manager.null_shader import NullShader
+from systems.render_system import RenderSystem
+from Context.context import global_data as GD
+
+
+def create_cube_mesh(size=1.0):
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([[*c, 0.0, 0.0, 1.0, 0.0, 0.0] for c in corners], dtype=np.float32).flatten()
+    indices = np.array([0, 1, 2, 1, 3, 2, 4, 6, 5, 5, 6, 7], dtype=np.uint32)
+    return Mesh(vertices, indices)
+
+
+def assert_rows_match(proxies):
+    """每一行的矩阵、包围盒和层号与其Entity当前的状态一致"""
+    for row, proxy in enumerate(proxies.proxies):
+        assert proxy.index == row and proxies.items[row] is proxy.item
+        world = proxy.transform.local_to_world_matrix
+        assert np.allclose(proxies.world_matrices[row], world)
+        assert np.allclose(proxy.item[0], world.flatten("F"))
+        assert np.allclose(proxies.bounds[0][row], world[:3, 3])
+        assert proxies.layers[row] == 1 << proxy.entity.layer
+
+
+def test_proxy_lifecycle():
+    """测试代理的创建、增量更新、删除时的行交换和层号刷新"""
+    print("🚀 测试渲染代理的增量维护:")
+    ecs = ECSManager()
+    scene = ecs.create_scene("ProxyScene")
+    crates = []
+    for k in range(4):
+        crate = ecs.create_entity(GameObject, name=f"Crate{k}")
+        ecs.add_component(crate, create_cube_mesh())
+        crate.transform.position = [float(k), 0.0, -5.0]
+        crates.append(crate)
+
+    # 只有Mesh没有Material时不可渲染，添加Material后才创建代理
+    proxies = scene.update_render_proxies()
+    assert proxies.count == 0
+    for crate in crates:
+        ecs.add_component(crate, Material())
+    assert proxies.count == 4 and proxies.entities == crates
+    assert scene.update_render_proxies().update() == 0  # 创建时已计算
+    assert_rows_match(proxies)
+
+    # 只重新计算移动过的一行，渲染元组保持不变
+    item = proxies.get(crates[2]).item
+    crates[2].transform.position = [2.0, 3.0, -5.0]
+    generations = proxies.generations.copy()
+    assert proxies.update() == 1 and proxies.update() == 0
+    assert proxies.get(crates[2]).item is item and item[0][13] == 3.0
+    # 只有变化的行得到新的代数
+    changed = proxies.generations != generations
+    assert changed.tolist() == [False, False, True, False] and proxies.generations[2] == proxies.generation
+    assert_rows_match(proxies)
+
+    # 删除时最后一行移到空出的位置，Transform回调随之解除
+    version = proxies.structure_version
+    scene.remove_entity(crates[0])
+    assert proxies.count == 3 and proxies.structure_version == version + 1
+    assert proxies.entities == [crates[3], crates[1], crates[2]]
+    assert proxies.generations[0] == proxies.generation  # 移入的行内容变了
+    assert crates[0].transform._change_listener is None
+    assert_rows_match(proxies)
+
+    # 移除Material后代理删除，替换为新的Material后重新创建
+    material = Material()
+    del crates[1].components[Material]
+    scene.notify_component_removed(crates[1], Material)
+    assert proxies.get(crates[1]) is None and proxies.count == 2
+    ecs.add_component(crates[1], material)
+    assert proxies.get(crates[1]).item[2] is material
+
+    # 修改层号后下次更新重新读取
+    crates[3].layer = 5
+    proxies.update()
+    print(f"   行: {[entity.name for entity in proxies.entities]}, 层掩码: {proxies.layers.tolist()}")
+    assert_rows_match(proxies)
+
+    # 容量不足时按2倍增长，渲染元组重新绑定到新数组的视图
+    small = RenderProxySet(capacity=2)
+    for crate in crates[1:]:
+        assert small.track(crate)
+    small.update()
+    assert len(small.model_matrices.base) == 4
+    assert all(item[0].base is small.model_matrices.base for item in small.items)
+    assert_rows_match(small)
+    print()
+
+
+def test_render_system_reuses_proxy_items():
+    """测试静止的帧中可见物体直接提交代理缓存的渲染元组，移动的物体只更新其所在行"""
+    print("🚀 测试RenderSystem复用渲染代理:")
+    ecs = ECSManager()
+    scene = ecs.create_scene("ProxyRenderScene")
+    shader = NullShader()
+    materials = [Material(shader) for _ in range(3)]
+    crates = []
+    for k in range(30):
+        crate = ecs.create_entity(GameObject, name="Crate")
+        ecs.add_component(crate, create_cube_mesh(1.0 + k * 0.01))  # 每个物体的Mesh不同，不会实例化
+        ecs.add_component(crate, materials[k % 3])
+        crate.transform.position = [float(k % 6) * 2.0 - 5.0, float(k // 6) - 2.0, -20.0]
+        crates.append(crate)
+    hidden = crates[-1]
+    hidden.layer = 4
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]),
+                               culling_mask=~(1 << 4) & 0xFFFFFFFF)
+    old_ecs, old_camera, old_renderer = GD.ecs_manager, GD.main_camera, GD.renderer
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        renderer = NullRenderer()
+        render_system = RenderSystem(renderer)
+        render_system.command_lists_enabled = False
+        frames = []
+        draw = renderer.draw
+        renderer.draw = lambda render_objects: frames.append(render_objects) or draw(render_objects)
+
+        render_system.update(0.016)
+        render_system.update(0.016)
+        proxies = scene.update_render_proxies()
+        assert proxies.update() == 0
+        crates[0].transform.position = [-5.0, -2.0, -21.0]
+        render_system.update(0.016)
+    finally:
+        GD.ecs_manager, GD.main_camera, GD.renderer = old_ecs, old_camera, old_renderer
+
+    items = {id(proxy.item): proxy.entity for proxy in proxies.proxies}
+    print(f"   每帧绘制: {[len(frame) for frame in frames]}, 统计: {render_system.stats}")
+    assert [len(frame) for frame in frames] == [29, 29, 29]
+    assert render_system.stats['layer_culled'] == 1
+    for frame in frames:
+        # 每个绘制都是代理上缓存的同一个元组
+        assert all(id(item) in items for item in frame)
+        assert hidden not in [items[id(item)] for item in frame]
+    assert [id(item) for item in frames[0]] == [id(item) for item in frames[1]]
+    moved = proxies.get(crates[0]).item
+    assert any(item is moved for item in frames[2]) and moved[0][14] == -21.0
+    print()
+
+
+if __name__ == "__main__":
+    test_proxy_lifecycle()
+    test_render_system_reuses_proxy_items()
+    print("✅ 所有渲染代理测试完成")
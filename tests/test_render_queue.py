@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+渲染队列与GL状态缓存测试
+验证排序键的优先级 (队列 > shader > 材质 > 纹理 > 深度)、半透明由远到近，以及重复绑定被跳过
+"""
+import gc
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import graphics.opengl_state_cache as opengl_state_cache
+from components.material import Material
+from graphics.opengl_state_cache import OpenGLStateCache
+from graphics.render_queue import RenderQueue
+from resource_manager.texture import BaseTexture
+
+
+class FakeTexture(BaseTexture):
+    def __init__(self, texture_id):
+        self.id = texture_id
+
+    def bind(self, unit):
+        pass
+
+    def unbind(self):
+        pass
+
+    def cleanup(self):
+        pass
+
+
+class FakeShader(object):
+    def __init__(self, program):
+        self.shader_program = program
+        self.use_calls = 0
+
+    def use(self):
+        self.use_calls += 1
+
+
+def make_material(shader, texture=None, render_queue=Material.RENDER_QUEUE_GEOMETRY):
+    material = Material(shader, render_queue=render_queue)
+    material.properties = {"MainTex": texture, "MyFloatParam": 0.5}
+    return material
+
+
+def test_sort_key_priority():
+    """测试排序键各字段的优先级"""
+    print("🚀 测试排序键:")
+    shader_a, shader_b = FakeShader(1), FakeShader(2)
+    brick, grass = FakeTexture(10), FakeTexture(11)
+    mat_a1 = make_material(shader_a, brick)
+    mat_b = make_material(shader_b, grass)
+    mat_a2 = make_material(shader_a, grass)
+    glass = make_material(shader_a, brick, Material.RENDER_QUEUE_TRANSPARENT)
+    sky = make_material(shader_b, None, Material.RENDER_QUEUE_BACKGROUND)
+
+    # (名称, 材质, 归一化深度)，按场景插入顺序交错排列
+    draws = [("a1_far", mat_a1, 0.9), ("b_near", mat_b, 0.1), ("glass_near", glass, 0.2), ("a2", mat_a2, 0.5),
+             ("a1_near", mat_a1, 0.1), ("glass_far", glass, 0.8), ("sky", sky, 0.99), ("b_far", mat_b, 0.7)]
+    queue = RenderQueue()
+    render_objects = [(None, name, material) for name, material, _ in draws]
+    ordered = [item[1] for item in queue.sort(render_objects, np.array([d for _, _, d in draws]))]
+    print(f"   绘制顺序: {ordered}")
+
+    assert ordered[0] == "sky"                           # 背景队列最先
+    assert ordered[-2:] == ["glass_far", "glass_near"]   # 半透明最后，由远到近
+    opaque = ordered[1:-2]
+    # 同一shader的绘制相邻，同一材质内由近到远
+    assert {opaque[0], opaque[1], opaque[2]} == {"a1_near", "a1_far", "a2"}
+    assert opaque.index("a1_near") < opaque.index("a1_far")
+    assert abs(opaque.index("a1_near") - opaque.index("a1_far")) == 1
+    assert opaque[3:] == ["b_near", "b_far"]
+    assert np.all(np.diff(queue.keys.astype(np.float64)) >= 0)
+
+    # 编号跨帧稳定: 相同输入得到相同的键
+    keys = queue.keys.copy()
+    queue.sort(render_objects, np.array([d for _, _, d in draws]))
+    assert np.array_equal(keys, queue.keys)
+    assert queue.sort([], np.zeros(0)) == []
+
+    # 编号表只持有弱引用: 不再使用的材质释放后表项移除，新材质的编号不与仍在使用的重复
+    temporary = make_material(shader_b, None)
+    queue.sort([(None, "temporary", temporary)], np.zeros(1))
+    assert len(queue._material_ids) == 6
+    del temporary
+    gc.collect()
+    assert len(queue._material_ids) == 5
+    queue.sort([(None, "late", make_material(shader_b, None))], np.zeros(1))
+    assert queue.build_keys([mat_a1], np.array([0.1]))[0] == keys[ordered.index("a1_near")]
+    print()
+
+
+def test_state_cache_skips_redundant_binds():
+    """测试状态缓存跳过重复的程序、纹理和VAO绑定"""
+    print("🚀 测试GL状态缓存:")
+    calls = []
+    saved = {}
+    fakes = {
+        'glActiveTexture': lambda unit: calls.append(('active', unit)),
+        'glBindTexture': lambda target, texture: calls.append(('texture', texture)),
+        'glBindVertexArray': lambda vao: calls.append(('vao', vao)),
+    }
+    for name, function in fakes.items():
+        saved[name] = getattr(opengl_state_cache, name)
+        setattr(opengl_state_cache, name, function)
+    try:
+        state = OpenGLStateCache()
+        shader = FakeShader(3)
+        # 排好序的10个绘制共享同一shader、纹理和VAO
+        for _ in range(10):
+            state.use_program(shader)
+            state.bind_texture(0, 10)
+            state.bind_vertex_array(5)
+            state.count_draw()
+        print(f"   统计: {state.stats}")
+        assert shader.use_calls == 1
+        assert calls == [('active', opengl_state_cache.GL_TEXTURE0), ('texture', 10), ('vao', 5)]
+        assert state.stats == {'draw_calls': 10, 'program_changes': 1, 'texture_changes': 1,
+                               'vertex_array_changes': 1, 'skipped': 27}
+
+        # 切换纹理单元，已删除的VAO被忘记，invalidate后重新绑定
+        state.bind_texture(1, 10)
+        assert calls[-2:] == [('active', opengl_state_cache.GL_TEXTURE0 + 1), ('texture', 10)]
+        state.forget_vertex_array(5)
+        assert state.bind_vertex_array(5)
+        state.invalidate()
+        assert state.use_program(shader) and shader.use_calls == 2
+    finally:
+        for name, function in saved.items():
+            setattr(opengl_state_cache, name, function)
+    print()
+
+
+if __name__ == "__main__":
+    test_sort_key_priority()
+    test_state_cache_skips_redundant_binds()
+    print("✅ 所有渲染队列测试完成")
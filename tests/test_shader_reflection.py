@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Shader反射测试
+用模拟的GL程序替换模块中的OpenGL入口，验证链接时的uniform/属性反射，以及值未变化时跳过上传
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import resource_manager.opengl_shader as opengl_shader
+from OpenGL.GL import (GL_ACTIVE_ATTRIBUTES, GL_ACTIVE_UNIFORMS, GL_FLOAT, GL_FLOAT_MAT4, GL_FLOAT_VEC2,
+                       GL_FLOAT_VEC3, GL_SAMPLER_2D)
+from resource_manager.opengl_shader import OpenGLShader
+
+
+class FakeProgram(object):
+    """模拟一个已链接的程序，记录uniform上传"""
+
+    UNIFORMS = [(b"model", 1, GL_FLOAT_MAT4), (b"view", 1, GL_FLOAT_MAT4), (b"MainTex", 1, GL_SAMPLER_2D),
+                (b"tint", 1, GL_FLOAT_VEC3), (b"weights[0]", 4, GL_FLOAT), (b"Globals.time", 1, GL_FLOAT)]
+    ATTRIBUTES = [(b"inPosition", 1, GL_FLOAT_VEC3), (b"inTexCoord", 1, GL_FLOAT_VEC2)]
+
+    def __init__(self):
+        self.uploads = []
+        self.block_bindings = []
+        self._saved = {}
+        self.functions = {
+            'glGetProgramiv': lambda program, pname: {int(GL_ACTIVE_UNIFORMS): len(self.UNIFORMS),
+                                                      int(GL_ACTIVE_ATTRIBUTES): len(self.ATTRIBUTES)}[int(pname)],
+            'glGetActiveUniform': lambda program, index: self.UNIFORMS[index],
+            'glGetActiveAttrib': lambda program, index: self.ATTRIBUTES[index],
+            # uniform block中的成员没有位置
+            'glGetUniformLocation': lambda program, name: -1 if '.' in name else
+            [self._name(u[0]) for u in self.UNIFORMS].index(name) + 10,
+            'glGetAttribLocation': lambda program, name: [self._name(a[0]) for a in self.ATTRIBUTES].index(name),
+            'glGetUniformBlockIndex': lambda program, name: 0 if name == "FrameData" else GL_INVALID_INDEX,
+            'glUniformBlockBinding': lambda program, index, binding: self.block_bindings.append((index, binding)),
+        }
+        for name in ('glUniform1iv', 'glUniform1fv', 'glUniform3fv', 'glUniformMatrix4fv'):
+            self.functions[name] = self._recorder(name)
+
+    @staticmethod
+    def _name(name):
+        return name.decode().replace('[0]', '')
+
+    def _recorder(self, name):
+        def upload(location, *args):
+            self.uploads.append((name, location))
+        return upload
+
+    def __enter__(self):
+        for name, function in self.functions.items():
+            self._saved[name] = getattr(opengl_shader, name)
+            setattr(opengl_shader, name, function)
+        return self
+
+    def __exit__(self, *exc):
+        for name, function in self._saved.items():
+            setattr(opengl_shader, name, function)
+
+
+def test_reflection():
+    """测试链接后反射活动uniform和顶点属性"""
+    print("🚀 测试Shader反射:")
+    with FakeProgram() as program:
+        shader = OpenGLShader()
+        shader.shader_program = 1
+        shader.reflect()
+    print(f"   uniforms: {sorted(shader.uniforms)}, attributes: {sorted(shader.attributes)}")
+    assert sorted(shader.uniforms) == ["MainTex", "model", "tint", "view", "weights"]
+    assert shader.uniforms["weights"].size == 4 and shader.uniforms["weights"].gl_type == int(GL_FLOAT)
+    assert shader.get_uniform_location("view") == 11
+    assert shader.get_uniform_location("missing") == -1 and not shader.has_uniform("Globals.time")
+    assert shader.attributes["inTexCoord"].location == 1
+    assert shader.attributes["inPosition"].gl_type == int(GL_FLOAT_VEC3)
+    # 每帧uniform块绑定到固定绑定点
+    assert shader.uniform_blocks == {"FrameData": 0} and program.block_bindings == [(0, 0)]
+    print()
+
+
+def test_setters_skip_unchanged_values():
+    """测试值未变化时不调用GL，缺失的uniform直接忽略"""
+    print("🚀 测试uniform缓存:")
+    with FakeProgram() as program:
+        shader = OpenGLShader()
+        shader.shader_program = 1
+        shader.reflect()
+
+        matrix = np.eye(4, dtype=np.float32).flatten("F")
+        assert shader.set_mat4("model", matrix)
+        assert not shader.set_mat4("model", matrix.copy())
+        matrix[12] = 2.0
+        assert shader.set_mat4("model", matrix)
+
+        assert shader.set_texture("MainTex", 0) and not shader.set_texture("MainTex", 0)
+        assert shader.set_vec3("tint", [1.0, 0.5, 0.0]) and not shader.set_vec3("tint", (1.0, 0.5, 0.0))
+        assert shader.set_uniform("weights", [0.1, 0.2, 0.3, 0.4])
+        assert not shader.set_uniform("weights", np.array([0.1, 0.2, 0.3, 0.4]))
+        assert not shader.set_float("missing", 1.0)
+        # set_uniform与set_int/set_float共用同一个缓存
+        assert not shader.set_uniform("MainTex", 0) and not shader.set_int("MainTex", np.int64(0))
+
+        print(f"   GL上传: {program.uploads}")
+        assert program.uploads == [('glUniformMatrix4fv', 10), ('glUniformMatrix4fv', 10), ('glUniform1iv', 12),
+                                   ('glUniform3fv', 13), ('glUniform1fv', 14)]
+
+        # 绕过setter修改后强制重新上传
+        shader.invalidate_uniform_cache()
+        assert shader.set_texture("MainTex", 0)
+        try:
+            shader.set_uniform("tint", [1.0, 2.0])
+            assert False, "wrong component count should raise"
+        except ValueError:
+            pass
+    print()
+
+
+if __name__ == "__main__":
+    test_reflection()
+    test_setters_skip_unchanged_values()
+    print("✅ 所有Shader反射测试完成")
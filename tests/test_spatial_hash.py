@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+空间哈希网格测试
+验证半径查询、邻居对查询与暴力计算一致，以及在LogicModule中的用法
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.gameobject import GameObject
+from core.ecs import ECSManager
+from systems.logic_system import LogicModule, LogicSystem
+from util.spatial_hash import SpatialHashGrid
+
+
+def brute_force_pairs(positions, radius):
+    delta = positions[:, np.newaxis, :] - positions[np.newaxis, :, :]
+    close = np.sum(delta ** 2, axis=-1) <= radius * radius
+    i, j = np.nonzero(np.triu(close, k=1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+def test_radius_query():
+    """测试半径查询与暴力计算一致"""
+    print("🚀 测试半径查询:")
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-20.0, 20.0, (2000, 3)).astype(np.float32)
+    grid = SpatialHashGrid(cell_size=2.0)
+    grid.rebuild(positions)
+
+    for center, radius in [([0.0, 0.0, 0.0], 3.0), ([18.0, -19.0, 5.0], 5.5), ([100.0, 0.0, 0.0], 4.0)]:
+        result = grid.query_radius(center, radius)
+        expected = np.flatnonzero(np.sum((positions - np.asarray(center, dtype=np.float32)) ** 2, axis=1)
+                                  <= radius * radius)
+        print(f"   中心 {center} 半径 {radius}: {len(result)} 个")
+        assert np.array_equal(result, expected)
+
+    neighbors = grid.query_neighbors(0, 3.0)
+    assert 0 not in neighbors
+    print()
+
+
+def test_pair_query():
+    """测试邻居对查询 (半径小于和大于格子尺寸)"""
+    print("🚀 测试邻居对查询:")
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(-10.0, 10.0, (500, 3)).astype(np.float32)
+    grid = SpatialHashGrid(cell_size=1.5)
+    grid.rebuild(positions)
+
+    for radius in (1.0, 1.5, 3.2):
+        pairs = grid.query_pairs(radius)
+        assert np.all(pairs[:, 0] < pairs[:, 1])
+        result = set(map(tuple, pairs.tolist()))
+        assert len(result) == len(pairs)  # 没有重复
+        assert result == brute_force_pairs(positions, radius)
+        print(f"   半径 {radius}: {len(pairs)} 对")
+
+    grid.rebuild(np.zeros((0, 3)))
+    assert len(grid.query_pairs(1.0)) == 0
+    assert len(grid.query_radius([0.0, 0.0, 0.0], 1.0)) == 0
+    print()
+
+
+class ProximityTriggerModule(LogicModule):
+    """示例：每帧重建网格，统计进入触发半径的物体"""
+    def __init__(self, entities, trigger_position, trigger_radius):
+        self.entities = entities
+        self.trigger_position = trigger_position
+        self.trigger_radius = trigger_radius
+        self.grid = SpatialHashGrid(cell_size=trigger_radius)
+        self.triggered = []
+
+    def update(self, dt):
+        self.grid.rebuild_from_entities(self.entities)
+        hits = self.grid.query_radius(self.trigger_position, self.trigger_radius)
+        self.triggered = [self.grid.entities[i] for i in hits]
+
+
+def test_logic_module_usage():
+    """测试在LogicModule中基于Transform重建网格"""
+    print("🚀 测试LogicModule用法:")
+    ecs = ECSManager()
+    ecs.create_scene("SpatialHashScene")
+    objects = []
+    for i in range(20):
+        obj = ecs.create_entity(GameObject, name=f"Agent_{i}")
+        obj.transform.position = [float(i), 0.0, 0.0]
+        objects.append(obj)
+
+    logic_system = LogicSystem()
+    module = ProximityTriggerModule(objects, [0.0, 0.0, 0.0], 2.5)
+    logic_system.add_logic_module(module)
+
+    logic_system.update(0.016)
+    assert module.triggered == objects[:3]
+
+    # 物体移动后下一帧自动反映
+    objects[10].transform.position = [0.0, 1.0, 0.0]
+    logic_system.update(0.016)
+    assert set(module.triggered) == set(objects[:3]) | {objects[10]}
+    print(f"   触发物体数: {len(module.triggered)}")
+    print()
+
+
+if __name__ == "__main__":
+    test_radius_query()
+    test_pair_query()
+    test_logic_module_usage()
+    print("✅ 所有空间哈希网格测试完成")
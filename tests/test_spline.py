@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Spline路径测试
+验证曲线采样、弧长表匀速运动以及SplineSystem的批量更新
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.gameobject import GameObject
+from core.ecs import ECSManager
+from components.spline import Spline, SplineType
+from components.spline_follower import SplineFollower, SplineWrapMode
+from systems.spline_system import SplineSystem
+from Context.context import global_data as GD
+
+
+def test_spline_evaluation():
+    """测试曲线经过控制点以及弧长"""
+    print("🚀 测试曲线采样:")
+    points = [[0.0, 0.0, 0.0], [10.0, 0.0, 0.0], [20.0, 0.0, 0.0]]
+    spline = Spline(points, SplineType.CATMULL_ROM)
+    print(f"   段数: {spline.segment_count}, 长度: {spline.length:.4f}")
+    assert spline.segment_count == 2
+    assert np.allclose(spline.evaluate([0.0, 1.0, 2.0]), points)
+    assert np.isclose(spline.length, 20.0, atol=1e-3)
+
+    bezier = Spline([[0, 0, 0], [0, 1, 0], [1, 1, 0], [1, 0, 0]], SplineType.BEZIER)
+    assert np.allclose(bezier.evaluate([0.0, 1.0]), [[0, 0, 0], [1, 0, 0]])
+    assert np.allclose(bezier.evaluate([0.5]), [[0.5, 0.75, 0.0]])
+    print()
+
+
+def test_constant_speed():
+    """测试按弧长采样得到等间距的点"""
+    print("🚀 测试匀速采样:")
+    spline = Spline([[0, 0, 0], [0, 1, 0], [3, 1, 0], [3, 0, 0]], SplineType.BEZIER, samples_per_segment=256)
+    distances = np.linspace(0.0, spline.length, 11)
+    positions, tangents = spline.evaluate_at_distance(distances)
+    steps = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+    print(f"   步长范围: {steps.min():.4f} ~ {steps.max():.4f}")
+    assert np.allclose(steps, steps.mean(), rtol=0.02)
+    assert np.allclose(np.linalg.norm(tangents, axis=1), 1.0)
+    print()
+
+
+def test_spline_system():
+    """测试SplineSystem批量驱动多个跟随者"""
+    print("🚀 测试SplineSystem:")
+    ecs = ECSManager()
+    GD.ecs_manager = ecs
+
+    spline = Spline([[0, 0, 0], [10, 0, 0]], SplineType.CATMULL_ROM)
+    looping = ecs.create_entity(GameObject, name="Looping")
+    once = ecs.create_entity(GameObject, name="Once")
+    ping_pong = ecs.create_entity(GameObject, name="PingPong")
+    ecs.add_component(looping, SplineFollower(spline, speed=4.0, distance=8.0, wrap_mode=SplineWrapMode.LOOP))
+    ecs.add_component(once, SplineFollower(spline, speed=4.0, distance=8.0, wrap_mode=SplineWrapMode.ONCE))
+    ecs.add_component(ping_pong, SplineFollower(spline, speed=4.0, distance=8.0, wrap_mode=SplineWrapMode.PING_PONG))
+
+    system = SplineSystem()
+    system.update(1.0)
+
+    print(f"   LOOP位置: {looping.transform.position}")
+    print(f"   ONCE位置: {once.transform.position}")
+    print(f"   PING_PONG位置: {ping_pong.transform.position}")
+    assert np.allclose(looping.transform.position, [2.0, 0.0, 0.0], atol=1e-3)
+    assert np.allclose(once.transform.position, [10.0, 0.0, 0.0], atol=1e-3)
+    assert not once.get_component(SplineFollower).is_playing
+    assert np.allclose(ping_pong.transform.position, [8.0, 0.0, 0.0], atol=1e-3)
+    assert ping_pong.get_component(SplineFollower).direction == -1.0
+
+    # 朝向沿切线：本地-Z轴指向运动方向
+    forward = looping.transform.transform_direction([0.0, 0.0, -1.0])
+    print(f"   LOOP朝向: {forward}")
+    assert np.allclose(forward, [1.0, 0.0, 0.0], atol=1e-4)
+    back = ping_pong.transform.transform_direction([0.0, 0.0, -1.0])
+    assert np.allclose(back, [-1.0, 0.0, 0.0], atol=1e-4)
+    print()
+
+
+def test_ping_pong_large_step():
+    """测试PING_PONG一步越界超过曲线长度时仍按往返折叠"""
+    print("🚀 测试PING_PONG大步长:")
+    system = SplineSystem()
+    modes = np.full(4, SplineWrapMode.PING_PONG.value)
+    distances = np.array([25.0, 32.0, -3.0, -14.0])  # 曲线长度10
+    directions = np.ones(4)
+    distances, directions, finished = system._wrap_distances(distances, directions, modes, 10.0)
+    print(f"   距离: {distances}, 方向: {directions}")
+    # 25: 到终点返回到起点后再前进5；32: 折叠为12，镜像为8并反向
+    assert np.allclose(distances, [5.0, 8.0, 3.0, 6.0])
+    assert np.allclose(directions, [1.0, -1.0, -1.0, 1.0])
+    assert not finished.any()
+    print()
+
+
+if __name__ == "__main__":
+    test_spline_evaluation()
+    test_constant_speed()
+    test_spline_system()
+    test_ping_pong_large_step()
+    print("✅ Spline测试完成!")
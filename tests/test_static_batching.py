@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+静态合批测试
+验证静态物体按Material合并为世界空间网格、submesh区间和包围盒，以及合批后仍按物体剔除
+"""
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from Entity.camera import Camera
+from Entity.gameobject import GameObject
+from components.material import Material
+from components.mesh import Mesh
+from core.ecs import ECSManager
+from graphics.renderer import Renderer
+from systems.render_system import RenderSystem
+from util.static_batch import combine_static_meshes
+from Context.context import global_data as GD
+
+
+def create_cube_mesh(size=1.0):
+    half = size * 0.5
+    corners = [[x, y, z] for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    vertices = np.array([[*c, 0.0, 0.0, 1.0, 0.0, 0.0] for c in corners], dtype=np.float32).flatten()
+    indices = np.array([0, 1, 2, 1, 3, 2, 4, 6, 5, 5, 6, 7], dtype=np.uint32)
+    return Mesh(vertices, indices)
+
+
+class RecordingRenderer(object):
+    def __init__(self):
+        self.render_objects = []
+
+    def begin_frame(self):
+        self.render_objects = []
+
+    def begin_view(self, camera):
+        pass
+
+    def setup_camera(self, camera, update_view=True, update_projection=True):
+        pass
+
+    def draw(self, render_objects):
+        self.render_objects.extend(render_objects)
+
+    # 命令列表还原为渲染元组交给draw() (Renderer的默认实现)
+    execute = Renderer.execute
+
+    def end_frame(self):
+        pass
+
+
+def test_combine_static_meshes():
+    """测试合并后的顶点在世界空间、submesh区间与包围盒"""
+    print("🚀 测试静态网格合并:")
+    cube = create_cube_mesh(1.0)
+    stone = Material()
+    matrices = np.tile(np.eye(4, dtype=np.float32), (3, 1, 1))
+    matrices[0, :3, 3] = [10.0, 0.0, 0.0]
+    matrices[1, :3, :3] = np.diag([2.0, 2.0, 2.0])
+    matrices[2, :3, :3] = np.diag([-1.0, 1.0, 1.0])  # 镜像
+    matrices[2, :3, 3] = [-10.0, 0.0, 0.0]
+    batches = combine_static_meshes([100, 101, 102], [cube] * 3, [stone] * 3, matrices)
+    assert len(batches) == 1
+    batch = batches[0]
+    assert batch.submesh_count == 3 and batch.mesh.get_vertex_count() == 24 and len(batch.mesh.indices) == 36
+    assert np.array_equal(batch.index_counts, [12, 12, 12]) and batch.index_offsets[0] == 0
+
+    positions = np.asarray(batch.mesh.vertices).reshape(-1, 8)[:, :3]
+    for s, entity_id in enumerate(batch.entity_ids):
+        k = entity_id - 100
+        start, count = batch.index_offsets[s], batch.index_counts[s]
+        used = positions[batch.mesh.indices[start:start + count]]
+        # 每个submesh的顶点都位于其世界包围盒内
+        assert np.all(np.abs(used - batch.centers[s]) <= batch.extents[s] + 1e-5)
+        assert np.allclose(batch.centers[s], matrices[k][:3, 3])
+        if k == 2:
+            # 镜像物体交换了环绕方向
+            assert np.array_equal(batch.mesh.indices[start:start + 3] - batch.mesh.indices[start:start + 3].min(),
+                                  [0, 2, 1])
+    assert batch.draw_ranges([0, 1, 2]) is None
+    starts, counts = batch.draw_ranges([0, 2])
+    assert list(starts) == [0, 24] and list(counts) == [12, 12]
+    starts, counts = batch.draw_ranges([1, 2])
+    assert list(starts) == [12] and list(counts) == [24]
+
+    # 超过顶点上限时拆分
+    assert len(combine_static_meshes([1, 2, 3], [cube] * 3, [stone] * 3, matrices, max_vertices=16)) == 2
+    print()
+
+
+def test_level_geometry_collapses_into_few_draws():
+    """测试数千个静态小物体只产生少量绘制，且仍按物体剔除"""
+    print("🚀 测试关卡静态合批:")
+    ecs = ECSManager()
+    ecs.create_scene("LevelScene")
+    pieces = [create_cube_mesh(0.5), create_cube_mesh(1.0), create_cube_mesh(0.25)]
+    wall, floor = Material(), Material()
+    for k in range(3000):
+        piece = ecs.create_entity(GameObject, name="Piece")
+        ecs.add_component(piece, pieces[k % 3])
+        ecs.add_component(piece, wall if k % 2 else floor)
+        piece.transform.position = [float(k % 60) - 30.0, float(k // 60 % 5), -5.0 - float(k // 300) * 10.0]
+        piece.is_static = True
+    # 动态物体不参与合批
+    mover = ecs.create_entity(GameObject, name="Mover")
+    ecs.add_component(mover, pieces[0])
+    ecs.add_component(mover, wall)
+    mover.transform.position = [0.0, 0.0, -3.0]
+
+    camera = ecs.create_entity(Camera, position=np.array([0.0, 0.0, 0.0]), far_clip=1000.0)
+    old_ecs, old_camera = GD.ecs_manager, GD.main_camera
+    GD.ecs_manager, GD.main_camera = ecs, camera
+    try:
+        render_system = RenderSystem(RecordingRenderer())
+        render_system.update(0.016)
+        stats = dict(render_system.stats)
+        objects = list(render_system.renderer.render_objects)
+
+        # 相机前移后身后的物体被剔除，合批只提交可见物体的区间
+        camera.position = np.array([0.0, 2.0, -40.0])
+        render_system.update(0.016)
+        moved = dict(render_system.stats)
+        moved_objects = list(render_system.renderer.render_objects)
+    finally:
+        GD.ecs_manager, GD.main_camera = old_ecs, old_camera
+
+    print(f"   合批 {len(render_system.static_batches)}, 可见 {stats['visible']}, 绘制 {stats['draws']}, "
+          f"合批物体 {stats['static_batched']}; 前移后可见 {moved['visible']}, 绘制 {moved['draws']}")
+    assert len(render_system.static_batches) == 2
+    assert stats['static_batched'] == stats['visible'] - 1
+    assert stats['draws'] == len(objects) <= 3
+    assert any(item[1] is pieces[0] for item in objects)  # 动态物体单独绘制
+
+    assert 0 < moved['static_batched'] < stats['static_batched']
+    assert moved['static_batched'] == moved['visible']  # 动态物体在相机身后
+    assert any(item[3] is not None for item in moved_objects)
+    for item in moved_objects:
+        if item[3] is not None:
+            starts, counts = item[3]
+            batch = next(b for b in render_system.static_batches if b.mesh is item[1])
+            # 提交的索引数等于可见submesh的索引数之和
+            assert counts.sum() < batch.index_counts.sum()
+    print()
+
+
+if __name__ == "__main__":
+    test_combine_static_meshes()
+    test_level_geometry_collapses_into_few_draws()
+    print("✅ 所有静态合批测试完成")
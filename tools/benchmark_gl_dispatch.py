@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+GL逐次调用开销基准
+在隐藏窗口的GL上下文中重复调用热路径上的GL函数，对比PyOpenGL包装调用与缓存的原始函数指针
+(graphics/opengl_dispatch.py) 的每次调用耗时
+
+用法:
+    python tools/benchmark_gl_dispatch.py              # 调试模式 (PyOpenGL错误检查开启)
+    python tools/benchmark_gl_dispatch.py --release    # 发布模式 (导入OpenGL之前关闭错误检查)
+
+两种模式下原始函数指针的耗时应基本相同，PyOpenGL调用在发布模式下少了glGetError的开销
+"""
+import argparse
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.renderer import RendererConfig
+
+VERTEX_SOURCE = """#version 330 core
+layout(location = 0) in vec3 inPosition;
+uniform mat4 model;
+uniform mat3 normalMatrix;
+out vec3 Normal;
+void main()
+{
+    Normal = normalMatrix * inPosition;
+    gl_Position = model * vec4(inPosition, 1.0);
+}
+"""
+
+FRAGMENT_SOURCE = """#version 330 core
+in vec3 Normal;
+uniform float value;
+out vec4 FragColor;
+void main()
+{
+    FragColor = vec4(Normal * value, 1.0);
+}
+"""
+
+
+def measure(function, iterations):
+    """返回每次调用的平均耗时 (纳秒)"""
+    start = time.perf_counter()
+    function(iterations)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def create_context():
+    import glfw
+    if not glfw.init():
+        raise RuntimeError("GLFW初始化失败")
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, glfw.TRUE)
+    window = glfw.create_window(64, 64, "benchmark", None, None)
+    if not window:
+        glfw.terminate()
+        raise RuntimeError("无法创建GL上下文")
+    glfw.make_context_current(window)
+    return glfw, window
+
+
+def run_benchmarks(iterations):
+    import numpy as np
+    import OpenGL
+    from OpenGL.GL import GL_FALSE, glUniform1f, glUniformMatrix3fv, glUniformMatrix4fv, glUseProgram
+    from graphics.opengl_dispatch import GL, GLDispatch
+    from resource_manager.opengl_shader import OpenGLShader
+
+    shader = OpenGLShader()
+    shader.load_source(VERTEX_SOURCE, FRAGMENT_SOURCE)
+    shader.compile()
+    shader.use()
+    program = shader.shader_program
+    model = shader.get_uniform_location("model")
+    normal = shader.get_uniform_location("normalMatrix")
+    value = shader.get_uniform_location("value")
+
+    raw = GLDispatch()
+    if not raw.load():
+        raise RuntimeError("无法获取GL函数指针")
+    matrix = np.eye(4, dtype=np.float32).reshape(-1)
+    normal_matrix = np.eye(3, dtype=np.float32).reshape(-1)
+    address = matrix.ctypes.data
+
+    def pyopengl_matrix(n):
+        for _ in range(n):
+            glUniformMatrix4fv(model, 1, GL_FALSE, matrix)
+
+    def raw_matrix(n):
+        function = raw.glUniformMatrix4fv
+        for _ in range(n):
+            function(model, 1, 0, address)
+
+    def pyopengl_float(n):
+        for _ in range(n):
+            glUniform1f(value, 0.5)
+
+    def raw_float(n):
+        function = raw.glUniform1f
+        for _ in range(n):
+            function(value, 0.5)
+
+    def pyopengl_program(n):
+        for _ in range(n):
+            glUseProgram(program)
+
+    def raw_program(n):
+        function = raw.glUseProgram
+        for _ in range(n):
+            function(program)
+
+    # 每个绘制的模型矩阵和法线矩阵 (两次uniform写入)
+    def pyopengl_per_draw(n):
+        for _ in range(n):
+            glUniformMatrix4fv(model, 1, GL_FALSE, matrix)
+            glUniformMatrix3fv(normal, 1, GL_FALSE, normal_matrix)
+
+    def batched_per_draw(n):
+        batch = raw.uniform_batch
+        for _ in range(n):
+            batch.write(model, 'mat4', matrix)
+            batch.write(normal, 'mat3', normal_matrix)
+            batch.flush(raw)
+
+    def shader_set_mat4(n):
+        for k in range(n):
+            matrix[12] = k  # 每次值都不同，避免被uniform缓存跳过
+            shader.set_mat4("model", matrix)
+        GL.flush_uniforms()
+
+    results = [
+        ("glUniformMatrix4fv", measure(pyopengl_matrix, iterations), measure(raw_matrix, iterations)),
+        ("glUniform1f", measure(pyopengl_float, iterations), measure(raw_float, iterations)),
+        ("glUseProgram", measure(pyopengl_program, iterations), measure(raw_program, iterations)),
+        ("每个绘制的model+normalMatrix", measure(pyopengl_per_draw, iterations),
+         measure(batched_per_draw, iterations)),
+    ]
+    mode = "发布" if not OpenGL.ERROR_CHECKING else "调试"
+    print(f"🚀 GL逐次调用开销 ({mode}模式, ERROR_CHECKING={OpenGL.ERROR_CHECKING}, {iterations}次):")
+    print(f"   {'调用':<28}{'PyOpenGL':>12}{'原始指针':>12}{'加速':>8}")
+    for name, wrapped, direct in results:
+        print(f"   {name:<28}{wrapped:>10.0f}ns{direct:>10.0f}ns{wrapped / direct:>7.1f}x")
+    print(f"   OpenGLShader.set_mat4 (GL{'已' if GL.loaded else '未'}加载): "
+          f"{measure(shader_set_mat4, iterations):.0f}ns")
+    shader.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-call overhead of PyOpenGL and the raw GL dispatch")
+    parser.add_argument("--release", action="store_true", help="disable PyOpenGL error checking before import")
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    # 必须在导入OpenGL.GL之前设置
+    RendererConfig.ReleaseMode = args.release
+    import graphics.opengl_dispatch as opengl_dispatch
+
+    glfw, window = create_context()
+    try:
+        if args.release:
+            opengl_dispatch.GL.load()
+        run_benchmarks(args.iterations)
+    finally:
+        opengl_dispatch.GL.unload()
+        glfw.destroy_window(window)
+        glfw.terminate()
+
+
+if __name__ == "__main__":
+    main()
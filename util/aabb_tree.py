@@ -0,0 +1,519 @@
+# -*- coding: utf-8 -*-
+"""
+动态AABB树 (Dynamic Bounding Volume Hierarchy)
+参考Box2D的b2DynamicTree：
+- 叶子节点保存"加胖"的AABB，物体小幅移动时无需更新树
+- 插入时按表面积启发式选择兄弟节点，沿途做旋转保持平衡
+- 支持按需整体重建 (rebuild) 进行周期性再平衡
+"""
+import heapq
+import numpy as np
+
+NULL_NODE = -1
+
+
+def _union(lower_a, upper_a, lower_b, upper_b):
+    return ((min(lower_a[0], lower_b[0]), min(lower_a[1], lower_b[1]), min(lower_a[2], lower_b[2])),
+            (max(upper_a[0], upper_b[0]), max(upper_a[1], upper_b[1]), max(upper_a[2], upper_b[2])))
+
+
+def _area(lower, upper):
+    """AABB表面积 (作为插入代价的启发式)"""
+    dx = upper[0] - lower[0]
+    dy = upper[1] - lower[1]
+    dz = upper[2] - lower[2]
+    return 2.0 * (dx * dy + dy * dz + dz * dx)
+
+
+def _contains(outer_lower, outer_upper, inner_lower, inner_upper):
+    return (outer_lower[0] <= inner_lower[0] and outer_lower[1] <= inner_lower[1] and outer_lower[2] <= inner_lower[2]
+            and inner_upper[0] <= outer_upper[0] and inner_upper[1] <= outer_upper[1]
+            and inner_upper[2] <= outer_upper[2])
+
+
+def _overlaps(lower_a, upper_a, lower_b, upper_b):
+    return (lower_a[0] <= upper_b[0] and lower_b[0] <= upper_a[0] and
+            lower_a[1] <= upper_b[1] and lower_b[1] <= upper_a[1] and
+            lower_a[2] <= upper_b[2] and lower_b[2] <= upper_a[2])
+
+
+def _distance_sq(point, lower, upper):
+    """点到AABB的距离平方 (点在盒内为0)"""
+    d = 0.0
+    for i in range(3):
+        if point[i] < lower[i]:
+            d += (lower[i] - point[i]) ** 2
+        elif point[i] > upper[i]:
+            d += (point[i] - upper[i]) ** 2
+    return d
+
+
+class DynamicAABBTree(object):
+    def __init__(self, margin=0.1, displacement_multiplier=2.0):
+        """
+        Args:
+            margin: 叶子AABB向外扩展的距离
+            displacement_multiplier: 按位移方向额外预测扩展的倍数
+        """
+        self.margin = margin
+        self.displacement_multiplier = displacement_multiplier
+
+        self._root = NULL_NODE
+        # 节点数据按索引存储在并行列表中
+        self._lower = []
+        self._upper = []
+        self._parent = []
+        self._child1 = []
+        self._child2 = []
+        self._height = []
+        self._user_data = []
+        # 叶子节点的精确AABB (查询结果以此为准)
+        self._tight_lower = []
+        self._tight_upper = []
+
+        self._free_nodes = []
+        self._proxies = set()
+
+    # ============ 节点分配 ============
+
+    def _allocate_node(self):
+        if self._free_nodes:
+            node = self._free_nodes.pop()
+            self._parent[node] = NULL_NODE
+            self._child1[node] = NULL_NODE
+            self._child2[node] = NULL_NODE
+            self._height[node] = 0
+            self._user_data[node] = None
+            return node
+
+        self._lower.append((0.0, 0.0, 0.0))
+        self._upper.append((0.0, 0.0, 0.0))
+        self._parent.append(NULL_NODE)
+        self._child1.append(NULL_NODE)
+        self._child2.append(NULL_NODE)
+        self._height.append(0)
+        self._user_data.append(None)
+        self._tight_lower.append(None)
+        self._tight_upper.append(None)
+        return len(self._lower) - 1
+
+    def _free_node(self, node):
+        self._height[node] = -1
+        self._user_data[node] = None
+        self._tight_lower[node] = None
+        self._tight_upper[node] = None
+        self._free_nodes.append(node)
+
+    def _is_leaf(self, node):
+        return self._child1[node] == NULL_NODE
+
+    # ============ 代理 (叶子) 操作 ============
+
+    def create_proxy(self, lower, upper, user_data):
+        """
+        插入一个物体
+        Returns:
+            代理ID，用于后续移动和删除
+        """
+        node = self._allocate_node()
+        self._set_leaf_bounds(node, lower, upper)
+        self._user_data[node] = user_data
+        self._insert_leaf(node)
+        self._proxies.add(node)
+        return node
+
+    def destroy_proxy(self, proxy_id):
+        """删除一个物体"""
+        self._remove_leaf(proxy_id)
+        self._proxies.discard(proxy_id)
+        self._free_node(proxy_id)
+
+    def move_proxy(self, proxy_id, lower, upper, displacement=None):
+        """
+        更新物体包围盒
+        新的精确AABB仍在加胖AABB内时不修改树结构
+        Returns:
+            树结构是否发生了变化
+        """
+        lower = tuple(float(v) for v in lower)
+        upper = tuple(float(v) for v in upper)
+        self._tight_lower[proxy_id] = lower
+        self._tight_upper[proxy_id] = upper
+        if _contains(self._lower[proxy_id], self._upper[proxy_id], lower, upper):
+            return False
+
+        self._remove_leaf(proxy_id)
+        self._set_leaf_bounds(proxy_id, lower, upper, displacement)
+        self._insert_leaf(proxy_id)
+        return True
+
+    def get_user_data(self, proxy_id):
+        return self._user_data[proxy_id]
+
+    def get_fat_aabb(self, proxy_id):
+        return self._lower[proxy_id], self._upper[proxy_id]
+
+    def get_aabb(self, proxy_id):
+        """物体的精确AABB"""
+        return self._tight_lower[proxy_id], self._tight_upper[proxy_id]
+
+    def _set_leaf_bounds(self, node, lower, upper, displacement=None):
+        lower = tuple(float(v) for v in lower)
+        upper = tuple(float(v) for v in upper)
+        self._tight_lower[node] = lower
+        self._tight_upper[node] = upper
+
+        fat_lower = [v - self.margin for v in lower]
+        fat_upper = [v + self.margin for v in upper]
+        # 沿运动方向额外扩展，减少快速移动物体的重插入次数
+        if displacement is not None:
+            for i in range(3):
+                d = float(displacement[i]) * self.displacement_multiplier
+                if d < 0.0:
+                    fat_lower[i] += d
+                else:
+                    fat_upper[i] += d
+        self._lower[node] = tuple(fat_lower)
+        self._upper[node] = tuple(fat_upper)
+
+    # ============ 插入与删除 ============
+
+    def _insert_leaf(self, leaf):
+        if self._root == NULL_NODE:
+            self._root = leaf
+            self._parent[leaf] = NULL_NODE
+            return
+
+        leaf_lower, leaf_upper = self._lower[leaf], self._upper[leaf]
+
+        # 按表面积启发式向下寻找最佳兄弟节点
+        index = self._root
+        while not self._is_leaf(index):
+            child1 = self._child1[index]
+            child2 = self._child2[index]
+
+            area = _area(self._lower[index], self._upper[index])
+            combined_area = _area(*_union(self._lower[index], self._upper[index], leaf_lower, leaf_upper))
+
+            # 在当前节点创建新父节点的代价
+            cost = 2.0 * combined_area
+            # 继续下降时祖先节点需要增大的代价
+            inheritance_cost = 2.0 * (combined_area - area)
+
+            cost1 = self._descend_cost(child1, leaf_lower, leaf_upper) + inheritance_cost
+            cost2 = self._descend_cost(child2, leaf_lower, leaf_upper) + inheritance_cost
+
+            if cost < cost1 and cost < cost2:
+                break
+            index = child1 if cost1 < cost2 else child2
+
+        sibling = index
+
+        # 创建新的父节点
+        old_parent = self._parent[sibling]
+        new_parent = self._allocate_node()
+        self._parent[new_parent] = old_parent
+        self._lower[new_parent], self._upper[new_parent] = _union(
+            leaf_lower, leaf_upper, self._lower[sibling], self._upper[sibling])
+        self._height[new_parent] = self._height[sibling] + 1
+
+        if old_parent != NULL_NODE:
+            if self._child1[old_parent] == sibling:
+                self._child1[old_parent] = new_parent
+            else:
+                self._child2[old_parent] = new_parent
+        else:
+            self._root = new_parent
+
+        self._child1[new_parent] = sibling
+        self._child2[new_parent] = leaf
+        self._parent[sibling] = new_parent
+        self._parent[leaf] = new_parent
+
+        # 向上修正高度和包围盒
+        self._refit_ancestors(self._parent[leaf])
+
+    def _descend_cost(self, child, leaf_lower, leaf_upper):
+        lower, upper = _union(leaf_lower, leaf_upper, self._lower[child], self._upper[child])
+        if self._is_leaf(child):
+            return _area(lower, upper)
+        return _area(lower, upper) - _area(self._lower[child], self._upper[child])
+
+    def _remove_leaf(self, leaf):
+        if leaf == self._root:
+            self._root = NULL_NODE
+            return
+
+        parent = self._parent[leaf]
+        grand_parent = self._parent[parent]
+        sibling = self._child2[parent] if self._child1[parent] == leaf else self._child1[parent]
+
+        if grand_parent != NULL_NODE:
+            # 用兄弟节点替换父节点
+            if self._child1[grand_parent] == parent:
+                self._child1[grand_parent] = sibling
+            else:
+                self._child2[grand_parent] = sibling
+            self._parent[sibling] = grand_parent
+            self._free_node(parent)
+            self._refit_ancestors(grand_parent)
+        else:
+            self._root = sibling
+            self._parent[sibling] = NULL_NODE
+            self._free_node(parent)
+
+    def _refit_ancestors(self, index):
+        while index != NULL_NODE:
+            index = self._balance(index)
+            child1 = self._child1[index]
+            child2 = self._child2[index]
+            self._height[index] = 1 + max(self._height[child1], self._height[child2])
+            self._lower[index], self._upper[index] = _union(
+                self._lower[child1], self._upper[child1], self._lower[child2], self._upper[child2])
+            index = self._parent[index]
+
+    def _balance(self, a):
+        """
+        如果A的子树高度差超过1，做一次旋转
+        Returns:
+            旋转后位于原A位置的节点
+        """
+        if self._is_leaf(a) or self._height[a] < 2:
+            return a
+
+        b = self._child1[a]
+        c = self._child2[a]
+        balance = self._height[c] - self._height[b]
+
+        if balance > 1:
+            return self._rotate_up(a, c, b, is_child2=True)
+        if balance < -1:
+            return self._rotate_up(a, b, c, is_child2=False)
+        return a
+
+    def _rotate_up(self, a, up, other, is_child2):
+        """把子节点up旋转到A的位置，other是A的另一个子节点"""
+        f = self._child1[up]
+        g = self._child2[up]
+
+        self._child1[up] = a
+        self._parent[up] = self._parent[a]
+        self._parent[a] = up
+
+        up_parent = self._parent[up]
+        if up_parent != NULL_NODE:
+            if self._child1[up_parent] == a:
+                self._child1[up_parent] = up
+            else:
+                self._child2[up_parent] = up
+        else:
+            self._root = up
+
+        # 较高的孙节点留在up下，较矮的交给A
+        keep, give = (f, g) if self._height[f] > self._height[g] else (g, f)
+        self._child2[up] = keep
+        if is_child2:
+            self._child2[a] = give
+        else:
+            self._child1[a] = give
+        self._parent[give] = a
+
+        self._lower[a], self._upper[a] = _union(
+            self._lower[other], self._upper[other], self._lower[give], self._upper[give])
+        self._lower[up], self._upper[up] = _union(
+            self._lower[a], self._upper[a], self._lower[keep], self._upper[keep])
+        self._height[a] = 1 + max(self._height[other], self._height[give])
+        self._height[up] = 1 + max(self._height[a], self._height[keep])
+        return up
+
+    # ============ 再平衡 ============
+
+    def rebuild(self):
+        """
+        自顶向下整体重建 (按质心在最长轴上的中位数划分)
+        适合在大量插入/移动后周期性调用，恢复树的质量
+        """
+        leaves = list(self._proxies)
+        for node in range(len(self._height)):
+            if self._height[node] > 0:
+                self._free_node(node)
+        if not leaves:
+            self._root = NULL_NODE
+            return
+
+        lowers = np.array([self._lower[leaf] for leaf in leaves], dtype=np.float64)
+        uppers = np.array([self._upper[leaf] for leaf in leaves], dtype=np.float64)
+        centers = (lowers + uppers) * 0.5
+        self._root = self._build_top_down(np.array(leaves), centers)
+        self._parent[self._root] = NULL_NODE
+
+    def _build_top_down(self, leaves, centers):
+        if len(leaves) == 1:
+            leaf = int(leaves[0])
+            self._height[leaf] = 0
+            return leaf
+
+        axis = int(np.argmax(centers.max(axis=0) - centers.min(axis=0)))
+        order = np.argsort(centers[:, axis], kind='stable')
+        half = len(leaves) // 2
+        left, right = order[:half], order[half:]
+
+        node = self._allocate_node()
+        child1 = self._build_top_down(leaves[left], centers[left])
+        child2 = self._build_top_down(leaves[right], centers[right])
+        self._child1[node] = child1
+        self._child2[node] = child2
+        self._parent[child1] = node
+        self._parent[child2] = node
+        self._height[node] = 1 + max(self._height[child1], self._height[child2])
+        self._lower[node], self._upper[node] = _union(
+            self._lower[child1], self._upper[child1], self._lower[child2], self._upper[child2])
+        return node
+
+    # ============ 查询 ============
+
+    @property
+    def proxy_count(self):
+        return len(self._proxies)
+
+    @property
+    def height(self):
+        return self._height[self._root] if self._root != NULL_NODE else 0
+
+    def query_aabb(self, lower, upper):
+        """查询与AABB重叠的所有物体"""
+        lower = tuple(float(v) for v in lower)
+        upper = tuple(float(v) for v in upper)
+        result = []
+        stack = [self._root] if self._root != NULL_NODE else []
+        while stack:
+            node = stack.pop()
+            if not _overlaps(self._lower[node], self._upper[node], lower, upper):
+                continue
+            if self._is_leaf(node):
+                if _overlaps(self._tight_lower[node], self._tight_upper[node], lower, upper):
+                    result.append(self._user_data[node])
+            else:
+                stack.append(self._child1[node])
+                stack.append(self._child2[node])
+        return result
+
+    def query_sphere(self, center, radius):
+        """查询与球体相交的所有物体"""
+        center = tuple(float(v) for v in center)
+        radius_sq = float(radius) ** 2
+        result = []
+        stack = [self._root] if self._root != NULL_NODE else []
+        while stack:
+            node = stack.pop()
+            if _distance_sq(center, self._lower[node], self._upper[node]) > radius_sq:
+                continue
+            if self._is_leaf(node):
+                if _distance_sq(center, self._tight_lower[node], self._tight_upper[node]) <= radius_sq:
+                    result.append(self._user_data[node])
+            else:
+                stack.append(self._child1[node])
+                stack.append(self._child2[node])
+        return result
+
+    def query_frustum(self, planes):
+        """
+        查询与视锥相交的所有物体
+        Args:
+            planes: (6, 4) 视锥平面，法线朝内
+        """
+        planes = [tuple(float(v) for v in plane) for plane in np.asarray(planes)]
+        result = []
+        # 栈中保存 (节点, 是否已确定完全在视锥内)
+        stack = [(self._root, False)] if self._root != NULL_NODE else []
+        while stack:
+            node, inside = stack.pop()
+            if not inside:
+                state = self._classify_frustum(planes, self._lower[node], self._upper[node])
+                if state < 0:
+                    continue
+                inside = state > 0
+            if self._is_leaf(node):
+                if inside or self._classify_frustum(planes, self._tight_lower[node], self._tight_upper[node]) >= 0:
+                    result.append(self._user_data[node])
+            else:
+                stack.append((self._child1[node], inside))
+                stack.append((self._child2[node], inside))
+        return result
+
+    @staticmethod
+    def _classify_frustum(planes, lower, upper):
+        """
+        Returns:
+            -1 在视锥外, 0 与视锥相交, 1 完全在视锥内
+        """
+        cx = (lower[0] + upper[0]) * 0.5
+        cy = (lower[1] + upper[1]) * 0.5
+        cz = (lower[2] + upper[2]) * 0.5
+        ex = (upper[0] - lower[0]) * 0.5
+        ey = (upper[1] - lower[1]) * 0.5
+        ez = (upper[2] - lower[2]) * 0.5
+        state = 1
+        for a, b, c, d in planes:
+            distance = a * cx + b * cy + c * cz + d
+            radius = abs(a) * ex + abs(b) * ey + abs(c) * ez
+            if distance + radius < 0.0:
+                return -1
+            if distance - radius < 0.0:
+                state = 0
+        return state
+
+    def nearest_k(self, point, k):
+        """
+        查询距离点最近的k个物体 (按到精确AABB的距离，最佳优先搜索)
+        Returns:
+            [(距离, user_data), ...] 按距离升序
+        """
+        point = tuple(float(v) for v in point)
+        result = []
+        if self._root == NULL_NODE or k <= 0:
+            return result
+
+        counter = 0
+        heap = [(_distance_sq(point, self._lower[self._root], self._upper[self._root]), counter, self._root, False)]
+        while heap and len(result) < k:
+            distance_sq, _, node, is_result = heapq.heappop(heap)
+            if is_result:
+                result.append((distance_sq ** 0.5, self._user_data[node]))
+                continue
+            if self._is_leaf(node):
+                # 叶子以精确距离重新入堆，出堆时即为下一个最近结果
+                counter += 1
+                exact = _distance_sq(point, self._tight_lower[node], self._tight_upper[node])
+                heapq.heappush(heap, (exact, counter, node, True))
+            else:
+                for child in (self._child1[node], self._child2[node]):
+                    counter += 1
+                    heapq.heappush(heap, (_distance_sq(point, self._lower[child], self._upper[child]),
+                                          counter, child, False))
+        return result
+
+    # ============ 调试 ============
+
+    def validate(self):
+        """检查树结构的一致性 (用于测试)"""
+        if self._root == NULL_NODE:
+            assert not self._proxies
+            return
+        assert self._parent[self._root] == NULL_NODE
+        leaf_count = 0
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if self._is_leaf(node):
+                assert self._height[node] == 0
+                assert _contains(self._lower[node], self._upper[node], self._tight_lower[node], self._tight_upper[node])
+                leaf_count += 1
+                continue
+            child1, child2 = self._child1[node], self._child2[node]
+            assert self._parent[child1] == node and self._parent[child2] == node
+            assert self._height[node] == 1 + max(self._height[child1], self._height[child2])
+            assert _contains(self._lower[node], self._upper[node], self._lower[child1], self._upper[child1])
+            assert _contains(self._lower[node], self._upper[node], self._lower[child2], self._upper[child2])
+            stack.extend([child1, child2])
+        assert leaf_count == len(self._proxies)
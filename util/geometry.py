@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+几何工具 - 包围盒、包围球与视锥体
+所有函数都以数组为单位批量计算，供剔除、空间查询等模块使用
+矩阵均为列向量约定 (与Transform.local_to_world_matrix一致)
+"""
+import numpy as np
+
+
+# ============ 包围体变换 ============
+
+def transform_aabbs(centers, extents, matrices):
+    """
+    把局部空间AABB批量变换到世界空间 (结果仍是轴对齐包围盒)
+    Args:
+        centers: (N, 3) 局部包围盒中心
+        extents: (N, 3) 局部包围盒半长
+        matrices: (N, 4, 4) 局部到世界矩阵
+    Returns:
+        (world_centers, world_extents) 两个 (N, 3) 数组
+    """
+    centers = np.asarray(centers, dtype=np.float32)
+    extents = np.asarray(extents, dtype=np.float32)
+    matrices = np.asarray(matrices, dtype=np.float32)
+    linear = matrices[:, :3, :3]
+
+    world_centers = np.einsum('nij,nj->ni', linear, centers) + matrices[:, :3, 3]
+    # 半长经过 |M| 变换得到新的轴对齐半长 (Arvo方法)
+    world_extents = np.einsum('nij,nj->ni', np.abs(linear), extents)
+    return world_centers, world_extents
+
+
+def transform_spheres(centers, radii, matrices):
+    """
+    把局部空间包围球批量变换到世界空间 (半径按最大轴向缩放放大)
+    Returns:
+        (world_centers, world_radii)
+    """
+    centers = np.asarray(centers, dtype=np.float32)
+    matrices = np.asarray(matrices, dtype=np.float32)
+    linear = matrices[:, :3, :3]
+
+    world_centers = np.einsum('nij,nj->ni', linear, centers) + matrices[:, :3, 3]
+    max_scale = np.sqrt(np.max(np.sum(linear ** 2, axis=1), axis=1))
+    return world_centers, np.asarray(radii, dtype=np.float32) * max_scale
+
+
+def normal_matrices(matrices, tolerance=1e-4):
+    """
+    批量计算法线矩阵 (左上3x3的逆转置)
+    旋转加均匀缩放 (L = s * R) 时逆转置等于 L / s^2，不需要求逆；只对其余矩阵求逆
+    不可逆的矩阵 (某个轴缩放为0) 使用余子式矩阵 (与逆转置同方向，只差det倍)，全为0时退化为单位矩阵
+    Args:
+        matrices: (N, 4, 4) 局部到世界矩阵
+        tolerance: 判断均匀缩放的相对误差
+    Returns:
+        (N, 3, 3) 法线矩阵
+    """
+    linear = np.asarray(matrices, dtype=np.float32)[:, :3, :3]
+    if len(linear) == 0:
+        return np.zeros((0, 3, 3), dtype=np.float32)
+    # 列向量两两正交且长度相同时 L^T L = s^2 I
+    gram = linear.transpose(0, 2, 1) @ linear
+    scale_squared = np.trace(gram, axis1=1, axis2=2) / 3.0
+    deviation = np.abs(gram - scale_squared[:, None, None] * np.eye(3, dtype=np.float32)).max(axis=(1, 2))
+    uniform = (deviation <= tolerance * scale_squared) & (scale_squared > 0.0)
+
+    result = np.empty_like(linear)
+    result[uniform] = linear[uniform] / scale_squared[uniform, None, None]
+    general = ~uniform
+    if np.any(general):
+        rows = linear[general]
+        # 行列式相对列长乘积过小时视为不可逆
+        column_lengths = np.prod(np.linalg.norm(rows, axis=1), axis=1)
+        invertible = np.abs(np.linalg.det(rows)) > 1e-6 * column_lengths
+        normals = np.empty_like(rows)
+        normals[invertible] = np.linalg.inv(rows[invertible]).transpose(0, 2, 1)
+        normals[~invertible] = _cofactor_matrices(rows[~invertible])
+        result[general] = normals
+    return result
+
+
+def _cofactor_matrices(linear):
+    """余子式矩阵 (列为两两列向量的叉积)，全为0的结果替换为单位矩阵"""
+    c0, c1, c2 = linear[:, :, 0], linear[:, :, 1], linear[:, :, 2]
+    cofactors = np.stack([np.cross(c1, c2), np.cross(c2, c0), np.cross(c0, c1)], axis=2)
+    degenerate = ~np.any(cofactors, axis=(1, 2))
+    cofactors[degenerate] = np.eye(3, dtype=linear.dtype)
+    return cofactors
+
+
+def aabb_corners(centers, extents):
+    """
+    求AABB的8个角点
+    Returns:
+        (N, 8, 3) 角点数组
+    """
+    signs = np.array([[x, y, z] for x in (-1.0, 1.0) for y in (-1.0, 1.0) for z in (-1.0, 1.0)],
+                     dtype=np.float32)
+    return np.asarray(centers)[:, np.newaxis, :] + np.asarray(extents)[:, np.newaxis, :] * signs
+
+
+# ============ 视锥体 ============
+
+def extract_frustum_planes(view_projection):
+    """
+    从视图投影矩阵提取6个视锥平面 (Gribb-Hartmann方法)
+    平面表示为 (a, b, c, d)，法线朝向视锥内部，已归一化
+    Args:
+        view_projection: 4x4 矩阵 (projection · view, 列向量约定)
+    Returns:
+        (6, 4) 数组，顺序为 左、右、下、上、近、远
+    """
+    m = np.asarray(view_projection, dtype=np.float64)
+    planes = np.array([
+        m[3] + m[0],  # 左
+        m[3] - m[0],  # 右
+        m[3] + m[1],  # 下
+        m[3] - m[1],  # 上
+        m[3] + m[2],  # 近
+        m[3] - m[2],  # 远
+    ])
+    lengths = np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return (planes / np.maximum(lengths, 1e-12)).astype(np.float32)
+
+
+def frustum_cull_aabbs(planes, centers, extents):
+    """
+    AABB与视锥体相交测试 (一次向量化调用处理所有候选)
+    Args:
+        planes: (6, 4) 视锥平面
+        centers: (N, 3) 世界空间包围盒中心
+        extents: (N, 3) 世界空间包围盒半长
+    Returns:
+        (N,) bool数组，True表示可见 (与视锥相交或在视锥内)
+    """
+    planes = np.asarray(planes, dtype=np.float32)
+    distances = np.asarray(centers, dtype=np.float32) @ planes[:, :3].T + planes[:, 3]
+    radii = np.asarray(extents, dtype=np.float32) @ np.abs(planes[:, :3]).T
+    return np.all(distances + radii >= 0.0, axis=1)
+
+
+def frustum_cull_spheres(planes, centers, radii):
+    """
+    包围球与视锥体相交测试
+    Returns:
+        (N,) bool数组，True表示可见
+    """
+    planes = np.asarray(planes, dtype=np.float32)
+    distances = np.asarray(centers, dtype=np.float32) @ planes[:, :3].T + planes[:, 3]
+    return np.all(distances + np.asarray(radii, dtype=np.float32)[:, np.newaxis] >= 0.0, axis=1)
+
+
+# ============ 屏幕尺寸 ============
+
+def screen_relative_heights(centers, radii, camera_position, projection_scale, perspective=True):
+    """
+    估算包围球投影到屏幕后的高度占比 (物体高度 / 屏幕高度)
+    Args:
+        centers: (N, 3) 世界空间包围球中心
+        radii: (N,) 世界空间包围球半径
+        camera_position: 相机位置
+        projection_scale: 投影矩阵的[1][1]元素 (透视为 1/tan(fov/2))
+        perspective: 是否透视投影 (正交投影与距离无关)
+    Returns:
+        (N,) 屏幕相对高度
+    """
+    radii = np.asarray(radii, dtype=np.float32)
+    if not perspective:
+        return radii * projection_scale
+    distances = np.linalg.norm(np.asarray(centers, dtype=np.float32) - np.asarray(camera_position, dtype=np.float32),
+                               axis=1)
+    # 相机位于包围球内时视为占满屏幕
+    return np.where(distances > radii, radii * projection_scale / np.maximum(distances, 1e-6), np.inf)
+
+
+# ============ 空间排序 ============
+
+def morton_order(points, bits=10):
+    """
+    按三维Morton码排序点 (量化到2^bits网格)，空间上相邻的点排序后也相邻
+    Returns:
+        (N,) 排序后的下标
+    """
+    points = np.asarray(points, dtype=np.float64)
+    low = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - low, 1e-12)
+    quantized = ((points - low) / span * ((1 << bits) - 1)).astype(np.uint64)
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for bit in range(bits):
+        for axis in range(3):
+            codes |= ((quantized[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return np.argsort(codes, kind='stable')
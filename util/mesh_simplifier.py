@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+网格简化 - 基于二次误差度量 (Quadric Error Metrics, Garland & Heckbert)
+- 顶点按位置焊接后计算误差二次型，边按折叠代价放入最小堆
+- 使用半边折叠 (顶点a合并到已有顶点b)，保留的顶点属性完全不变
+- UV/法线接缝：OBJ加载时接缝两侧是不同的顶点 (wedge)，折叠时要求a的每个wedge
+  都能在共享边的三角形中找到唯一对应的b的wedge，因此接缝只会沿自身方向收缩；
+  接缝与开放边界额外加入垂直约束平面，保持轮廓形状
+"""
+import heapq
+import numpy as np
+
+# 约束平面 (边界/接缝) 相对于普通面的权重
+BOUNDARY_WEIGHT = 100.0
+# 折叠后三角形法线与原法线夹角余弦低于该值视为翻转
+FLIP_THRESHOLD = 0.2
+
+
+class QuadricSimplifier(object):
+    def __init__(self, vertices, indices, stride=8, weld_epsilon=1e-6):
+        """
+        Args:
+            vertices: 顶点数组 (每个顶点stride个float，前3个为位置)
+            indices: 三角形索引
+            stride: 每个顶点的float数量
+            weld_epsilon: 位置焊接容差
+        """
+        self.vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, stride)
+        indices = np.asarray(indices, dtype=np.intp).reshape(-1)
+        if len(indices) == 0:
+            indices = np.arange(len(self.vertices) - len(self.vertices) % 3, dtype=np.intp)
+        self._corners = indices.reshape(-1, 3).copy()  # 每个三角形角点的wedge (原始顶点) 索引
+
+        # 焊接位置相同的顶点
+        keys = np.round(self.vertices[:, :3].astype(np.float64) / weld_epsilon).astype(np.int64)
+        _, first, wedge_to_position = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        wedge_to_position = wedge_to_position.reshape(-1)
+        self._positions = self.vertices[first, :3].astype(np.float64)
+        self._pos_corners = wedge_to_position[self._corners]
+
+        position_count = len(self._positions)
+        self._alive = np.ones(len(self._corners), dtype=bool)
+        self._alive &= ((self._pos_corners[:, 0] != self._pos_corners[:, 1]) &
+                        (self._pos_corners[:, 1] != self._pos_corners[:, 2]) &
+                        (self._pos_corners[:, 0] != self._pos_corners[:, 2]))
+        self.triangle_count = int(np.count_nonzero(self._alive))
+
+        self._quadrics = self._build_quadrics(position_count)
+        self._versions = np.zeros(position_count, dtype=np.int64)
+        self._position_alive = np.ones(position_count, dtype=bool)
+
+        # 位置 -> 相邻三角形集合
+        self._position_triangles = [set() for _ in range(position_count)]
+        for t in np.nonzero(self._alive)[0].tolist():
+            for p in self._pos_corners[t].tolist():
+                self._position_triangles[p].add(t)
+
+        self._heap = []
+        self._build_heap()
+
+    # ============ 初始化 ============
+
+    def _edge_table(self):
+        """
+        所有存活三角形的边 (按位置)，端点规范化为 pa < pb
+        Returns:
+            (pa, pb, wa, wb, triangle) 五个 (3T,) 数组
+        """
+        triangles = np.nonzero(self._alive)[0]
+        pos = self._pos_corners[triangles]
+        wedges = self._corners[triangles]
+        pa = pos.reshape(-1)
+        pb = pos[:, [1, 2, 0]].reshape(-1)
+        wa = wedges.reshape(-1)
+        wb = wedges[:, [1, 2, 0]].reshape(-1)
+        swap = pa > pb
+        pa, pb = np.where(swap, pb, pa), np.where(swap, pa, pb)
+        wa, wb = np.where(swap, wb, wa), np.where(swap, wa, wb)
+        return pa, pb, wa, wb, np.repeat(triangles, 3)
+
+    def _build_quadrics(self, position_count):
+        """面平面二次型 (按面积加权) + 边界/接缝约束平面"""
+        corners = self._positions[self._pos_corners]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        double_areas = np.linalg.norm(normals, axis=1)
+        normals /= np.maximum(double_areas, 1e-20)[:, np.newaxis]
+        planes = np.hstack([normals, -np.sum(normals * corners[:, 0], axis=1, keepdims=True)])
+        weights = np.where(self._alive, double_areas * 0.5, 0.0)
+        face_quadrics = np.einsum('ti,tj,t->tij', planes, planes, weights)
+
+        quadrics = np.zeros((position_count, 4, 4))
+        for k in range(3):
+            np.add.at(quadrics, self._pos_corners[:, k], face_quadrics)
+
+        # 约束边: 开放边界、UV/法线接缝、非流形边
+        pa, pb, wa, wb, triangles = self._edge_table()
+        if len(pa) == 0:
+            return quadrics
+        keys = pa * position_count + pb
+        order = np.argsort(keys, kind='stable')
+        keys, pa, pb, wa, wb, triangles = keys[order], pa[order], pb[order], wa[order], wb[order], triangles[order]
+        starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+        counts = np.diff(np.append(starts, len(keys)))
+
+        constrained = counts != 2
+        pairs = starts[counts == 2]
+        seams = (wa[pairs] != wa[pairs + 1]) | (wb[pairs] != wb[pairs + 1])
+        constrained[counts == 2] = seams
+        rows = starts[constrained]
+        if len(rows) == 0:
+            return quadrics
+
+        p0 = self._positions[pa[rows]]
+        p1 = self._positions[pb[rows]]
+        edges = p1 - p0
+        lengths_sq = np.sum(edges * edges, axis=1)
+        side_normals = np.cross(edges, normals[triangles[rows]])
+        side_normals /= np.maximum(np.linalg.norm(side_normals, axis=1, keepdims=True), 1e-20)
+        side_planes = np.hstack([side_normals, -np.sum(side_normals * p0, axis=1, keepdims=True)])
+        side_quadrics = np.einsum('ti,tj,t->tij', side_planes, side_planes, lengths_sq * BOUNDARY_WEIGHT)
+        np.add.at(quadrics, pa[rows], side_quadrics)
+        np.add.at(quadrics, pb[rows], side_quadrics)
+        return quadrics
+
+    def _build_heap(self):
+        """把所有边的两个折叠方向按代价放入堆"""
+        pa, pb, _, _, _ = self._edge_table()
+        if len(pa) == 0:
+            return
+        edges = np.unique(np.stack([pa, pb], axis=1), axis=0)
+        sources = np.concatenate([edges[:, 0], edges[:, 1]])
+        targets = np.concatenate([edges[:, 1], edges[:, 0]])
+        homogeneous = np.hstack([self._positions[targets], np.ones((len(targets), 1))])
+        quadrics = self._quadrics[sources] + self._quadrics[targets]
+        costs = np.einsum('ni,nij,nj->n', homogeneous, quadrics, homogeneous)
+        self._heap = [(cost, a, b, 0, 0) for cost, a, b in zip(costs.tolist(), sources.tolist(), targets.tolist())]
+        heapq.heapify(self._heap)
+
+    # ============ 简化 ============
+
+    def _push_edges(self, b, neighbors):
+        """批量计算b与邻居之间两个方向的折叠代价并入堆"""
+        neighbors = np.fromiter(neighbors, dtype=np.intp)
+        if len(neighbors) == 0:
+            return
+        quadrics = self._quadrics[neighbors] + self._quadrics[b]
+        to_b = np.append(self._positions[b], 1.0)
+        to_neighbors = np.hstack([self._positions[neighbors], np.ones((len(neighbors), 1))])
+        costs_to_b = np.einsum('i,nij,j->n', to_b, quadrics, to_b)
+        costs_to_neighbors = np.einsum('ni,nij,nj->n', to_neighbors, quadrics, to_neighbors)
+
+        version_b = int(self._versions[b])
+        for n, cost_to_b, cost_to_n in zip(neighbors.tolist(), costs_to_b.tolist(), costs_to_neighbors.tolist()):
+            version_n = int(self._versions[n])
+            heapq.heappush(self._heap, (cost_to_b, n, b, version_n, version_b))
+            heapq.heappush(self._heap, (cost_to_n, b, n, version_b, version_n))
+
+    def _neighbors(self, p):
+        result = set()
+        for t in self._position_triangles[p]:
+            result.update(self._pos_corners[t].tolist())
+        result.discard(p)
+        return result
+
+    def _plan_collapse(self, a, b):
+        """
+        检查折叠 a -> b 是否合法
+        Returns:
+            (wedge映射, 要删除的三角形, 要修改的三角形)，不合法时返回None
+        """
+        removed = []
+        moved = []
+        opposite = set()
+        wedge_map = {}
+        for t in self._position_triangles[a]:
+            pos = self._pos_corners[t].tolist()
+            corner_a = pos.index(a)
+            if b in pos:
+                corner_b = pos.index(b)
+                wa, wb = int(self._corners[t, corner_a]), int(self._corners[t, corner_b])
+                # 同一个wedge必须对应唯一的目标wedge，否则会撕裂接缝
+                if wedge_map.setdefault(wa, wb) != wb:
+                    return None
+                opposite.add(int(pos[3 - corner_a - corner_b]))
+                removed.append(t)
+            else:
+                moved.append((t, corner_a))
+        if not removed:
+            return None
+
+        # a的所有wedge都必须能映射到b (否则a位于接缝上而边不在接缝上)
+        for t, corner_a in moved:
+            if int(self._corners[t, corner_a]) not in wedge_map:
+                return None
+
+        # 连接条件: a和b的公共邻居只能是共享边三角形的对顶点，保持流形
+        if (self._neighbors(a) & self._neighbors(b)) != opposite:
+            return None
+
+        # 折叠后三角形不能翻转或退化
+        if moved:
+            triangles = np.array([t for t, _ in moved])
+            columns = np.array([corner_a for _, corner_a in moved])
+            corners = self._positions[self._pos_corners[triangles]]
+            old_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+            corners[np.arange(len(moved)), columns] = self._positions[b]
+            new_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+            denominators = np.linalg.norm(old_normals, axis=1) * np.linalg.norm(new_normals, axis=1)
+            dots = np.sum(old_normals * new_normals, axis=1)
+            if np.any((denominators <= 1e-20) | (dots < FLIP_THRESHOLD * denominators)):
+                return None
+        return wedge_map, removed, moved
+
+    def _collapse(self, a, b, plan):
+        wedge_map, removed, moved = plan
+        for t in removed:
+            self._alive[t] = False
+            for p in self._pos_corners[t].tolist():
+                self._position_triangles[p].discard(t)
+        for t, corner_a in moved:
+            self._pos_corners[t, corner_a] = b
+            self._corners[t, corner_a] = wedge_map[int(self._corners[t, corner_a])]
+            self._position_triangles[b].add(t)
+        self._position_triangles[a].clear()
+        self.triangle_count -= len(removed)
+
+        self._quadrics[b] += self._quadrics[a]
+        self._position_alive[a] = False
+        # b的二次型变化后，旧的含b的堆条目全部失效，重新计算与b相连的边
+        self._versions[b] += 1
+        self._push_edges(b, self._neighbors(b))
+
+    def simplify(self, target_triangle_count):
+        """
+        持续折叠代价最小的边，直到三角形数量不超过目标或无法继续
+        可多次调用逐级简化 (目标递减)
+        Returns:
+            当前三角形数量
+        """
+        heap = self._heap
+        versions = self._versions
+        while self.triangle_count > target_triangle_count and heap:
+            _, a, b, version_a, version_b = heapq.heappop(heap)
+            if not (self._position_alive[a] and self._position_alive[b]):
+                continue
+            if versions[a] != version_a or versions[b] != version_b:
+                continue
+            plan = self._plan_collapse(a, b)
+            if plan is not None:
+                self._collapse(a, b, plan)
+        return self.triangle_count
+
+    def get_result(self):
+        """
+        导出当前简化结果 (只保留被引用的顶点，属性与原始顶点一致)
+        Returns:
+            (vertices, indices) 顶点为 (V', stride) float32，索引为 uint32
+        """
+        corners = self._corners[self._alive]
+        used, remapped = np.unique(corners, return_inverse=True)
+        return self.vertices[used].copy(), remapped.reshape(-1).astype(np.uint32)
+
+
+def simplify_mesh(vertices, indices, ratio, stride=8):
+    """
+    把网格简化到原三角形数量的ratio倍
+    Returns:
+        (vertices, indices)
+    """
+    simplifier = QuadricSimplifier(vertices, indices, stride)
+    simplifier.simplify(int(simplifier.triangle_count * ratio))
+    return simplifier.get_result()
+
+
+def generate_lod_chain(vertices, indices, ratios, stride=8):
+    """
+    生成LOD链：同一个简化器按比例从大到小逐级简化，后一级在前一级的基础上继续
+    Args:
+        ratios: 目标三角形比例列表，例如 [0.5, 0.25, 0.1]
+    Returns:
+        与ratios顺序一致的 [(vertices, indices), ...]
+    """
+    simplifier = QuadricSimplifier(vertices, indices, stride)
+    original = simplifier.triangle_count
+    results = {}
+    for ratio in sorted(set(ratios), reverse=True):
+        simplifier.simplify(int(original * ratio))
+        results[ratio] = simplifier.get_result()
+    return [results[ratio] for ratio in ratios]
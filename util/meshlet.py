@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Meshlet (网格簇) - 把大网格切分为顶点和三角形数量有上限的小簇
+- 构建: 从空间上相邻的种子三角形开始，沿共享顶点广度优先生长，
+  只接受法线与簇平均法线同向的三角形，使法线锥尽量收窄
+- 每个簇记录包围球和法线锥 (轴、截止值、锥顶)，算法与meshoptimizer的meshopt_computeMeshletBounds一致
+- 剔除: 在Mesh局部空间一次向量化测试所有簇的视锥和背面，
+  幸存簇在重排后的索引缓冲中是连续区间，相邻区间合并后提交
+"""
+from collections import deque
+
+import numpy as np
+
+from util.geometry import morton_order
+
+MAX_MESHLET_VERTICES = 64
+MAX_MESHLET_TRIANGLES = 124
+
+# 法线锥的最小点积低于该值时锥太宽，不做背面剔除
+_MIN_CONE_DOT = 0.1
+# 生长簇时三角形法线与簇平均法线的最小点积
+_GROW_NORMAL_DOT = 0.5
+
+
+class MeshletData(object):
+    def __init__(self, indices, triangle_offsets, triangle_counts, vertex_counts,
+                 centers, radii, cone_axes, cone_cutoffs, cone_apexes):
+        """
+        Args:
+            indices: 按簇重排后的索引缓冲 (uint32)，簇k占用三角形 [offset_k, offset_k + count_k)
+            triangle_offsets, triangle_counts, vertex_counts: (M,) 每个簇的三角形区间与顶点数量
+            centers, radii: 每个簇的包围球 (局部空间)
+            cone_axes, cone_cutoffs, cone_apexes: 每个簇的法线锥，截止值为1表示不做背面剔除
+        """
+        self.indices = indices
+        self.triangle_offsets = triangle_offsets
+        self.triangle_counts = triangle_counts
+        self.vertex_counts = vertex_counts
+        self.centers = centers
+        self.radii = radii
+        self.cone_axes = cone_axes
+        self.cone_cutoffs = cone_cutoffs
+        self.cone_apexes = cone_apexes
+
+    @property
+    def count(self):
+        return len(self.triangle_counts)
+
+    @property
+    def triangle_count(self):
+        return len(self.indices) // 3
+
+    def cull(self, planes, view_position=None, view_direction=None):
+        """
+        测试所有簇
+        Args:
+            planes: (6, 4) 局部空间的视锥平面 (法线无需归一化)
+            view_position: 局部空间的相机位置 (透视投影)
+            view_direction: 局部空间的视线方向 (正交投影)，两者都为None时不做背面剔除
+        Returns:
+            (M,) bool数组，True表示簇可能可见
+        """
+        planes = np.asarray(planes, dtype=np.float64)
+        lengths = np.linalg.norm(planes[:, :3], axis=1)
+        distances = self.centers @ planes[:, :3].T + planes[:, 3]
+        visible = np.all(distances >= -self.radii[:, np.newaxis] * lengths, axis=1)
+
+        if view_position is not None:
+            directions = self.cone_apexes - np.asarray(view_position, dtype=np.float64)
+            lengths = np.linalg.norm(directions, axis=1)
+            dots = np.einsum('ij,ij->i', directions, self.cone_axes) / np.maximum(lengths, 1e-12)
+            visible &= dots < self.cone_cutoffs
+        elif view_direction is not None:
+            direction = np.asarray(view_direction, dtype=np.float64)
+            direction = direction / max(np.linalg.norm(direction), 1e-12)
+            visible &= self.cone_axes @ direction < self.cone_cutoffs
+        return visible
+
+    def draw_ranges(self, visible):
+        """
+        把幸存簇转换为索引区间，相邻的簇合并为一个区间
+        Returns:
+            (starts, counts) 以索引为单位的起点和数量
+        """
+        visible = np.asarray(visible, dtype=bool)
+        if not np.any(visible):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        # 每段连续可见簇的第一个和最后一个
+        padded = np.concatenate([[False], visible, [False]])
+        changes = np.diff(padded.astype(np.int8))
+        first = np.nonzero(changes == 1)[0]
+        last = np.nonzero(changes == -1)[0] - 1
+        starts = self.triangle_offsets[first]
+        ends = self.triangle_offsets[last] + self.triangle_counts[last]
+        return starts * 3, (ends - starts) * 3
+
+
+def build_meshlets(positions, triangles, max_vertices=MAX_MESHLET_VERTICES, max_triangles=MAX_MESHLET_TRIANGLES):
+    """
+    切分网格为簇
+    Args:
+        positions: (V, 3) 顶点位置
+        triangles: (T, 3) 三角形顶点索引
+    Returns:
+        MeshletData
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    triangle_total = len(triangles)
+    v0, v1, v2 = positions[triangles[:, 0]], positions[triangles[:, 1]], positions[triangles[:, 2]]
+    normals = np.cross(v1 - v0, v2 - v0)
+    lengths = np.linalg.norm(normals, axis=1)
+    normals = np.where(lengths[:, np.newaxis] > 1e-20, normals / np.maximum(lengths, 1e-20)[:, np.newaxis], 0.0)
+
+    clusters = _grow_clusters(triangles, normals, (v0 + v1 + v2) / 3.0, max_vertices, max_triangles)
+    order = np.fromiter((t for cluster in clusters for t in cluster), dtype=np.int64, count=triangle_total)
+    counts = np.array([len(cluster) for cluster in clusters], dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    vertex_counts = np.array([len(set(triangles[cluster].ravel().tolist())) for cluster in clusters],
+                             dtype=np.int64)
+
+    # 包围球: 包围盒中心 + 最远角点距离
+    corners = np.stack([v0[order], v1[order], v2[order]], axis=1)  # (T, 3, 3)
+    corner_min = np.minimum.reduceat(corners.min(axis=1), offsets, axis=0)
+    corner_max = np.maximum.reduceat(corners.max(axis=1), offsets, axis=0)
+    centers = (corner_min + corner_max) * 0.5
+    cluster_of = np.repeat(np.arange(len(counts)), counts)
+    distances = np.linalg.norm(corners - centers[cluster_of][:, np.newaxis, :], axis=2).max(axis=1)
+    radii = np.maximum.reduceat(distances, offsets)
+
+    # 法线锥: 轴为平均法线，截止值由与轴夹角最大的法线决定
+    ordered_normals = normals[order]
+    axes = np.add.reduceat(ordered_normals, offsets, axis=0)
+    axes /= np.maximum(np.linalg.norm(axes, axis=1), 1e-20)[:, np.newaxis]
+    degenerate_triangle = ~np.any(ordered_normals != 0.0, axis=1)
+    dots = np.einsum('ij,ij->i', ordered_normals, axes[cluster_of])
+    min_dots = np.minimum.reduceat(np.where(degenerate_triangle, 1.0, dots), offsets)
+    usable = min_dots > _MIN_CONE_DOT
+    cutoffs = np.where(usable, np.sqrt(np.maximum(1.0 - min_dots ** 2, 0.0)), 1.0)
+
+    # 锥顶: 沿轴后退到所有三角形平面的背面
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.einsum('ij,ij->i', centers[cluster_of] - corners[:, 0], ordered_normals) / dots
+    t = np.where(degenerate_triangle | ~usable[cluster_of], -np.inf, t)
+    max_t = np.maximum.reduceat(t, offsets)
+    max_t = np.where(np.isfinite(max_t), max_t, 0.0)
+    apexes = centers - axes * max_t[:, np.newaxis]
+
+    return MeshletData(triangles[order].astype(np.uint32).reshape(-1), offsets, counts, vertex_counts,
+                       centers, radii, axes, cutoffs, apexes)
+
+
+def _grow_clusters(triangles, normals, centroids, max_vertices, max_triangles):
+    """
+    广度优先生长簇，返回每个簇的三角形编号列表
+    种子按质心的Morton顺序选取，使相邻簇在索引缓冲中也相邻
+    """
+    triangle_total = len(triangles)
+    if triangle_total == 0:
+        return []
+
+    # 顶点 → 相邻三角形 (CSR)
+    corner_owner = np.argsort(triangles.ravel(), kind='stable')
+    sorted_vertices = triangles.ravel()[corner_owner]
+    vertex_count = int(triangles.max()) + 1
+    adjacency_start = np.searchsorted(sorted_vertices, np.arange(vertex_count + 1)).tolist()
+    adjacency = (corner_owner // 3).tolist()
+
+    seeds = morton_order(centroids).tolist()
+    triangle_list = triangles.tolist()
+    normal_list = normals.tolist()
+    used = [False] * triangle_total
+    clusters = []
+
+    for seed in seeds:
+        if used[seed]:
+            continue
+        cluster = []
+        vertices = set()
+        axis = [0.0, 0.0, 0.0]
+        frontier = deque([seed])
+        while frontier and len(cluster) < max_triangles:
+            t = frontier.popleft()
+            if used[t]:
+                continue
+            a, b, c = triangle_list[t]
+            added = (a not in vertices) + (b not in vertices) + (c not in vertices)
+            if len(vertices) + added > max_vertices:
+                continue
+            n = normal_list[t]
+            if cluster and n[0] * axis[0] + n[1] * axis[1] + n[2] * axis[2] < _GROW_NORMAL_DOT * (
+                    axis[0] * axis[0] + axis[1] * axis[1] + axis[2] * axis[2]) ** 0.5:
+                continue
+
+            used[t] = True
+            cluster.append(t)
+            vertices.update((a, b, c))
+            axis[0] += n[0]
+            axis[1] += n[1]
+            axis[2] += n[2]
+            for v in (a, b, c):
+                for neighbor in adjacency[adjacency_start[v]:adjacency_start[v + 1]]:
+                    if not used[neighbor]:
+                        frontier.append(neighbor)
+        clusters.append(cluster)
+    return clusters
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+软件遮挡剔除 - CPU端低分辨率深度缓冲 + 层级深度 (Hi-Z)
+- 光栅化: 遮挡体三角形在裁剪空间做近平面裁剪后，按包围矩形展开像素，
+  用重心坐标一次向量化判断覆盖并插值深度，np.minimum.at写入深度缓冲
+- 层级深度: 每级对上一级2x2取最大值 (最远深度)，保证测试是保守的
+- 测试: 包围盒投影到屏幕后选择使矩形覆盖不超过2x2个texel的级别，
+  包围盒最近深度比这些texel中的最远深度还远时判定为被遮挡
+深度取值为NDC z映射到 [0, 1]，1为远平面；屏幕坐标原点在左下角
+"""
+import numpy as np
+
+from util.geometry import aabb_corners
+
+# 包围盒角点w小于该值时视为跨越近平面，直接判定可见
+_MIN_W = 1e-5
+
+
+def clip_triangles_near(clip_triangles):
+    """
+    用近平面 (z + w >= 0) 裁剪裁剪空间三角形
+    一个顶点在内侧时得到1个三角形，两个顶点在内侧时得到2个三角形
+    Args:
+        clip_triangles: (T, 3, 4) 裁剪空间顶点
+    Returns:
+        (T', 3, 4) 完全位于近平面内侧的三角形
+    """
+    triangles = np.asarray(clip_triangles, dtype=np.float32).reshape(-1, 3, 4)
+    distances = triangles[:, :, 2] + triangles[:, :, 3]
+    inside = distances >= 0.0
+    inside_count = np.count_nonzero(inside, axis=1)
+    result = [triangles[inside_count == 3]]
+
+    for count in (1, 2):
+        selected = inside_count == count
+        if not np.any(selected):
+            continue
+        tris = triangles[selected]
+        dist = distances[selected]
+        # 轮换顶点顺序 (保持绕序)，使"与众不同"的顶点排在第一位
+        odd = np.argmax(inside[selected], axis=1) if count == 1 else np.argmin(inside[selected], axis=1)
+        order = (odd[:, np.newaxis] + np.arange(3)) % 3
+        rows = np.arange(len(tris))[:, np.newaxis]
+        tris = tris[rows, order]
+        dist = dist[rows, order]
+
+        a, b, c = tris[:, 0], tris[:, 1], tris[:, 2]
+        t_ab = (dist[:, 0] / (dist[:, 0] - dist[:, 1]))[:, np.newaxis]
+        t_ac = (dist[:, 0] / (dist[:, 0] - dist[:, 2]))[:, np.newaxis]
+        ab = a + (b - a) * t_ab
+        ac = a + (c - a) * t_ac
+        if count == 1:
+            result.append(np.stack([a, ab, ac], axis=1))
+        else:
+            # 四边形 ab, b, c, ac 拆成两个三角形
+            result.append(np.stack([ab, b, c], axis=1))
+            result.append(np.stack([ab, c, ac], axis=1))
+    return np.concatenate(result, axis=0)
+
+
+class OcclusionBuffer(object):
+    def __init__(self, width=256, height=128, depth_bias=1e-4, max_chunk_pixels=1 << 20):
+        """
+        Args:
+            width, height: 深度缓冲分辨率
+            depth_bias: 测试时的深度容差，避免物体被贴在其表面的遮挡体误剔除
+            max_chunk_pixels: 光栅化时单批展开的最大像素数，限制临时内存
+        """
+        self.width = width
+        self.height = height
+        self.depth_bias = depth_bias
+        self.max_chunk_pixels = max_chunk_pixels
+        self.depth = np.ones((height, width), dtype=np.float32)
+        self.levels = [self.depth]
+        self.triangle_count = 0
+
+    def clear(self):
+        """清空深度缓冲 (全部置为远平面)"""
+        self.depth.fill(1.0)
+        self.levels = [self.depth]
+        self.triangle_count = 0
+
+    # ============ 光栅化 ============
+
+    def render_occluders(self, view_projection, triangle_sets, model_matrices):
+        """
+        清空后光栅化一帧的所有遮挡体并构建层级深度
+        Args:
+            view_projection: 4x4 视图投影矩阵 (列向量约定)
+            triangle_sets: 每个遮挡体的 (T, 3, 4) 局部空间齐次三角形
+            model_matrices: 每个遮挡体的 4x4 局部到世界矩阵
+        """
+        self.clear()
+        view_projection = np.asarray(view_projection, dtype=np.float32)
+        clip = [triangles @ (view_projection @ np.asarray(matrix, dtype=np.float32)).T
+                for triangles, matrix in zip(triangle_sets, model_matrices) if len(triangles) > 0]
+        if clip:
+            self.rasterize(np.concatenate(clip, axis=0))
+        self.build_hierarchy()
+
+    def rasterize(self, clip_triangles):
+        """
+        光栅化裁剪空间三角形到深度缓冲 (双面，不做背面剔除)
+        Args:
+            clip_triangles: (T, 3, 4) 裁剪空间顶点
+        """
+        triangles = clip_triangles_near(clip_triangles)
+        if len(triangles) == 0:
+            return
+        w = triangles[:, :, 3]
+        x = (triangles[:, :, 0] / w * 0.5 + 0.5) * self.width
+        y = (triangles[:, :, 1] / w * 0.5 + 0.5) * self.height
+        z = triangles[:, :, 2] / w * 0.5 + 0.5
+
+        # 像素中心落在 [min - 0.5, max - 0.5] 范围内的像素
+        x_min = np.maximum(np.ceil(x.min(axis=1) - 0.5), 0).astype(np.int64)
+        x_max = np.minimum(np.floor(x.max(axis=1) - 0.5), self.width - 1).astype(np.int64)
+        y_min = np.maximum(np.ceil(y.min(axis=1) - 0.5), 0).astype(np.int64)
+        y_max = np.minimum(np.floor(y.max(axis=1) - 0.5), self.height - 1).astype(np.int64)
+
+        area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+        keep = (x_min <= x_max) & (y_min <= y_max) & (np.abs(area) > 1e-12) & (z.min(axis=1) < 1.0)
+        if not np.any(keep):
+            return
+        x, y, z, area = x[keep], y[keep], z[keep], area[keep]
+        x_min, x_max, y_min, y_max = x_min[keep], x_max[keep], y_min[keep], y_max[keep]
+        self.triangle_count += len(x)
+
+        # 重心坐标和深度都是屏幕坐标的线性函数: b = A·px + B·py + C
+        inv_area = 1.0 / area
+        b0 = np.stack([(y[:, 1] - y[:, 2]), (x[:, 2] - x[:, 1]), (x[:, 1] * y[:, 2] - x[:, 2] * y[:, 1])],
+                      axis=1) * inv_area[:, np.newaxis]
+        b1 = np.stack([(y[:, 2] - y[:, 0]), (x[:, 0] - x[:, 2]), (x[:, 2] * y[:, 0] - x[:, 0] * y[:, 2])],
+                      axis=1) * inv_area[:, np.newaxis]
+        b2 = -b0 - b1
+        b2[:, 2] += 1.0
+        plane_z = b0 * z[:, 0:1] + b1 * z[:, 1:2] + b2 * z[:, 2:3]
+        coefficients = np.stack([b0, b1, b2, plane_z], axis=1)  # (T, 4, 3)
+
+        widths = x_max - x_min + 1
+        counts = widths * (y_max - y_min + 1)
+        cumulative = np.cumsum(counts)
+        start = 0
+        while start < len(counts):
+            limit = (cumulative[start - 1] if start > 0 else 0) + self.max_chunk_pixels
+            end = max(int(np.searchsorted(cumulative, limit, side='right')), start + 1)
+            self._rasterize_chunk(coefficients[start:end], x_min[start:end], y_min[start:end],
+                                  widths[start:end], counts[start:end])
+            start = end
+
+    def _rasterize_chunk(self, coefficients, x_min, y_min, widths, counts):
+        """展开一批三角形覆盖的像素并写入最小深度"""
+        total = int(counts.sum())
+        owners = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        px = x_min[owners] + offsets % widths[owners]
+        py = y_min[owners] + offsets // widths[owners]
+
+        coeff = coefficients[owners]  # (P, 4, 3)
+        values = coeff[:, :, 0] * (px + 0.5)[:, np.newaxis] + coeff[:, :, 1] * (py + 0.5)[:, np.newaxis] \
+            + coeff[:, :, 2]
+        covered = np.all(values[:, :3] >= 0.0, axis=1)
+        if not np.any(covered):
+            return
+        depth = np.maximum(values[covered, 3], 0.0).astype(np.float32)
+        np.minimum.at(self.depth.reshape(-1), py[covered] * self.width + px[covered], depth)
+
+    # ============ 层级深度 ============
+
+    def build_hierarchy(self):
+        """构建最远深度金字塔，levels[0]为原始深度缓冲，最后一级为1x1"""
+        self.levels = [self.depth]
+        level = self.depth
+        while level.shape[0] > 1 or level.shape[1] > 1:
+            # 奇数尺寸复制边缘补齐，不影响最大值
+            pad_y, pad_x = level.shape[0] % 2, level.shape[1] % 2
+            if pad_y or pad_x:
+                level = np.pad(level, ((0, pad_y), (0, pad_x)), mode='edge')
+            height, width = level.shape
+            level = level.reshape(height // 2, 2, width // 2, 2).max(axis=(1, 3))
+            self.levels.append(level)
+
+    # ============ 可见性测试 ============
+
+    def test_aabbs(self, centers, extents, view_projection):
+        """
+        批量测试世界空间AABB是否可能可见
+        Args:
+            centers: (N, 3) 世界空间包围盒中心
+            extents: (N, 3) 世界空间包围盒半长
+            view_projection: 4x4 视图投影矩阵 (应与render_occluders时相同)
+        Returns:
+            (N,) bool数组，True表示可能可见
+        """
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        count = len(centers)
+        visible = np.ones(count, dtype=bool)
+        if count == 0 or self.triangle_count == 0:
+            return visible
+
+        corners = aabb_corners(centers, np.asarray(extents, dtype=np.float32).reshape(-1, 3))
+        view_projection = np.asarray(view_projection, dtype=np.float32)
+        clip = corners @ view_projection[:3, :3].T + view_projection[:3, 3]
+        w = corners @ view_projection[3, :3] + view_projection[3, 3]
+
+        # 跨越近平面的包围盒无法得到可靠的屏幕矩形，保守判定为可见
+        testable = np.all(w > _MIN_W, axis=1)
+        if not np.any(testable):
+            return visible
+        ndc = clip[testable] / w[testable][:, :, np.newaxis]
+        x_min = np.floor((ndc[:, :, 0].min(axis=1) * 0.5 + 0.5) * self.width).astype(np.int64)
+        x_max = np.floor((ndc[:, :, 0].max(axis=1) * 0.5 + 0.5) * self.width).astype(np.int64)
+        y_min = np.floor((ndc[:, :, 1].min(axis=1) * 0.5 + 0.5) * self.height).astype(np.int64)
+        y_max = np.floor((ndc[:, :, 1].max(axis=1) * 0.5 + 0.5) * self.height).astype(np.int64)
+        nearest = ndc[:, :, 2].min(axis=1) * 0.5 + 0.5
+
+        # 完全在屏幕外的交给视锥剔除处理
+        on_screen = (x_max >= 0) & (x_min < self.width) & (y_max >= 0) & (y_min < self.height)
+        x_min = np.clip(x_min, 0, self.width - 1)
+        x_max = np.clip(x_max, 0, self.width - 1)
+        y_min = np.clip(y_min, 0, self.height - 1)
+        y_max = np.clip(y_max, 0, self.height - 1)
+
+        # 选择使矩形最多覆盖2x2个texel的级别
+        size = np.maximum(x_max - x_min, y_max - y_min) + 1
+        levels = np.minimum(np.ceil(np.log2(size)).astype(np.int64), len(self.levels) - 1)
+        farthest = np.ones(len(levels), dtype=np.float32)
+        for level in np.unique(levels):
+            selected = levels == level
+            texels = self.levels[level]
+            x0, x1 = x_min[selected] >> level, x_max[selected] >> level
+            y0, y1 = y_min[selected] >> level, y_max[selected] >> level
+            farthest[selected] = np.maximum(np.maximum(texels[y0, x0], texels[y0, x1]),
+                                            np.maximum(texels[y1, x0], texels[y1, x1]))
+
+        occluded = on_screen & (nearest > farthest + self.depth_bias)
+        visible[np.nonzero(testable)[0][occluded]] = False
+        return visible
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+潜在可见集 (Potentially Visible Set)
+- 烘焙: 把可行走空间划分为均匀格子，在每个格子内随机取样点发射射线，
+  射线最先命中的物体记为该格子可见；格子之间相互独立，用进程池并行
+- 存储: 每个格子一行bitset (np.packbits)，整体zlib压缩后写入二进制文件
+- 运行时: 按相机位置找到格子，解包该行得到每个物体的可见性
+物体用 object_keys() 生成的稳定键 (名称#同名序号) 关联，烘焙和运行时必须使用相同的收集顺序
+"""
+import json
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from util.triangle_bvh import TriangleBVH
+
+PVS_MAGIC = b'MPVS'
+PVS_VERSION = 1
+_HEADER = struct.Struct('<4sI3f f3I I')
+
+
+def object_keys(entities):
+    """
+    为物体生成稳定键: 名称加上同名物体中的出现序号
+    没有名称的物体返回None (不参与PVS，运行时始终可见)
+    """
+    keys = []
+    occurrences = {}
+    for entity in entities:
+        name = getattr(entity, 'name', None)
+        if not name:
+            keys.append(None)
+            continue
+        index = occurrences.get(name, 0)
+        occurrences[name] = index + 1
+        keys.append(f"{name}#{index}")
+    return keys
+
+
+class PVSData(object):
+    def __init__(self, bounds_min, cell_size, dims, keys, bits):
+        """
+        Args:
+            bounds_min: 格子网格的最小角点
+            cell_size: 格子边长
+            dims: (nx, ny, nz) 各轴格子数量
+            keys: 物体键列表 (bitset中的位顺序)
+            bits: (cell_count, ceil(object_count / 8)) uint8，packbits后的可见性
+        """
+        self.bounds_min = np.asarray(bounds_min, dtype=np.float32).reshape(3)
+        self.cell_size = float(cell_size)
+        self.dims = np.asarray(dims, dtype=np.int64).reshape(3)
+        self.keys = list(keys)
+        self.key_to_index = {key: i for i, key in enumerate(self.keys)}
+        self.bits = np.asarray(bits, dtype=np.uint8).reshape(self.cell_count, -1)
+        self._cached_cell = -1
+        self._cached_mask = None
+
+    @property
+    def cell_count(self):
+        return int(np.prod(self.dims))
+
+    @property
+    def object_count(self):
+        return len(self.keys)
+
+    def cell_centers(self):
+        """(cell_count, 3) 所有格子中心，顺序与bitset行一致 (x变化最快)"""
+        grid = np.indices(self.dims[::-1]).reshape(3, -1)[::-1].T
+        return self.bounds_min + (grid + 0.5) * self.cell_size
+
+    def cell_of(self, position):
+        """返回位置所在格子编号，不在烘焙范围内时返回-1"""
+        coords = np.floor((np.asarray(position, dtype=np.float32).reshape(3) - self.bounds_min) / self.cell_size)
+        coords = coords.astype(np.int64)
+        if np.any(coords < 0) or np.any(coords >= self.dims):
+            return -1
+        return int(coords[0] + self.dims[0] * (coords[1] + self.dims[1] * coords[2]))
+
+    def visible_objects(self, cell):
+        """(object_count,) bool，格子中可能可见的物体 (结果缓存到下一次换格子)"""
+        if cell != self._cached_cell:
+            self._cached_mask = np.unpackbits(self.bits[cell], count=self.object_count).astype(bool)
+            self._cached_cell = cell
+        return self._cached_mask
+
+    def save(self, path):
+        """写入二进制文件: 头部 + 物体键(JSON) + 压缩的bitset"""
+        keys = json.dumps(self.keys, ensure_ascii=False).encode('utf-8')
+        bits = zlib.compress(np.ascontiguousarray(self.bits).tobytes(), 9)
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(PVS_MAGIC, PVS_VERSION, *self.bounds_min.tolist(), self.cell_size,
+                                 *self.dims.tolist(), self.object_count))
+            f.write(struct.pack('<I', len(keys)))
+            f.write(keys)
+            f.write(struct.pack('<I', len(bits)))
+            f.write(bits)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, x, y, z, cell_size, nx, ny, nz, object_count = _HEADER.unpack_from(data, 0)
+        if magic != PVS_MAGIC or version != PVS_VERSION:
+            raise ValueError(f"Unsupported PVS file: {path}")
+        offset = _HEADER.size
+        (length,) = struct.unpack_from('<I', data, offset)
+        keys = json.loads(data[offset + 4:offset + 4 + length].decode('utf-8'))
+        offset += 4 + length
+        (length,) = struct.unpack_from('<I', data, offset)
+        bits = np.frombuffer(zlib.decompress(data[offset + 4:offset + 4 + length]), dtype=np.uint8)
+        assert len(keys) == object_count
+        return cls((x, y, z), cell_size, (nx, ny, nz), keys, bits.reshape(nx * ny * nz, -1))
+
+
+# ============ 烘焙 ============
+
+# 工作进程中的场景数据 (由_init_worker在每个进程中构建一次)
+_worker_state = None
+
+
+def _init_worker(positions, triangles, triangle_objects, targets, target_objects, object_count, settings):
+    global _worker_state
+    _worker_state = {
+        'bvh': TriangleBVH(positions, triangles),
+        'triangle_objects': triangle_objects,
+        'targets': targets,
+        'target_objects': target_objects,
+        'object_count': object_count,
+        'settings': settings,
+    }
+
+
+def _bake_cells(cell_ids, cell_mins):
+    """计算一批格子的可见性，返回 (len(cell_ids), object_count) bool"""
+    state = _worker_state
+    settings = state['settings']
+    bvh = state['bvh']
+    object_count = state['object_count']
+    result = np.zeros((len(cell_ids), object_count), dtype=bool)
+    for k, (cell, cell_min) in enumerate(zip(cell_ids, cell_mins)):
+        rng = np.random.default_rng([settings['seed'], int(cell)])
+        points = cell_min + rng.random((settings['samples_per_cell'], 3)) * settings['cell_size']
+
+        # 均匀分布在球面上的随机方向
+        directions = rng.normal(size=(len(points), settings['rays_per_sample'], 3))
+        origins = np.repeat(points, settings['rays_per_sample'], axis=0)
+        directions = directions.reshape(-1, 3)
+        max_distances = np.full(len(origins), settings['max_distance'])
+
+        # 指向每个物体表面采样点的射线，保证小物体也能被采到
+        if len(state['targets']) > 0:
+            target_origins = np.repeat(points, len(state['targets']), axis=0)
+            target_directions = np.tile(state['targets'], (len(points), 1)) - target_origins
+            origins = np.concatenate([origins, target_origins])
+            directions = np.concatenate([directions, target_directions])
+            # 目标射线的t以到目标点的距离为单位，稍微超过目标点以命中目标本身
+            max_distances = np.concatenate([max_distances / np.linalg.norm(directions[:len(max_distances)], axis=1),
+                                            np.full(len(target_origins), 1.0 + 1e-4)])
+        else:
+            max_distances /= np.linalg.norm(directions, axis=1)
+
+        for start in range(0, len(origins), settings['batch_size']):
+            end = start + settings['batch_size']
+            _, hit_triangles, _, _ = bvh.intersect_rays(origins[start:end], directions[start:end],
+                                                        max_distances[start:end])
+            hit_triangles = hit_triangles[hit_triangles >= 0]
+            result[k, state['triangle_objects'][hit_triangles]] = True
+    return result
+
+
+def sample_surface_points(positions, triangles, count, rng):
+    """按面积在三角形上均匀采样表面点"""
+    v0, v1, v2 = positions[triangles[:, 0]], positions[triangles[:, 1]], positions[triangles[:, 2]]
+    areas = 0.5 * np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1)
+    if len(triangles) == 0 or areas.sum() <= 0.0:
+        return np.zeros((0, 3))
+    chosen = rng.choice(len(triangles), size=count, p=areas / areas.sum())
+    u, v = rng.random(count), rng.random(count)
+    flip = u + v > 1.0
+    u[flip], v[flip] = 1.0 - u[flip], 1.0 - v[flip]
+    return v0[chosen] + (v1 - v0)[chosen] * u[:, np.newaxis] + (v2 - v0)[chosen] * v[:, np.newaxis]
+
+
+def bake_pvs(objects, keys, bounds_min, bounds_max, cell_size, samples_per_cell=16, rays_per_sample=256,
+             targets_per_object=8, max_distance=np.inf, processes=None, cells_per_task=8, seed=0,
+             batch_size=4096):
+    """
+    烘焙PVS
+    Args:
+        objects: 每个物体的 (positions (V, 3), triangles (T, 3))，已变换到世界空间
+        keys: 物体键列表 (与objects一一对应)
+        bounds_min, bounds_max: 可行走空间范围 (相机可能出现的位置)
+        cell_size: 格子边长
+        samples_per_cell: 每个格子的采样点数量
+        rays_per_sample: 每个采样点的随机方向射线数量
+        targets_per_object: 每个物体表面的目标采样点数量
+        max_distance: 射线最大长度
+        processes: 进程数，None使用CPU核数，0或1时在当前进程计算
+        cells_per_task: 每个任务包含的格子数量
+    Returns:
+        PVSData
+    """
+    bounds_min = np.asarray(bounds_min, dtype=np.float64).reshape(3)
+    dims = np.maximum(np.ceil((np.asarray(bounds_max, dtype=np.float64) - bounds_min) / cell_size), 1)
+    dims = dims.astype(np.int64)
+
+    rng = np.random.default_rng(seed)
+    all_positions, all_triangles, triangle_objects, targets, target_objects = [], [], [], [], []
+    vertex_offset = 0
+    for index, (positions, triangles) in enumerate(objects):
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        triangles = np.asarray(triangles, dtype=np.intp).reshape(-1, 3)
+        all_positions.append(positions)
+        all_triangles.append(triangles + vertex_offset)
+        triangle_objects.append(np.full(len(triangles), index, dtype=np.intp))
+        vertex_offset += len(positions)
+        points = sample_surface_points(positions, triangles, targets_per_object, rng)
+        targets.append(points)
+        target_objects.append(np.full(len(points), index, dtype=np.intp))
+
+    object_count = len(keys)
+    initargs = (np.concatenate(all_positions) if all_positions else np.zeros((0, 3)),
+                np.concatenate(all_triangles) if all_triangles else np.zeros((0, 3), dtype=np.intp),
+                np.concatenate(triangle_objects) if triangle_objects else np.zeros(0, dtype=np.intp),
+                np.concatenate(targets) if targets else np.zeros((0, 3)),
+                np.concatenate(target_objects) if target_objects else np.zeros(0, dtype=np.intp),
+                object_count,
+                {'cell_size': float(cell_size), 'samples_per_cell': samples_per_cell,
+                 'rays_per_sample': rays_per_sample, 'max_distance': float(max_distance),
+                 'seed': seed, 'batch_size': batch_size})
+
+    pvs = PVSData(bounds_min, cell_size, dims, keys,
+                  np.zeros((int(np.prod(dims)), (object_count + 7) // 8), dtype=np.uint8))
+    cell_mins = pvs.cell_centers() - 0.5 * cell_size
+    cell_ids = np.arange(pvs.cell_count)
+    tasks = [(cell_ids[i:i + cells_per_task], cell_mins[i:i + cells_per_task])
+             for i in range(0, pvs.cell_count, cells_per_task)]
+
+    visibility = np.zeros((pvs.cell_count, object_count), dtype=bool)
+    if processes is not None and processes <= 1:
+        _init_worker(*initargs)
+        for ids, mins in tasks:
+            visibility[ids] = _bake_cells(ids, mins)
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=initargs) as executor:
+            for (ids, _), rows in zip(tasks, executor.map(_bake_cells, *zip(*tasks))):
+                visibility[ids] = rows
+
+    pvs.bits = np.packbits(visibility, axis=1).reshape(pvs.cell_count, -1)
+    return pvs
@@ -236,6 +236,97 @@ class Quaternion:
             cos_half
         )
     
+    @staticmethod
+    def from_rotation_matrix(matrix):
+        """
+        从旋转矩阵创建四元数
+        Args:
+            matrix: 3x3 或 4x4 旋转矩阵 (列向量约定)
+        Returns:
+            Quaternion对象
+        """
+        return Quaternion.from_array(Quaternion.from_rotation_matrices(np.asarray(matrix)[np.newaxis, :3, :3])[0])
+
+    @staticmethod
+    def from_rotation_matrices(matrices):
+        """
+        批量把旋转矩阵转换为四元数 (向量化)
+        Args:
+            matrices: (N, 3, 3) 旋转矩阵数组
+        Returns:
+            (N, 4) 数组，每行 [x, y, z, w]
+        """
+        m = np.asarray(matrices, dtype=np.float64)
+        m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+        trace = m00 + m11 + m22
+        result = np.empty((len(m), 4), dtype=np.float64)
+
+        # 按迹和最大对角元素分四种情况，保证数值稳定
+        case_w = trace > 0
+        case_x = ~case_w & (m00 > m11) & (m00 > m22)
+        case_y = ~case_w & ~case_x & (m11 > m22)
+        case_z = ~case_w & ~case_x & ~case_y
+
+        s = np.sqrt(np.maximum(trace[case_w] + 1.0, 1e-12)) * 2
+        mc = m[case_w]
+        result[case_w] = np.stack([(mc[:, 2, 1] - mc[:, 1, 2]) / s, (mc[:, 0, 2] - mc[:, 2, 0]) / s,
+                                   (mc[:, 1, 0] - mc[:, 0, 1]) / s, 0.25 * s], axis=1)
+
+        s = np.sqrt(np.maximum(1.0 + m00[case_x] - m11[case_x] - m22[case_x], 1e-12)) * 2
+        mc = m[case_x]
+        result[case_x] = np.stack([0.25 * s, (mc[:, 0, 1] + mc[:, 1, 0]) / s,
+                                   (mc[:, 0, 2] + mc[:, 2, 0]) / s, (mc[:, 2, 1] - mc[:, 1, 2]) / s], axis=1)
+
+        s = np.sqrt(np.maximum(1.0 + m11[case_y] - m00[case_y] - m22[case_y], 1e-12)) * 2
+        mc = m[case_y]
+        result[case_y] = np.stack([(mc[:, 0, 1] + mc[:, 1, 0]) / s, 0.25 * s,
+                                   (mc[:, 1, 2] + mc[:, 2, 1]) / s, (mc[:, 0, 2] - mc[:, 2, 0]) / s], axis=1)
+
+        s = np.sqrt(np.maximum(1.0 + m22[case_z] - m00[case_z] - m11[case_z], 1e-12)) * 2
+        mc = m[case_z]
+        result[case_z] = np.stack([(mc[:, 0, 2] + mc[:, 2, 0]) / s, (mc[:, 1, 2] + mc[:, 2, 1]) / s,
+                                   0.25 * s, (mc[:, 1, 0] - mc[:, 0, 1]) / s], axis=1)
+
+        return result / np.linalg.norm(result, axis=1, keepdims=True)
+
+    @staticmethod
+    def look_rotation_batch(forwards, up=None):
+        """
+        批量计算朝向四元数 (与Transform.look_at约定一致：本地-Z轴指向forward)
+        Args:
+            forwards: (N, 3) 朝向向量
+            up: 上方向 (3,) 或每行一个 (N, 3)，默认为Y轴
+        Returns:
+            (N, 4) 数组，每行 [x, y, z, w]
+        """
+        forwards = np.asarray(forwards, dtype=np.float64).reshape(-1, 3)
+        up = np.array([0.0, 1.0, 0.0]) if up is None else np.asarray(up, dtype=np.float64)
+
+        forwards = forwards / np.maximum(np.linalg.norm(forwards, axis=1, keepdims=True), 1e-12)
+        right = np.cross(forwards, up)
+        right_len = np.linalg.norm(right, axis=1, keepdims=True)
+
+        # forward与up平行时换一个参考轴，避免退化
+        parallel = right_len[:, 0] < 1e-6
+        if np.any(parallel):
+            right[parallel] = np.cross(forwards[parallel], np.array([1.0, 0.0, 0.0]))
+            right_len[parallel] = np.linalg.norm(right[parallel], axis=1, keepdims=True)
+        right = right / right_len
+        true_up = np.cross(right, forwards)
+
+        # 旋转矩阵的列: [right, up, -forward]
+        matrices = np.stack([right, true_up, -forwards], axis=2)
+        return Quaternion.from_rotation_matrices(matrices)
+
+    @staticmethod
+    def look_rotation(forward, up=None):
+        """
+        朝向四元数 - 参考Unity Quaternion.LookRotation
+        本地-Z轴指向forward (与Transform.look_at约定一致)
+        """
+        quat = Quaternion.look_rotation_batch([forward], up)[0]
+        return Quaternion.from_array(quat)
+
     @staticmethod
     def identity():
         """单位四元数"""
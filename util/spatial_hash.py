@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+均匀空间哈希网格
+适合每帧都在移动的大量小物体 (人群、鸟群、接近触发器)：
+不做增量维护，每帧用一次向量化的格子编号 + argsort 整体重建，
+查询结果都是索引数组，可直接用于numpy批量计算
+"""
+import numpy as np
+
+
+class SpatialHashGrid(object):
+    def __init__(self, cell_size=1.0):
+        """
+        Args:
+            cell_size: 格子边长，建议取常用查询半径
+        """
+        self.cell_size = float(cell_size)
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.entities = []  # rebuild_from_entities 时保存，索引与positions一致
+
+        self._origin = np.zeros(3, dtype=np.int64)   # 最小格子坐标
+        self._dims = np.ones(3, dtype=np.int64)      # 各轴格子数量
+        self._order = np.zeros(0, dtype=np.intp)     # 按格子编号排序后的物体索引
+        self._cell_keys = np.zeros(0, dtype=np.int64)    # 非空格子的编号 (升序)
+        self._cell_starts = np.zeros(0, dtype=np.intp)   # 每个非空格子在_order中的起点
+        self._cell_counts = np.zeros(0, dtype=np.intp)   # 每个非空格子中的物体数量
+
+    # ============ 构建 ============
+
+    def rebuild(self, positions):
+        """
+        用新的位置数组重建网格
+        Args:
+            positions: (N, 3) 世界坐标
+        """
+        self.positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        if len(self.positions) == 0:
+            self._order = np.zeros(0, dtype=np.intp)
+            self._cell_keys = np.zeros(0, dtype=np.int64)
+            self._cell_starts = np.zeros(0, dtype=np.intp)
+            self._cell_counts = np.zeros(0, dtype=np.intp)
+            return
+
+        cells = np.floor(self.positions / self.cell_size).astype(np.int64)
+        self._origin = cells.min(axis=0)
+        self._dims = cells.max(axis=0) - self._origin + 1
+        keys = self._cell_key(cells)
+
+        self._order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[self._order]
+        starts = np.flatnonzero(np.diff(sorted_keys, prepend=sorted_keys[0] - 1))
+        self._cell_keys = sorted_keys[starts]
+        self._cell_starts = starts
+        self._cell_counts = np.diff(np.append(starts, len(sorted_keys)))
+
+    def rebuild_from_transforms(self, transforms):
+        """用Transform的世界坐标重建网格"""
+        from components.transform import stack_world_matrices
+        self.rebuild(stack_world_matrices(transforms)[:, :3, 3])
+
+    def rebuild_from_entities(self, entities):
+        """
+        用Entity的世界坐标重建网格，查询返回的索引对应self.entities
+        """
+        from components.transform import Transform
+        self.entities = list(entities)
+        self.rebuild_from_transforms([entity.get_component(Transform) for entity in self.entities])
+
+    def _cell_key(self, cells):
+        """格子坐标 -> 线性编号 (相对于origin，不会冲突)"""
+        local = cells - self._origin
+        return (local[..., 0] * self._dims[1] + local[..., 1]) * self._dims[2] + local[..., 2]
+
+    def _lookup_cells(self, cells):
+        """
+        查找格子在非空格子表中的位置
+        Returns:
+            (slots, found) 找不到或超出网格范围的 found 为False
+        """
+        local = cells - self._origin
+        inside = np.all((local >= 0) & (local < self._dims), axis=-1)
+        keys = self._cell_key(cells)
+        slots = np.searchsorted(self._cell_keys, keys)
+        slots = np.minimum(slots, max(len(self._cell_keys) - 1, 0))
+        found = inside & (self._cell_keys[slots] == keys) if len(self._cell_keys) else np.zeros_like(inside)
+        return slots, found
+
+    def _cell_offsets(self, radius):
+        reach = max(int(np.ceil(radius / self.cell_size)), 1)
+        steps = np.arange(-reach, reach + 1)
+        return np.stack(np.meshgrid(steps, steps, steps, indexing='ij'), axis=-1).reshape(-1, 3)
+
+    # ============ 查询 ============
+
+    @property
+    def count(self):
+        return len(self.positions)
+
+    def query_radius(self, center, radius):
+        """
+        查询距离center不超过radius的物体
+        Returns:
+            升序的物体索引数组
+        """
+        if self.count == 0:
+            return np.zeros(0, dtype=np.intp)
+
+        center = np.asarray(center, dtype=np.float32)
+        low = np.floor((center - radius) / self.cell_size).astype(np.int64)
+        high = np.floor((center + radius) / self.cell_size).astype(np.int64)
+        # 只遍历与网格范围相交的格子
+        low = np.maximum(low, self._origin)
+        high = np.minimum(high, self._origin + self._dims - 1)
+        if np.any(high < low):
+            return np.zeros(0, dtype=np.intp)
+
+        axes = [np.arange(low[i], high[i] + 1) for i in range(3)]
+        cells = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        slots, found = self._lookup_cells(cells)
+        candidates = self._gather(slots[found])
+
+        delta = self.positions[candidates] - center
+        hits = candidates[np.einsum('ij,ij->i', delta, delta) <= radius * radius]
+        return np.sort(hits)
+
+    def query_pairs(self, radius):
+        """
+        查询所有距离不超过radius的物体对
+        Returns:
+            (M, 2) 索引数组，每行 i < j
+        """
+        if self.count < 2:
+            return np.zeros((0, 2), dtype=np.intp)
+
+        # 每个物体所在格子 (按排序后的顺序)
+        cell_of_sorted = np.repeat(np.arange(len(self._cell_keys)), self._cell_counts)
+        local = self._unravel(self._cell_keys)
+
+        pairs = []
+        for offset in self._cell_offsets(radius):
+            # 每个非空格子的邻居格子
+            neighbour_slots, found = self._lookup_cells(local + self._origin + offset)
+            if not np.any(found):
+                continue
+
+            # 该偏移下，每个物体需要比较的邻居格子
+            point_found = found[cell_of_sorted]
+            first = self._order[point_found]
+            neighbour = neighbour_slots[cell_of_sorted[point_found]]
+            counts = self._cell_counts[neighbour]
+
+            # 展开为 (物体, 邻居格子中的每个物体) 的候选对
+            first = np.repeat(first, counts)
+            run_starts = np.repeat(self._cell_starts[neighbour], counts)
+            run_offsets = np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts)
+            second = self._order[run_starts + run_offsets]
+
+            # 每个无序对会从两侧各出现一次，只保留 i < j
+            keep = first < second
+            first, second = first[keep], second[keep]
+            delta = self.positions[first] - self.positions[second]
+            close = np.einsum('ij,ij->i', delta, delta) <= radius * radius
+            pairs.append(np.stack([first[close], second[close]], axis=1))
+
+        if not pairs:
+            return np.zeros((0, 2), dtype=np.intp)
+        return np.concatenate(pairs).astype(np.intp)
+
+    def query_neighbors(self, index, radius):
+        """查询某个物体半径内的其它物体索引"""
+        hits = self.query_radius(self.positions[index], radius)
+        return hits[hits != index]
+
+    def _gather(self, slots):
+        """取出若干非空格子中的全部物体索引"""
+        if len(slots) == 0:
+            return np.zeros(0, dtype=np.intp)
+        counts = self._cell_counts[slots]
+        run_starts = np.repeat(self._cell_starts[slots], counts)
+        run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self._order[run_starts + run_offsets]
+
+    def _unravel(self, keys):
+        """线性编号 -> 相对于origin的格子坐标"""
+        z = keys % self._dims[2]
+        y = (keys // self._dims[2]) % self._dims[1]
+        x = keys // (self._dims[2] * self._dims[1])
+        return np.stack([x, y, z], axis=-1)
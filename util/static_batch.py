@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+静态合批 (参考Unity Static Batching)
+把共享同一Material的静态物体的网格预先变换到世界空间，合并为一个顶点/索引缓冲
+- 每个来源物体在合并后的索引缓冲中占一段连续区间 (submesh)，并保留其世界包围盒，
+  剔除仍以物体为单位进行，可见物体的区间相邻时合并为一次提交
+- 来源按包围盒中心的Morton码排序，空间上相邻的物体区间也相邻，部分可见时区间更容易合并
+- 合批后的物体不应再移动；移动或增删静态物体后需要重新构建
+"""
+import numpy as np
+
+from components.mesh import Mesh
+from util.geometry import morton_order, normal_matrices, transform_aabbs
+
+# 单个合批的顶点数上限，超过时拆分为多个合批
+MAX_BATCH_VERTICES = 1 << 20
+
+
+class StaticBatch(object):
+    """一个合批: 世界空间的合并网格与每个来源物体的submesh区间"""
+
+    def __init__(self, mesh, material, entity_ids, index_offsets, index_counts, centers, extents):
+        self.mesh = mesh                    # 合并后的世界空间Mesh
+        self.material = material
+        self.entity_ids = entity_ids        # 每个submesh的来源Entity id
+        self.index_offsets = index_offsets  # (S,) submesh在索引缓冲中的起点 (递增)
+        self.index_counts = index_counts    # (S,) submesh的索引数量
+        self.centers = centers              # (S, 3) submesh的世界包围盒中心
+        self.extents = extents              # (S, 3) submesh的世界包围盒半长
+
+    @property
+    def submesh_count(self):
+        return len(self.entity_ids)
+
+    def draw_ranges(self, submeshes):
+        """
+        把可见的submesh转换为索引区间，相邻的submesh合并为一个区间
+        Args:
+            submeshes: 可见submesh的下标
+        Returns:
+            None表示全部可见 (整体提交)，否则为 (starts, counts) 以索引为单位的起点和数量
+        """
+        visible = np.zeros(self.submesh_count, dtype=bool)
+        visible[np.asarray(submeshes, dtype=np.intp)] = True
+        if visible.all():
+            return None
+        padded = np.concatenate([[False], visible, [False]])
+        changes = np.diff(padded.astype(np.int8))
+        first = np.nonzero(changes == 1)[0]
+        last = np.nonzero(changes == -1)[0] - 1
+        starts = self.index_offsets[first]
+        ends = self.index_offsets[last] + self.index_counts[last]
+        return starts, ends - starts
+
+
+def combine_static_meshes(entity_ids, meshes, materials, world_matrices, max_vertices=MAX_BATCH_VERTICES):
+    """
+    按Material合并静态物体的网格
+    Args:
+        entity_ids: 每个物体的Entity id
+        meshes: 每个物体的局部空间Mesh
+        materials: 每个物体的Material
+        world_matrices: (N, 4, 4) 局部到世界矩阵
+        max_vertices: 单个合批的顶点数上限 (单个网格超过上限时独占一个合批)
+    Returns:
+        StaticBatch列表
+    """
+    world_matrices = np.asarray(world_matrices, dtype=np.float32)
+    if len(meshes) == 0:
+        return []
+    local_centers = np.array([mesh.bounds_center for mesh in meshes], dtype=np.float32)
+    local_extents = np.array([mesh.bounds_extents for mesh in meshes], dtype=np.float32)
+    centers, extents = transform_aabbs(local_centers, local_extents, world_matrices)
+
+    groups = {}
+    for k, material in enumerate(materials):
+        groups.setdefault(material, []).append(k)
+
+    batches = []
+    for material, members in groups.items():
+        members = np.array(members, dtype=np.intp)
+        members = members[morton_order(centers[members])]
+        chunk = []
+        chunk_vertices = 0
+        for k in members:
+            vertex_count = meshes[k].get_vertex_count()
+            if chunk and chunk_vertices + vertex_count > max_vertices:
+                batches.append(_merge(chunk, entity_ids, meshes, material, world_matrices, centers, extents))
+                chunk, chunk_vertices = [], 0
+            chunk.append(k)
+            chunk_vertices += vertex_count
+        if chunk:
+            batches.append(_merge(chunk, entity_ids, meshes, material, world_matrices, centers, extents))
+    return batches
+
+
+def _merge(members, entity_ids, meshes, material, world_matrices, centers, extents):
+    """把一组物体的顶点变换到世界空间并拼接，索引加上各自的顶点基址"""
+    normals = normal_matrices(world_matrices[members])
+    vertex_blocks = []
+    index_blocks = []
+    index_counts = np.zeros(len(members), dtype=np.int64)
+    base_vertex = 0
+    for n, k in enumerate(members):
+        mesh = meshes[k]
+        matrix = world_matrices[k]
+        vertices = np.array(mesh.vertices, dtype=np.float32).reshape(-1, mesh._stride)
+        vertices[:, 0:3] = vertices[:, 0:3] @ matrix[:3, :3].T + matrix[:3, 3]
+        world_normals = vertices[:, 3:6] @ normals[n].T
+        lengths = np.linalg.norm(world_normals, axis=1, keepdims=True)
+        vertices[:, 3:6] = world_normals / np.maximum(lengths, 1e-12)
+
+        _, triangles = mesh.get_triangles()
+        if np.linalg.det(matrix[:3, :3]) < 0.0:
+            # 镜像变换会翻转环绕方向，交换两个顶点保持正面朝外
+            triangles = triangles[:, [0, 2, 1]]
+        vertex_blocks.append(vertices)
+        index_blocks.append(triangles.reshape(-1) + base_vertex)
+        index_counts[n] = triangles.size
+        base_vertex += len(vertices)
+
+    index_offsets = np.concatenate([[0], np.cumsum(index_counts)[:-1]]).astype(np.int64)
+    mesh = Mesh(np.concatenate(vertex_blocks).reshape(-1),
+                np.concatenate(index_blocks).astype(np.uint32))
+    return StaticBatch(mesh, material, [entity_ids[k] for k in members], index_offsets, index_counts,
+                       centers[members], extents[members])
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+三角形BVH - 单个Mesh的精确射线检测加速结构
+- 构建: 自顶向下，按质心分桶的SAH (Surface Area Heuristic) 选择划分
+- 遍历: 多条射线组成射线包一起遍历，叶子中的三角形用向量化的
+  Möller–Trumbore算法一次测试
+所有计算都在Mesh局部空间进行
+"""
+import numpy as np
+
+# 射线方向分量为0时使用的替代值，避免除零
+_EPSILON = 1e-12
+
+
+def _surface_area(bounds_min, bounds_max):
+    d = np.maximum(bounds_max - bounds_min, 0.0)
+    return 2.0 * (d[..., 0] * d[..., 1] + d[..., 1] * d[..., 2] + d[..., 2] * d[..., 0])
+
+
+class TriangleBVH(object):
+    def __init__(self, positions, triangles, leaf_size=16, bin_count=16, sah_threshold=256):
+        """
+        Args:
+            positions: (V, 3) 顶点位置
+            triangles: (T, 3) 三角形顶点索引
+            leaf_size: 叶子最多包含的三角形数量 (超过且SAH认为值得时继续划分)
+            bin_count: SAH分桶数量
+            sah_threshold: 三角形数少于该值的节点直接按中位数划分，减少构建开销
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        triangles = np.asarray(triangles, dtype=np.intp).reshape(-1, 3)
+        self.leaf_size = leaf_size
+        self.bin_count = bin_count
+        self.sah_threshold = sah_threshold
+
+        v0 = positions[triangles[:, 0]]
+        v1 = positions[triangles[:, 1]]
+        v2 = positions[triangles[:, 2]]
+        self._tri_min = np.minimum(np.minimum(v0, v1), v2)
+        self._tri_max = np.maximum(np.maximum(v0, v1), v2)
+        self._centroids = (v0 + v1 + v2) / 3.0
+
+        # 节点数据: 叶子的count > 0，内部节点记录左右子节点
+        self._node_min = []
+        self._node_max = []
+        self._node_start = []
+        self._node_count = []
+        self._node_left = []
+        self._node_right = []
+
+        order = np.arange(len(triangles), dtype=np.intp)
+        if len(triangles) > 0:
+            self._build(order)
+
+        self.node_min = np.array(self._node_min, dtype=np.float64).reshape(-1, 3)
+        self.node_max = np.array(self._node_max, dtype=np.float64).reshape(-1, 3)
+        self.node_start = np.array(self._node_start, dtype=np.intp)
+        self.node_count = np.array(self._node_count, dtype=np.intp)
+        self.node_left = np.array(self._node_left, dtype=np.intp)
+        self.node_right = np.array(self._node_right, dtype=np.intp)
+        del self._node_min, self._node_max, self._node_start, self._node_count, self._node_left, self._node_right
+        del self._tri_min, self._tri_max, self._centroids
+
+        # 按叶子顺序重排后的三角形数据 (Möller–Trumbore只需要v0和两条边)
+        self.triangle_ids = order
+        self.v0 = v0[order]
+        self.edge1 = (v1 - v0)[order]
+        self.edge2 = (v2 - v0)[order]
+
+    @classmethod
+    def from_mesh(cls, mesh, **kwargs):
+        """从Mesh的顶点位置和三角形索引构建"""
+        positions, triangles = mesh.get_triangles()
+        return cls(positions, triangles, **kwargs)
+
+    # ============ 构建 ============
+
+    def _add_node(self, bounds_min, bounds_max):
+        self._node_min.append(bounds_min)
+        self._node_max.append(bounds_max)
+        self._node_start.append(0)
+        self._node_count.append(0)
+        self._node_left.append(-1)
+        self._node_right.append(-1)
+        return len(self._node_min) - 1
+
+    def _build(self, order):
+        """用显式栈自顶向下构建，order被原地重排为叶子顺序"""
+        root = self._add_node(self._tri_min.min(axis=0), self._tri_max.max(axis=0))
+        stack = [(root, 0, len(order))]
+        while stack:
+            node, start, end = stack.pop()
+            count = end - start
+            split = self._find_split(order[start:end]) if count > self.leaf_size else None
+            if split is None:
+                self._node_start[node] = start
+                self._node_count[node] = count
+                continue
+
+            left_ids, right_ids = split
+            order[start:start + len(left_ids)] = left_ids
+            order[start + len(left_ids):end] = right_ids
+            middle = start + len(left_ids)
+
+            left = self._add_node(self._tri_min[left_ids].min(axis=0), self._tri_max[left_ids].max(axis=0))
+            right = self._add_node(self._tri_min[right_ids].min(axis=0), self._tri_max[right_ids].max(axis=0))
+            self._node_left[node] = left
+            self._node_right[node] = right
+            stack.append((left, start, middle))
+            stack.append((right, middle, end))
+
+    def _find_split(self, ids):
+        """
+        选择划分方式
+        Returns:
+            (left_ids, right_ids)，不值得划分时返回None
+        """
+        centroids = self._centroids[ids]
+        c_min = centroids.min(axis=0)
+        c_max = centroids.max(axis=0)
+        axis = int(np.argmax(c_max - c_min))
+        extent = c_max[axis] - c_min[axis]
+        values = centroids[:, axis]
+
+        if extent <= _EPSILON:
+            # 质心重合，只能按数量平分
+            half = len(ids) // 2
+            return ids[:half], ids[half:]
+
+        if len(ids) < self.sah_threshold:
+            half = len(ids) // 2
+            part = np.argpartition(values, half)
+            return ids[part[:half]], ids[part[half:]]
+
+        # 分桶统计每个桶的三角形数量和包围盒
+        bins = self.bin_count
+        bin_ids = np.minimum(((values - c_min[axis]) / extent * bins).astype(np.intp), bins - 1)
+        counts = np.bincount(bin_ids, minlength=bins)
+        bin_min = np.full((bins, 3), np.inf)
+        bin_max = np.full((bins, 3), -np.inf)
+        np.minimum.at(bin_min, bin_ids, self._tri_min[ids])
+        np.maximum.at(bin_max, bin_ids, self._tri_max[ids])
+
+        # 前缀/后缀累积得到每个划分位置两侧的包围盒
+        left_count = np.cumsum(counts)[:-1]
+        right_count = np.cumsum(counts[::-1])[::-1][1:]
+        left_area = _surface_area(np.minimum.accumulate(bin_min)[:-1], np.maximum.accumulate(bin_max)[:-1])
+        right_area = _surface_area(np.minimum.accumulate(bin_min[::-1])[::-1][1:],
+                                   np.maximum.accumulate(bin_max[::-1])[::-1][1:])
+        with np.errstate(invalid='ignore'):
+            costs = np.where((left_count > 0) & (right_count > 0),
+                             left_area * left_count + right_area * right_count, np.inf)
+
+        best = int(np.argmin(costs))
+        parent_area = _surface_area(self._tri_min[ids].min(axis=0), self._tri_max[ids].max(axis=0))
+        # 遍历代价按1个三角形测试计
+        if not np.isfinite(costs[best]) or (1.0 + costs[best] / max(parent_area, _EPSILON) >= len(ids)
+                                            and len(ids) <= self.leaf_size * 4):
+            return None
+
+        mask = bin_ids <= best
+        return ids[mask], ids[~mask]
+
+    # ============ 查询 ============
+
+    @property
+    def node_total(self):
+        return len(self.node_count)
+
+    @property
+    def triangle_count(self):
+        return len(self.triangle_ids)
+
+    def intersect(self, origin, direction, max_distance=np.inf):
+        """
+        单条射线检测
+        Returns:
+            (t, triangle_index, u, v)，未命中返回None。t以direction长度为单位
+        """
+        t, triangles, u, v = self.intersect_rays([origin], [direction], [max_distance])
+        if triangles[0] < 0:
+            return None
+        return float(t[0]), int(triangles[0]), float(u[0]), float(v[0])
+
+    def intersect_rays(self, origins, directions, max_distances=None):
+        """
+        批量射线检测 (射线包遍历)
+        Args:
+            origins: (R, 3) 射线起点
+            directions: (R, 3) 射线方向 (不要求归一化)
+            max_distances: (R,) 最大t值，默认无限
+        Returns:
+            (t, triangle_indices, u, v) 四个 (R,) 数组，未命中的triangle_index为-1
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        ray_count = len(origins)
+
+        best_t = np.full(ray_count, np.inf)
+        if max_distances is not None:
+            best_t[:] = max_distances
+        best_tri = np.full(ray_count, -1, dtype=np.intp)
+        best_u = np.zeros(ray_count)
+        best_v = np.zeros(ray_count)
+        if ray_count == 0 or self.triangle_count == 0:
+            return best_t, best_tri, best_u, best_v
+
+        safe = np.where(np.abs(directions) < _EPSILON, np.where(directions < 0.0, -_EPSILON, _EPSILON), directions)
+        inv_directions = 1.0 / safe
+
+        stack = [(0, np.arange(ray_count))]
+        while stack:
+            node, rays = stack.pop()
+
+            # 射线与节点包围盒的slab测试 (使用最新的最近距离剔除)
+            t0 = (self.node_min[node] - origins[rays]) * inv_directions[rays]
+            t1 = (self.node_max[node] - origins[rays]) * inv_directions[rays]
+            t_near = np.minimum(t0, t1).max(axis=1)
+            t_far = np.maximum(t0, t1).min(axis=1)
+            rays = rays[(t_near <= t_far) & (t_far >= 0.0) & (t_near < best_t[rays])]
+            if len(rays) == 0:
+                continue
+
+            count = self.node_count[node]
+            if count > 0:
+                start = self.node_start[node]
+                self._intersect_leaf(origins, directions, rays, start, start + count,
+                                     best_t, best_tri, best_u, best_v)
+                continue
+
+            # 先访问离射线起点较近的子节点，更早缩短最近距离
+            left, right = self.node_left[node], self.node_right[node]
+            offset = (self.node_min[right] + self.node_max[right]) - (self.node_min[left] + self.node_max[left])
+            if np.dot(directions[rays[0]], offset) > 0.0:
+                stack.append((right, rays))
+                stack.append((left, rays))
+            else:
+                stack.append((left, rays))
+                stack.append((right, rays))
+
+        # 转换回原始三角形编号
+        hit = best_tri >= 0
+        best_tri[hit] = self.triangle_ids[best_tri[hit]]
+        return best_t, best_tri, best_u, best_v
+
+    def _intersect_leaf(self, origins, directions, rays, start, end, best_t, best_tri, best_u, best_v):
+        """Möller–Trumbore: 射线 × 叶子三角形 一次广播计算 (双面)"""
+        o = origins[rays][:, np.newaxis, :]
+        d = directions[rays][:, np.newaxis, :]
+        v0 = self.v0[start:end][np.newaxis]
+        e1 = self.edge1[start:end][np.newaxis]
+        e2 = self.edge2[start:end][np.newaxis]
+
+        p = np.cross(d, e2)
+        det = np.sum(e1 * p, axis=-1)
+        valid = np.abs(det) > _EPSILON
+        inv_det = 1.0 / np.where(valid, det, 1.0)
+
+        s = o - v0
+        u = np.sum(s * p, axis=-1) * inv_det
+        q = np.cross(s, e1)
+        v = np.sum(d * q, axis=-1) * inv_det
+        t = np.sum(e2 * q, axis=-1) * inv_det
+
+        valid &= (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t >= 0.0) & (t < best_t[rays][:, np.newaxis])
+        t = np.where(valid, t, np.inf)
+        nearest = np.argmin(t, axis=1)
+        rows = np.arange(len(rays))
+        nearest_t = t[rows, nearest]
+        closer = nearest_t < best_t[rays]
+
+        hit_rays = rays[closer]
+        best_t[hit_rays] = nearest_t[closer]
+        best_tri[hit_rays] = start + nearest[closer]
+        best_u[hit_rays] = u[rows, nearest][closer]
+        best_v[hit_rays] = v[rows, nearest][closer]